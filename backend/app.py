@@ -3,13 +3,16 @@
 # Flask Backend Server
 # ========================================
 
-from flask import Flask, request, jsonify, session, send_from_directory
+from flask import Flask, Response, request, jsonify, session, send_from_directory
 from flask_cors import CORS
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Import our modules
-from config import SECRET_KEY, SESSION_TYPE, PERMANENT_SESSION_LIFETIME
+from config import (
+    SECRET_KEY, SESSION_TYPE, PERMANENT_SESSION_LIFETIME, MONGO_BULK_CONFIG,
+    SENSOR_INGEST_CONFIG, SENSOR_PARQUET_CONFIG, MONGO_TIMESERIES_CONFIG, METRICS_CONFIG
+)
 from database import db_manager
 from auth import (
     authenticate_user, create_user_session, destroy_user_session,
@@ -18,6 +21,38 @@ from auth import (
     log_query, get_query_logs
 )
 from llm_query import LLMQueryConverter
+from documents import (
+    prepare_sensor_log, prepare_biodiversity, prepare_air_quality,
+    prepare_species, prepare_sensor_metadata
+)
+from streaming import iter_json_documents
+from write_behind import write_behind
+from ingestion import start_ingestion, get_job, list_jobs
+from migrations import run_migrations
+from partitions import climate_partitions
+from sensor_parquet import (
+    sensor_parquet, sensor_readings_table, invalidate_sensor_readings_table, CSV_SENSOR_TABLE
+)
+from sensor_ingest import sensor_segments, parse_reading
+from mongo_timeseries import mongo_timeseries
+from query_router import query_router
+from workload import SAMPLE_QUERIES
+from region_summary import region_summary
+from dimensions import dimensions
+from cdc import change_capture
+from slow_queries import slow_query_log
+import metrics
+import tracing
+import profiling
+import serialization
+from profiling import request_profiler
+from structured_log import get_logger, dropped_records
+from tracing import span
+from rollups import rollups, rollup_collection, written_documents, ROLLUPS, PERIODS
+import threading
+from bson import ObjectId
+
+log = get_logger('app')
 
 # ========================================
 # Flask App Initialization
@@ -27,9 +62,32 @@ app.secret_key = SECRET_KEY
 app.config['SESSION_TYPE'] = SESSION_TYPE
 app.config['PERMANENT_SESSION_LIFETIME'] = PERMANENT_SESSION_LIFETIME
 
+# jsonify() encodes with orjson when available (Decimal / datetime / ObjectId / NumPy)
+serialization.install(app)
+
 # Enable CORS for frontend communication
 CORS(app, supports_credentials=True)
 
+# Per-route latency / status / size metrics (GET /metrics)
+metrics.instrument_flask(app)
+
+# Per-request phases in a Server-Timing header (and optional trace file)
+tracing.instrument_flask(app)
+
+# cProfile + tracemalloc for requested (Admin) or sampled requests
+profiling.instrument_flask(app, request_profiler)
+
+
+# Caches kept current by change data capture
+change_capture.subscribe(dimensions.on_change, tables=['region_info', 'Species_Details'])
+
+
+@app.before_request
+def start_background_workers():
+    """Start the write-behind flusher and CDC listeners in the serving process (no-op once running)"""
+    write_behind.start()
+    change_capture.start()
+
 # ========================================
 # Static File Serving
 # ========================================
@@ -127,6 +185,61 @@ def current_user():
     }), 200
 
 
+# ========================================
+# Metrics Routes
+# ========================================
+def _component_metrics():
+    """Numbers kept by other components, read at scrape time"""
+    coalescing = db_manager.drill.coalescing_stats()
+    pool = query_router.pool_stats()
+    dimension_status = dimensions.status()
+    cdc_status = change_capture.status()
+    write_behind_stats = write_behind.stats()
+    return [
+        ('drill_coalesced_requests_total', 'counter', 'Drill queries served from an identical in-flight query',
+         [({}, coalescing['coalesced'])]),
+        ('drill_round_trips_total', 'counter', 'Queries actually sent to Drill', [({}, coalescing['executed'])]),
+        ('drill_queries_in_flight', 'gauge', 'Distinct Drill queries running', [({}, coalescing['in_flight'])]),
+        ('query_router_queries_total', 'counter', 'Queries by execution path',
+         [({'path': path}, query_router.stats[path]) for path in ('postgres', 'mongo', 'drill')]),
+        ('query_router_fallbacks_total', 'counter', 'Native executions that fell back to Drill',
+         [({}, query_router.stats['fallbacks'])]),
+        ('postgres_pool_connections', 'gauge', 'Query router PostgreSQL pool',
+         [({'state': state}, pool[state]) for state in ('max', 'in_use', 'available')]),
+        ('dimension_cache_events_total', 'counter', 'Dimension cache hits / loads / errors / invalidations',
+         [({'event': event}, dimension_status[event]) for event in ('hits', 'loads', 'load_errors', 'invalidations')]),
+        ('cdc_listener_live', 'gauge', 'Change data capture feed connected (1) or not (0)',
+         [({'source': source}, int(source in cdc_status['live'])) for source in ('postgres', 'mongo')]),
+        ('write_behind_pending_rows', 'gauge', 'Rows acknowledged but not yet written',
+         [({}, write_behind_stats['pending'])]),
+        ('sensor_segment_rows_total', 'counter', 'Sensor readings appended to segments',
+         [({}, sensor_segments.stats['rows'])]),
+        ('sensor_segment_fsyncs_total', 'counter', 'Group fsyncs of sensor segments',
+         [({}, sensor_segments.stats['fsyncs'])]),
+        ('sensor_segments_published_total', 'counter', 'Sensor segments published to Drill',
+         [({}, sensor_segments.stats['segments_published'])]),
+        ('log_records_dropped_total', 'counter', 'Log records dropped because the log queue was full',
+         [({}, dropped_records())])
+    ]
+
+
+metrics.add_collector(_component_metrics)
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint (local scrapers, or a bearer token if METRICS_TOKEN is set)"""
+    if not METRICS_CONFIG['enabled']:
+        return jsonify({'success': False, 'error': 'Metrics are disabled'}), 404
+    token = METRICS_CONFIG['token']
+    if token:
+        if request.headers.get('Authorization', '') != f'Bearer {token}':
+            return jsonify({'success': False, 'error': 'Invalid metrics token'}), 401
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'success': False, 'error': 'Metrics are only served to local scrapers'}), 403
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 # ========================================
 # Database Status Routes
 # ========================================
@@ -146,7 +259,12 @@ def database_status():
         
         return jsonify({
             'success': True,
-            'status': status
+            'status': status,
+            'query_coalescing': db_manager.drill.coalescing_stats(),
+            'query_routing': query_router.stats,
+            'dimension_cache': dimensions.status(),
+            'change_capture': change_capture.status(),
+            'slow_query_log': slow_query_log.status()
         }), 200
     except Exception as e:
         return jsonify({
@@ -178,18 +296,23 @@ def federated_query():
         # Get current user
         user = get_current_user()
         
-        # Execute query through Drill
-        result = db_manager.drill.execute_query(query)
+        # Execute natively when single-source, otherwise through Drill
+        result = query_router.execute(query, role=user['role'])
         
         # Log the query
-        log_query(user['user_id'], query)
+        with span('log-query'):
+            log_query(user['user_id'], query)
+            slow_query_log.record(query, result, user_id=user['user_id'])
         
         if result['success']:
-            return jsonify({
-                'success': True,
-                'data': result['rows'],
-                'columns': result['columns']
-            }), 200
+            with span('serialize'):
+                response = jsonify({
+                    'success': True,
+                    'data': result['rows'],
+                    'columns': result['columns'],
+                    'path': result['path']
+                })
+            return response, 200
         else:
             return jsonify({
                 'success': False,
@@ -211,183 +334,12 @@ def sample_queries():
     Get sample federated queries for users.
     Helps users understand federated query syntax.
     """
-    samples = [
-        {
-            'name': 'All Regions',
-            'description': 'List all environmental regions',
-            'query': 'SELECT * FROM postgres.public.`region_info` LIMIT 10'
-        },
-        {
-            'name': 'Climate Data',
-            'description': 'Recent climate measurements',
-            'query': 'SELECT * FROM postgres.public.`climate_data` LIMIT 10'
-        },
-        {
-            'name': 'Biodiversity Info',
-            'description': 'Species diversity data from MongoDB',
-            'query': 'SELECT * FROM mongo.environmental_db.`Biodiversity_Data` LIMIT 10'
-        },
-        {
-            'name': 'Sensor Readings',
-            'description': 'Real-time sensor data from CSV',
-            'query': 'SELECT * FROM dfs.data.`sensor_readings.csv` LIMIT 10'
-        },
-        {
-            'name': 'Agriculture Data',
-            'description': 'Crop yields by region',
-            'query': 'SELECT * FROM postgres.public.`agriculture_data` LIMIT 10'
-        },
-        {
-            'name': 'Air Quality History',
-            'description': 'Historical air quality from MongoDB',
-            'query': 'SELECT * FROM mongo.environmental_db.`Air_Quality_History` LIMIT 5'
-        },
-        {
-            'name': 'Regions with Climate',
-            'description': 'Join PostgreSQL tables: regions + climate',
-            'query': '''SELECT 
-                r.region_name, 
-                r.latitude,
-                r.longitude,
-                c.temperature, 
-                c.rainfall,
-                c.humidity
-            FROM postgres.public.`climate_data` c
-            JOIN postgres.public.`region_info` r ON c.region_id = r.region_id
-            LIMIT 10'''
-        },
-        {
-            'name': 'Regions with Agriculture',
-            'description': 'Join PostgreSQL: regions + crop yields',
-            'query': '''SELECT 
-                r.region_name,
-                a.crop_type,
-                a.yield,
-                a.season,
-                a.year
-            FROM postgres.public.`agriculture_data` a
-            JOIN postgres.public.`region_info` r ON a.region_id = r.region_id
-            LIMIT 10'''
-        },
-        {
-            'name': 'Climate vs Biodiversity',
-            'description': 'Federated join: PostgreSQL + MongoDB',
-            'query': '''WITH 
-                pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
-                pg_climate AS (SELECT region_id, temperature, humidity FROM postgres.public.`climate_data`),
-                mongo_bio AS (SELECT region_id, species_count, conservation_status FROM mongo.environmental_db.`Biodiversity_Data`)
-            SELECT 
-                r.region_name,
-                c.temperature,
-                c.humidity,
-                b.species_count,
-                b.conservation_status
-            FROM pg_region r
-            JOIN pg_climate c ON r.region_id = c.region_id
-            JOIN mongo_bio b ON r.region_id = b.region_id
-            LIMIT 50'''
-        },
-        {
-            'name': 'Sensors vs Climate',
-            'description': 'Federated join: CSV + PostgreSQL',
-            'query': '''WITH 
-                csv_sensors AS (SELECT CAST(region_id AS INT) as rid, CAST(co2_level AS FLOAT) as co2, CAST(pm2_5 AS FLOAT) as pm FROM dfs.data.`sensor_readings.csv`),
-                pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
-                pg_climate AS (SELECT region_id, temperature, humidity FROM postgres.public.`climate_data`)
-            SELECT 
-                r.region_name,
-                s.co2 as co2_level,
-                s.pm as pm2_5,
-                c.temperature,
-                c.humidity
-            FROM csv_sensors s
-            JOIN pg_region r ON s.rid = r.region_id
-            JOIN pg_climate c ON r.region_id = c.region_id
-            LIMIT 50'''
-        },
-        {
-            'name': 'Complete Environmental View',
-            'description': 'Join PostgreSQL (3 tables) + MongoDB',
-            'query': '''WITH 
-                pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
-                pg_climate AS (SELECT region_id, temperature, rainfall FROM postgres.public.`climate_data`),
-                pg_agri AS (SELECT region_id, crop_type, `yield` as crop_yield FROM postgres.public.`agriculture_data`),
-                mongo_bio AS (SELECT region_id, species_count FROM mongo.environmental_db.`Biodiversity_Data`)
-            SELECT 
-                r.region_name,
-                c.temperature,
-                c.rainfall,
-                a.crop_type,
-                a.crop_yield,
-                b.species_count
-            FROM pg_region r
-            LEFT JOIN pg_climate c ON r.region_id = c.region_id
-            LEFT JOIN pg_agri a ON r.region_id = a.region_id
-            LEFT JOIN mongo_bio b ON r.region_id = b.region_id
-            LIMIT 50'''
-        },
-        {
-            'name': 'High Temp Regions with Species',
-            'description': 'Filter + join: Hot regions with biodiversity',
-            'query': '''WITH 
-                pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
-                pg_climate AS (SELECT region_id, temperature FROM postgres.public.`climate_data`),
-                mongo_bio AS (SELECT region_id, species_count, conservation_status FROM mongo.environmental_db.`Biodiversity_Data`)
-            SELECT 
-                r.region_name,
-                c.temperature,
-                b.species_count,
-                b.conservation_status
-            FROM pg_climate c
-            JOIN pg_region r ON c.region_id = r.region_id
-            JOIN mongo_bio b ON r.region_id = b.region_id
-            WHERE c.temperature > 25
-            LIMIT 50'''
-        },
-        {
-            'name': 'High CO2 Regions Analysis',
-            'description': 'CSV sensors + PostgreSQL regions',
-            'query': '''WITH 
-                csv_sensors AS (SELECT CAST(region_id AS INT) as rid, CAST(co2_level AS FLOAT) as co2, CAST(pm2_5 AS FLOAT) as pm FROM dfs.data.`sensor_readings.csv`),
-                pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`)
-            SELECT 
-                r.region_name,
-                AVG(s.co2) as avg_co2,
-                AVG(s.pm) as avg_pm25,
-                COUNT(*) as reading_count
-            FROM csv_sensors s
-            JOIN pg_region r ON s.rid = r.region_id
-            GROUP BY r.region_name
-            HAVING AVG(s.co2) > 420
-            LIMIT 50'''
-        },
-        {
-            'name': 'Critical Conservation Regions',
-            'description': 'MongoDB + PostgreSQL: endangered species areas',
-            'query': '''SELECT 
-                r.region_name,
-                r.latitude,
-                r.longitude,
-                b.species_count,
-                b.conservation_status
-            FROM mongo.environmental_db.`Biodiversity_Data` b
-            JOIN postgres.public.`region_info` r ON b.region_id = r.region_id
-            WHERE b.conservation_status = 'Critical'
-            LIMIT 50'''
-        },
-        {
-            'name': 'Top Crop Producing Regions',
-            'description': 'Aggregate agriculture data by region',
-            'query': '''SELECT 
-                r.region_name,
-                SUM(a.yield) as total_yield,
-                COUNT(DISTINCT a.crop_type) as crop_diversity
-            FROM postgres.public.`agriculture_data` a
-            JOIN postgres.public.`region_info` r ON a.region_id = r.region_id
-            GROUP BY r.region_name
-            LIMIT 50'''
-        }
-    ]
+    samples = [dict(sample) for sample in SAMPLE_QUERIES]
+    
+    # Point sensor samples at the active source (Parquet, or CSV plus ingested increments)
+    sensor_table = sensor_readings_table()
+    for sample in samples:
+        sample['query'] = sample['query'].replace(CSV_SENSOR_TABLE, sensor_table)
     
     return jsonify({
         'success': True,
@@ -419,42 +371,47 @@ def natural_query():
         use_llm = converter.is_available()
         
         # Convert natural language to SQL
-        result = converter.convert(natural_query, use_llm=use_llm)
+        with span('nl-convert'):
+            result = converter.convert(natural_query, use_llm=use_llm)
         sql_query = result['sql']
         confidence = result['confidence']
         interpretation = result['interpretation']
         method = result.get('method', 'pattern')
         
-        print(f"\n{'='*60}")
-        print(f"Natural Query: {natural_query}")
-        print(f"Generated SQL: {sql_query}")
-        print(f"Method: {method}, Confidence: {confidence}")
-        print(f"{'='*60}\n")
+        log.info('nl.converted', natural_query=natural_query, sql=sql_query,
+                 method=method, confidence=confidence)
         
         # Execute the generated SQL
         user = get_current_user()
-        query_result = db_manager.drill.execute_query(sql_query)
+        query_result = query_router.execute(sql_query, role=user['role'])
         
-        print(f"Query Result Success: {query_result['success']}")
-        print(f"Rows returned: {len(query_result.get('rows', []))}")
-        if not query_result['success']:
-            print(f"Error: {query_result.get('error', 'Unknown')}")
+        if query_result['success']:
+            log.info('nl.executed', path=query_result['path'], rows=len(query_result.get('rows', [])),
+                     elapsed_ms=query_result.get('elapsed_ms'))
+        else:
+            log.warning('nl.execution_failed', path=query_result['path'], sql=sql_query,
+                        error=query_result.get('error', 'Unknown'))
         
         # Log the query
-        log_query(user['user_id'], f"[NL: {natural_query}] {sql_query}")
+        with span('log-query'):
+            log_query(user['user_id'], f"[NL: {natural_query}] {sql_query}")
+            slow_query_log.record(sql_query, query_result, user_id=user['user_id'], from_nl=True)
         
         if query_result['success']:
-            return jsonify({
-                'success': True,
-                'data': query_result['rows'],
-                'columns': query_result['columns'],
-                'generated_sql': sql_query,
-                'confidence': confidence,
-                'interpretation': interpretation,
-                'natural_query': natural_query,
-                'method': method,
-                'llm_available': use_llm
-            }), 200
+            with span('serialize'):
+                response = jsonify({
+                    'success': True,
+                    'data': query_result['rows'],
+                    'columns': query_result['columns'],
+                    'generated_sql': sql_query,
+                    'confidence': confidence,
+                    'interpretation': interpretation,
+                    'natural_query': natural_query,
+                    'method': method,
+                    'llm_available': use_llm,
+                    'path': query_result['path']
+                })
+            return response, 200
         else:
             return jsonify({
                 'success': False,
@@ -492,6 +449,24 @@ def insert_climate():
                     'error': f'Missing required field: {field}'
                 }), 400
         
+        # Make sure this month's partition exists (no-op until next month)
+        climate_partitions.ensure_current()
+        
+        # Write-behind mode: acknowledge once the row is in the durability log
+        queued = write_behind.submit('climate', {
+            'region_id': data['region_id'],
+            'temperature': data['temperature'],
+            'rainfall': data['rainfall'],
+            'humidity': data['humidity'],
+            'timestamp': datetime.utcnow()
+        })
+        if queued:
+            return jsonify({
+                'success': True,
+                'message': 'Climate data accepted',
+                'queued': True
+            }), 202
+        
         query = """
             INSERT INTO climate_data (region_id, temperature, rainfall, humidity)
             VALUES (%s, %s, %s, %s)
@@ -538,6 +513,16 @@ def insert_agriculture():
                     'error': f'Missing required field: {field}'
                 }), 400
         
+        queued = write_behind.submit('agriculture', {
+            field: data[field] for field in required_fields
+        })
+        if queued:
+            return jsonify({
+                'success': True,
+                'message': 'Agriculture data accepted',
+                'queued': True
+            }), 202
+        
         query = """
             INSERT INTO agriculture_data (region_id, crop_type, yield, season, year)
             VALUES (%s, %s, %s, %s, %s)
@@ -571,13 +556,17 @@ def insert_agriculture():
 def insert_sensor_log():
     try:
         data = request.get_json()
-        required_fields = ['sensor_id', 'region_id', 'event_type', 'severity', 'message']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing field: {field}'}), 400
-        data['timestamp'] = datetime.utcnow()
-        result = db_manager.mongo.insert_one('Sensor_Logs', data)
+        try:
+            document = prepare_sensor_log(data, datetime.utcnow())
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        # Pre-assigned _id makes write-behind replays idempotent
+        document['_id'] = ObjectId()
+        if write_behind.submit('sensor_log', document):
+            return jsonify({'success': True, 'message': 'Sensor log accepted', 'id': str(document['_id']), 'queued': True}), 202
+        result = db_manager.mongo.insert_one('Sensor_Logs', document)
         if result:
+            rollups.record('Sensor_Logs', [document])
             return jsonify({'success': True, 'message': 'Sensor log inserted successfully', 'id': str(result)}), 201
         return jsonify({'success': False, 'error': 'Failed to insert sensor log'}), 500
     except Exception as e:
@@ -597,6 +586,7 @@ def insert_region():
         success = db_manager.postgres.execute_update(query, (data['region_name'], data['latitude'], data['longitude']))
         
         if success:
+            dimensions.invalidate('region_info')
             return jsonify({'success': True, 'message': 'Region inserted successfully'}), 201
         return jsonify({'success': False, 'error': 'Failed to insert region'}), 500
     except Exception as e:
@@ -607,16 +597,10 @@ def insert_region():
 def insert_biodiversity():
     try:
         data = request.get_json()
-        # biodiversity_id, region_id, region_name, species_count, endangered_species, dominant_flora, conservation_status
-        data['last_survey_date'] = datetime.utcnow()
-        # Handle arrays
-        if isinstance(data.get('endangered_species'), str):
-            data['endangered_species'] = [s.strip() for s in data['endangered_species'].split(',') if s.strip()]
-        if isinstance(data.get('dominant_flora'), str):
-            data['dominant_flora'] = [s.strip() for s in data['dominant_flora'].split(',') if s.strip()]
-            
-        result = db_manager.mongo.insert_one('Biodiversity_Data', data)
+        document = prepare_biodiversity(data, datetime.utcnow())
+        result = db_manager.mongo.insert_one('Biodiversity_Data', document)
         if result:
+            region_summary.record('Biodiversity_Data', [document])
             return jsonify({'success': True, 'message': 'Biodiversity data inserted successfully'}), 201
         return jsonify({'success': False, 'error': 'Failed to insert biodiversity data'}), 500
     except Exception as e:
@@ -627,21 +611,13 @@ def insert_biodiversity():
 def insert_air_quality():
     try:
         data = request.get_json()
-        # reading_id, region_id, aqi, co2, pm2_5, pm10, no2, so2, o3, air_quality_level
-        data['recorded_at'] = datetime.utcnow()
-        # Restructure pollutants if they are flat in the request
-        pollutants = {
-            'co2': data.pop('co2', None),
-            'pm2_5': data.pop('pm2_5', None),
-            'pm10': data.pop('pm10', None),
-            'no2': data.pop('no2', None),
-            'so2': data.pop('so2', None),
-            'o3': data.pop('o3', None)
-        }
-        data['pollutants'] = pollutants
-        
-        result = db_manager.mongo.insert_one('Air_Quality_History', data)
+        document = prepare_air_quality(data, datetime.utcnow())
+        document['_id'] = ObjectId()
+        if write_behind.submit('air_quality', document):
+            return jsonify({'success': True, 'message': 'Air quality record accepted', 'queued': True}), 202
+        result = db_manager.mongo.insert_one('Air_Quality_History', document)
         if result:
+            rollups.record('Air_Quality_History', [document])
             return jsonify({'success': True, 'message': 'Air quality record inserted successfully'}), 201
         return jsonify({'success': False, 'error': 'Failed to insert air quality record'}), 500
     except Exception as e:
@@ -652,12 +628,10 @@ def insert_air_quality():
 def insert_species():
     try:
         data = request.get_json()
-        # species_id, common_name, scientific_name, habitat_regions, population_estimate, conservation_status, diet, lifespan_years
-        if isinstance(data.get('habitat_regions'), str):
-            data['habitat_regions'] = [int(r.strip()) for r in data['habitat_regions'].split(',') if r.strip()]
-            
-        result = db_manager.mongo.insert_one('Species_Details', data)
+        document = prepare_species(data, datetime.utcnow())
+        result = db_manager.mongo.insert_one('Species_Details', document)
         if result:
+            dimensions.invalidate('Species_Details')
             return jsonify({'success': True, 'message': 'Species detail inserted successfully'}), 201
         return jsonify({'success': False, 'error': 'Failed to insert species detail'}), 500
     except Exception as e:
@@ -668,12 +642,8 @@ def insert_species():
 def insert_sensor_metadata():
     try:
         data = request.get_json()
-        # sensor_id, sensor_type, region_id, region_name, manufacturer, model, status, measurements, accuracy_rating
-        data['installation_date'] = datetime.utcnow()
-        if isinstance(data.get('measurements'), str):
-            data['measurements'] = [m.strip() for m in data['measurements'].split(',') if m.strip()]
-            
-        result = db_manager.mongo.insert_one('Sensor_Metadata', data)
+        document = prepare_sensor_metadata(data, datetime.utcnow())
+        result = db_manager.mongo.insert_one('Sensor_Metadata', document)
         if result:
             return jsonify({'success': True, 'message': 'Sensor metadata inserted successfully'}), 201
         return jsonify({'success': False, 'error': 'Failed to insert sensor metadata'}), 500
@@ -681,6 +651,227 @@ def insert_sensor_metadata():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# ========================================
+# Bulk Insert Routes (MongoDB)
+# ========================================
+# Maps /api/bulk/insert-<kind> to its collection and document preparer
+BULK_COLLECTIONS = {
+    'sensor-log': ('Sensor_Logs', prepare_sensor_log),
+    'biodiversity': ('Biodiversity_Data', prepare_biodiversity),
+    'air-quality': ('Air_Quality_History', prepare_air_quality),
+    'species': ('Species_Details', prepare_species),
+    'sensor-metadata': ('Sensor_Metadata', prepare_sensor_metadata)
+}
+
+
+@app.route('/api/bulk/insert-<kind>', methods=['POST'])
+@role_required('Data Provider', 'Administrator')
+def bulk_insert(kind):
+    """
+    Insert many documents with unordered batched writes.
+    Body: a JSON array of records or NDJSON (one record per line), decoded
+    as a stream. Each record has the same shape as the single-row route.
+    Query args: batch_size, w (write concern), j (journal: true/false)
+    """
+    target = BULK_COLLECTIONS.get(kind)
+    if target is None:
+        return jsonify({'success': False, 'error': f'Unknown bulk collection: {kind}'}), 404
+    collection_name, prepare = target
+    
+    batch_size = request.args.get('batch_size', MONGO_BULK_CONFIG['batch_size'], type=int)
+    write_concern = {}
+    if request.args.get('w'):
+        w = request.args['w']
+        write_concern['w'] = int(w) if w.isdigit() else w
+    if request.args.get('j'):
+        write_concern['j'] = request.args['j'].lower() == 'true'
+    
+    received_at = datetime.utcnow()
+    max_errors = MONGO_BULK_CONFIG['max_reported_errors']
+    report = {'received': 0, 'inserted': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+    batch, batch_indexes = [], []
+    
+    def record_error(index, message):
+        report['failed'] += 1
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'index': index, 'error': message})
+        else:
+            report['errors_truncated'] = True
+    
+    def flush():
+        if not batch:
+            return
+        result = db_manager.mongo.insert_many(
+            collection_name, batch, batch_size=len(batch), write_concern=write_concern
+        )
+        if result is None:
+            for index in batch_indexes:
+                record_error(index, 'MongoDB unavailable')
+        else:
+            report['inserted'] += result['inserted'] + result['unacknowledged']
+            for err in result['errors']:
+                record_error(batch_indexes[err['index']], err['error'])
+            # Errors beyond the database's reporting cap still count as failures
+            unreported = result['failed'] - len(result['errors'])
+            if unreported > 0:
+                report['failed'] += unreported
+                report['errors_truncated'] = True
+            written = written_documents(batch, result)
+            rollups.record(collection_name, written)
+            region_summary.record(collection_name, written)
+            dimensions.invalidate(collection_name)
+        batch.clear()
+        batch_indexes.clear()
+    
+    try:
+        documents = iter_json_documents(
+            request.stream, max_document_size=MONGO_BULK_CONFIG['max_document_bytes']
+        )
+        try:
+            for index, data in enumerate(documents):
+                report['received'] += 1
+                try:
+                    batch.append(prepare(data, received_at, client_timestamps=True))
+                    batch_indexes.append(index)
+                except (ValueError, TypeError) as e:
+                    record_error(index, str(e))
+                if len(batch) >= batch_size:
+                    flush()
+        except ValueError as e:
+            flush()
+            report['success'] = False
+            report['error'] = f'Malformed request body after {report["received"]} records: {e}'
+            return jsonify(report), 400
+        flush()
+        
+        report['success'] = report['failed'] == 0
+        if report['failed'] == 0:
+            status = 201
+        elif report['inserted'] > 0:
+            status = 207
+        else:
+            status = 400
+        return jsonify(report), status
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Bulk insert error: {str(e)}'}), 500
+
+
+# ========================================
+# Sensor Reading Ingestion (append-only CSV segments)
+# ========================================
+def _append_published_segment(path):
+    """
+    Fold a newly published segment into the Parquet dataset when it is the
+    active source. Always queued: a run already in progress may have listed
+    the increments before this segment, and append() waits for it.
+    """
+    def run():
+        try:
+            sensor_parquet.append()
+        except Exception as e:
+            log.error('sensor_parquet.append_failed', error=str(e), segment=path)
+
+    threading.Thread(target=run, name='sensor-parquet-append', daemon=True).start()
+
+# The first published segment turns the CSV source into a UNION with the increments
+sensor_segments.on_publish.append(invalidate_sensor_readings_table)
+if SENSOR_PARQUET_CONFIG['source'] == 'parquet' and sensor_parquet.available():
+    sensor_segments.on_publish.append(_append_published_segment)
+
+
+@app.route('/api/insert-sensor-readings', methods=['POST'])
+@role_required('Data Provider', 'Administrator')
+def insert_sensor_readings():
+    """
+    Append timestamp,region_id,co2_level,pm2_5 readings to the CSV source.
+    Body: one reading object, a JSON array or NDJSON. Valid rows are
+    written durably before the response; invalid rows are reported.
+    Readings become visible to queries over sensor_readings_table() (the
+    CSV unioned with dfs.data.`sensor_increments`) when their segment is
+    published.
+    """
+    max_rows = SENSOR_INGEST_CONFIG['max_rows_per_request']
+    lines, errors = [], []
+    documents = iter_json_documents(request.stream, max_document_size=MONGO_BULK_CONFIG['max_document_bytes'])
+    try:
+        try:
+            for index, data in enumerate(documents):
+                if index >= max_rows:
+                    return jsonify({'success': False, 'error': f'At most {max_rows} readings per request'}), 413
+                try:
+                    lines.append(parse_reading(data))
+                except (ValueError, TypeError) as e:
+                    errors.append({'index': index, 'error': str(e)})
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Malformed request body: {e}'}), 400
+        
+        appended = sensor_segments.append(lines)
+        report = {'success': not errors, 'appended': appended, 'failed': len(errors), 'errors': errors}
+        if not errors:
+            status = 201
+        elif appended:
+            status = 207
+        else:
+            status = 400
+        return jsonify(report), status
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Sensor ingest error: {str(e)}'}), 500
+
+
+# ========================================
+# File Upload Routes (CSV / Excel)
+# ========================================
+@app.route('/api/upload/<dataset>', methods=['POST'])
+@role_required('Data Provider', 'Administrator')
+def upload_dataset(dataset):
+    """
+    Start a background bulk load of a CSV or Excel file.
+    Send multipart/form-data with a `file` field, or the raw file as the
+    request body with ?filename=data.csv. The first row must be a header.
+    Datasets: region, climate, agriculture, biodiversity, air_quality
+    """
+    try:
+        user = get_current_user()
+        if 'file' in request.files:
+            upload = request.files['file']
+            stream, filename = upload.stream, upload.filename
+        else:
+            stream, filename = request.stream, request.args.get('filename', 'upload.csv')
+        
+        try:
+            job = start_ingestion(dataset, stream, filename, user['user_id'])
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'Upload accepted',
+            'job': job.snapshot()
+        }), 202
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Upload error: {str(e)}'}), 500
+
+
+@app.route('/api/upload-jobs', methods=['GET'])
+@role_required('Data Provider', 'Administrator')
+def upload_jobs():
+    """List recent upload jobs (Administrators see everyone's)"""
+    user = get_current_user()
+    user_id = None if user['role'] == 'Administrator' else user['user_id']
+    return jsonify({'success': True, 'jobs': list_jobs(user_id)}), 200
+
+
+@app.route('/api/upload-jobs/<job_id>', methods=['GET'])
+@role_required('Data Provider', 'Administrator')
+def upload_job_status(job_id):
+    """Progress of one upload job"""
+    user = get_current_user()
+    job = get_job(job_id)
+    if job is None or (user['role'] != 'Administrator' and job.user_id != user['user_id']):
+        return jsonify({'success': False, 'error': 'Upload job not found'}), 404
+    return jsonify({'success': True, 'job': job.snapshot()}), 200
+
+
 # ========================================
 # Administrator Routes
 # ========================================
@@ -796,13 +987,124 @@ def query_logs():
         }), 500
 
 
+@app.route('/api/admin/partitions', methods=['GET'])
+@role_required('Administrator')
+def list_climate_partitions():
+    """List climate_data partitions with bounds and sizes (Admin only)"""
+    partitions = climate_partitions.list_partitions()
+    if partitions is None:
+        return jsonify({'success': False, 'error': 'Failed to read partitions'}), 500
+    return jsonify({'success': True, 'partitions': partitions}), 200
+
+
+@app.route('/api/admin/partitions/maintain', methods=['POST'])
+@role_required('Administrator')
+def maintain_climate_partitions():
+    """
+    Create partitions ahead and optionally detach cold ones (Admin only).
+    Optional JSON: {"months_ahead": 3, "detach_older_than_months": 24, "drop": false}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if climate_partitions.is_partitioned() is not True:
+            return jsonify({'success': False, 'error': 'climate_data is not partitioned (run migrations)'}), 400
+        
+        created = climate_partitions.ensure_ahead(data.get('months_ahead'))
+        detached = []
+        if data.get('detach_older_than_months'):
+            detached = climate_partitions.detach_cold(
+                int(data['detach_older_than_months']), drop=bool(data.get('drop', False))
+            )
+        return jsonify({'success': True, 'created': created, 'detached': detached}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/admin/timeseries', methods=['GET'])
+@role_required('Administrator')
+def timeseries_status():
+    """Type, options and storage of the MongoDB time-series collections (Admin only)"""
+    try:
+        return jsonify({
+            'success': True,
+            'collections': mongo_timeseries.status(),
+            'migrations': mongo_timeseries.migrations
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/admin/timeseries/<collection>/migrate', methods=['POST'])
+@role_required('Administrator')
+def migrate_timeseries(collection):
+    """
+    Convert a regular collection into a time-series collection in the background (Admin only).
+    Optional JSON: {"drop_legacy": false}
+    """
+    if collection not in mongo_timeseries.specs:
+        return jsonify({'success': False, 'error': f'Unknown time-series collection: {collection}'}), 404
+    if mongo_timeseries.migrations.get(collection, {}).get('state') == 'running':
+        return jsonify({'success': False, 'error': f'{collection} is already being migrated'}), 409
+    try:
+        if mongo_timeseries.collection_type(collection, refresh=True) == 'timeseries':
+            return jsonify({'success': False, 'error': f'{collection} is already a time-series collection'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    drop_legacy = bool((request.get_json(silent=True) or {}).get('drop_legacy', False))
+    
+    def run():
+        try:
+            mongo_timeseries.migrate(collection, drop_legacy=drop_legacy)
+        except Exception as e:
+            log.error('timeseries.migration_failed', collection=collection, error=str(e))
+    
+    threading.Thread(target=run, name=f'timeseries-migrate-{collection}', daemon=True).start()
+    return jsonify({'success': True, 'message': f'Migration of {collection} started'}), 202
+
+
+@app.route('/api/admin/sensor-parquet', methods=['GET'])
+@role_required('Administrator')
+def sensor_parquet_status():
+    """State of the sensor readings Parquet pipeline (Admin only)"""
+    return jsonify({
+        'success': True,
+        'available': sensor_parquet.available(),
+        'active_table': sensor_readings_table(),
+        'status': sensor_parquet.status,
+        'segments': sensor_segments.stats
+    }), 200
+
+
+@app.route('/api/admin/sensor-parquet/<operation>', methods=['POST'])
+@role_required('Administrator')
+def run_sensor_parquet(operation):
+    """Start a Parquet compaction ('compact') or increment conversion ('append') in the background"""
+    if operation not in ('compact', 'append'):
+        return jsonify({'success': False, 'error': 'Operation must be compact or append'}), 400
+    if not sensor_parquet.available():
+        return jsonify({'success': False, 'error': 'pyarrow is not installed'}), 400
+    if sensor_parquet.status['state'] != 'idle':
+        return jsonify({'success': False, 'error': f"Pipeline busy ({sensor_parquet.status['state']})"}), 409
+    
+    def run():
+        try:
+            getattr(sensor_parquet, operation)()
+        except Exception as e:
+            log.error('sensor_parquet.run_failed', operation=operation, error=str(e))
+    
+    threading.Thread(target=run, name=f'sensor-parquet-{operation}', daemon=True).start()
+    return jsonify({'success': True, 'message': f'{operation} started'}), 202
+
+
 @app.route('/api/regions', methods=['GET'])
 @login_required
 def get_regions():
-    """Get all regions (for dropdown menus)"""
+    """Get all regions (for dropdown menus), served from the dimension cache"""
     try:
-        query = "SELECT region_id, region_name FROM region_info ORDER BY region_name"
-        regions = db_manager.postgres.execute_query(query)
+        regions = dimensions.regions()
+        if regions is None:
+            return jsonify({'success': False, 'error': 'Failed to load regions'}), 500
         
         return jsonify({
             'success': True,
@@ -815,6 +1117,159 @@ def get_regions():
         }), 500
 
 
+# ========================================
+# Region Summary Routes
+# ========================================
+@app.route('/api/region-summary', methods=['GET'])
+@login_required
+def get_region_summary():
+    """
+    Per-region headline numbers from the materialized region_summary.
+    If a source's watermark is dirty a background refresh is started and
+    the current (possibly stale) rows are returned with stale: true.
+    """
+    summary = region_summary.get()
+    if summary is None:
+        return jsonify({'success': False, 'error': 'Region summary unavailable (run migrations)'}), 500
+    if summary['stale']:
+        summary['refresh_started'] = region_summary.refresh_in_background()
+    return jsonify(dict(summary, success=True)), 200
+
+
+@app.route('/api/admin/region-summary/refresh', methods=['POST'])
+@role_required('Administrator')
+def refresh_region_summary():
+    """Recompute region_summary from all sources (Admin only)"""
+    if region_summary.refresh():
+        return jsonify({'success': True, 'message': 'Region summary refreshed'}), 200
+    return jsonify({'success': False, 'error': 'Region summary refresh failed'}), 500
+
+
+# ========================================
+# Rollup Routes (hourly / daily aggregates)
+# ========================================
+def _parse_time_arg(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+@app.route('/api/rollups/<kind>', methods=['GET'])
+@login_required
+def get_rollups(kind):
+    """
+    Read pre-aggregated buckets for air-quality or sensor-logs.
+    Query args: period (hour/day, default day), region_id, start, end (ISO-8601), limit
+    """
+    kind = kind.replace('-', '_')
+    period = request.args.get('period', 'day')
+    if kind not in ROLLUPS:
+        return jsonify({'success': False, 'error': f'Unknown rollup: {kind}'}), 404
+    if period not in PERIODS:
+        return jsonify({'success': False, 'error': 'period must be hour or day'}), 400
+    try:
+        start, end = _parse_time_arg('start'), _parse_time_arg('end')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid time: {e}'}), 400
+    
+    buckets = rollups.query(
+        kind, period,
+        region_id=request.args.get('region_id', type=int),
+        start=start, end=end,
+        limit=min(request.args.get('limit', 1000, type=int), 10000)
+    )
+    if buckets is None:
+        return jsonify({'success': False, 'error': 'Failed to read rollups'}), 500
+    dimensions.enrich(buckets)
+    return jsonify({
+        'success': True,
+        'collection': rollup_collection(kind, period),
+        'buckets': buckets,
+        'count': len(buckets)
+    }), 200
+
+
+@app.route('/api/admin/rollups/rebuild', methods=['POST'])
+@role_required('Administrator')
+def rebuild_rollups():
+    """
+    Recompute rollups from raw history (Admin only).
+    Optional JSON: {"kind": "air_quality", "days": 7} (default: all kinds, all history)
+    """
+    data = request.get_json(silent=True) or {}
+    kinds = [data['kind']] if data.get('kind') else list(ROLLUPS)
+    if any(kind not in ROLLUPS for kind in kinds):
+        return jsonify({'success': False, 'error': f"Unknown rollup: {data['kind']}"}), 404
+    since = datetime.utcnow() - timedelta(days=int(data['days'])) if data.get('days') else None
+    try:
+        return jsonify({'success': True, 'buckets': {kind: rollups.rebuild(kind, since) for kind in kinds}}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+@role_required('Administrator')
+def list_slow_queries():
+    """
+    Slowest logged queries with Drill phase times and hottest operators (Admin only).
+    Optional query string: limit=20, hours=24, nl=true|false, path=drill|postgres|mongo
+    """
+    try:
+        nl = request.args.get('nl')
+        entries = slow_query_log.slowest(
+            limit=min(int(request.args.get('limit', 20)), 500),
+            since_hours=float(request.args['hours']) if request.args.get('hours') else None,
+            from_nl=nl.lower() == 'true' if nl else None,
+            path=request.args.get('path') or None
+        )
+        if entries is None:
+            return jsonify({'success': False, 'error': 'Failed to read the slow-query log (run migrations)'}), 500
+        return jsonify({
+            'success': True,
+            'threshold_ms': slow_query_log.config['threshold_ms'],
+            'queries': entries
+        }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@role_required('Administrator')
+def list_profiles():
+    """Recent request profiles, newest first, and the sampling rate (Admin only)"""
+    return jsonify({
+        'success': True,
+        'enabled': request_profiler.config['enabled'],
+        'sample_rate': request_profiler.sample_rate,
+        'stats': request_profiler.stats,
+        'profiles': request_profiler.list()
+    }), 200
+
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+@role_required('Administrator')
+def get_profile(profile_id):
+    """Top functions and allocation sites of one profiled request (Admin only)"""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    return jsonify({'success': True, 'profile': profile}), 200
+
+
+@app.route('/api/admin/profiles/sampling', methods=['POST'])
+@role_required('Administrator')
+def set_profile_sampling():
+    """
+    Profile a fraction of all API requests (Admin only).
+    Expects JSON: {"sample_rate": 0.01}  (0 turns sampling off)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        request_profiler.set_sample_rate(float(data.get('sample_rate', 0)))
+        return jsonify({'success': True, 'sample_rate': request_profiler.sample_rate}), 200
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
 # ========================================
 # Error Handlers
 # ========================================
@@ -850,6 +1305,18 @@ if __name__ == '__main__':
     print(f"MongoDB: {'✓ Connected' if status['mongo'] else '✗ Failed'}")
     print(f"Apache Drill: {'✓ Connected' if status['drill'] else '✗ Failed'}")
     
+    if status['postgres']:
+        applied = run_migrations()
+        if applied:
+            print(f"Schema migrations applied: {applied}")
+        climate_partitions.ensure_current()
+    
+    if status['mongo'] and MONGO_TIMESERIES_CONFIG['auto_provision']:
+        try:
+            print(f"Time-series collections: {mongo_timeseries.provision()}")
+        except Exception as e:
+            print(f"Time-Series Provision Error: {e}")
+    
     print("\n" + "=" * 50)
     print("Starting Flask server...")
     print("Access the application at: http://localhost:5000")
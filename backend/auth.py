@@ -7,6 +7,10 @@ import bcrypt
 from functools import wraps
 from flask import session, jsonify
 from database import db_manager
+from tracing import span
+from structured_log import get_logger
+
+log = get_logger('auth')
 
 # ========================================
 # Password Hashing Utilities
@@ -64,7 +68,7 @@ def authenticate_user(email, password):
         
         # If results is None, the DB call failed (e.g., connection issues)
         if results is None:
-            print("Authentication Error: PostgreSQL unavailable")
+            log.error('auth.login_failed', error='PostgreSQL unavailable')
             # Return a sentinel to indicate DB error to caller
             return {'_db_error': True}
 
@@ -85,7 +89,7 @@ def authenticate_user(email, password):
         
         return None
     except Exception as e:
-        print(f"Authentication Error: {e}")
+        log.error('auth.login_failed', error=str(e))
         return None
 
 
@@ -135,7 +139,9 @@ def login_required(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'logged_in' not in session or not session['logged_in']:
+        with span('auth'):
+            logged_in = 'logged_in' in session and session['logged_in']
+        if not logged_in:
             return jsonify({
                 'success': False,
                 'error': 'Authentication required',
@@ -158,14 +164,16 @@ def role_required(*allowed_roles):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if 'logged_in' not in session or not session['logged_in']:
+            with span('auth'):
+                logged_in = 'logged_in' in session and session['logged_in']
+                user_role = session.get('role')
+            if not logged_in:
                 return jsonify({
                     'success': False,
                     'error': 'Authentication required',
                     'redirect': '/login.html'
                 }), 401
             
-            user_role = session.get('role')
             if user_role not in allowed_roles:
                 return jsonify({
                     'success': False,
@@ -232,7 +240,7 @@ def create_new_user(name, email, password, role):
             (name, email, password_hash, role)
         )
     except Exception as e:
-        print(f"Create User Error: {e}")
+        log.error('auth.create_user_failed', error=str(e))
         return False
 
 
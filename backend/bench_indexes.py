@@ -0,0 +1,97 @@
+# ========================================
+# Index Benchmark for Pushed-Down Joins
+# Runs the PostgreSQL-only queries from sample_federated_queries.sql
+# (in the native form Drill's JDBC plugin pushes down) with
+# EXPLAIN ANALYZE, first without and then with migration 1's indexes.
+#
+# Usage (drops and recreates indexes, do not run against production):
+#   python bench_indexes.py --yes [--runs 5] [--json report.json]
+# ========================================
+
+import argparse
+import json
+import statistics
+from migrations import MigrationRunner
+from workload import load_sql_file, to_postgres_sql
+
+INDEX_MIGRATION = 1
+
+
+def _plan_nodes(plan, found=None):
+    """Collect 'Node Type on relation' strings from an EXPLAIN JSON plan"""
+    found = found if found is not None else []
+    label = plan['Node Type']
+    if 'Relation Name' in plan:
+        label += f" on {plan['Relation Name']}"
+    if 'Index Name' in plan:
+        label += f" using {plan['Index Name']}"
+    found.append(label)
+    for child in plan.get('Plans', []):
+        _plan_nodes(child, found)
+    return found
+
+
+def measure(connection, queries, runs):
+    """Median execution time (ms) and scan nodes for each query"""
+    results = {}
+    with connection.cursor() as cursor:
+        for q in queries:
+            timings = []
+            plan = None
+            for _ in range(runs):
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + q['sql'])
+                explain = cursor.fetchone()[0][0]
+                timings.append(explain['Execution Time'])
+                plan = explain['Plan']
+            scans = [n for n in _plan_nodes(plan) if 'Scan' in n]
+            results[q['name']] = {'median_ms': round(statistics.median(timings), 3), 'scans': scans}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pushed-down joins before/after index migration')
+    parser.add_argument('--yes', action='store_true', help='confirm dropping/recreating indexes')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args()
+    if not args.yes:
+        parser.error('this benchmark drops and recreates indexes; pass --yes to continue')
+
+    queries = []
+    for q in load_sql_file():
+        sql = to_postgres_sql(q['query'], tables=None)  # query_log too, for its indexes
+        if sql:
+            queries.append({'name': q['name'], 'sql': sql})
+
+    runner = MigrationRunner()
+    try:
+        if INDEX_MIGRATION in runner.applied_versions():
+            runner.revert(INDEX_MIGRATION)
+        connection = runner.postgres.connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        before = measure(connection, queries, args.runs)
+
+        runner.migrate(INDEX_MIGRATION)
+        connection.autocommit = True
+        after = measure(connection, queries, args.runs)
+    finally:
+        runner.close()
+
+    print(f"{'Query':<48} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    report = []
+    for q in queries:
+        b, a = before[q['name']], after[q['name']]
+        speedup = b['median_ms'] / a['median_ms'] if a['median_ms'] else float('inf')
+        print(f"{q['name'][:48]:<48} {b['median_ms']:>10.3f} {a['median_ms']:>10.3f} {speedup:>7.1f}x")
+        report.append({'name': q['name'], 'sql': q['sql'], 'before': b, 'after': a, 'speedup': round(speedup, 2)})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
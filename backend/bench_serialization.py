@@ -0,0 +1,154 @@
+# ========================================
+# JSON Serialization Microbenchmark
+# Encodes large result sets the way API responses carry them
+# ({'success', 'rows', 'columns', ...}) with
+#   flask    Flask's default provider, after the per-document str(_id)
+#            loop MongoDB.find / aggregate used to run (the previous path)
+#   stdlib   serialization.py on the standard library encoder
+#   orjson   serialization.py on orjson (if installed)
+# and reports time, rows/s and MB/s per result shape:
+#   postgres  RealDictCursor rows: int, Decimal, datetime, str
+#   mongo     documents: ObjectId, datetime, nested dict, list
+#   numpy     NumPy scalars / arrays (if NumPy is installed)
+#
+# Rows come from datagen.py, so runs are comparable.
+#
+# Usage:
+#   python bench_serialization.py [--rows 100000] [--runs 5] [--json report.json]
+# ========================================
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+from decimal import Decimal
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import serialization
+from datagen import SyntheticData
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _rows(data, dataset, count):
+    rows = []
+    for chunk in range(data.chunks(dataset)):
+        rows.extend(data.rows(dataset, chunk))
+        if len(rows) >= count:
+            break
+    return rows[:count]
+
+
+def build_results(rows):
+    """Response payloads of `rows` rows for each result shape"""
+    data = SyntheticData(scale=rows / 20000, seed=1)  # 20000 climate / air quality rows at scale 1
+    climate = _rows(data, 'climate_data', rows)
+    postgres_rows = [
+        {'climate_id': i + 1, 'region_id': region_id, 'temperature': Decimal(str(temperature)),
+         'rainfall': Decimal(str(rainfall)), 'humidity': Decimal(str(humidity)),
+         'timestamp': datetime.fromisoformat(timestamp)}
+        for i, (region_id, temperature, rainfall, humidity, timestamp) in enumerate(climate)
+    ]
+    mongo_rows = [dict(document, _id=ObjectId()) for document in _rows(data, 'air_quality', rows)]
+    results = {
+        'postgres': {'success': True, 'rows': postgres_rows, 'columns': list(postgres_rows[0]), 'path': 'postgres'},
+        'mongo': {'success': True, 'rows': mongo_rows, 'columns': list(mongo_rows[0]), 'path': 'mongo'}
+    }
+    if numpy is not None:
+        values = numpy.random.default_rng(1).normal(20, 5, size=(rows, 3))
+        results['numpy'] = {
+            'success': True,
+            'rows': [{'region_id': numpy.int64(i % 50 + 1), 'readings': values[i]} for i in range(rows)],
+            'columns': ['region_id', 'readings']
+        }
+    return results
+
+
+def encoders():
+    app = Flask(__name__)
+    flask_provider = DefaultJSONProvider(app)
+    flask_provider.compact = True
+
+    def flask_encode(value):
+        for row in value['rows']:
+            if '_id' in row:
+                row['_id'] = str(row['_id'])
+        return flask_provider.dumps(value).encode('utf-8')
+
+    # The module picks its encoder at import; build both explicitly
+    found = {}
+    stdlib = json.JSONEncoder(default=serialization._default, ensure_ascii=False, separators=(',', ':'))
+    found['stdlib'] = lambda value: stdlib.encode(value).encode('utf-8')
+    if serialization.orjson is not None:
+        orjson = serialization.orjson
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        found['orjson'] = lambda value: orjson.dumps(value, default=serialization._default, option=options)
+    # Last: its _id loop rewrites the rows in place
+    found['flask'] = flask_encode
+    return found
+
+
+def measure(encode, payload, runs):
+    """Median seconds and output size of encoding `payload`"""
+    timings = []
+    size = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = encode(payload)
+        timings.append(time.perf_counter() - started)
+        size = len(output)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API response JSON encoding')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args()
+
+    results = build_results(args.rows)
+    report = {'rows': args.rows, 'runs': args.runs, 'results': {}}
+    print(f"{'shape':<9} {'encoder':<7} {'ms':>9} {'rows/s':>12} {'MB/s':>8} {'MB':>7} {'speedup':>8}")
+    for shape, payload in results.items():
+        timings = {}
+        for name, encode in encoders().items():
+            try:
+                timings[name] = measure(encode, payload, args.runs)
+            except TypeError as e:  # Flask's provider cannot encode NumPy values
+                timings[name] = e
+        baseline = timings.get('flask')
+        report['results'][shape] = {}
+        for name in ('flask', 'stdlib', 'orjson'):
+            if name not in timings:
+                continue
+            if isinstance(timings[name], Exception):
+                print(f"{shape:<9} {name:<7} unsupported: {timings[name]}")
+                report['results'][shape][name] = {'error': str(timings[name])}
+                continue
+            seconds, size = timings[name]
+            entry = {
+                'ms': round(seconds * 1000, 1),
+                'rows_per_second': round(args.rows / seconds),
+                'mb_per_second': round(size / seconds / 1e6, 1),
+                'bytes': size,
+                'speedup': round(baseline[0] / seconds, 2) if isinstance(baseline, tuple) else None
+            }
+            report['results'][shape][name] = entry
+            speedup = f"{entry['speedup']:>7.2f}x" if entry['speedup'] else f"{'-':>8}"
+            print(f"{shape:<9} {name:<7} {entry['ms']:>9.1f} {entry['rows_per_second']:>12,} "
+                  f"{entry['mb_per_second']:>8.1f} {size / 1e6:>7.1f} {speedup}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
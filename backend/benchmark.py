@@ -0,0 +1,217 @@
+# ========================================
+# Workload Benchmark
+# Replays the sample workload (config/sample_federated_queries.sql and
+# the UI sample queries) through each execution path and reports
+# per-query latency percentiles, rows and result bytes:
+#   drill   DrillDB.execute_query (every query through Drill)
+#   router  QueryRouter.execute (native PostgreSQL / MongoDB when the
+#           query is single-source, otherwise Drill)
+#
+# Reports are JSON. With --baseline, each query / path is compared with
+# a saved report and flagged when p50 or p95 regressed by more than
+# --tolerance (and --min-delta-ms), or the row count changed; the exit
+# status is 1 if anything regressed.
+#
+# Runs against whatever config.py points at (local containers, or the
+# stand-ins from the test kit).
+#
+# Usage:
+#   python benchmark.py --runs 10 --json report.json
+#   python benchmark.py --baseline baseline.json --json report.json
+#   python benchmark.py --paths router --filter "Query 3" --runs 20
+# ========================================
+
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+from datetime import datetime
+from database import db_manager
+from query_router import query_router
+from sensor_parquet import sensor_readings_table, CSV_SENSOR_TABLE
+from workload import SAMPLE_QUERIES, load_sql_file
+
+
+def _run_drill(sql):
+    result = db_manager.drill.execute_query(sql)
+    result['path'] = 'drill'
+    return result
+
+
+# Execution paths: name -> callable(sql) returning a DrillDB-shaped result
+PATHS = {
+    'drill': _run_drill,
+    'router': query_router.execute
+}
+
+
+def workload_queries(name_filter=None):
+    """
+    The benchmark workload: the SQL file's queries, then the UI samples.
+
+    Returns:
+        list: [{'name': str, 'query': str}]
+    """
+    queries = [{'name': q['name'], 'query': q['query']} for q in load_sql_file()]
+    sensor_table = sensor_readings_table()
+    for sample in SAMPLE_QUERIES:
+        queries.append({
+            'name': f"Sample: {sample['name']}",
+            'query': sample['query'].replace(CSV_SENSOR_TABLE, sensor_table)
+        })
+    if name_filter:
+        queries = [q for q in queries if name_filter.lower() in q['name'].lower()]
+    return queries
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def measure(run, sql, runs, warmup):
+    """
+    Execute `sql` warmup + runs times and summarize the timed runs.
+
+    Returns:
+        dict: p50_ms, p95_ms, min_ms, max_ms, rows, bytes, engine, errors
+    """
+    for _ in range(warmup):
+        run(sql)
+    timings = []
+    errors = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = run(sql)
+        elapsed = (time.perf_counter() - started) * 1000
+        if result.get('success'):
+            timings.append(elapsed)
+        else:
+            errors.append(result.get('error', 'failed'))
+    summary = {
+        'runs': runs,
+        'errors': len(errors),
+        'engine': result.get('path') if result else None
+    }
+    if errors:
+        summary['error'] = errors[-1]
+    if timings:
+        rows = result.get('rows', []) if result.get('success') else []
+        summary.update({
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'min_ms': round(min(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'rows': len(rows),
+            'bytes': len(json.dumps(rows, default=str).encode('utf-8'))
+        })
+    return summary
+
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """
+    Flag regressions against a baseline report.
+
+    Returns:
+        list: [{'query', 'path', 'metric', 'baseline', 'current', 'change'}]
+    """
+    regressions = []
+    for name, paths in report['results'].items():
+        for path, current in paths.items():
+            previous = baseline.get('results', {}).get(name, {}).get(path)
+            if not previous:
+                continue
+            if previous.get('p50_ms') is not None and current.get('p50_ms') is None:
+                regressions.append({'query': name, 'path': path, 'metric': 'success',
+                                    'baseline': 'ok', 'current': current.get('error'), 'change': None})
+                continue
+            for metric in ('p50_ms', 'p95_ms'):
+                before, after = previous.get(metric), current.get(metric)
+                if before is None or after is None:
+                    continue
+                if after > before * (1 + tolerance) and after - before >= min_delta_ms:
+                    regressions.append({'query': name, 'path': path, 'metric': metric, 'baseline': before,
+                                        'current': after, 'change': f'{(after / before - 1) * 100:+.0f}%' if before else None})
+            if previous.get('rows') is not None and current.get('rows') is not None \
+                    and previous['rows'] != current['rows']:
+                regressions.append({'query': name, 'path': path, 'metric': 'rows',
+                                    'baseline': previous['rows'], 'current': current['rows'], 'change': None})
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sample workload through each execution path')
+    parser.add_argument('--runs', type=int, default=5, help='timed runs per query and path')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs first')
+    parser.add_argument('--paths', default=','.join(PATHS), help=f"comma-separated subset of {', '.join(PATHS)}")
+    parser.add_argument('--filter', help='only queries whose name contains this text')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='compare with this earlier report')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown (0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='ignore slowdowns smaller than this')
+    args = parser.parse_args()
+
+    paths = [path.strip() for path in args.paths.split(',') if path.strip()]
+    unknown = [path for path in paths if path not in PATHS]
+    if unknown:
+        parser.error(f"unknown path(s): {', '.join(unknown)}")
+    queries = workload_queries(args.filter)
+    if not queries:
+        parser.error('no queries matched')
+
+    report = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'commit': _git_commit(),
+        'runs': args.runs,
+        'warmup': args.warmup,
+        'paths': paths,
+        'results': {}
+    }
+    print(f"{'Query':<48} {'path':<7} {'engine':<8} {'p50 ms':>9} {'p95 ms':>9} {'rows':>6} {'bytes':>9}")
+    for q in queries:
+        report['results'][q['name']] = {}
+        for path in paths:
+            summary = measure(PATHS[path], q['query'], args.runs, args.warmup)
+            report['results'][q['name']][path] = summary
+            if 'p50_ms' in summary:
+                print(f"{q['name'][:48]:<48} {path:<7} {summary['engine'] or '-':<8} {summary['p50_ms']:>9.1f} "
+                      f"{summary['p95_ms']:>9.1f} {summary['rows']:>6} {summary['bytes']:>9}")
+            else:
+                print(f"{q['name'][:48]:<48} {path:<7} {'-':<8} {'failed: ' + str(summary.get('error'))[:60]}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        report['baseline'] = {'file': args.baseline, 'commit': baseline.get('commit'), 'regressions': regressions}
+        if regressions:
+            exit_code = 1
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for r in regressions:
+                change = f" ({r['change']})" if r['change'] else ''
+                print(f"  {r['query'][:48]:<48} {r['path']:<7} {r['metric']:<7} {r['baseline']} -> {r['current']}{change}")
+        else:
+            print(f"\nNo regressions against {args.baseline}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+# ========================================
+# Change Data Capture
+# Turns writes from any client (the app, psql, mongosh, ETL jobs) into
+# table-level change events on an in-process bus:
+#   PostgreSQL  LISTEN on the 'table_changes' channel (triggers: migration 4)
+#   MongoDB     a database-level change stream on environmental_db
+#               (needs a replica set; a single-node one is enough)
+#
+# Events are dicts: {'source': 'postgres' | 'mongo', 'table': str,
+# 'operation': 'INSERT' | 'UPDATE' | 'DELETE' | 'TRUNCATE' | ..., 'at': datetime}.
+# Control events have table None:
+#   LISTENING  the listener (re)connected; changes may have been missed
+#              while it was down, so subscribers should resync
+#   STOPPED    the listener is down; fall back to short TTLs
+# ========================================
+
+import json
+import select
+import threading
+import time
+from datetime import datetime
+import psycopg2
+from pymongo.errors import OperationFailure, PyMongoError
+from config import POSTGRES_CONFIG, CDC_CONFIG
+from database import db_manager
+from structured_log import get_logger
+
+log = get_logger('cdc')
+
+# Channel used by notify_table_change() in migration 4
+CHANNEL = 'table_changes'
+
+_MONGO_OPERATIONS = {
+    'insert': 'INSERT', 'update': 'UPDATE', 'replace': 'UPDATE', 'delete': 'DELETE',
+    'drop': 'TRUNCATE', 'rename': 'TRUNCATE'
+}
+
+
+class ChangeBus:
+    """
+    Fan-out of change events to subscribers.
+    Callbacks run on the listener threads, so they should be quick
+    (e.g. mark a cache entry stale) and must not block.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.live = set()   # sources whose listener is currently connected
+        self.stats = {}     # 'source.table' -> events published
+
+    def subscribe(self, callback, tables=None):
+        """
+        Register callback(event).
+
+        Args:
+            callback (callable): Called with each event
+            tables (iterable): Only these tables / collections (control events
+                               are always delivered); None for all
+        """
+        with self._lock:
+            self._subscribers.append((callback, set(tables) if tables else None))
+
+    def publish(self, source, table, operation):
+        event = {'source': source, 'table': table, 'operation': operation, 'at': datetime.utcnow()}
+        if operation == 'LISTENING':
+            self.live.add(source)
+        elif operation == 'STOPPED':
+            self.live.discard(source)
+        else:
+            key = f'{source}.{table}'
+            self.stats[key] = self.stats.get(key, 0) + 1
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, tables in subscribers:
+            if table is not None and tables is not None and table not in tables:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                log.error('cdc.subscriber_failed', error=str(e))
+
+
+class PostgresChangeListener:
+    """LISTENs on a dedicated autocommit connection and republishes NOTIFY payloads"""
+
+    def __init__(self, bus, config=CDC_CONFIG):
+        self.bus = bus
+        self.config = config
+        self._stop = threading.Event()
+
+    def run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(
+                    host=POSTGRES_CONFIG['host'],
+                    port=POSTGRES_CONFIG['port'],
+                    database=POSTGRES_CONFIG['database'],
+                    user=POSTGRES_CONFIG['user'],
+                    password=POSTGRES_CONFIG['password']
+                )
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                self.bus.publish('postgres', None, 'LISTENING')
+                self._listen(conn)
+            except Exception as e:
+                log.error('cdc.listener_failed', source='postgres', error=str(e))
+            finally:
+                if conn is not None:
+                    conn.close()
+            if 'postgres' in self.bus.live:
+                self.bus.publish('postgres', None, 'STOPPED')
+            self._stop.wait(self.config['reconnect_seconds'])
+
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            # Wake up periodically to notice stop(); a dead socket raises from poll()
+            if select.select([conn], [], [], 5.0) == ([], [], []):
+                continue
+            conn.poll()
+            changes = []
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    payload = json.loads(notify.payload)
+                    change = (payload['table'], payload['operation'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if change not in changes:
+                    changes.append(change)
+            for table, operation in changes:
+                self.bus.publish('postgres', table, operation)
+
+    def stop(self):
+        self._stop.set()
+
+
+class MongoChangeListener:
+    """
+    Watches the whole database and republishes one event per collection and
+    operation for each burst of changes (a bulk insert of 10,000 documents
+    is one event, not 10,000).
+    """
+
+    def __init__(self, bus, config=CDC_CONFIG):
+        self.bus = bus
+        self.config = config
+        self._stop = threading.Event()
+        self._resume_token = None
+        self.unsupported = None   # error message if the server cannot stream changes
+
+    def run(self):
+        pipeline = [
+            {'$match': {'operationType': {'$in': list(_MONGO_OPERATIONS)}}},
+            {'$project': {'ns': 1, 'operationType': 1}}
+        ]
+        while not self._stop.is_set():
+            try:
+                mongo = db_manager.mongo
+                if mongo.db is None and not mongo.connect():
+                    raise ConnectionError('MongoDB unavailable')
+                with mongo.db.watch(pipeline, resume_after=self._resume_token,
+                                    max_await_time_ms=self.config['mongo_batch_window_ms']) as stream:
+                    self.bus.publish('mongo', None, 'LISTENING')
+                    self._listen(stream)
+            except OperationFailure as e:
+                if e.code in (40573, 40324):  # not a replica set / change streams unsupported
+                    self.unsupported = str(e)
+                    log.warning('cdc.change_streams_unavailable', error=str(e))
+                    return
+                if e.code == 286:  # resume token no longer in the oplog
+                    self._resume_token = None
+                log.error('cdc.listener_failed', source='mongo', error=str(e))
+            except (PyMongoError, ConnectionError) as e:
+                log.error('cdc.listener_failed', source='mongo', error=str(e))
+            if 'mongo' in self.bus.live:
+                self.bus.publish('mongo', None, 'STOPPED')
+            self._stop.wait(self.config['reconnect_seconds'])
+
+    def _listen(self, stream):
+        window = self.config['mongo_batch_window_ms'] / 1000.0
+        changes = []
+        burst_started = None
+        while not self._stop.is_set() and stream.alive:
+            change = stream.try_next()  # waits up to max_await_time_ms
+            if change is not None:
+                self._resume_token = stream.resume_token
+                entry = (change.get('ns', {}).get('coll'), _MONGO_OPERATIONS[change['operationType']])
+                if entry[0] and entry not in changes:
+                    changes.append(entry)
+                if burst_started is None:
+                    burst_started = time.monotonic()
+            # Publish once the burst is over (or has lasted a full window)
+            if changes and (change is None or time.monotonic() - burst_started >= window):
+                for collection, operation in changes:
+                    self.bus.publish('mongo', collection, operation)
+                changes = []
+                burst_started = None
+        if not stream.alive:
+            self._resume_token = None  # invalidated (e.g. database dropped): start afresh
+
+    def stop(self):
+        self._stop.set()
+
+
+class ChangeDataCapture:
+    """Owns the bus and runs one listener thread per source"""
+
+    def __init__(self, config=CDC_CONFIG):
+        self.config = config
+        self.bus = ChangeBus()
+        self.listeners = {
+            'postgres': PostgresChangeListener(self.bus, config),
+            'mongo': MongoChangeListener(self.bus, config)
+        }
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the enabled listeners (no-op once running)"""
+        if not self.config['enabled'] or self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for source, listener in self.listeners.items():
+                if not self.config[f'{source}_enabled']:
+                    continue
+                thread = threading.Thread(target=listener.run, name=f'cdc-{source}', daemon=True)
+                thread.start()
+                self._threads[source] = thread
+
+    def stop(self):
+        for listener in self.listeners.values():
+            listener.stop()
+
+    def subscribe(self, callback, tables=None):
+        """Shortcut for bus.subscribe()"""
+        self.bus.subscribe(callback, tables)
+
+    def status(self):
+        return {
+            'enabled': self.config['enabled'],
+            'live': sorted(self.bus.live),
+            'running': sorted(source for source, thread in self._threads.items() if thread.is_alive()),
+            'mongo_unsupported': self.listeners['mongo'].unsupported,
+            'events': dict(self.bus.stats)
+        }
+
+
+# Global change data capture instance
+change_capture = ChangeDataCapture()
+
+
+if __name__ == '__main__':
+    # Print events as they arrive (useful to check the triggers / replica set)
+    change_capture.subscribe(lambda event: print(event))
+    change_capture.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        change_capture.stop()
@@ -29,12 +29,158 @@ MONGODB_CONFIG = {
     'uri': os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 }
 
+# MongoDB Bulk Write Configuration
+# Used by MongoDB.insert_many / bulk_write and the /api/bulk/* routes
+_mongo_bulk_w = os.getenv('MONGO_BULK_W', '1')
+MONGO_BULK_CONFIG = {
+    'batch_size': int(os.getenv('MONGO_BULK_BATCH_SIZE', 1000)),
+    'write_concern': {
+        'w': int(_mongo_bulk_w) if _mongo_bulk_w.isdigit() else _mongo_bulk_w,
+        'j': os.getenv('MONGO_BULK_JOURNAL', 'false').lower() == 'true'
+    },
+    'max_reported_errors': int(os.getenv('MONGO_BULK_MAX_ERRORS', 100)),
+    'max_document_bytes': int(os.getenv('MONGO_BULK_MAX_DOCUMENT_BYTES', 16 * 1024 * 1024))
+}
+
+# Write-Behind Configuration
+# When enabled, single-row insert routes acknowledge after appending to a
+# local durability log; a background thread group-commits the rows.
+WRITE_BEHIND_CONFIG = {
+    'enabled': os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() == 'true',
+    'log_dir': os.getenv('WRITE_BEHIND_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'write_behind')),
+    'max_batch_rows': int(os.getenv('WRITE_BEHIND_MAX_BATCH', 1000)),
+    'max_latency_ms': int(os.getenv('WRITE_BEHIND_MAX_LATENCY_MS', 250)),
+    'fsync': os.getenv('WRITE_BEHIND_FSYNC', 'true').lower() == 'true',
+    'retry_interval_s': float(os.getenv('WRITE_BEHIND_RETRY_S', 5)),
+    'compact_bytes': int(os.getenv('WRITE_BEHIND_COMPACT_BYTES', 64 * 1024 * 1024))
+}
+
+# File Upload Ingestion Configuration (/api/upload/<dataset>)
+INGESTION_CONFIG = {
+    'upload_dir': os.getenv('UPLOAD_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'uploads')),
+    'chunk_rows': int(os.getenv('UPLOAD_CHUNK_ROWS', 5000)),
+    'max_concurrent_jobs': int(os.getenv('UPLOAD_MAX_JOBS', 2)),
+    'max_reported_errors': int(os.getenv('UPLOAD_MAX_ERRORS', 100)),
+    'jobs_retained': 100
+}
+
+# Schema Migrations (see migrations.py)
+# Off by default: migration 2 (partitioning climate_data) cannot be reverted,
+# so run `python migrations.py migrate` deliberately.
+MIGRATIONS_CONFIG = {
+    'auto_migrate': os.getenv('AUTO_MIGRATE', 'false').lower() == 'true'
+}
+
+# Climate_Data Partitioning (see partitions.py)
+PARTITION_CONFIG = {
+    'months_ahead': int(os.getenv('CLIMATE_PARTITION_MONTHS_AHEAD', 3)),
+    'retention_months': int(os.getenv('CLIMATE_PARTITION_RETENTION_MONTHS', 0)),  # 0 = keep all
+    'drop_detached': os.getenv('CLIMATE_PARTITION_DROP_DETACHED', 'false').lower() == 'true',
+    'archive_schema': os.getenv('CLIMATE_PARTITION_ARCHIVE_SCHEMA', 'climate_archive')
+}
+
 # Apache Drill Configuration
 DRILL_CONFIG = {
     'host': os.getenv('DRILL_HOST', 'localhost'),
     'port': int(os.getenv('DRILL_PORT', 8047))
 }
 
+# Single-source query routing (backend/query_router.py): PostgreSQL-only and
+# simple MongoDB-only queries run natively instead of through Drill
+QUERY_ROUTER_CONFIG = {
+    'enabled': os.getenv('QUERY_ROUTER_ENABLED', 'true').lower() == 'true',
+    'postgres_pool_size': int(os.getenv('QUERY_ROUTER_PG_POOL', 4)),
+    'statement_timeout_ms': int(os.getenv('QUERY_ROUTER_TIMEOUT_MS', 30000)),
+    'mongo_batch_size': int(os.getenv('QUERY_ROUTER_MONGO_BATCH', 1000)),
+    'fallback_to_drill': True
+}
+
+# In-memory cache of region_info and Species_Details (dimensions.py).
+# Writes through the app invalidate it at once; max_age_seconds bounds
+# how long changes made outside the app take to show up.
+DIMENSION_CACHE_CONFIG = {
+    'enabled': os.getenv('DIMENSION_CACHE_ENABLED', 'true').lower() == 'true',
+    'max_age_seconds': int(os.getenv('DIMENSION_CACHE_MAX_AGE', 300)),
+    # Used instead while change data capture is live for the table's source
+    'max_age_with_cdc_seconds': int(os.getenv('DIMENSION_CACHE_MAX_AGE_CDC', 3600))
+}
+
+# Change data capture (cdc.py): PostgreSQL LISTEN/NOTIFY (migration 4) and
+# MongoDB change streams (replica set required) feed cache invalidation.
+CDC_CONFIG = {
+    'enabled': os.getenv('CDC_ENABLED', 'true').lower() == 'true',
+    'postgres_enabled': os.getenv('CDC_POSTGRES_ENABLED', 'true').lower() == 'true',
+    'mongo_enabled': os.getenv('CDC_MONGO_ENABLED', 'true').lower() == 'true',
+    'mongo_batch_window_ms': int(os.getenv('CDC_MONGO_BATCH_WINDOW_MS', 200)),
+    'reconnect_seconds': int(os.getenv('CDC_RECONNECT_SECONDS', 5))
+}
+
+# GET /metrics (Prometheus text format). Without a token only local
+# scrapers (127.0.0.1 / ::1) are allowed; with one, send
+# "Authorization: Bearer <token>".
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+    'token': os.getenv('METRICS_TOKEN')
+}
+
+# Slow-query log (slow_queries.py, table from migration 5). Drill profiles
+# are fetched from http://<drill>/profiles/<query_id>.json.
+SLOW_QUERY_CONFIG = {
+    'enabled': os.getenv('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true',
+    'threshold_ms': float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 2000)),
+    'fetch_profiles': os.getenv('SLOW_QUERY_FETCH_PROFILES', 'true').lower() == 'true',
+    'top_operators': int(os.getenv('SLOW_QUERY_TOP_OPERATORS', 5)),
+    'queue_size': 1000
+}
+
+# Per-request phase tracing (tracing.py): Server-Timing response header
+# and, if TRACE_FILE is set, one JSON line per request at least
+# TRACE_MIN_MS long. The header reveals backend timings, so it is opt-in:
+# TRACING_SERVER_TIMING=off (default), admin (Administrator sessions) or all.
+TRACING_CONFIG = {
+    'enabled': os.getenv('TRACING_ENABLED', 'true').lower() == 'true',
+    'server_timing': os.getenv('TRACING_SERVER_TIMING', 'off').lower(),
+    'trace_file': os.getenv('TRACE_FILE') or None,
+    'trace_min_ms': float(os.getenv('TRACE_MIN_MS', 0))
+}
+
+# On-demand request profiling (profiling.py): Administrators add
+# "X-Profile: 1" or "?profile=1"; PROFILE_SAMPLE_RATE profiles a
+# fraction of all API requests. PROFILE_DIR keeps .prof files for snakeviz.
+PROFILING_CONFIG = {
+    'enabled': os.getenv('PROFILING_ENABLED', 'true').lower() == 'true',
+    'sample_rate': float(os.getenv('PROFILE_SAMPLE_RATE', 0)),
+    'directory': os.getenv('PROFILE_DIR') or None,
+    'keep': int(os.getenv('PROFILE_KEEP', 50)),
+    'top_functions': 30,
+    'top_allocations': 20,
+    'tracemalloc_frames': 1,
+    # Always listed when called: LLM post-processing, ObjectId conversion
+    # in MongoDB.find, JSON serialization, query routing
+    'focus': ['_convert_with_llm', '_generate_interpretation', 'find', 'aggregate', '_run_mongo',
+              '_run_postgres', '_execute', 'execute', 'jsonify', 'dumps', 'log_query']
+}
+
+# Structured logging (structured_log.py). LOG_SAMPLE_RATES keeps a fraction
+# of chatty info events, e.g. "drill.query=0.1,postgres.query=0.01".
+LOGGING_CONFIG = {
+    'level': os.getenv('LOG_LEVEL', 'INFO').upper(),
+    'format': os.getenv('LOG_FORMAT', 'json').lower(),  # 'json' or 'text'
+    'file': os.getenv('LOG_FILE') or None,
+    'max_field_chars': int(os.getenv('LOG_MAX_FIELD_CHARS', 500)),
+    'queue_size': int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+    'sample_rates': {
+        event.strip(): float(rate)
+        for event, rate in (item.split('=', 1) for item in os.getenv('LOG_SAMPLE_RATES', '').split(',') if '=' in item)
+    }
+}
+
+# API response encoding (serialization.py): 'orjson' (C encoder, used when
+# installed) or 'stdlib'
+SERIALIZATION_CONFIG = {
+    'backend': os.getenv('JSON_SERIALIZER', 'orjson').lower()
+}
+
 # Flask Configuration
 SECRET_KEY = 'your-secret-key-change-this-in-production'  # CHANGE THIS in production
 SESSION_TYPE = 'filesystem'
@@ -46,3 +192,35 @@ GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 
 # CSV Data Path
 CSV_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sensor_readings.csv')
+
+# Sensor Readings Parquet Pipeline (see sensor_parquet.py)
+# Both directories must sit inside Drill's dfs.data workspace
+SENSOR_PARQUET_CONFIG = {
+    'source': os.getenv('SENSOR_READINGS_SOURCE', 'csv'),  # 'csv' or 'parquet'
+    'output_dir': os.getenv('SENSOR_PARQUET_DIR', os.path.join(os.path.dirname(CSV_DATA_PATH), 'sensor_readings_parquet')),
+    'increments_dir': os.getenv('SENSOR_INCREMENTS_DIR', os.path.join(os.path.dirname(CSV_DATA_PATH), 'sensor_increments')),
+    'row_group_rows': int(os.getenv('SENSOR_PARQUET_ROW_GROUP_ROWS', 131072)),
+    'read_block_bytes': 8 * 1024 * 1024,
+    'compression': 'snappy'
+}
+
+# MongoDB time-series collections (backend/mongo_timeseries.py).
+# expire_days 0 keeps data forever; otherwise MongoDB drops whole buckets past the TTL.
+MONGO_TIMESERIES_CONFIG = {
+    'auto_provision': os.getenv('MONGO_TIMESERIES_AUTO_PROVISION', 'true').lower() == 'true',
+    'sensor_logs_granularity': os.getenv('SENSOR_LOGS_GRANULARITY', 'minutes'),
+    'sensor_logs_expire_days': int(os.getenv('SENSOR_LOGS_EXPIRE_DAYS', 0)),
+    'air_quality_granularity': os.getenv('AIR_QUALITY_GRANULARITY', 'hours'),
+    'air_quality_expire_days': int(os.getenv('AIR_QUALITY_EXPIRE_DAYS', 0)),
+    'copy_batch_size': 5000
+}
+
+# Append-only sensor reading ingestion (/api/insert-sensor-readings).
+# Segments rotate at max_segment_bytes or max_segment_seconds, whichever comes first.
+SENSOR_INGEST_CONFIG = {
+    'max_segment_bytes': int(os.getenv('SENSOR_SEGMENT_MAX_BYTES', 16 * 1024 * 1024)),
+    'max_segment_seconds': int(os.getenv('SENSOR_SEGMENT_MAX_SECONDS', 300)),
+    'fsync_interval_ms': int(os.getenv('SENSOR_SEGMENT_FSYNC_MS', 50)),
+    'append_timeout_s': float(os.getenv('SENSOR_APPEND_TIMEOUT_S', 30)),
+    'max_rows_per_request': int(os.getenv('SENSOR_INGEST_MAX_ROWS', 50000))
+}
@@ -4,11 +4,47 @@
 # ========================================
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from pymongo import MongoClient
+import psycopg2.extensions
+from psycopg2.extras import execute_values
+from pymongo import MongoClient, InsertOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
 import requests
 import json
-from config import POSTGRES_CONFIG, MONGODB_CONFIG, DRILL_CONFIG
+import io
+import csv
+import re
+import threading
+import uuid
+from concurrent.futures import Future
+from mongo_sql import compile_query, UnsupportedQuery
+from metrics import timed, BACKEND_BYTES
+from tracing import span
+from structured_log import get_logger
+from config import POSTGRES_CONFIG, MONGODB_CONFIG, MONGO_BULK_CONFIG, DRILL_CONFIG
+
+log = get_logger('database')
+
+# NUMERIC decoded straight to float (no Decimal objects); registered per cursor
+NUMERIC_AS_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values, 'NUMERIC_AS_FLOAT',
+    lambda value, cursor: float(value) if value is not None else None
+)
+
+
+def _convert_rows(columns, rows, converters):
+    """Apply {column: callable} to the named columns of tuple rows (None stays None)"""
+    if not converters:
+        return rows
+    plan = [(index, converters[name]) for index, name in enumerate(columns) if name in converters]
+    converted = []
+    for row in rows:
+        row = list(row)
+        for index, convert in plan:
+            if row[index] is not None:
+                row[index] = convert(row[index])
+        converted.append(tuple(row))
+    return converted
 
 # ========================================
 # PostgreSQL Connection
@@ -23,19 +59,22 @@ class PostgresDB:
         self.config = POSTGRES_CONFIG
         self.connection = None
     
+    def _open_connection(self):
+        return psycopg2.connect(
+            host=self.config['host'],
+            port=self.config['port'],
+            database=self.config['database'],
+            user=self.config['user'],
+            password=self.config['password']
+        )
+    
     def connect(self):
         """Establish connection to PostgreSQL"""
         try:
-            self.connection = psycopg2.connect(
-                host=self.config['host'],
-                port=self.config['port'],
-                database=self.config['database'],
-                user=self.config['user'],
-                password=self.config['password']
-            )
+            self.connection = self._open_connection()
             return True
         except Exception as e:
-            print(f"PostgreSQL Connection Error: {e}")
+            log.error('postgres.connect_failed', error=str(e))
             return False
     
     def disconnect(self):
@@ -44,6 +83,7 @@ class PostgresDB:
             self.connection.close()
             self.connection = None
     
+    @timed('postgres', 'execute_query')
     def execute_query(self, query, params=None):
         """
         Execute a SELECT query and return results as list of dictionaries.
@@ -59,20 +99,112 @@ class PostgresDB:
             if not self.connection or self.connection.closed:
                 connected = self.connect()
                 if not connected:
-                    print("PostgreSQL Query Error: could not establish connection (check POSTGRES_PASSWORD and DB server).")
+                    log.error('postgres.query_failed', error='could not establish connection (check POSTGRES_PASSWORD and DB server)')
                     return None
             
-            cursor = self.connection.cursor(cursor_factory=RealDictCursor)
+            cursor = self.connection.cursor()
             cursor.execute(query, params)
+            columns = [column.name for column in cursor.description]
             results = cursor.fetchall()
             cursor.close()
             
-            # Convert to list of dictionaries
-            return [dict(row) for row in results]
+            # One dict per row, built from the tuples
+            return [dict(zip(columns, row)) for row in results]
         except Exception as e:
-            print(f"PostgreSQL Query Error: {e}")
+            log.error('postgres.query_failed', error=str(e), query=query)
             return None
     
+    def _lean_cursor(self, numeric_as_float):
+        if not self.connection or self.connection.closed:
+            if not self.connect():
+                raise ConnectionError('could not establish connection (check POSTGRES_PASSWORD and DB server)')
+        cursor = self.connection.cursor()
+        if numeric_as_float:
+            psycopg2.extensions.register_type(NUMERIC_AS_FLOAT, cursor)
+        return cursor
+    
+    @timed('postgres', 'execute_rows')
+    def execute_rows(self, query, params=None, converters=None, numeric_as_float=False):
+        """
+        Execute a SELECT query and return column names once plus tuple rows.
+        Cheaper than execute_query (no dict per row) for internal consumers.
+        
+        Args:
+            query (str): SQL query to execute
+            params (tuple): Query parameters for safe execution
+            converters (dict): {column: callable} applied to non-NULL values
+            numeric_as_float (bool): Decode NUMERIC as float instead of Decimal
+            
+        Returns:
+            dict: {'columns': [str], 'rows': [tuple]}, or None on error
+        """
+        try:
+            cursor = self._lean_cursor(numeric_as_float)
+            cursor.execute(query, params)
+            columns = [column.name for column in cursor.description]
+            rows = cursor.fetchall()
+            cursor.close()
+            return {'columns': columns, 'rows': _convert_rows(columns, rows, converters)}
+        except Exception as e:
+            log.error('postgres.query_failed', error=str(e), query=query)
+            return None
+    
+    def execute_columns(self, query, params=None, converters=None, numeric_as_float=False):
+        """
+        Execute a SELECT query and return one list per column.
+        
+        Returns:
+            dict: {column: [values]} in SELECT order, or None on error
+        """
+        result = self.execute_rows(query, params, converters, numeric_as_float)
+        if result is None:
+            return None
+        arrays = zip(*result['rows']) if result['rows'] else [()] * len(result['columns'])
+        return {column: list(values) for column, values in zip(result['columns'], arrays)}
+    
+    @timed('postgres', 'iter_rows')
+    def iter_rows(self, query, params=None, batch_size=10000, converters=None, numeric_as_float=False):
+        """
+        Stream a large SELECT through a server-side (named) cursor,
+        fetchmany(batch_size) at a time, so only one batch is in memory.
+        The scan runs on its own connection, closed when the scan ends or
+        is abandoned, so it never holds or commits self.connection.
+        
+        Args:
+            query (str): SQL query to execute
+            params (tuple): Query parameters for safe execution
+            batch_size (int): Rows per round trip
+            converters (dict): {column: callable} applied to non-NULL values
+            numeric_as_float (bool): Decode NUMERIC as float instead of Decimal
+            
+        Yields:
+            tuple: (columns, rows) per batch; columns is the same list every time
+            
+        Raises:
+            psycopg2.Error: If the scan cannot connect or run
+        """
+        connection = self._open_connection()
+        try:
+            connection.readonly = True
+            cursor = connection.cursor(name=f'scan_{uuid.uuid4().hex[:12]}')
+            if numeric_as_float:
+                psycopg2.extensions.register_type(NUMERIC_AS_FLOAT, cursor)
+            cursor.itersize = batch_size
+            cursor.execute(query, params)
+            columns = None
+            while True:
+                with span('postgres-fetchmany'):
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if columns is None:
+                    # Named cursors only describe the result after the first fetch
+                    columns = [column.name for column in cursor.description]
+                yield columns, _convert_rows(columns, rows, converters)
+        finally:
+            connection.close()  # also ends the transaction and the server-side cursor
+    
+    @timed('postgres', 'execute_update')
     def execute_update(self, query, params=None):
         """
         Execute INSERT, UPDATE, or DELETE query.
@@ -88,7 +220,7 @@ class PostgresDB:
             if not self.connection or self.connection.closed:
                 connected = self.connect()
                 if not connected:
-                    print("PostgreSQL Update Error: could not establish connection (check POSTGRES_PASSWORD and DB server).")
+                    log.error('postgres.update_failed', error='could not establish connection (check POSTGRES_PASSWORD and DB server)')
                     return False
             
             cursor = self.connection.cursor()
@@ -99,7 +231,81 @@ class PostgresDB:
         except Exception as e:
             if self.connection:
                 self.connection.rollback()
-            print(f"PostgreSQL Update Error: {e}")
+            log.error('postgres.update_failed', error=str(e), query=query)
+            return False
+    
+    @timed('postgres', 'execute_values')
+    def execute_values(self, query, rows, page_size=1000, then=None):
+        """
+        Execute a multi-row INSERT in one transaction.
+        
+        Args:
+            query (str): SQL with a single VALUES %s placeholder,
+                         e.g. "INSERT INTO t (a, b) VALUES %s"
+            rows (list): List of parameter tuples
+            page_size (int): Rows sent per statement
+            then (tuple): Optional (query, params) run in the same transaction
+                          after the insert (e.g. bookkeeping)
+            
+        Returns:
+            bool: True if all rows were written, False otherwise (nothing is written)
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                connected = self.connect()
+                if not connected:
+                    log.error('postgres.batch_failed', error='could not establish connection (check POSTGRES_PASSWORD and DB server)')
+                    return False
+            
+            cursor = self.connection.cursor()
+            execute_values(cursor, query, rows, page_size=page_size)
+            if then:
+                cursor.execute(*then)
+            self.connection.commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            if self.connection:
+                self.connection.rollback()
+            log.error('postgres.batch_failed', error=str(e), query=query)
+            return False
+    
+    @timed('postgres', 'copy_rows')
+    def copy_rows(self, table, columns, rows):
+        """
+        Bulk load rows with COPY ... FROM STDIN (CSV) in one transaction.
+        
+        Args:
+            table (str): Target table
+            columns (list): Column names, in the order of each row
+            rows (iterable): Row tuples; None is loaded as NULL
+            
+        Returns:
+            bool: True if all rows were loaded, False otherwise (nothing is loaded)
+        """
+        try:
+            if not self.connection or self.connection.closed:
+                connected = self.connect()
+                if not connected:
+                    log.error('postgres.copy_failed', error='could not establish connection (check POSTGRES_PASSWORD and DB server)')
+                    return False
+            
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            
+            cursor = self.connection.cursor()
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            self.connection.commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            if self.connection:
+                self.connection.rollback()
+            log.error('postgres.copy_failed', error=str(e), table=table)
             return False
     
     def test_connection(self):
@@ -135,7 +341,7 @@ class MongoDB:
             self.client.server_info()
             return True
         except Exception as e:
-            print(f"MongoDB Connection Error: {e}")
+            log.error('mongo.connect_failed', error=str(e))
             return False
     
     def disconnect(self):
@@ -145,7 +351,8 @@ class MongoDB:
             self.client = None
             self.db = None
     
-    def find(self, collection_name, query={}, projection=None, limit=0):
+    @timed('mongo', 'find')
+    def find(self, collection_name, query={}, projection=None, limit=0, sort=None, skip=0, batch_size=None):
         """
         Find documents in a collection.
         
@@ -154,6 +361,9 @@ class MongoDB:
             query (dict): MongoDB query filter
             projection (dict): Fields to include/exclude
             limit (int): Maximum number of documents to return
+            sort (list): (field, direction) pairs, e.g. [('recorded_at', -1)]
+            skip (int): Number of matching documents to skip
+            batch_size (int): Documents per server round trip
             
         Returns:
             list: List of documents
@@ -165,21 +375,72 @@ class MongoDB:
             collection = self.db[collection_name]
             cursor = collection.find(query, projection)
             
+            if sort:
+                cursor = cursor.sort(sort)
+            if skip > 0:
+                cursor = cursor.skip(skip)
             if limit > 0:
                 cursor = cursor.limit(limit)
+            if batch_size:
+                cursor = cursor.batch_size(batch_size)
             
-            results = list(cursor)
+            # _id stays an ObjectId; the API's JSON provider (serialization.py) encodes it
+            return list(cursor)
+        except Exception as e:
+            log.error('mongo.find_failed', error=str(e), collection=collection_name)
+            return None
+    
+    @timed('mongo', 'aggregate')
+    def aggregate(self, collection_name, pipeline, batch_size=None, allow_disk_use=False, max_time_ms=None):
+        """
+        Run an aggregation pipeline.
+        
+        Args:
+            collection_name (str): Name of the collection
+            pipeline (list): Aggregation stages
+            batch_size (int): Documents per server round trip
+            allow_disk_use (bool): Let $group / $sort spill to disk
+            max_time_ms (int): Server-side time limit (maxTimeMS)
             
-            # Convert ObjectId to string for JSON serialization
-            for doc in results:
-                if '_id' in doc:
-                    doc['_id'] = str(doc['_id'])
+        Returns:
+            list: Result documents, or None on error
+        """
+        try:
+            if self.db is None:
+                self.connect()
             
-            return results
+            options = {'allowDiskUse': allow_disk_use}
+            if batch_size:
+                options['batchSize'] = batch_size
+            if max_time_ms:
+                options['maxTimeMS'] = max_time_ms
+            return list(self.db[collection_name].aggregate(pipeline, **options))
         except Exception as e:
-            print(f"MongoDB Find Error: {e}")
+            log.error('mongo.aggregate_failed', error=str(e), collection=collection_name, pipeline=pipeline)
+            return None
+    
+    def compile_sql(self, query):
+        """
+        Compile a Drill query over one collection of this database into an
+        aggregation pipeline (see mongo_sql.py), so filtering, grouping,
+        sorting and limiting run inside MongoDB.
+        
+        Args:
+            query (str): SELECT or WITH ... SELECT reading mongo.<db>.`Collection`
+            
+        Returns:
+            dict: {'collection', 'pipeline', 'columns', 'empty_row', ...}, or None
+                  if the query cannot be expressed as one pipeline
+        """
+        try:
+            plan = compile_query(query)
+        except UnsupportedQuery:
             return None
+        if plan['database'] != self.config['database']:
+            return None
+        return plan
     
+    @timed('mongo', 'insert_one')
     def insert_one(self, collection_name, document):
         """
         Insert a single document into a collection.
@@ -199,9 +460,123 @@ class MongoDB:
             result = collection.insert_one(document)
             return str(result.inserted_id)
         except Exception as e:
-            print(f"MongoDB Insert Error: {e}")
+            log.error('mongo.insert_failed', error=str(e), collection=collection_name)
+            return None
+    
+    def insert_many(self, collection_name, documents, batch_size=None, write_concern=None):
+        """
+        Insert many documents using unordered batched writes.
+        
+        Args:
+            collection_name (str): Name of the collection
+            documents (iterable): Documents to insert (lists or generators)
+            batch_size (int): Documents per round trip (default from MONGO_BULK_CONFIG)
+            write_concern (dict): WriteConcern options, e.g. {'w': 1, 'j': False}
+            
+        Returns:
+            dict: {'inserted': int, 'failed': int, 'errors': [...]} where each
+                  error is {'index': int, 'code': int, 'error': str} and index is
+                  the position of the document in `documents`; None if MongoDB
+                  could not be reached
+        """
+        return self.bulk_write(
+            collection_name,
+            (InsertOne(doc) for doc in documents),
+            batch_size=batch_size,
+            write_concern=write_concern
+        )
+    
+    @timed('mongo', 'bulk_write')
+    def bulk_write(self, collection_name, operations, batch_size=None, write_concern=None):
+        """
+        Execute write operations (InsertOne, UpdateOne, ...) in unordered batches.
+        A failing operation does not stop the rest of its batch.
+        
+        Args:
+            collection_name (str): Name of the collection
+            operations (iterable): pymongo write operations
+            batch_size (int): Operations per round trip (default from MONGO_BULK_CONFIG)
+            write_concern (dict): WriteConcern options, e.g. {'w': 'majority'}
+            
+        Returns:
+            dict: Counts of inserted/matched/modified/upserted/failed operations,
+                  a compact error list capped at MONGO_BULK_CONFIG['max_reported_errors'],
+                  and the positions of all failed operations ('failed_indexes');
+                  None if MongoDB could not be reached
+        """
+        batch_size = batch_size or MONGO_BULK_CONFIG['batch_size']
+        max_errors = MONGO_BULK_CONFIG['max_reported_errors']
+        summary = {
+            'inserted': 0,
+            'matched': 0,
+            'modified': 0,
+            'upserted': 0,
+            'unacknowledged': 0,
+            'failed': 0,
+            'errors': [],
+            'errors_truncated': False,
+            'failed_indexes': []
+        }
+        
+        def record_error(index, code, message):
+            summary['failed'] += 1
+            summary['failed_indexes'].append(index)
+            if len(summary['errors']) < max_errors:
+                summary['errors'].append({'index': index, 'code': code, 'error': message})
+            else:
+                summary['errors_truncated'] = True
+        
+        def accumulate(counts):
+            summary['inserted'] += counts.get('nInserted', 0)
+            summary['matched'] += counts.get('nMatched', 0)
+            summary['modified'] += counts.get('nModified', 0)
+            summary['upserted'] += counts.get('nUpserted', 0)
+        
+        def flush(batch, offset):
+            try:
+                result = collection.bulk_write(batch, ordered=False)
+                if result.acknowledged:
+                    accumulate(result.bulk_api_result)
+                else:
+                    # w=0: the server does not report per-operation outcomes
+                    summary['unacknowledged'] += len(batch)
+            except BulkWriteError as e:
+                accumulate(e.details)
+                for err in e.details.get('writeErrors', []):
+                    record_error(offset + err['index'], err.get('code'), err.get('errmsg'))
+            except Exception as e:
+                # Network / server failure: the whole batch is unaccounted for
+                log.error('mongo.bulk_write_failed', error=str(e), collection=collection_name)
+                for i in range(len(batch)):
+                    record_error(offset + i, None, str(e))
+        
+        try:
+            if self.db is None:
+                self.connect()
+            
+            options = dict(MONGO_BULK_CONFIG['write_concern'])
+            options.update(write_concern or {})
+            collection = self.db[collection_name].with_options(
+                write_concern=WriteConcern(**options)
+            )
+        except Exception as e:
+            log.error('mongo.bulk_write_failed', error=str(e), collection=collection_name)
             return None
+        
+        batch = []
+        offset = 0
+        for op in operations:
+            batch.append(op)
+            if len(batch) >= batch_size:
+                flush(batch, offset)
+                offset += len(batch)
+                batch = []
+        if batch:
+            flush(batch, offset)
+        
+        return summary
     
+    @timed('mongo', 'update_one')
     def update_one(self, collection_name, query, update):
         """
         Update a single document in a collection.
@@ -222,7 +597,7 @@ class MongoDB:
             result = collection.update_one(query, {'$set': update})
             return result.modified_count > 0
         except Exception as e:
-            print(f"MongoDB Update Error: {e}")
+            log.error('mongo.update_failed', error=str(e), collection=collection_name)
             return False
     
     def test_connection(self):
@@ -239,26 +614,92 @@ class MongoDB:
 # ========================================
 # Apache Drill Federated Query Engine
 # ========================================
+# Quoted literals / identifiers are kept verbatim; runs of comments and
+# whitespace elsewhere collapse to one space. Comments are matched in the same
+# pass, so a `--` comment ends at its own newline before that is collapsed.
+_SQL_TOKENS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)|(?:\s+|--[^\n]*|/\*.*?\*/)+""", re.DOTALL)
+
+
+def normalize_sql(query):
+    """Canonical form of a query for coalescing: comments dropped, whitespace collapsed outside quotes, no trailing ';'"""
+    normalized = _SQL_TOKENS.sub(lambda m: m.group(1) or ' ', query).strip()
+    return normalized.rstrip(';').rstrip()
+
+
 class DrillDB:
     """
     Manages Apache Drill federated queries.
     Allows querying across PostgreSQL, MongoDB, and CSV files.
+    
+    Identical queries submitted concurrently (same normalized SQL and
+    role) are coalesced: the first caller runs the query and the others
+    wait for and share its result.
     """
     
     def __init__(self):
         self.config = DRILL_CONFIG
         self.base_url = f"http://{self.config['host']}:{self.config['port']}"
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats = {'requests': 0, 'executed': 0, 'coalesced': 0, 'max_waiters': 0}
     
-    def execute_query(self, query):
+    @timed('drill', 'query')
+    def execute_query(self, query, role=None):
         """
         Execute a federated SQL query through Apache Drill.
         
         Args:
             query (str): SQL query to execute
+            role (str): Caller's role; only callers with the same role share results
             
         Returns:
             dict: Query results with rows and columns
         """
+        key = (normalize_sql(query), role)
+        with self._inflight_lock:
+            self._stats['requests'] += 1
+            entry = self._inflight.get(key)
+            if entry is None:
+                entry = {'future': Future(), 'waiters': 0}
+                self._inflight[key] = entry
+                leader = True
+                self._stats['executed'] += 1
+            else:
+                leader = False
+                entry['waiters'] += 1
+                self._stats['coalesced'] += 1
+                self._stats['max_waiters'] = max(self._stats['max_waiters'], entry['waiters'])
+        
+        if not leader:
+            # Shallow copy so callers can annotate their own response
+            with span('drill-coalesced-wait'):
+                return dict(entry['future'].result())
+        
+        try:
+            result = self._execute(query)
+        except BaseException as e:
+            result = {'success': False, 'error': str(e)}
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            entry['future'].set_result(result)
+        return result
+    
+    def coalescing_stats(self):
+        """
+        Coalescing counters since startup.
+        
+        Returns:
+            dict: requests, executed (Drill round trips), coalesced (shared results),
+                  max_waiters, in_flight
+        """
+        with self._inflight_lock:
+            return dict(self._stats, in_flight=len(self._inflight))
+    
+    @timed('drill', 'round_trip')
+    def _execute(self, query):
+        """Run one query against the Drill REST API"""
         try:
             # Drill REST API endpoint
             url = f"{self.base_url}/query.json"
@@ -273,39 +714,34 @@ class DrillDB:
             }
             
             response = requests.post(url, json=payload, headers=headers, timeout=30)
+            BACKEND_BYTES.inc(len(response.content), backend='drill')
             
             if response.status_code == 200:
-                data = response.json()
+                with span('drill-decode'):
+                    data = response.json()
                 
                 # Check if query failed
                 if data.get('queryState') == 'FAILED':
                     error_msg = data.get('errorMessage', 'Query execution failed in Drill')
-                    print(f"\n{'='*60}")
-                    print(f"DRILL QUERY FAILED")
-                    print(f"Query: {query}")
-                    print(f"Error: {error_msg}")
-                    print(f"Full response: {data}")
-                    print(f"{'='*60}\n")
+                    log.warning('drill.query_failed', query=query, error=error_msg, query_id=data.get('queryId'))
                     return {
                         'success': False,
                         'error': error_msg,
                         'rows': [],
-                        'columns': []
+                        'columns': [],
+                        'query_id': data.get('queryId')
                     }
                 
                 # Query succeeded
                 rows = data.get('rows', [])
                 columns = data.get('columns', [])
-                print(f"\n{'='*60}")
-                print(f"DRILL QUERY SUCCESS")
-                print(f"Query: {query[:100]}...")
-                print(f"Rows returned: {len(rows)}")
-                print(f"{'='*60}\n")
+                log.info('drill.query', query=query, rows=len(rows), query_id=data.get('queryId'))
                 
                 return {
                     'success': True,
                     'rows': rows,
-                    'columns': columns
+                    'columns': columns,
+                    'query_id': data.get('queryId')
                 }
             else:
                 return {
@@ -313,12 +749,33 @@ class DrillDB:
                     'error': f"Query failed with status {response.status_code}"
                 }
         except Exception as e:
-            print(f"Drill Query Error: {e}")
+            log.error('drill.query_failed', error=str(e), query=query)
             return {
                 'success': False,
                 'error': str(e)
             }
     
+    @timed('drill', 'profile')
+    def get_profile(self, query_id):
+        """
+        Fetch a finished query's profile (plan, fragments, operator times)
+        from the Drill profiles REST API.
+        
+        Args:
+            query_id (str): 'queryId' returned with the query results
+            
+        Returns:
+            dict: Profile JSON, or None if unavailable
+        """
+        try:
+            response = requests.get(f"{self.base_url}/profiles/{query_id}.json", timeout=10)
+            if response.status_code != 200:
+                return None
+            return response.json()
+        except Exception as e:
+            log.error('drill.profile_failed', error=str(e), query_id=query_id)
+            return None
+    
     def test_connection(self):
         """Test Drill connection"""
         try:
@@ -0,0 +1,491 @@
+# ========================================
+# Synthetic Data Generator
+# Deterministic, referentially consistent data for every federated
+# source, at a scale factor from thousands to hundreds of millions of
+# rows, bulk-loaded into each backend:
+#
+#   PostgreSQL  region_info, climate_data, agriculture_data  (COPY)
+#   MongoDB     Biodiversity_Data, Species_Details, Sensor_Metadata,
+#               Sensor_Logs, Air_Quality_History             (unordered
+#               insert_many, w=1 without journaling)
+#   CSV         data/sensor_readings.csv                     (Drill dfs)
+#
+# Rows are generated in fixed-size chunks, each from its own seeded
+# random stream, so the same --seed / --scale / --end gives identical data
+# however many --workers load it. Every region_id / sensor_id refers to
+# a generated region / sensor; time series are spread evenly over the
+# --days before --end.
+#
+# Loading replaces the existing data (tables are truncated, collections
+# dropped and time-series collections re-provisioned), then partitions,
+# sequences, statistics, region_summary and the rollups are brought up
+# to date.
+#
+# Usage:
+#   python datagen.py plan --scale 100
+#   python datagen.py load --scale 1 --yes
+#   python datagen.py load --scale 1000 --workers 8 --targets postgres,csv --yes
+# ========================================
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from multiprocessing import Pool
+from config import CSV_DATA_PATH
+
+CHUNK_ROWS = 50000
+
+# Rows at scale 1; regions, sensors and species grow with sqrt(scale) so
+# that per-region history gets longer as the scale goes up
+BASE_COUNTS = {
+    'regions': 50,
+    'climate_data': 20000,
+    'agriculture_data': 5000,
+    'biodiversity': 200,
+    'species': 500,
+    'sensors': 200,
+    'sensor_logs': 20000,
+    'air_quality': 20000,
+    'sensor_csv': 20000
+}
+_SQRT_SCALED = ('regions', 'species', 'sensors')
+
+# dataset -> (target, table / collection)
+DATASETS = {
+    'regions': ('postgres', 'region_info'),
+    'climate_data': ('postgres', 'climate_data'),
+    'agriculture_data': ('postgres', 'agriculture_data'),
+    'biodiversity': ('mongo', 'Biodiversity_Data'),
+    'species': ('mongo', 'Species_Details'),
+    'sensors': ('mongo', 'Sensor_Metadata'),
+    'sensor_logs': ('mongo', 'Sensor_Logs'),
+    'air_quality': ('mongo', 'Air_Quality_History'),
+    'sensor_csv': ('csv', 'sensor_readings.csv')
+}
+
+POSTGRES_COLUMNS = {
+    'region_info': ['region_id', 'region_name', 'latitude', 'longitude'],
+    'climate_data': ['region_id', 'temperature', 'rainfall', 'humidity', 'timestamp'],
+    'agriculture_data': ['region_id', 'crop_type', 'yield', 'season', 'year']
+}
+
+_BIOMES = ['Rainforest', 'Savanna', 'Desert', 'Tundra', 'Wetland', 'Highlands', 'Steppe', 'Delta',
+           'Reef', 'Taiga', 'Prairie', 'Mangrove', 'Plateau', 'Coast', 'Valley']
+_CROPS = ['Wheat', 'Rice', 'Corn', 'Soybeans', 'Barley', 'Coffee', 'Cocoa', 'Cassava', 'Potatoes', 'Sorghum']
+_SEASONS = ['Spring', 'Summer', 'Fall', 'Winter']
+_STATUSES = ['Least Concern', 'Near Threatened', 'Vulnerable', 'Endangered', 'Critical']
+_CLASSES = [('Mammalia', 'Carnivora'), ('Aves', 'Passeriformes'), ('Reptilia', 'Testudines'),
+            ('Amphibia', 'Anura'), ('Actinopterygii', 'Perciformes')]
+_FLORA = ['Kapok Tree', 'Acacia', 'Lichen', 'Mangrove', 'Oak', 'Pine', 'Cactus', 'Fern', 'Moss', 'Bamboo']
+_SENSOR_TYPES = [('Climate Monitor', ['temperature', 'humidity', 'rainfall']),
+                 ('Air Quality Monitor', ['co2', 'pm2_5', 'pm10', 'no2']),
+                 ('Water Quality Monitor', ['water_temperature', 'salinity', 'pH'])]
+_EVENTS = [('reading', 'info', 'Periodic reading within normal range'),
+           ('temperature_spike', 'warning', 'Temperature exceeded threshold'),
+           ('calibration', 'info', 'Automatic calibration completed'),
+           ('low_battery', 'warning', 'Battery below 15%'),
+           ('connection_lost', 'critical', 'No data received for 30 minutes')]
+_AQI_LEVELS = [(50, 'Good'), (100, 'Moderate'), (150, 'Unhealthy for Sensitive Groups'),
+               (200, 'Unhealthy'), (300, 'Very Unhealthy'), (None, 'Hazardous')]
+
+
+def plan(scale):
+    """
+    Row counts for a scale factor.
+
+    Returns:
+        dict: {dataset: rows}
+    """
+    counts = {}
+    for dataset, base in BASE_COUNTS.items():
+        factor = math.sqrt(scale) if dataset in _SQRT_SCALED else scale
+        counts[dataset] = max(5, round(base * factor))
+    return counts
+
+
+def _rng(seed, dataset, chunk):
+    # String seeds hash deterministically (unlike hash() of a tuple)
+    return random.Random(f'{seed}:{dataset}:{chunk}')
+
+
+class SyntheticData:
+    """Generates the chunks of each dataset; cheap to construct in every worker"""
+
+    def __init__(self, scale=1.0, seed=42, end=None, days=365):
+        self.scale = scale
+        self.seed = seed
+        self.counts = plan(scale)
+        self.end = datetime.combine(end or date.today(), datetime.min.time())
+        self.start = self.end - timedelta(days=days)
+        self.regions = [self._region(region_id) for region_id in range(1, self.counts['regions'] + 1)]
+
+    def chunks(self, dataset):
+        return math.ceil(self.counts[dataset] / CHUNK_ROWS)
+
+    def rows(self, dataset, chunk):
+        """Rows (tuples) or documents (dicts) of one chunk"""
+        first = chunk * CHUNK_ROWS
+        last = min(first + CHUNK_ROWS, self.counts[dataset])
+        rng = _rng(self.seed, dataset, chunk)
+        make = getattr(self, f'_{dataset}')
+        return [make(rng, index) for index in range(first, last)]
+
+    # ----------------------------------------
+    # Shared helpers
+    # ----------------------------------------
+    def _region(self, region_id):
+        rng = _rng(self.seed, 'region', region_id)
+        latitude = round(rng.uniform(-60, 75), 7)
+        return {
+            'region_id': region_id,
+            'region_name': f'{rng.choice(_BIOMES)} {region_id}',
+            'latitude': latitude,
+            'longitude': round(rng.uniform(-180, 180), 7),
+            # Climate baseline: warmer and wetter towards the equator
+            'base_temperature': 30 - abs(latitude) * 0.55,
+            'base_rainfall': max(20.0, 2500 - abs(latitude) * 35 + rng.uniform(-300, 300)),
+            'base_humidity': max(10.0, 90 - abs(latitude) * 0.6),
+            'pollution': rng.uniform(0.5, 3.0)
+        }
+
+    def _series_time(self, dataset, index, per_key):
+        """Timestamp of row `index` of a dataset holding `per_key` interleaved, evenly spaced series"""
+        span = (self.end - self.start).total_seconds()
+        points = max(self.counts[dataset] // per_key, 1)
+        return self.start + timedelta(seconds=(index // per_key) % points * span / points)
+
+    def _spread_time(self, rng):
+        return self.start + timedelta(seconds=int(rng.random() * (self.end - self.start).total_seconds()))
+
+    def _sensor_region(self, sensor_number):
+        return (sensor_number - 1) % self.counts['regions'] + 1
+
+    # ----------------------------------------
+    # PostgreSQL
+    # ----------------------------------------
+    def _regions(self, rng, index):
+        region = self.regions[index]
+        return (region['region_id'], region['region_name'], region['latitude'], region['longitude'])
+
+    def _climate_data(self, rng, index):
+        region = self.regions[index % len(self.regions)]
+        at = self._series_time('climate_data', index, len(self.regions))
+        season = math.sin(2 * math.pi * at.timetuple().tm_yday / 365) * (1 if region['latitude'] >= 0 else -1)
+        return (
+            region['region_id'],
+            round(region['base_temperature'] + 8 * season + rng.gauss(0, 2), 2),
+            round(max(0.0, region['base_rainfall'] * (1 + 0.3 * season) + rng.gauss(0, 50)), 2),
+            round(min(100.0, max(0.0, region['base_humidity'] + rng.gauss(0, 5))), 2),
+            at.isoformat(sep=' ')
+        )
+
+    def _agriculture_data(self, rng, index):
+        region = self.regions[index % len(self.regions)]
+        return (
+            region['region_id'],
+            rng.choice(_CROPS),
+            round(rng.lognormvariate(7, 0.8), 2),
+            rng.choice(_SEASONS),
+            rng.randint(self.end.year - 10, self.end.year)
+        )
+
+    # ----------------------------------------
+    # MongoDB
+    # ----------------------------------------
+    def _biodiversity(self, rng, index):
+        region = self.regions[index % len(self.regions)]
+        return {
+            'biodiversity_id': f'BIO{index + 1:09d}',
+            'region_id': region['region_id'],
+            'region_name': region['region_name'],
+            'species_count': int(rng.lognormvariate(7, 1.2)),
+            'endangered_species': [f'Species {rng.randint(1, self.counts["species"])}' for _ in range(rng.randint(0, 5))],
+            'dominant_flora': rng.sample(_FLORA, 3),
+            'conservation_status': rng.choice(_STATUSES),
+            'last_survey_date': self._spread_time(rng)
+        }
+
+    def _species(self, rng, index):
+        taxon_class, order = rng.choice(_CLASSES)
+        return {
+            'species_id': f'SP{index + 1:07d}',
+            'common_name': f'Species {index + 1}',
+            'scientific_name': f'Genus{index % 997} species{index + 1}',
+            'classification': {'kingdom': 'Animalia', 'phylum': 'Chordata', 'class': taxon_class, 'order': order},
+            'habitat_regions': sorted(rng.sample(range(1, len(self.regions) + 1), min(3, len(self.regions)))),
+            'population_estimate': int(rng.lognormvariate(9, 2)),
+            'conservation_status': rng.choice(_STATUSES),
+            'diet': rng.choice(['Herbivore', 'Carnivore', 'Omnivore']),
+            'lifespan_years': rng.randint(1, 80)
+        }
+
+    def _sensors(self, rng, index):
+        region = self.regions[self._sensor_region(index + 1) - 1]
+        sensor_type, measurements = rng.choice(_SENSOR_TYPES)
+        installed = self.start - timedelta(days=rng.randint(30, 1500))
+        return {
+            'sensor_id': f'SENS_{index + 1:05d}',
+            'sensor_type': sensor_type,
+            'region_id': region['region_id'],
+            'region_name': region['region_name'],
+            'manufacturer': rng.choice(['EnviroTech', 'OceanSense', 'AirWatch']),
+            'model': f'M-{rng.randint(100, 999)}',
+            'installation_date': installed,
+            'last_maintenance': self._spread_time(rng),
+            'status': rng.choices(['active', 'maintenance', 'inactive'], [90, 7, 3])[0],
+            'measurements': measurements,
+            'accuracy_rating': round(rng.uniform(0.9, 0.99), 2),
+            'coordinates': {'latitude': region['latitude'], 'longitude': region['longitude']}
+        }
+
+    def _sensor_logs(self, rng, index):
+        sensor_number = index % self.counts['sensors'] + 1
+        event_type, severity, message = rng.choices(_EVENTS, [80, 8, 6, 4, 2])[0]
+        return {
+            'log_id': f'LOG{index + 1:010d}',
+            'sensor_id': f'SENS_{sensor_number:05d}',
+            'region_id': self._sensor_region(sensor_number),
+            'event_type': event_type,
+            'severity': severity,
+            'message': message,
+            'timestamp': self._spread_time(rng)
+        }
+
+    def _air_quality(self, rng, index):
+        region = self.regions[index % len(self.regions)]
+        pm2_5 = round(rng.lognormvariate(2.3, 0.6) * region['pollution'], 1)
+        aqi = min(500, int(pm2_5 * 4 + rng.uniform(0, 20)))
+        return {
+            'reading_id': f'AQ{index + 1:010d}',
+            'region_id': region['region_id'],
+            'aqi': aqi,
+            'pollutants': {
+                'co2': round(rng.uniform(390, 470), 1),
+                'pm2_5': pm2_5,
+                'pm10': round(pm2_5 * rng.uniform(1.5, 2.5), 1),
+                'no2': round(rng.uniform(5, 60), 1),
+                'so2': round(rng.uniform(1, 20), 1),
+                'o3': round(rng.uniform(20, 90), 1)
+            },
+            'air_quality_level': next(level for limit, level in _AQI_LEVELS if limit is None or aqi <= limit),
+            'recorded_at': self._series_time('air_quality', index, len(self.regions))
+        }
+
+    # ----------------------------------------
+    # Sensor CSV (timestamp,region_id,co2_level,pm2_5)
+    # ----------------------------------------
+    def _sensor_csv(self, rng, index):
+        region = self.regions[index % len(self.regions)]
+        return (
+            self._series_time('sensor_csv', index, len(self.regions)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            region['region_id'],
+            round(rng.uniform(390, 470), 1),
+            round(rng.lognormvariate(2.3, 0.6) * region['pollution'], 1)
+        )
+
+
+# ========================================
+# Loading
+# ========================================
+_worker = {}
+
+
+def _init_worker(scale, seed, end, days, targets):
+    # Connections are per process; nothing opened by the parent is reused
+    from database import MongoDB, PostgresDB
+    _worker['data'] = SyntheticData(scale, seed, end, days)
+    _worker['mongo'] = MongoDB()
+    _worker['postgres'] = PostgresDB()
+    if 'postgres' in targets and _worker['postgres'].connect():
+        # Bulk load: losing the last commits on a crash is acceptable
+        _worker['postgres'].execute_update("SET synchronous_commit TO off")
+
+
+def _load_chunk(task):
+    """Generate and load one chunk; returns (dataset, chunk, rows, ok)"""
+    dataset, chunk = task
+    target, name = DATASETS[dataset]
+    rows = _worker['data'].rows(dataset, chunk)
+    if target == 'postgres':
+        ok = _worker['postgres'].copy_rows(name, POSTGRES_COLUMNS[name], rows)
+    else:
+        result = _worker['mongo'].insert_many(name, rows)
+        ok = result is not None and not result.get('failed')
+    return dataset, chunk, len(rows), ok
+
+
+def _prepare_postgres(data):
+    from database import PostgresDB
+    from partitions import ClimatePartitionManager
+    postgres = PostgresDB()
+    if not postgres.connect():
+        raise ConnectionError('PostgreSQL unavailable (check POSTGRES_* settings)')
+    if not postgres.execute_update("TRUNCATE region_info, climate_data, agriculture_data RESTART IDENTITY CASCADE"):
+        raise RuntimeError('could not truncate the PostgreSQL tables')
+    # One partition per month of the window, so COPY never lands in climate_data_default
+    manager = ClimatePartitionManager()
+    if manager.is_partitioned():
+        month = data.start.date().replace(day=1)
+        while month <= data.end.date():
+            postgres.execute_query("SELECT climate_data_ensure_partition(%s)", (month,))
+            month = (month + timedelta(days=32)).replace(day=1)
+        postgres.connection.commit()
+    postgres.disconnect()
+
+
+def _finish_postgres(counts):
+    from database import PostgresDB
+    from dimensions import dimensions
+    from region_summary import region_summary
+    postgres = PostgresDB()
+    postgres.execute_update(
+        "SELECT setval(pg_get_serial_sequence('region_info', 'region_id'), %s)", (max(counts['regions'], 1),)
+    )
+    postgres.execute_update("ANALYZE region_info, climate_data, agriculture_data")
+    postgres.disconnect()
+    dimensions.invalidate('region_info')
+    region_summary.refresh()
+
+
+def _prepare_mongo():
+    from database import db_manager
+    from mongo_timeseries import mongo_timeseries
+    if db_manager.mongo.db is None and not db_manager.mongo.connect():
+        raise ConnectionError('MongoDB unavailable (check MONGO_* settings)')
+    for target, name in DATASETS.values():
+        if target == 'mongo':
+            db_manager.mongo.db[name].drop()
+    try:
+        mongo_timeseries.provision()  # recreate Sensor_Logs / Air_Quality_History as time-series
+    except Exception as e:
+        print(f"Time-series provisioning skipped: {e}")
+
+
+def _finish_mongo():
+    from dimensions import dimensions
+    from region_summary import region_summary
+    from rollups import rollups
+    for kind in ('air_quality', 'sensor_logs'):
+        rollups.rebuild(kind)
+    region_summary.refresh_biodiversity()
+    dimensions.invalidate('Species_Details')
+
+
+def write_sensor_csv(data, path=CSV_DATA_PATH):
+    """Write the sensor readings CSV (replaced atomically)"""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'region_id', 'co2_level', 'pm2_5'])
+        for chunk in range(data.chunks('sensor_csv')):
+            writer.writerows(data.rows('sensor_csv', chunk))
+    os.replace(temporary, path)
+    return data.counts['sensor_csv']
+
+
+def load(scale, seed, targets, workers=1, end=None, days=365, csv_path=CSV_DATA_PATH):
+    """
+    Replace the data in `targets` with the generated data.
+
+    Args:
+        scale (float): Scale factor (see plan())
+        seed (int): Random seed
+        targets (list): Any of 'postgres', 'mongo', 'csv'
+        workers (int): Processes generating and loading chunks
+        end (date): Last day of the time window (default today)
+        days (int): Length of the time window
+
+    Returns:
+        dict: {dataset: {'rows', 'failed_chunks', 'seconds'}}
+    """
+    data = SyntheticData(scale, seed, end, days)
+    report = {}
+    if 'postgres' in targets:
+        _prepare_postgres(data)
+    if 'mongo' in targets:
+        _prepare_mongo()
+
+    # Regions first: the other PostgreSQL tables reference them
+    phases = [['regions'], [dataset for dataset, (target, _) in DATASETS.items()
+                            if target in targets and target != 'csv' and dataset != 'regions']]
+    if 'postgres' not in targets:
+        phases = phases[1:]
+    initargs = (scale, seed, data.end.date(), days, targets)
+    if workers > 1:
+        pool = Pool(workers, initializer=_init_worker, initargs=initargs)
+        run = pool.imap_unordered
+    else:
+        _init_worker(*initargs)
+        pool, run = None, map
+    try:
+        for phase in phases:
+            started = time.perf_counter()
+            tasks = [(dataset, chunk) for dataset in phase for chunk in range(data.chunks(dataset))]
+            for dataset in phase:
+                report[dataset] = {'rows': 0, 'failed_chunks': 0}
+            for dataset, chunk, rows, ok in run(_load_chunk, tasks):
+                report[dataset]['rows' if ok else 'failed_chunks'] += rows if ok else 1
+                # Datasets of a phase load concurrently: time until their last chunk finished
+                report[dataset]['seconds'] = round(time.perf_counter() - started, 1)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if 'csv' in targets:
+        started = time.perf_counter()
+        report['sensor_csv'] = {'rows': write_sensor_csv(data, csv_path), 'failed_chunks': 0,
+                                'seconds': round(time.perf_counter() - started, 1)}
+    if 'postgres' in targets:
+        _finish_postgres(data.counts)
+    if 'mongo' in targets:
+        _finish_mongo()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate and bulk-load synthetic data')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name in ('plan', 'load'):
+        command = commands.add_parser(name)
+        command.add_argument('--scale', type=float, default=1.0, help='1 = ~%d rows in total' % sum(plan(1).values()))
+        if name == 'load':
+            command.add_argument('--seed', type=int, default=42)
+            command.add_argument('--targets', default='postgres,mongo,csv')
+            command.add_argument('--workers', type=int, default=1)
+            command.add_argument('--end', type=date.fromisoformat, help='last day of the time window (YYYY-MM-DD)')
+            command.add_argument('--days', type=int, default=365)
+            command.add_argument('--csv-path', default=CSV_DATA_PATH)
+            command.add_argument('--yes', action='store_true', help='confirm replacing the existing data')
+    args = parser.parse_args()
+
+    if args.command == 'plan':
+        counts = plan(args.scale)
+        for dataset, rows in counts.items():
+            target, name = DATASETS[dataset]
+            print(f"{target:9} {name:22} {rows:>14,}")
+        print(f"{'':32} {sum(counts.values()):>14,} total")
+        return
+
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    unknown = [target for target in targets if target not in ('postgres', 'mongo', 'csv')]
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(unknown)}")
+    if not args.yes:
+        parser.error('loading truncates the tables / drops the collections it fills; pass --yes to continue')
+    report = load(args.scale, args.seed, targets, args.workers, args.end, args.days, args.csv_path)
+    failed = False
+    for dataset, entry in report.items():
+        failed = failed or entry['failed_chunks'] > 0
+        print(f"{DATASETS[dataset][1]:22} {entry['rows']:>14,} rows in {entry['seconds']:>8.1f}s"
+              + (f"  ({entry['failed_chunks']} chunk(s) failed)" if entry['failed_chunks'] else ''))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
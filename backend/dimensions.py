@@ -0,0 +1,231 @@
+# ========================================
+# Dimension Table Cache
+# Keeps the small, rarely changing lookup tables in memory so dropdowns
+# and in-process joins never hit a database:
+#   region_info      (PostgreSQL)  -> by region_id, list ordered by name
+#   Species_Details  (MongoDB)     -> by species_id, by habitat region
+#
+# Writes through this app call invalidate(), so the next read reloads
+# (read-your-writes). Changes made elsewhere arrive through on_change()
+# (change data capture, cdc.py); max_age_seconds bounds staleness when
+# no change feed is live. Stale snapshots are reloaded in the background
+# while readers keep the old one.
+# ========================================
+
+import threading
+import time
+from config import DIMENSION_CACHE_CONFIG
+from database import PostgresDB, db_manager
+from structured_log import get_logger
+
+log = get_logger('dimensions')
+
+# Species fields kept in memory (the rest of the document stays in MongoDB)
+SPECIES_FIELDS = ['species_id', 'common_name', 'scientific_name', 'habitat_regions',
+                  'population_estimate', 'conservation_status']
+
+
+class _Snapshot:
+    """Immutable view of one table; replaced wholesale on reload"""
+
+    def __init__(self, rows, key, loaded_at):
+        self.rows = rows
+        self.by_key = {row.get(key): row for row in rows}
+        self.loaded_at = loaded_at
+
+
+class DimensionCache:
+    """
+    Loads each dimension on first use and serves it from memory.
+    Reads region_info through PostgresDB.iter_rows, which scans on a
+    connection of its own, so reloads never touch the shared one.
+    """
+
+    def __init__(self, config=DIMENSION_CACHE_CONFIG):
+        self.config = config
+        self.postgres = PostgresDB()
+        self._snapshots = {}               # table -> _Snapshot
+        self._dirty = set()                # tables invalidated by a write
+        self._load_lock = threading.Lock()
+        self._background = set()           # tables with a reload thread running
+        self.stats = {'hits': 0, 'loads': 0, 'load_errors': 0, 'invalidations': 0}
+        self._loaders = {
+            'region_info': self._load_regions,
+            'Species_Details': self._load_species
+        }
+        self._sources = {'region_info': 'postgres', 'Species_Details': 'mongo'}
+        self._live_sources = set()         # sources with a live change feed
+
+    # ----------------------------------------
+    # Loading
+    # ----------------------------------------
+    def _load_regions(self):
+        rows = []
+        try:
+            # A scan on its own connection: nothing to commit, nothing left open
+            for columns, batch in self.postgres.iter_rows(
+                    "SELECT region_id, region_name, latitude, longitude FROM region_info ORDER BY region_name",
+                    numeric_as_float=True):
+                rows.extend(dict(zip(columns, row)) for row in batch)
+        except Exception as e:
+            log.error('dimensions.load_failed', table='region_info', error=str(e))
+            return None
+        return _Snapshot(rows, 'region_id', time.monotonic())
+
+    def _load_species(self):
+        projection = {field: 1 for field in SPECIES_FIELDS}
+        projection['_id'] = 0
+        rows = db_manager.mongo.find('Species_Details', {}, projection, sort=[('species_id', 1)])
+        if rows is None:
+            return None
+        by_region = {}
+        for row in rows:
+            for region_id in row.get('habitat_regions') or []:
+                by_region.setdefault(region_id, []).append(row)
+        snapshot = _Snapshot(rows, 'species_id', time.monotonic())
+        snapshot.by_region = by_region
+        return snapshot
+
+    def _reload(self, table, seen=None):
+        """
+        Load `table` and swap the snapshot in; keeps the old one on failure.
+        If another thread replaced `seen` while we waited, its snapshot is used.
+        """
+        with self._load_lock:
+            current = self._snapshots.get(table)
+            if current is not None and current is not seen and table not in self._dirty:
+                return current
+            dirty = table in self._dirty
+            self._dirty.discard(table)
+            snapshot = self._loaders[table]()
+            if snapshot is None:
+                if dirty:
+                    self._dirty.add(table)
+                self.stats['load_errors'] += 1
+                return self._snapshots.get(table)
+            self._snapshots[table] = snapshot
+            self.stats['loads'] += 1
+            return snapshot
+
+    def _reload_in_background(self, table):
+        def run():
+            try:
+                self._reload(table, seen=self._snapshots.get(table))
+            finally:
+                self._background.discard(table)
+
+        if table in self._background:
+            return
+        self._background.add(table)
+        threading.Thread(target=run, name=f'dimension-{table}', daemon=True).start()
+
+    def _get(self, table):
+        """Current snapshot of `table`, or None if it could never be loaded"""
+        snapshot = self._snapshots.get(table)
+        if not self.config['enabled'] or snapshot is None or table in self._dirty:
+            return self._reload(table, seen=snapshot)
+        max_age = self.config['max_age_with_cdc_seconds'] if self._sources[table] in self._live_sources \
+            else self.config['max_age_seconds']
+        if time.monotonic() - snapshot.loaded_at > max_age:
+            self._reload_in_background(table)
+        self.stats['hits'] += 1
+        return snapshot
+
+    def invalidate(self, table):
+        """
+        Mark a table changed; the next read reloads it.
+        Tables that are not cached are ignored, so write paths can call
+        this with any table or collection name.
+        """
+        if table in self._loaders:
+            self._dirty.add(table)
+            self.stats['invalidations'] += 1
+
+    def on_change(self, event):
+        """
+        Change data capture subscriber: invalidate on table changes; when a
+        feed (re)connects, changes may have been missed, so reload its tables.
+        """
+        if event['table'] is not None:
+            self.invalidate(event['table'])
+        elif event['operation'] == 'LISTENING':
+            self._live_sources.add(event['source'])
+            for table, source in self._sources.items():
+                if source == event['source']:
+                    self.invalidate(table)
+        elif event['operation'] == 'STOPPED':
+            self._live_sources.discard(event['source'])
+
+    # ----------------------------------------
+    # Regions
+    # ----------------------------------------
+    def regions(self):
+        """
+        All regions ordered by name.
+
+        Returns:
+            list: {'region_id', 'region_name', 'latitude', 'longitude'} dicts, or None
+        """
+        snapshot = self._get('region_info')
+        return snapshot.rows if snapshot else None
+
+    def region(self, region_id):
+        """Region dict for an id, or None"""
+        snapshot = self._get('region_info')
+        return snapshot.by_key.get(region_id) if snapshot else None
+
+    def enrich(self, rows, key='region_id', fields=('region_name',)):
+        """
+        Add region columns to rows in place (an in-process join on region_info).
+        Rows whose region is unknown get None.
+
+        Args:
+            rows (list): Dictionaries with a region id under `key`
+            key (str): Field holding the region id
+            fields (tuple): region_info columns to copy
+
+        Returns:
+            list: The same rows
+        """
+        snapshot = self._get('region_info')
+        by_id = snapshot.by_key if snapshot else {}
+        for row in rows:
+            region = by_id.get(row.get(key))
+            for field in fields:
+                row[field] = region[field] if region else None
+        return rows
+
+    # ----------------------------------------
+    # Species
+    # ----------------------------------------
+    def species(self, species_id=None):
+        """One species by id, or all species (ordered by species_id) if no id is given"""
+        snapshot = self._get('Species_Details')
+        if snapshot is None:
+            return None
+        return snapshot.by_key.get(species_id) if species_id is not None else snapshot.rows
+
+    def species_in_region(self, region_id):
+        """Species whose habitat_regions include `region_id`"""
+        snapshot = self._get('Species_Details')
+        return snapshot.by_region.get(region_id, []) if snapshot else None
+
+    def status(self):
+        """Row counts, ages and hit / load counters"""
+        now = time.monotonic()
+        return {
+            'tables': {
+                table: {
+                    'rows': len(snapshot.rows),
+                    'age_seconds': round(now - snapshot.loaded_at, 1),
+                    'dirty': table in self._dirty
+                }
+                for table, snapshot in self._snapshots.items()
+            },
+            'change_feeds': sorted(self._live_sources),
+            **self.stats
+        }
+
+
+# Global dimension cache instance
+dimensions = DimensionCache()
@@ -0,0 +1,89 @@
+# ========================================
+# MongoDB Document Preparation
+# Shapes incoming insert payloads into stored documents.
+# Shared by the single-row insert routes and the bulk routes.
+# ========================================
+
+from datetime import datetime
+
+
+def _split_list(value, cast=str):
+    """Turn a comma-separated string into a list"""
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def _document_time(data, field, received_at, client_timestamps):
+    """
+    Pick the timestamp stored in `field`.
+    Single-row routes always stamp the server time; bulk callers may send
+    their own ISO-8601 timestamps (e.g. buffered gateway logs).
+    """
+    value = data.get(field)
+    if not client_timestamps or value is None:
+        return received_at
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    raise ValueError(f'Invalid timestamp for {field}: {value!r}')
+
+
+def prepare_sensor_log(data, received_at, client_timestamps=False):
+    """
+    Build a Sensor_Logs document.
+    
+    Raises:
+        ValueError: If a required field is missing
+    """
+    required_fields = ['sensor_id', 'region_id', 'event_type', 'severity', 'message']
+    for field in required_fields:
+        if field not in data:
+            raise ValueError(f'Missing field: {field}')
+    data['timestamp'] = _document_time(data, 'timestamp', received_at, client_timestamps)
+    return data
+
+
+def prepare_biodiversity(data, received_at, client_timestamps=False):
+    """Build a Biodiversity_Data document"""
+    # biodiversity_id, region_id, region_name, species_count, endangered_species, dominant_flora, conservation_status
+    data['last_survey_date'] = _document_time(data, 'last_survey_date', received_at, client_timestamps)
+    # Handle arrays
+    if isinstance(data.get('endangered_species'), str):
+        data['endangered_species'] = _split_list(data['endangered_species'])
+    if isinstance(data.get('dominant_flora'), str):
+        data['dominant_flora'] = _split_list(data['dominant_flora'])
+    return data
+
+
+def prepare_air_quality(data, received_at, client_timestamps=False):
+    """Build an Air_Quality_History document"""
+    # reading_id, region_id, aqi, co2, pm2_5, pm10, no2, so2, o3, air_quality_level
+    data['recorded_at'] = _document_time(data, 'recorded_at', received_at, client_timestamps)
+    # Restructure pollutants if they are flat in the request
+    if not isinstance(data.get('pollutants'), dict):
+        data['pollutants'] = {
+            'co2': data.pop('co2', None),
+            'pm2_5': data.pop('pm2_5', None),
+            'pm10': data.pop('pm10', None),
+            'no2': data.pop('no2', None),
+            'so2': data.pop('so2', None),
+            'o3': data.pop('o3', None)
+        }
+    return data
+
+
+def prepare_species(data, received_at, client_timestamps=False):
+    """Build a Species_Details document"""
+    # species_id, common_name, scientific_name, habitat_regions, population_estimate, conservation_status, diet, lifespan_years
+    if isinstance(data.get('habitat_regions'), str):
+        data['habitat_regions'] = _split_list(data['habitat_regions'], int)
+    return data
+
+
+def prepare_sensor_metadata(data, received_at, client_timestamps=False):
+    """Build a Sensor_Metadata document"""
+    # sensor_id, sensor_type, region_id, region_name, manufacturer, model, status, measurements, accuracy_rating
+    data['installation_date'] = _document_time(data, 'installation_date', received_at, client_timestamps)
+    if isinstance(data.get('measurements'), str):
+        data['measurements'] = _split_list(data['measurements'])
+    return data
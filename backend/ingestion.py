@@ -0,0 +1,417 @@
+# ========================================
+# Streaming File Upload Ingestion
+# Parses CSV / Excel uploads row by row, validates and type-coerces
+# them in chunks and bulk-loads each chunk (PostgreSQL COPY or
+# MongoDB insert_many). Progress is tracked per job.
+# ========================================
+
+import csv
+import io
+import os
+import threading
+import uuid
+from datetime import datetime
+from config import INGESTION_CONFIG
+from database import PostgresDB, db_manager
+from documents import prepare_biodiversity, prepare_air_quality
+from region_summary import region_summary
+from dimensions import dimensions
+from partitions import climate_partitions
+from rollups import rollups, written_documents
+from structured_log import get_logger
+
+log = get_logger('ingestion')
+
+try:
+    import openpyxl
+except ImportError:  # Excel uploads are optional
+    openpyxl = None
+
+
+# ========================================
+# Column Coercion
+# ========================================
+def _to_int(value):
+    if isinstance(value, bool):
+        raise ValueError('not an integer')
+    if isinstance(value, int):
+        return value
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError('not an integer')
+    return int(number)
+
+
+def _to_float(value):
+    return float(value)
+
+
+def _to_str(value):
+    return str(value).strip()
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+
+
+def _to_list(value):
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+
+# Each dataset: target backend, table/collection and (column, coerce, required)
+DATASETS = {
+    'region': {
+        'backend': 'postgres',
+        'table': 'region_info',
+        'columns': [
+            ('region_name', _to_str, True),
+            ('latitude', _to_float, True),
+            ('longitude', _to_float, True)
+        ]
+    },
+    'climate': {
+        'backend': 'postgres',
+        'table': 'climate_data',
+        'columns': [
+            ('region_id', _to_int, True),
+            ('temperature', _to_float, True),
+            ('rainfall', _to_float, True),
+            ('humidity', _to_float, True),
+            ('timestamp', _to_datetime, False)
+        ]
+    },
+    'agriculture': {
+        'backend': 'postgres',
+        'table': 'agriculture_data',
+        'columns': [
+            ('region_id', _to_int, True),
+            ('crop_type', _to_str, True),
+            ('yield', _to_float, True),
+            ('season', _to_str, True),
+            ('year', _to_int, True)
+        ],
+        'choices': {'season': {'Spring', 'Summer', 'Fall', 'Winter'}}
+    },
+    'biodiversity': {
+        'backend': 'mongo',
+        'table': 'Biodiversity_Data',
+        'prepare': prepare_biodiversity,
+        'columns': [
+            ('biodiversity_id', _to_str, False),
+            ('region_id', _to_int, True),
+            ('region_name', _to_str, False),
+            ('species_count', _to_int, True),
+            ('endangered_species', _to_list, False),
+            ('dominant_flora', _to_list, False),
+            ('conservation_status', _to_str, True),
+            ('last_survey_date', _to_datetime, False)
+        ]
+    },
+    'air_quality': {
+        'backend': 'mongo',
+        'table': 'Air_Quality_History',
+        'prepare': prepare_air_quality,
+        'columns': [
+            ('air_quality_id', _to_str, False),
+            ('region_id', _to_int, True),
+            ('region_name', _to_str, False),
+            ('aqi', _to_int, True),
+            ('air_quality_level', _to_str, False),
+            ('co2', _to_float, False),
+            ('pm2_5', _to_float, False),
+            ('pm10', _to_float, False),
+            ('no2', _to_float, False),
+            ('so2', _to_float, False),
+            ('o3', _to_float, False),
+            ('recorded_at', _to_datetime, False)
+        ]
+    }
+}
+
+
+# ========================================
+# Streaming Readers
+# ========================================
+def _iter_csv(path, progress):
+    """Yield the header then each row of a CSV file, reporting bytes read"""
+    with open(path, 'rb') as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        for line_no, row in enumerate(csv.reader(text)):
+            if line_no % 1000 == 0:
+                progress(raw.tell())
+            yield row
+        progress(raw.tell())
+
+
+def _iter_excel(path, progress):
+    """Yield the header then each row of the first worksheet (read-only mode)"""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row or 0
+        size = os.path.getsize(path)
+        for line_no, row in enumerate(sheet.iter_rows(values_only=True)):
+            # Bytes are not observable in read-only mode; estimate from rows
+            if total and line_no % 1000 == 0:
+                progress(int(size * line_no / total))
+            yield list(row)
+        progress(size)
+    finally:
+        workbook.close()
+
+
+# ========================================
+# Ingestion Jobs
+# ========================================
+class IngestionJob:
+    """
+    One upload being loaded in the background.
+    The uploaded file is spooled to disk first so parsing never
+    holds more than one chunk of rows in memory.
+    """
+
+    def __init__(self, dataset, path, filename, file_format, user_id):
+        self.job_id = uuid.uuid4().hex
+        self.dataset = dataset
+        self.spec = DATASETS[dataset]
+        self.path = path
+        self.filename = filename
+        self.file_format = file_format
+        self.user_id = user_id
+        self.status = {
+            'job_id': self.job_id,
+            'dataset': dataset,
+            'filename': filename,
+            'state': 'queued',
+            'bytes_total': os.path.getsize(path),
+            'bytes_read': 0,
+            'rows_read': 0,
+            'rows_loaded': 0,
+            'rows_rejected': 0,
+            'errors': [],
+            'errors_truncated': False,
+            'created_at': datetime.utcnow().isoformat(),
+            'finished_at': None
+        }
+        self._postgres = PostgresDB()  # own connection; jobs run off the request thread
+
+    def snapshot(self):
+        """Copy of the job status for the status endpoint"""
+        with _jobs_lock:
+            status = dict(self.status)
+            status['errors'] = list(self.status['errors'])
+        total = status['bytes_total']
+        status['progress'] = round(status['bytes_read'] / total, 4) if total else 1.0
+        return status
+
+    def _update(self, **changes):
+        with _jobs_lock:
+            for key, value in changes.items():
+                if key in ('rows_read', 'rows_loaded', 'rows_rejected'):
+                    self.status[key] += value
+                else:
+                    self.status[key] = value
+
+    def _error(self, row_number, message):
+        with _jobs_lock:
+            self.status['rows_rejected'] += 1
+            if len(self.status['errors']) < INGESTION_CONFIG['max_reported_errors']:
+                self.status['errors'].append({'row': row_number, 'error': message})
+            else:
+                self.status['errors_truncated'] = True
+
+    def run(self):
+        """Parse, validate and load the file chunk by chunk"""
+        with _job_slots:
+            self._update(state='running')
+            try:
+                self._load()
+                self._update(state='completed')
+            except Exception as e:
+                log.error('ingestion.job_failed', job_id=self.job_id, error=str(e))
+                self._update(state='failed', error=str(e))
+            finally:
+                self._update(finished_at=datetime.utcnow().isoformat())
+                self._postgres.disconnect()
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+    def _load(self):
+        reader = _iter_excel if self.file_format == 'xlsx' else _iter_csv
+        rows = reader(self.path, lambda n: self._update(bytes_read=n))
+
+        header = next(rows, None)
+        if header is None:
+            raise ValueError('File is empty')
+        positions = {str(name).strip().lower(): i for i, name in enumerate(header) if name is not None}
+        missing = [name for name, _, required in self.spec['columns']
+                   if required and name not in positions]
+        if missing:
+            raise ValueError(f'Missing required columns: {", ".join(missing)}')
+        # Only columns present in the file are loaded; the rest take DB defaults
+        columns = [(name, coerce, required, positions[name])
+                   for name, coerce, required in self.spec['columns'] if name in positions]
+
+        chunk_rows = INGESTION_CONFIG['chunk_rows']
+        chunk, row_numbers = [], []
+        for row_number, raw_row in enumerate(rows, start=2):
+            if not any(cell not in (None, '') for cell in raw_row):
+                continue  # blank line
+            self._update(rows_read=1)
+            try:
+                chunk.append(self._coerce(raw_row, columns))
+                row_numbers.append(row_number)
+            except ValueError as e:
+                self._error(row_number, str(e))
+            if len(chunk) >= chunk_rows:
+                self._write_chunk(chunk, row_numbers, columns)
+                chunk, row_numbers = [], []
+        if chunk:
+            self._write_chunk(chunk, row_numbers, columns)
+
+    def _coerce(self, raw_row, columns):
+        """Validate one row and return a tuple of typed values"""
+        values = []
+        choices = self.spec.get('choices', {})
+        for name, coerce, required, position in columns:
+            cell = raw_row[position] if position < len(raw_row) else None
+            if cell is None or (isinstance(cell, str) and not cell.strip()):
+                if required:
+                    raise ValueError(f'Missing value for {name}')
+                values.append(None)
+                continue
+            try:
+                value = coerce(cell)
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid {name}: {cell!r}')
+            if name in choices and value not in choices[name]:
+                raise ValueError(f'Invalid {name}: {value!r}')
+            values.append(value)
+        return tuple(values)
+
+    def _write_chunk(self, chunk, row_numbers, columns):
+        names = [column[0] for column in columns]
+        try:
+            if self.spec['backend'] == 'postgres':
+                self._copy_chunk(chunk, row_numbers, names)
+            else:
+                self._insert_chunk(chunk, row_numbers, names)
+        finally:
+            dimensions.invalidate(self.spec['table'])
+
+    def _copy_chunk(self, chunk, row_numbers, names):
+        table = self.spec['table']
+        if table == 'climate_data':
+            self._ensure_partitions(chunk, names)
+        if self._postgres.copy_rows(table, names, chunk):
+            self._update(rows_loaded=len(chunk))
+            return
+        if not self._postgres.test_connection():
+            raise ConnectionError('PostgreSQL unavailable')
+        # COPY is all-or-nothing; find the offending rows one at a time
+        query = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+        for values, row_number in zip(chunk, row_numbers):
+            if self._postgres.execute_update(query, values):
+                self._update(rows_loaded=1)
+            else:
+                self._error(row_number, 'Rejected by PostgreSQL (check region_id exists)')
+
+    def _ensure_partitions(self, chunk, names):
+        """Create the monthly partitions the chunk's timestamped rows land in"""
+        column = names.index('timestamp')
+        months = {values[column].date().replace(day=1) for values in chunk if values[column] is not None}
+        if not climate_partitions.ensure_months(months):
+            raise ConnectionError('PostgreSQL unavailable')
+
+    def _insert_chunk(self, chunk, row_numbers, names):
+        received_at = datetime.utcnow()
+        prepare = self.spec['prepare']
+        documents = []
+        for values in chunk:
+            data = {name: value for name, value in zip(names, values) if value is not None}
+            documents.append(prepare(data, received_at, client_timestamps=True))
+        result = db_manager.mongo.insert_many(self.spec['table'], documents)
+        if result is None:
+            raise ConnectionError('MongoDB unavailable')
+        self._update(rows_loaded=result['inserted'] + result['unacknowledged'])
+        for err in result['errors']:
+            self._error(row_numbers[err['index']], err['error'])
+        # Failures past the database's reporting cap still count as rejected rows
+        unreported = result['failed'] - len(result['errors'])
+        if unreported > 0:
+            with _jobs_lock:
+                self.status['rows_rejected'] += unreported
+                self.status['errors_truncated'] = True
+        written = written_documents(documents, result)
+        rollups.record(self.spec['table'], written)
+        region_summary.record(self.spec['table'], written)
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_job_slots = threading.Semaphore(INGESTION_CONFIG['max_concurrent_jobs'])
+
+
+def start_ingestion(dataset, stream, filename, user_id):
+    """
+    Spool an upload to disk and load it in a background thread.
+
+    Args:
+        dataset (str): Key of DATASETS
+        stream: Binary file-like object with the upload
+        filename (str): Original file name (.csv, .xlsx)
+        user_id (int): Uploading user
+
+    Returns:
+        IngestionJob: The queued job
+
+    Raises:
+        ValueError: Unknown dataset or unsupported file type
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown dataset: {dataset}. Must be one of: {", ".join(DATASETS)}')
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        if openpyxl is None:
+            raise ValueError('Excel uploads require the openpyxl package')
+        file_format = 'xlsx'
+    elif extension in ('.csv', '.txt', ''):
+        file_format = 'csv'
+    else:
+        raise ValueError(f'Unsupported file type: {extension}')
+
+    os.makedirs(INGESTION_CONFIG['upload_dir'], exist_ok=True)
+    path = os.path.join(INGESTION_CONFIG['upload_dir'], f'{uuid.uuid4().hex}.{file_format}')
+    with open(path, 'wb') as out:
+        while True:
+            block = stream.read(1024 * 1024)
+            if not block:
+                break
+            out.write(block)
+
+    job = IngestionJob(dataset, path, filename, file_format, user_id)
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+        # Forget the oldest finished jobs
+        finished = [j for j in _jobs.values() if j.status['finished_at']]
+        for old in finished[:max(0, len(_jobs) - INGESTION_CONFIG['jobs_retained'])]:
+            del _jobs[old.job_id]
+    threading.Thread(target=job.run, name=f'ingest-{job.job_id[:8]}', daemon=True).start()
+    return job
+
+
+def get_job(job_id):
+    """Return a job by id, or None"""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs(user_id=None):
+    """Status of recent jobs, optionally only those of one user"""
+    with _jobs_lock:
+        jobs = [j for j in _jobs.values() if user_id is None or j.user_id == user_id]
+    return [job.snapshot() for job in jobs]
@@ -7,6 +7,12 @@ import os
 import json
 from groq import Groq
 from config import GROQ_API_KEY
+from sensor_parquet import sensor_readings_table
+from metrics import timed
+from tracing import span
+from structured_log import get_logger
+
+log = get_logger('llm')
 
 class LLMQueryConverter:
     """
@@ -27,11 +33,54 @@ class LLMQueryConverter:
         if self.api_key:
             self.client = Groq(api_key=self.api_key)
         
-        # Database schema context
+        # Database schema context (rebuilt when the sensor source changes)
+        self._sensor_table = sensor_readings_table()
         self.schema_context = self._build_schema_context()
     
     def _build_schema_context(self):
         """Build comprehensive schema context for the LLM"""
+        return (self._schema_template()
+                .replace('{sensor_section}', self._sensor_section())
+                .replace('{sensor_table}', self._sensor_table))
+    
+    def _current_schema_context(self):
+        """Schema context for the sensor source Drill serves right now"""
+        table = sensor_readings_table()
+        if table != self._sensor_table:
+            self._sensor_table = table
+            self.schema_context = self._build_schema_context()
+        return self.schema_context
+    
+    def _sensor_section(self):
+        """Describe the sensor readings source Drill currently serves (CSV, CSV plus increments or typed Parquet)"""
+        table = self._sensor_table
+        if table.startswith('('):
+            return f"""## CSV Files (prefix: dfs.data.`filename.csv`):
+
+### 1. Sensor readings (sensor_readings.csv plus newly ingested readings)
+Always read sensor readings through this derived table, never from the files directly:
+{table}
+Columns: timestamp (String), region_id (String), co2_level (String), pm2_5 (String)
+Description: Real-time CO2 and particulate matter readings
+Note: Cast region_id to INT, co2_level and pm2_5 to FLOAT for calculations
+Example: SELECT CAST(s.region_id AS INT) AS region_id, AVG(CAST(s.co2_level AS FLOAT)) AS avg_co2 FROM {table} s GROUP BY CAST(s.region_id AS INT)"""
+        if table.endswith('.csv`'):
+            return """## CSV Files (prefix: dfs.data.`filename.csv`):
+
+### 1. sensor_readings.csv
+Columns: timestamp (String), region_id (String), co2_level (String), pm2_5 (String)
+Description: Real-time CO2 and particulate matter readings
+Note: Cast region_id to INT, co2_level and pm2_5 to FLOAT for calculations
+Example: CAST(s.region_id AS INT), CAST(s.co2_level AS FLOAT)"""
+        return f"""## Sensor Readings (prefix: dfs.data.`folder`):
+
+### 1. {table}
+Columns: timestamp (TIMESTAMP), reading_date (DATE), region_id (INT), co2_level (FLOAT), pm2_5 (FLOAT)
+Description: Real-time CO2 and particulate matter readings stored as typed Parquet
+Note: Columns are already typed; no CAST is needed. Filter on reading_date or region_id where possible
+Example: SELECT region_id, AVG(co2_level) FROM {table} WHERE reading_date >= DATE '2024-03-01' GROUP BY region_id"""
+    
+    def _schema_template(self):
         return """
 # FEDERATED DATABASE SCHEMA
 
@@ -70,6 +119,14 @@ Description: System users with authentication
 Columns: query_id (INT), user_id (INT FK→user_info), query_text (TEXT), executed_at (TIMESTAMP)
 Description: Audit trail of executed queries
 
+### 6. region_summary (materialized, kept current on insert)
+Columns: region_id (INT FK→region_info), climate_count (BIGINT), temperature_sum, rainfall_sum (DECIMAL), latest_temperature, latest_rainfall, latest_humidity (DECIMAL), latest_climate_at (TIMESTAMP), species_count (INT), conservation_status (VARCHAR), biodiversity_survey_date (TIMESTAMP), updated_at (TIMESTAMP)
+Description: One row per region. Average temperature = temperature_sum / climate_count. **Prefer this over joining climate_data + Biodiversity_Data for per-region overviews.**
+
+### 7. region_yield_summary
+Columns: region_id (INT), year (INT), total_yield (DECIMAL tons), record_count (INT)
+Description: Total crop yield per region and year
+
 ## MongoDB Collections (prefix: mongo.environmental_db.`CollectionName`):
 
 ### 1. Biodiversity_Data
@@ -95,13 +152,16 @@ Description: Detailed species information.
 Fields: sensor_id, sensor_type, location_name, region_id (INT), installation_date (Date), status, last_maintenance (Date)
 Description: IoT sensor device information
 
-## CSV Files (prefix: dfs.data.`filename.csv`):
+### 6. Air_Quality_Rollups_Hourly / Air_Quality_Rollups_Daily
+Fields: region_id (INT), period_start (Date, start of the hour/day), count (INT), aqi_count, aqi_sum, aqi_min, aqi_max, pm2_5_count, pm2_5_sum, pm2_5_min, pm2_5_max, co2_count, co2_sum, co2_min, co2_max, last_at (Date), last_aqi, last_pm2_5, last_air_quality_level
+Description: Pre-aggregated Air_Quality_History per region. Average = <metric>_sum / <metric>_count.
+**Prefer these over Air_Quality_History for averages or trends over time.**
 
-### 1. sensor_readings.csv
-Columns: timestamp (String), region_id (String), co2_level (String), pm2_5 (String)
-Description: Real-time CO2 and particulate matter readings
-Note: Cast region_id to INT, co2_level and pm2_5 to FLOAT for calculations
-Example: CAST(s.region_id AS INT), CAST(s.co2_level AS FLOAT)
+### 7. Sensor_Log_Rollups_Hourly / Sensor_Log_Rollups_Daily
+Fields: region_id (INT), period_start (Date), count (INT), severity_info, severity_warning, severity_critical, severity_other (INT), last_at (Date), last_event_type, last_severity, last_sensor_id
+Description: Sensor_Logs event counts per region and hour/day
+
+{sensor_section}
 
 ## Query Syntax Rules:
 
@@ -121,7 +181,7 @@ Example: CAST(s.region_id AS INT), CAST(s.co2_level AS FLOAT)
    FROM postgres.public.`region_info` r
    JOIN postgres.public.`climate_data` c ON r.region_id = c.region_id
    JOIN mongo.environmental_db.`Biodiversity_Data` b ON r.region_id = b.region_id
-   JOIN dfs.data.`sensor_readings.csv` s ON CAST(s.region_id AS INT) = r.region_id
+   JOIN {sensor_table} s ON CAST(s.region_id AS INT) = r.region_id
    ```
 
 4. **Aggregations**: Use GROUP BY with aggregate functions (AVG, SUM, COUNT, MAX, MIN)
@@ -170,12 +230,13 @@ Example: CAST(s.region_id AS INT), CAST(s.co2_level AS FLOAT)
         
         return self._convert_with_llm(natural_query)
     
+    @timed('llm', 'convert', is_failure=lambda result: result['method'] == 'error')
     def _convert_with_llm(self, natural_query):
         """Use Groq Qwen to convert natural language to SQL"""
         try:
             prompt = f"""You are a SQL expert specializing in federated database queries using Apache Drill.
 
-{self.schema_context}
+{self._current_schema_context()}
 
 USER QUESTION: "{natural_query}"
 
@@ -241,25 +302,28 @@ IMPORTANT: Return ONLY the SQL query. Do NOT include any thinking process, expla
 
 SQL Query:"""
 
-            completion = self.client.chat.completions.create(
-                model="qwen/qwen3-32b",
-                messages=[
-                    {"role": "system", "content": "You are a SQL expert. Generate only valid SQL queries without explanations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.6,
-                max_completion_tokens=4096,
-                top_p=0.95,
-                reasoning_effort="default",
-                stream=True,
-                stop=None
-            )
+            # groq-request: until response headers arrive; groq-stream: generated tokens
+            with span('groq-request'):
+                completion = self.client.chat.completions.create(
+                    model="qwen/qwen3-32b",
+                    messages=[
+                        {"role": "system", "content": "You are a SQL expert. Generate only valid SQL queries without explanations."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.6,
+                    max_completion_tokens=4096,
+                    top_p=0.95,
+                    reasoning_effort="default",
+                    stream=True,
+                    stop=None
+                )
             
             # Collect streaming response
             sql_query = ""
-            for chunk in completion:
-                if chunk.choices[0].delta.content:
-                    sql_query += chunk.choices[0].delta.content
+            with span('groq-stream'):
+                for chunk in completion:
+                    if chunk.choices[0].delta.content:
+                        sql_query += chunk.choices[0].delta.content
             
             sql_query = sql_query.strip()
             
@@ -300,7 +364,7 @@ SQL Query:"""
             }
             
         except Exception as e:
-            print(f"LLM conversion error: {e}")
+            log.error('llm.convert_failed', error=str(e), natural_query=natural_query)
             return {
                 'sql': '',
                 'confidence': 0.0,
@@ -350,7 +414,7 @@ SQL Query:"""
         
         if 'sensor' in query_lower or 'co2' in query_lower:
             return {
-                'sql': 'SELECT * FROM dfs.data.`sensor_readings.csv` LIMIT 10',
+                'sql': f'SELECT * FROM {sensor_readings_table()} LIMIT 10',
                 'confidence': 0.7,
                 'interpretation': 'Showing sensor readings',
                 'method': 'pattern'
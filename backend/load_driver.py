@@ -0,0 +1,238 @@
+# ========================================
+# Concurrent Load Driver
+# Simulated users log in, then loop over a weighted mix of requests
+# against a running app (real backends or `python standins.py serve`):
+#   federated   POST /api/federated-query   workload queries
+#   natural     POST /api/natural-query     sample questions
+#   climate     POST /api/insert-climate
+#   sensor-log  POST /api/insert-sensor-log
+#   air-quality POST /api/insert-air-quality
+#
+# Reports throughput, p50 / p95 / p99 latency and errors per endpoint
+# (and overall); --json writes the same report for later comparison.
+#
+# Usage:
+#   python load_driver.py --users 20 --duration 60
+#   python load_driver.py --mix federated=6,natural=1,climate=1,sensor-log=2 --json load.json
+# ========================================
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+import requests
+from benchmark import percentile, workload_queries
+
+QUESTIONS = [
+    'What is the average temperature in each region?',
+    'Which regions have endangered species?',
+    'Show the latest air quality readings by region',
+    'Compare crop yield with rainfall for every region',
+    'List sensors with critical log events',
+    'How many species are recorded per region?'
+]
+
+DEFAULT_MIX = {'federated': 6, 'natural': 1, 'climate': 1, 'sensor-log': 1, 'air-quality': 1}
+
+
+def _climate(rng):
+    return '/api/insert-climate', {
+        'region_id': rng.randint(1, 10),
+        'temperature': round(rng.uniform(-10, 40), 1),
+        'rainfall': round(rng.uniform(0, 300), 1),
+        'humidity': round(rng.uniform(10, 100), 1)
+    }
+
+
+def _sensor_log(rng):
+    return '/api/insert-sensor-log', {
+        'sensor_id': f'SENS_{rng.randint(1, 10):05d}',
+        'region_id': rng.randint(1, 10),
+        'event_type': rng.choice(['reading', 'maintenance', 'alert']),
+        'severity': rng.choice(['info', 'info', 'warning', 'critical']),
+        'message': 'load driver event'
+    }
+
+
+def _air_quality(rng):
+    return '/api/insert-air-quality', {
+        'region_id': rng.randint(1, 10),
+        'aqi': rng.randint(10, 300),
+        'pollutants': {'co2': round(rng.uniform(380, 480), 1), 'pm2_5': round(rng.uniform(1, 80), 1)},
+        'air_quality_level': rng.choice(['Good', 'Moderate', 'Unhealthy'])
+    }
+
+
+class LoadDriver:
+    """Runs simulated users and collects per-endpoint latencies"""
+
+    def __init__(self, base_url, email, password, mix, queries, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.email = email
+        self.password = password
+        self.mix = mix
+        self.queries = queries
+        self.timeout = timeout
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def _request(self, rng, kind):
+        if kind == 'federated':
+            return '/api/federated-query', {'query': rng.choice(self.queries)['query']}
+        if kind == 'natural':
+            return '/api/natural-query', {'question': rng.choice(QUESTIONS)}
+        return {'climate': _climate, 'sensor-log': _sensor_log, 'air-quality': _air_quality}[kind](rng)
+
+    def _record(self, kind, elapsed_ms, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies.setdefault(kind, []).append(elapsed_ms)
+            else:
+                errors = self.errors.setdefault(kind, {})
+                errors[error] = errors.get(error, 0) + 1
+
+    def _timed(self, kind, http, path, payload):
+        started = time.perf_counter()
+        try:
+            response = http.post(f'{self.base_url}{path}', json=payload, timeout=self.timeout)
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                self._record(kind, elapsed, f'HTTP {response.status_code}')
+            else:
+                self._record(kind, elapsed)
+            return response
+        except requests.RequestException as e:
+            self._record(kind, None, type(e).__name__)
+            return None
+
+    def user(self, index, deadline):
+        rng = random.Random(index)
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        http = requests.Session()
+        response = self._timed('login', http, '/api/login', {'email': self.email, 'password': self.password})
+        if response is None or response.status_code != 200:
+            return
+        while time.monotonic() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            path, payload = self._request(rng, kind)
+            self._timed(kind, http, path, payload)
+
+    def run(self, users, duration, ramp_up=0.0):
+        """
+        Run `users` concurrent users for `duration` seconds.
+
+        Returns:
+            dict: Report with per-endpoint and overall summaries
+        """
+        started = time.monotonic()
+        deadline = started + duration
+        threads = []
+        for index in range(users):
+            thread = threading.Thread(target=self.user, args=(index, deadline), daemon=True)
+            thread.start()
+            threads.append(thread)
+            if ramp_up:
+                time.sleep(ramp_up / users)
+        for thread in threads:
+            thread.join()
+        wall = time.monotonic() - started
+
+        endpoints = {kind: self._summary(self.latencies.get(kind, []), self.errors.get(kind, {}), wall)
+                     for kind in sorted(set(self.latencies) | set(self.errors))}
+        all_latencies = [ms for kind, values in self.latencies.items() if kind != 'login' for ms in values]
+        all_errors = {}
+        for kind, errors in self.errors.items():
+            if kind == 'login':
+                continue
+            for error, count in errors.items():
+                all_errors[f'{kind}: {error}'] = count
+        return {
+            'created_at': datetime.utcnow().isoformat() + 'Z',
+            'base_url': self.base_url,
+            'users': users,
+            'duration_s': round(wall, 2),
+            'mix': self.mix,
+            'overall': self._summary(all_latencies, all_errors, wall),
+            'endpoints': endpoints
+        }
+
+    @staticmethod
+    def _summary(latencies, errors, wall):
+        summary = {
+            'requests': len(latencies) + sum(errors.values()),
+            'errors': sum(errors.values()),
+            'throughput_rps': round(len(latencies) / wall, 2) if wall else None
+        }
+        if errors:
+            summary['error_types'] = errors
+        if latencies:
+            summary.update({
+                'p50_ms': round(percentile(latencies, 50), 1),
+                'p95_ms': round(percentile(latencies, 95), 1),
+                'p99_ms': round(percentile(latencies, 99), 1),
+                'max_ms': round(max(latencies), 1)
+            })
+        return summary
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"unknown request type '{kind}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive concurrent load against the API')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--ramp-up', type=float, default=0, help='seconds to start all users')
+    parser.add_argument('--email', default='admin@example.com')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--mix', help=f"weights, e.g. {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}")
+    parser.add_argument('--filter', help='only workload queries whose name contains this text')
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args()
+
+    try:
+        mix = _parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    except ValueError as e:
+        parser.error(str(e))
+    queries = workload_queries(args.filter)
+    if not queries:
+        parser.error('no queries matched')
+
+    driver = LoadDriver(args.url, args.email, args.password, mix, queries)
+    report = driver.run(args.users, args.duration, args.ramp_up)
+
+    print(f"{args.users} users, {report['duration_s']} s against {args.url}")
+    print(f"{'Endpoint':<12} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for kind, summary in list(report['endpoints'].items()) + [('overall', report['overall'])]:
+        percentiles = ''.join(f"{summary[key]:>10.1f}" if key in summary else f"{'-':>10}"
+                              for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f"{kind:<12} {summary['requests']:>9} {summary['errors']:>7} "
+              f"{summary['throughput_rps'] or 0:>8.1f}{percentiles}")
+        for error, count in summary.get('error_types', {}).items():
+            if kind != 'overall':
+                print(f"{'':14}{count} x {error}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+    # Nothing measured (e.g. every login failed) is a failed run
+    sys.exit(1 if 'p50_ms' not in report['overall'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+# ========================================
+# Metrics (Prometheus text format)
+# Counters, gauges and histograms kept in process memory and rendered
+# by GET /metrics. No client library needed; the exposition format is
+# https://prometheus.io/docs/instrumenting/exposition_formats/
+#
+# Instrumented:
+#   HTTP requests          instrument_flask(app): per-route latency, status, bytes
+#   Database / LLM calls   @timed(backend, operation) on PostgresDB, MongoDB,
+#                          DrillDB and LLMQueryConverter methods
+#   Components             add_collector(fn) for stats kept elsewhere
+#
+# @timed calls also appear as '<backend>-<operation>' request phases
+# (tracing.py).
+# ========================================
+
+import functools
+import inspect
+import threading
+import time
+from tracing import span
+
+# Seconds; covers cached lookups through multi-second federated queries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_collectors = []
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f'{self.name} expects labels {self.label_names}')
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def _render_sample(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state['counts']):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, f'le="{_format_value(float(bound))}"')
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.label_names, key, 'le="+Inf"')
+        lines.append(f'{self.name}_bucket{labels} {state["count"]}')
+        plain = _format_labels(self.label_names, key)
+        lines.append(f'{self.name}_sum{plain} {_format_value(state["sum"])}')
+        lines.append(f'{self.name}_count{plain} {state["count"]}')
+        return lines
+
+
+# ----------------------------------------
+# Standard metrics
+# ----------------------------------------
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests handled', ('method', 'route', 'status'))
+HTTP_DURATION = Histogram('http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests being handled')
+HTTP_RESPONSE_BYTES = Counter('http_response_bytes_total', 'HTTP response body bytes', ('route',))
+
+BACKEND_DURATION = Histogram('backend_call_duration_seconds', 'Database / LLM call latency', ('backend', 'operation'))
+BACKEND_IN_FLIGHT = Gauge('backend_calls_in_flight', 'Database / LLM calls in progress', ('backend',))
+BACKEND_ERRORS = Counter('backend_call_errors_total', 'Failed database / LLM calls', ('backend', 'operation'))
+BACKEND_ROWS = Counter('backend_rows_returned_total', 'Rows / documents returned by reads', ('backend', 'operation'))
+BACKEND_BYTES = Counter('backend_response_bytes_total', 'Response bytes received from a backend', ('backend',))
+
+
+def _result_rows(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict) and isinstance(result.get('rows'), list):
+        return len(result['rows'])
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], list):
+        return len(result[1])  # a (columns, rows) batch
+    return None
+
+
+def _is_failure(result):
+    # Repo convention: methods catch errors and return None / False / {'success': False}
+    return result is None or result is False or (isinstance(result, dict) and result.get('success') is False)
+
+
+def timed(backend, operation, is_failure=_is_failure):
+    """
+    Decorator recording latency, in-flight calls, failures and rows returned.
+    Generator functions are timed from the first next() until they finish
+    or are closed, and rows are summed over the yielded batches.
+
+    Args:
+        backend (str): 'postgres', 'mongo', 'drill' or 'llm'
+        operation (str): Method label, e.g. 'execute_query'
+        is_failure (callable): is_failure(result) -> True if the call failed
+    """
+    def decorator(function):
+        if inspect.isgeneratorfunction(function):
+            return _timed_generator(function, backend, operation)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            BACKEND_IN_FLIGHT.inc(backend=backend)
+            started = time.perf_counter()
+            failed = True
+            try:
+                with span(f'{backend}-{operation}'):
+                    result = function(*args, **kwargs)
+                failed = is_failure(result)
+                rows = _result_rows(result)
+                if rows:
+                    BACKEND_ROWS.inc(rows, backend=backend, operation=operation)
+                return result
+            finally:
+                BACKEND_IN_FLIGHT.dec(backend=backend)
+                BACKEND_DURATION.observe(time.perf_counter() - started, backend=backend, operation=operation)
+                if failed:
+                    BACKEND_ERRORS.inc(backend=backend, operation=operation)
+        return wrapper
+    return decorator
+
+
+def _timed_generator(function, backend, operation):
+    # No span: the generator yields to its caller, which must not run inside it
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        BACKEND_IN_FLIGHT.inc(backend=backend)
+        started = time.perf_counter()
+        failed = True
+        generator = function(*args, **kwargs)
+        try:
+            for item in generator:
+                rows = _result_rows(item)
+                if rows:
+                    BACKEND_ROWS.inc(rows, backend=backend, operation=operation)
+                yield item
+            failed = False
+        except GeneratorExit:
+            failed = False  # the consumer stopped early
+            raise
+        finally:
+            generator.close()
+            BACKEND_IN_FLIGHT.dec(backend=backend)
+            BACKEND_DURATION.observe(time.perf_counter() - started, backend=backend, operation=operation)
+            if failed:
+                BACKEND_ERRORS.inc(backend=backend, operation=operation)
+    return wrapper
+
+
+def instrument_flask(app):
+    """Register request hooks recording per-route latency, status codes and response size"""
+    from flask import g, request
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _metrics_record(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_DURATION.observe(time.perf_counter() - started, method=request.method, route=route)
+            HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+            if response.content_length:
+                HTTP_RESPONSE_BYTES.inc(response.content_length, route=route)
+        return response
+
+    @app.teardown_request
+    def _metrics_done(error=None):
+        HTTP_IN_FLIGHT.dec()
+
+
+def add_collector(collect):
+    """
+    Register collect() -> [(name, type, help, [(labels dict, value), ...]), ...],
+    called at scrape time for numbers kept by other components.
+    """
+    with _lock:
+        _collectors.append(collect)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        metrics = list(_registry)
+        collectors = list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collect in collectors:
+        try:
+            families = collect()
+        except Exception as e:
+            print(f"Metrics Collector Error: {e}")
+            continue
+        for name, kind, documentation, samples in families:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if value is None:
+                    continue
+                names = sorted(labels)
+                lines.append(f'{name}{_format_labels(names, [labels[n] for n in names])} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,573 @@
+# ========================================
+# Versioned PostgreSQL Schema Migrations
+# Applies numbered migrations once and records them in schema_migrations.
+#
+# Usage:
+#   python migrations.py status
+#   python migrations.py migrate [target_version]
+# ========================================
+
+import sys
+import time
+from config import MIGRATIONS_CONFIG
+from database import PostgresDB
+
+# Arbitrary constant for pg_advisory_lock so only one process migrates at a time
+_MIGRATION_LOCK_ID = 482913
+
+
+def _index_on(table, statement):
+    """
+    A CONCURRENTLY index statement on `table` that runs without CONCURRENTLY
+    once the table is partitioned (migration 2): PostgreSQL cannot create or
+    drop indexes concurrently on a partitioned parent.
+    """
+    return {'table': table, 'sql': statement}
+
+
+# Each migration: version, name, statements to apply, statements to revert
+# ('down': None marks a migration that cannot be reverted).
+# Non-transactional migrations run in autocommit mode, which
+# CREATE INDEX CONCURRENTLY requires (it does not block writes).
+MIGRATIONS = [
+    {
+        'version': 1,
+        'name': 'federated_join_indexes',
+        'transactional': False,
+        'up': [
+            # FK / join columns pushed down by Drill's JDBC plugin
+            _index_on('climate_data', "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_climate_data_region_ts "
+                                      "ON climate_data (region_id, timestamp DESC)"),
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agriculture_data_region "
+            "ON agriculture_data (region_id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_query_log_user "
+            "ON query_log (user_id)",
+            # Append-only time series: a BRIN index stays tiny and prunes block ranges
+            _index_on('climate_data', "CREATE INDEX CONCURRENTLY IF NOT EXISTS brin_climate_data_timestamp "
+                                      "ON climate_data USING brin (timestamp)"),
+            # Common filter / grouping columns
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agriculture_data_year_season "
+            "ON agriculture_data (year, season)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agriculture_data_crop "
+            "ON agriculture_data (crop_type)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_query_log_executed_at "
+            "ON query_log (executed_at DESC)",
+            "ANALYZE climate_data",
+            "ANALYZE agriculture_data",
+            "ANALYZE query_log"
+        ],
+        'down': [
+            _index_on('climate_data', "DROP INDEX CONCURRENTLY IF EXISTS idx_climate_data_region_ts"),
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_agriculture_data_region",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_query_log_user",
+            _index_on('climate_data', "DROP INDEX CONCURRENTLY IF EXISTS brin_climate_data_timestamp"),
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_agriculture_data_year_season",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_agriculture_data_crop",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_query_log_executed_at"
+        ]
+    },
+    {
+        'version': 2,
+        'name': 'partition_climate_data_by_month',
+        'transactional': True,
+        'up': [
+            "ALTER TABLE climate_data RENAME TO climate_data_unpartitioned",
+            """
+            CREATE TABLE climate_data (
+                climate_id INTEGER NOT NULL DEFAULT nextval('climate_data_climate_id_seq'),
+                region_id INTEGER NOT NULL REFERENCES region_info(region_id) ON DELETE CASCADE,
+                temperature DECIMAL(5, 2) NOT NULL,
+                rainfall DECIMAL(6, 2) NOT NULL,
+                humidity DECIMAL(5, 2) NOT NULL,
+                timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (climate_id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+            """,
+            "ALTER SEQUENCE climate_data_climate_id_seq OWNED BY climate_data.climate_id",
+            # Rows outside every monthly partition land here instead of failing
+            "CREATE TABLE climate_data_default PARTITION OF climate_data DEFAULT",
+            # Creates one monthly partition; rows already sitting in the default
+            # partition for that month are moved into it
+            """
+            CREATE OR REPLACE FUNCTION climate_data_ensure_partition(month_start DATE)
+            RETURNS TEXT AS $$
+            DECLARE
+                range_start DATE := date_trunc('month', month_start)::DATE;
+                range_end DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::DATE;
+                partition_name TEXT := 'climate_data_' || to_char(month_start, 'YYYY_MM');
+            BEGIN
+                IF to_regclass(partition_name) IS NOT NULL THEN
+                    RETURN partition_name;
+                END IF;
+                CREATE TEMP TABLE climate_data_moved ON COMMIT DROP AS
+                    SELECT * FROM climate_data_default
+                    WHERE "timestamp" >= range_start AND "timestamp" < range_end;
+                DELETE FROM climate_data_default
+                    WHERE "timestamp" >= range_start AND "timestamp" < range_end;
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF climate_data FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, range_start, range_end
+                );
+                INSERT INTO climate_data SELECT * FROM climate_data_moved;
+                DROP TABLE climate_data_moved;
+                RETURN partition_name;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            SELECT climate_data_ensure_partition(month::DATE)
+            FROM generate_series(
+                date_trunc('month', COALESCE((SELECT MIN("timestamp") FROM climate_data_unpartitioned), now())),
+                date_trunc('month', now()) + INTERVAL '3 months',
+                INTERVAL '1 month'
+            ) AS month
+            """,
+            """
+            INSERT INTO climate_data (climate_id, region_id, temperature, rainfall, humidity, timestamp)
+            SELECT climate_id, region_id, temperature, rainfall, humidity, COALESCE(timestamp, now())
+            FROM climate_data_unpartitioned
+            """,
+            "DROP TABLE climate_data_unpartitioned",
+            # Indexes on the parent are created on every partition, including
+            # future ones: per-partition BRIN plus the region/time btree
+            "CREATE INDEX idx_climate_data_region_ts ON climate_data (region_id, timestamp DESC)",
+            "CREATE INDEX brin_climate_data_timestamp ON climate_data USING brin (timestamp)",
+            "ANALYZE climate_data"
+        ],
+        # Irreversible: later migrations attach triggers to the partitioned
+        # table, and partitions.py may have detached or dropped partitions
+        'down': None
+    },
+    {
+        'version': 3,
+        'name': 'region_summary',
+        'transactional': True,
+        'up': [
+            # One row per region; averages are sum / count, kept incrementally
+            """
+            CREATE TABLE region_summary (
+                region_id INTEGER PRIMARY KEY REFERENCES region_info(region_id) ON DELETE CASCADE,
+                climate_count BIGINT NOT NULL DEFAULT 0,
+                temperature_sum DECIMAL(16, 2) NOT NULL DEFAULT 0,
+                rainfall_sum DECIMAL(18, 2) NOT NULL DEFAULT 0,
+                latest_temperature DECIMAL(5, 2),
+                latest_rainfall DECIMAL(6, 2),
+                latest_humidity DECIMAL(5, 2),
+                latest_climate_at TIMESTAMP,
+                species_count INTEGER,
+                conservation_status VARCHAR(50),
+                biodiversity_survey_date TIMESTAMP,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE region_yield_summary (
+                region_id INTEGER NOT NULL REFERENCES region_info(region_id) ON DELETE CASCADE,
+                year INTEGER NOT NULL,
+                total_yield DECIMAL(16, 2) NOT NULL DEFAULT 0,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (region_id, year)
+            )
+            """,
+            # Last full refresh per source; dirty = an update / delete (or a failed
+            # MongoDB sync) made the incremental numbers unreliable
+            """
+            CREATE TABLE region_summary_watermark (
+                source VARCHAR(30) PRIMARY KEY,
+                refreshed_at TIMESTAMP,
+                dirty BOOLEAN NOT NULL DEFAULT TRUE
+            )
+            """,
+            "INSERT INTO region_summary_watermark (source) VALUES ('climate'), ('agriculture'), ('biodiversity')",
+            # Statement-level triggers see every inserted row (routes, COPY,
+            # write-behind) through a transition table: one upsert per region
+            # per statement, in the inserting transaction
+            """
+            CREATE OR REPLACE FUNCTION region_summary_climate_insert() RETURNS TRIGGER AS $$
+            BEGIN
+                INSERT INTO region_summary AS s (
+                    region_id, climate_count, temperature_sum, rainfall_sum, latest_temperature,
+                    latest_rainfall, latest_humidity, latest_climate_at, updated_at
+                )
+                SELECT DISTINCT ON (region_id)
+                    region_id,
+                    COUNT(*) OVER w, SUM(temperature) OVER w, SUM(rainfall) OVER w,
+                    temperature, rainfall, humidity, "timestamp", now()
+                FROM new_rows
+                WINDOW w AS (PARTITION BY region_id)
+                ORDER BY region_id, "timestamp" DESC NULLS LAST
+                ON CONFLICT (region_id) DO UPDATE SET
+                    climate_count = s.climate_count + EXCLUDED.climate_count,
+                    temperature_sum = s.temperature_sum + EXCLUDED.temperature_sum,
+                    rainfall_sum = s.rainfall_sum + EXCLUDED.rainfall_sum,
+                    latest_temperature = CASE WHEN s.latest_climate_at IS NULL OR EXCLUDED.latest_climate_at >= s.latest_climate_at
+                        THEN EXCLUDED.latest_temperature ELSE s.latest_temperature END,
+                    latest_rainfall = CASE WHEN s.latest_climate_at IS NULL OR EXCLUDED.latest_climate_at >= s.latest_climate_at
+                        THEN EXCLUDED.latest_rainfall ELSE s.latest_rainfall END,
+                    latest_humidity = CASE WHEN s.latest_climate_at IS NULL OR EXCLUDED.latest_climate_at >= s.latest_climate_at
+                        THEN EXCLUDED.latest_humidity ELSE s.latest_humidity END,
+                    latest_climate_at = GREATEST(s.latest_climate_at, EXCLUDED.latest_climate_at),
+                    updated_at = now();
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION region_summary_agriculture_insert() RETURNS TRIGGER AS $$
+            BEGIN
+                INSERT INTO region_yield_summary AS y (region_id, year, total_yield, record_count)
+                SELECT region_id, year, SUM(yield), COUNT(*)
+                FROM new_rows
+                GROUP BY region_id, year
+                ON CONFLICT (region_id, year) DO UPDATE SET
+                    total_yield = y.total_yield + EXCLUDED.total_yield,
+                    record_count = y.record_count + EXCLUDED.record_count;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            # Updates and deletes cannot be folded in cheaply (latest values, sums)
+            """
+            CREATE OR REPLACE FUNCTION region_summary_mark_dirty() RETURNS TRIGGER AS $$
+            BEGIN
+                UPDATE region_summary_watermark SET dirty = TRUE WHERE source = TG_ARGV[0] AND NOT dirty;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER region_summary_climate_ins AFTER INSERT ON climate_data
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION region_summary_climate_insert()
+            """,
+            """
+            CREATE TRIGGER region_summary_agriculture_ins AFTER INSERT ON agriculture_data
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION region_summary_agriculture_insert()
+            """,
+            """
+            CREATE TRIGGER region_summary_climate_changed AFTER UPDATE OR DELETE ON climate_data
+            FOR EACH STATEMENT EXECUTE FUNCTION region_summary_mark_dirty('climate')
+            """,
+            """
+            CREATE TRIGGER region_summary_agriculture_changed AFTER UPDATE OR DELETE ON agriculture_data
+            FOR EACH STATEMENT EXECUTE FUNCTION region_summary_mark_dirty('agriculture')
+            """,
+            # Full recomputation of the PostgreSQL-sourced columns. The EXCLUSIVE
+            # lock makes concurrent inserts wait in their trigger, so their
+            # deltas land on top of the recomputed totals instead of being lost.
+            """
+            CREATE OR REPLACE FUNCTION region_summary_refresh() RETURNS VOID AS $$
+            BEGIN
+                LOCK TABLE region_summary, region_yield_summary IN EXCLUSIVE MODE;
+                INSERT INTO region_summary (region_id)
+                SELECT region_id FROM region_info
+                ON CONFLICT (region_id) DO NOTHING;
+                UPDATE region_summary s SET
+                    climate_count = COALESCE(c.climate_count, 0),
+                    temperature_sum = COALESCE(c.temperature_sum, 0),
+                    rainfall_sum = COALESCE(c.rainfall_sum, 0),
+                    latest_temperature = c.temperature,
+                    latest_rainfall = c.rainfall,
+                    latest_humidity = c.humidity,
+                    latest_climate_at = c."timestamp",
+                    updated_at = now()
+                FROM region_summary r
+                LEFT JOIN (
+                    SELECT DISTINCT ON (region_id)
+                        region_id,
+                        COUNT(*) OVER w AS climate_count,
+                        SUM(temperature) OVER w AS temperature_sum,
+                        SUM(rainfall) OVER w AS rainfall_sum,
+                        temperature, rainfall, humidity, "timestamp"
+                    FROM climate_data
+                    WINDOW w AS (PARTITION BY region_id)
+                    ORDER BY region_id, "timestamp" DESC NULLS LAST
+                ) c ON c.region_id = r.region_id
+                WHERE s.region_id = r.region_id;
+                DELETE FROM region_yield_summary;
+                INSERT INTO region_yield_summary (region_id, year, total_yield, record_count)
+                SELECT region_id, year, SUM(yield), COUNT(*)
+                FROM agriculture_data
+                GROUP BY region_id, year;
+                UPDATE region_summary_watermark SET refreshed_at = now(), dirty = FALSE
+                WHERE source IN ('climate', 'agriculture');
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            "SELECT region_summary_refresh()"
+        ],
+        'down': [
+            "DROP TRIGGER IF EXISTS region_summary_climate_ins ON climate_data",
+            "DROP TRIGGER IF EXISTS region_summary_agriculture_ins ON agriculture_data",
+            "DROP TRIGGER IF EXISTS region_summary_climate_changed ON climate_data",
+            "DROP TRIGGER IF EXISTS region_summary_agriculture_changed ON agriculture_data",
+            "DROP FUNCTION IF EXISTS region_summary_refresh()",
+            "DROP FUNCTION IF EXISTS region_summary_mark_dirty()",
+            "DROP FUNCTION IF EXISTS region_summary_agriculture_insert()",
+            "DROP FUNCTION IF EXISTS region_summary_climate_insert()",
+            "DROP TABLE IF EXISTS region_summary_watermark",
+            "DROP TABLE IF EXISTS region_yield_summary",
+            "DROP TABLE IF EXISTS region_summary"
+        ]
+    },
+    {
+        'version': 4,
+        'name': 'table_change_notify',
+        'transactional': True,
+        'up': [
+            # One NOTIFY per statement (not per row) on the 'table_changes'
+            # channel; identical payloads in a transaction are delivered once,
+            # at commit. Read by cdc.py to invalidate in-process caches.
+            """
+            CREATE OR REPLACE FUNCTION notify_table_change() RETURNS TRIGGER AS $$
+            BEGIN
+                PERFORM pg_notify('table_changes', json_build_object('table', TG_TABLE_NAME, 'operation', TG_OP)::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER region_info_notify AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON region_info
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change()
+            """,
+            # climate_data is partitioned (migration 2): statement triggers on the
+            # parent fire for statements issued against the parent
+            """
+            CREATE TRIGGER climate_data_notify AFTER INSERT OR UPDATE OR DELETE ON climate_data
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change()
+            """,
+            """
+            CREATE TRIGGER agriculture_data_notify AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON agriculture_data
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change()
+            """
+        ],
+        'down': [
+            "DROP TRIGGER IF EXISTS region_info_notify ON region_info",
+            "DROP TRIGGER IF EXISTS climate_data_notify ON climate_data",
+            "DROP TRIGGER IF EXISTS agriculture_data_notify ON agriculture_data",
+            "DROP FUNCTION IF EXISTS notify_table_change()"
+        ]
+    },
+    {
+        'version': 5,
+        'name': 'slow_query_log',
+        'transactional': True,
+        'up': [
+            # Queries over SLOW_QUERY_THRESHOLD_MS (slow_queries.py); profile holds
+            # the Drill profile summary (phase times, hottest operators)
+            """
+            CREATE TABLE IF NOT EXISTS slow_query_log (
+                slow_query_id BIGSERIAL PRIMARY KEY,
+                logged_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                user_id INTEGER REFERENCES user_info (user_id) ON DELETE SET NULL,
+                from_nl BOOLEAN NOT NULL DEFAULT FALSE,
+                path VARCHAR(20) NOT NULL,
+                success BOOLEAN NOT NULL,
+                duration_ms NUMERIC(12, 2) NOT NULL,
+                row_count INTEGER,
+                drill_query_id VARCHAR(64),
+                query_text TEXT NOT NULL,
+                profile JSONB
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_slow_query_log_duration ON slow_query_log (duration_ms DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_slow_query_log_logged_at ON slow_query_log (logged_at DESC)"
+        ],
+        'down': [
+            "DROP TABLE IF EXISTS slow_query_log"
+        ]
+    },
+    {
+        'version': 6,
+        'name': 'write_behind_watermark',
+        'transactional': True,
+        'up': [
+            # Highest write-behind log seq committed per kind, written in the
+            # same transaction as the rows so replays skip them (write_behind.py).
+            # log_id identifies one log directory: a fresh log restarts at seq 1.
+            """
+            CREATE TABLE IF NOT EXISTS write_behind_watermark (
+                log_id VARCHAR(32) NOT NULL,
+                kind VARCHAR(50) NOT NULL,
+                seq BIGINT NOT NULL,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (log_id, kind)
+            )
+            """
+        ],
+        'down': [
+            "DROP TABLE IF EXISTS write_behind_watermark"
+        ]
+    }
+]
+
+
+class MigrationRunner:
+    """
+    Applies pending migrations in version order.
+    Uses its own connection so autocommit mode never leaks into
+    the shared request connection.
+    """
+
+    def __init__(self, migrations=MIGRATIONS):
+        self.migrations = sorted(migrations, key=lambda m: m['version'])
+        self.postgres = PostgresDB()
+
+    def _connection(self):
+        if not self.postgres.connection or self.postgres.connection.closed:
+            if not self.postgres.connect():
+                raise ConnectionError('PostgreSQL unavailable')
+        return self.postgres.connection
+
+    def _ensure_table(self, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                duration_ms INTEGER
+            )
+        """)
+
+    @staticmethod
+    def _execute(cursor, statement):
+        if isinstance(statement, dict):
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (statement['table'],)
+            )
+            row = cursor.fetchone()
+            sql = statement['sql']
+            if row and row[0] == 'p':
+                sql = sql.replace(' CONCURRENTLY', '', 1)
+            cursor.execute(sql)
+        else:
+            cursor.execute(statement)
+
+    def applied_versions(self):
+        """Return the set of applied migration versions"""
+        conn = self._connection()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            self._ensure_table(cursor)
+            cursor.execute("SELECT version FROM schema_migrations")
+            return {row[0] for row in cursor.fetchall()}
+
+    def status(self):
+        """
+        Get the state of every known migration.
+
+        Returns:
+            list: [{'version': int, 'name': str, 'applied': bool}]
+        """
+        applied = self.applied_versions()
+        return [
+            {'version': m['version'], 'name': m['name'], 'applied': m['version'] in applied}
+            for m in self.migrations
+        ]
+
+    def migrate(self, target=None):
+        """
+        Apply all pending migrations up to `target` (inclusive).
+
+        Returns:
+            list: Versions applied by this call
+
+        Raises:
+            Exception: The failing statement's error; earlier migrations stay applied
+        """
+        conn = self._connection()
+        conn.autocommit = True
+        applied_now = []
+        with conn.cursor() as cursor:
+            self._ensure_table(cursor)
+            cursor.execute("SELECT pg_advisory_lock(%s)", (_MIGRATION_LOCK_ID,))
+            try:
+                applied = self.applied_versions()
+                for migration in self.migrations:
+                    if migration['version'] in applied:
+                        continue
+                    if target is not None and migration['version'] > target:
+                        break
+                    self._apply(conn, migration)
+                    applied_now.append(migration['version'])
+            finally:
+                conn.autocommit = True
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (_MIGRATION_LOCK_ID,))
+        return applied_now
+
+    def _apply(self, conn, migration):
+        print(f"Applying migration {migration['version']}: {migration['name']}")
+        started = time.perf_counter()
+        conn.autocommit = not migration.get('transactional', True)
+        try:
+            with conn.cursor() as cursor:
+                for statement in migration['up']:
+                    self._execute(cursor, statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)",
+                    (migration['version'], migration['name'], int((time.perf_counter() - started) * 1000))
+                )
+            if not conn.autocommit:
+                conn.commit()
+        except Exception:
+            if not conn.autocommit:
+                conn.rollback()
+            raise
+
+    def revert(self, version):
+        """
+        Run a migration's down statements and forget it.
+        Used by the index benchmark to measure the "before" state.
+
+        Raises:
+            ValueError: If the migration is irreversible
+        """
+        migration = next(m for m in self.migrations if m['version'] == version)
+        if migration['down'] is None:
+            raise ValueError(f"Migration {version} ({migration['name']}) cannot be reverted")
+        conn = self._connection()
+        conn.autocommit = not migration.get('transactional', True)
+        try:
+            with conn.cursor() as cursor:
+                for statement in migration['down']:
+                    self._execute(cursor, statement)
+                cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (version,))
+            if not conn.autocommit:
+                conn.commit()
+        except Exception:
+            if not conn.autocommit:
+                conn.rollback()
+            raise
+
+    def close(self):
+        self.postgres.disconnect()
+
+
+def run_migrations():
+    """Apply pending migrations at startup if AUTO_MIGRATE is on. Returns applied versions."""
+    if not MIGRATIONS_CONFIG['auto_migrate']:
+        return []
+    runner = MigrationRunner()
+    try:
+        return runner.migrate()
+    except Exception as e:
+        print(f"Migration Error: {e}")
+        return []
+    finally:
+        runner.close()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    runner = MigrationRunner()
+    try:
+        if command == 'migrate':
+            target = int(sys.argv[2]) if len(sys.argv) > 2 else None
+            applied = runner.migrate(target)
+            print(f"Applied: {applied or 'nothing (up to date)'}")
+        else:
+            for m in runner.status():
+                print(f"{m['version']:>4}  {'applied' if m['applied'] else 'pending':8}  {m['name']}")
+    finally:
+        runner.close()
@@ -0,0 +1,730 @@
+# ========================================
+# Drill SQL -> MongoDB Aggregation Pipeline Compiler
+# Compiles single-collection queries (optionally written as a chain of
+# CTEs, as in the sample queries) into one aggregation pipeline:
+#
+#   WHERE            -> $match   (query operators, so indexes apply)
+#   GROUP BY / aggs  -> $group   (COUNT / SUM / AVG / MIN / MAX)
+#   HAVING           -> $match
+#   SELECT list      -> $project (only the referenced fields leave the server)
+#   DISTINCT         -> $group + $replaceWith
+#   ORDER BY         -> $sort    (before $project when it is on stored fields)
+#   OFFSET / LIMIT   -> $skip / $limit
+#
+# Anything else (joins, other sources, unsupported functions) raises
+# UnsupportedQuery, and the caller falls back to Drill.
+# ========================================
+
+import re
+from datetime import datetime
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+|--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>`[^`]+`|"(?:[^"]|"")+")
+  | (?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z_0-9$]*)
+  | (?P<op><>|!=|<=|>=|[=<>(),.*;+\-/%|])
+""", re.VERBOSE | re.DOTALL)
+
+# Words that end a select item, source or expression (never taken as an alias)
+_RESERVED = {
+    'select', 'from', 'where', 'group', 'by', 'having', 'order', 'limit', 'offset', 'as', 'and', 'or',
+    'not', 'in', 'is', 'null', 'like', 'between', 'join', 'inner', 'left', 'right', 'full', 'cross',
+    'on', 'using', 'union', 'intersect', 'except', 'with', 'asc', 'desc', 'distinct', 'fetch', 'nulls'
+}
+
+_COMPARISONS = {'=': '$eq', '<>': '$ne', '!=': '$ne', '<': '$lt', '<=': '$lte', '>': '$gt', '>=': '$gte'}
+_FLIPPED = {'$eq': '$eq', '$ne': '$ne', '$lt': '$gt', '$lte': '$gte', '$gt': '$lt', '$gte': '$lte'}
+_AGGREGATES = {'count', 'sum', 'avg', 'min', 'max'}
+_CAST_TYPES = {
+    'float': 'double', 'double': 'double', 'real': 'double', 'decimal': 'double', 'numeric': 'double',
+    'int': 'int', 'integer': 'int', 'smallint': 'int', 'bigint': 'long',
+    'varchar': 'string', 'char': 'string', 'text': 'string', 'string': 'string',
+    'boolean': 'bool', 'timestamp': 'date', 'date': 'date'
+}
+
+
+class UnsupportedQuery(ValueError):
+    """Raised when a query cannot be compiled into a pipeline"""
+
+
+# ----------------------------------------
+# Tokenizer / parser
+# ----------------------------------------
+# Expressions are tuples:
+#   ('col', [parts]) ('lit', value) ('star',) ('agg', name, arg) ('cast', expr, type)
+#   ('round', expr, digits) ('cmp', op, left, right) ('and', [..]) ('or', [..])
+#   ('in', expr, [values], negated) ('between', expr, low, high, negated)
+#   ('isnull', expr, negated) ('like', expr, pattern, negated)
+
+def sql_tokens(sql):
+    """
+    Yield (kind, text) for every token of a query, text verbatim (quotes
+    included), whitespace and comments as 'space'. Kinds: space, string,
+    quoted, number, word, op.
+
+    Raises:
+        UnsupportedQuery: On a character outside the supported syntax
+    """
+    position = 0
+    while position < len(sql):
+        match = _TOKEN.match(sql, position)
+        if not match:
+            raise UnsupportedQuery(f'Unexpected character: {sql[position]!r}')
+        position = match.end()
+        yield match.lastgroup, match.group()
+
+
+def _tokenize(sql):
+    tokens = []
+    for kind, text in sql_tokens(sql):
+        if kind == 'space':
+            continue
+        if kind == 'string':
+            tokens.append(('string', text[1:-1].replace("''", "'")))
+        elif kind == 'quoted':
+            tokens.append(('ident', text[1:-1].replace('""', '"')))
+        else:
+            tokens.append((kind, text))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, sql):
+        self.tokens = _tokenize(sql)
+        self.position = 0
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise UnsupportedQuery('Unexpected end of query')
+        self.position += 1
+        return token
+
+    def is_keyword(self, *words, offset=0):
+        kind, text = self.peek(offset)
+        return kind == 'word' and text.lower() in words
+
+    def accept(self, *words):
+        if self.is_keyword(*words):
+            return self.next()[1].lower()
+        return None
+
+    def expect(self, word):
+        if not self.accept(word):
+            raise UnsupportedQuery(f'Expected {word.upper()} near {self.peek()[1]!r}')
+
+    def accept_op(self, op):
+        if self.peek() == ('op', op):
+            self.position += 1
+            return True
+        return False
+
+    def expect_op(self, op):
+        if not self.accept_op(op):
+            raise UnsupportedQuery(f'Expected {op!r} near {self.peek()[1]!r}')
+
+    def identifier(self):
+        kind, text = self.next()
+        if kind == 'ident' or (kind == 'word' and text.lower() not in _RESERVED):
+            return text
+        raise UnsupportedQuery(f'Expected an identifier, got {text!r}')
+
+    def at_identifier(self):
+        kind, text = self.peek()
+        return kind == 'ident' or (kind == 'word' and text.lower() not in _RESERVED)
+
+    # ---- statements ----
+    def query(self):
+        ctes = []
+        if self.accept('with'):
+            while True:
+                name = self.identifier()
+                if self.peek() == ('op', '('):
+                    raise UnsupportedQuery('CTE column lists are not supported')
+                self.expect('as')
+                self.expect_op('(')
+                ctes.append((name, self.select()))
+                self.expect_op(')')
+                if not self.accept_op(','):
+                    break
+        select = self.select()
+        self.accept_op(';')
+        if self.peek()[0] is not None:
+            raise UnsupportedQuery(f'Unsupported syntax near {self.peek()[1]!r}')
+        return ctes, select
+
+    def select(self):
+        self.expect('select')
+        node = {'distinct': bool(self.accept('distinct')), 'items': [], 'where': None, 'group_by': [],
+                'having': None, 'order_by': [], 'limit': None, 'offset': None}
+        while True:
+            if self.accept_op('*'):
+                node['items'].append((('star',), None))
+            else:
+                expr = self.expression()
+                alias = None
+                if self.accept('as'):
+                    alias = self.identifier()
+                elif self.at_identifier():
+                    alias = self.identifier()
+                node['items'].append((expr, alias))
+            if not self.accept_op(','):
+                break
+
+        self.expect('from')
+        if self.accept_op('('):
+            raise UnsupportedQuery('Subqueries are not supported')
+        node['source'] = [self.identifier()]
+        while self.accept_op('.'):
+            node['source'].append(self.identifier())
+        node['alias'] = None
+        if self.accept('as'):
+            node['alias'] = self.identifier()
+        elif self.at_identifier():
+            node['alias'] = self.identifier()
+        if self.peek() == ('op', ',') or self.is_keyword('join', 'inner', 'left', 'right', 'full', 'cross'):
+            raise UnsupportedQuery('Joins are not supported')
+
+        if self.accept('where'):
+            node['where'] = self.expression()
+        if self.accept('group'):
+            self.expect('by')
+            node['group_by'].append(self.expression())
+            while self.accept_op(','):
+                node['group_by'].append(self.expression())
+        if self.accept('having'):
+            node['having'] = self.expression()
+        if self.accept('order'):
+            self.expect('by')
+            while True:
+                expr = self.expression()
+                direction = -1 if self.accept('asc', 'desc') == 'desc' else 1
+                if self.is_keyword('nulls'):
+                    raise UnsupportedQuery('NULLS FIRST / LAST is not supported')
+                node['order_by'].append((expr, direction))
+                if not self.accept_op(','):
+                    break
+        if self.accept('limit'):
+            node['limit'] = self.integer()
+        if self.accept('offset'):
+            node['offset'] = self.integer()
+            self.accept('row', 'rows')
+        if self.is_keyword('union', 'intersect', 'except'):
+            raise UnsupportedQuery('Set operations are not supported')
+        return node
+
+    def integer(self):
+        kind, text = self.next()
+        if kind != 'number' or not text.isdigit():
+            raise UnsupportedQuery(f'Expected an integer, got {text!r}')
+        return int(text)
+
+    # ---- expressions ----
+    def expression(self):
+        terms = [self.conjunction()]
+        while self.accept('or'):
+            terms.append(self.conjunction())
+        return terms[0] if len(terms) == 1 else ('or', terms)
+
+    def conjunction(self):
+        terms = [self.predicate()]
+        while self.accept('and'):
+            terms.append(self.predicate())
+        return terms[0] if len(terms) == 1 else ('and', terms)
+
+    def predicate(self):
+        if self.is_keyword('not'):
+            raise UnsupportedQuery('NOT is only supported as NOT IN / NOT LIKE / NOT BETWEEN')
+        left = self.primary()
+        kind, text = self.peek()
+        if kind == 'op' and text in _COMPARISONS:
+            self.next()
+            return ('cmp', _COMPARISONS[text], left, self.primary())
+        if self.accept('is'):
+            negated = bool(self.accept('not'))
+            self.expect('null')
+            return ('isnull', left, negated)
+        negated = bool(self.accept('not'))
+        if self.accept('in'):
+            self.expect_op('(')
+            values = [self.literal()]
+            while self.accept_op(','):
+                values.append(self.literal())
+            self.expect_op(')')
+            return ('in', left, values, negated)
+        if self.accept('between'):
+            low = self.literal()
+            self.expect('and')
+            return ('between', left, low, self.literal(), negated)
+        if self.accept('like'):
+            kind, pattern = self.next()
+            if kind != 'string':
+                raise UnsupportedQuery('LIKE needs a string pattern')
+            return ('like', left, pattern, negated)
+        if negated:
+            raise UnsupportedQuery('Expected IN, BETWEEN or LIKE after NOT')
+        return left
+
+    def literal(self):
+        expr = self.primary()
+        if expr[0] != 'lit':
+            raise UnsupportedQuery('Expected a literal')
+        return expr[1]
+
+    def primary(self):
+        kind, text = self.peek()
+        if kind == 'op' and text == '(':
+            self.next()
+            expr = self.expression()
+            self.expect_op(')')
+            return expr
+        if kind == 'op' and text == '-' and self.peek(1)[0] == 'number':
+            self.next()
+            return ('lit', -self._number(self.next()[1]))
+        if kind == 'number':
+            self.next()
+            return ('lit', self._number(text))
+        if kind == 'string':
+            self.next()
+            return ('lit', text)
+        if kind == 'word':
+            word = text.lower()
+            if word in ('true', 'false'):
+                self.next()
+                return ('lit', word == 'true')
+            if word == 'null':
+                self.next()
+                return ('lit', None)
+            if word in ('timestamp', 'date') and self.peek(1)[0] == 'string':
+                self.next()
+                value = self.next()[1]
+                try:
+                    return ('lit', datetime.fromisoformat(value.replace('Z', '')))
+                except ValueError:
+                    raise UnsupportedQuery(f'Bad {word} literal: {value!r}')
+            if self.peek(1) == ('op', '('):
+                return self.call()
+        if kind == 'op' and text in (')', ',', '*'):
+            raise UnsupportedQuery(f'Unexpected {text!r}')
+        parts = [self.identifier()]
+        while self.accept_op('.'):
+            parts.append(self.identifier())
+        if self.peek() == ('op', '(') or (self.peek()[0] == 'op' and self.peek()[1] in '+-/%|'):
+            raise UnsupportedQuery('Arithmetic and qualified function calls are not supported')
+        return ('col', parts)
+
+    def call(self):
+        name = self.next()[1].lower()
+        self.expect_op('(')
+        if name in _AGGREGATES:
+            if self.accept('distinct'):
+                raise UnsupportedQuery(f'{name.upper()}(DISTINCT ...) is not supported')
+            if name == 'count' and self.accept_op('*'):
+                arg = ('star',)
+            else:
+                arg = self.expression()
+            self.expect_op(')')
+            return ('agg', name, arg)
+        if name == 'cast':
+            expr = self.expression()
+            self.expect('as')
+            type_name = self.next()[1].lower()
+            if type_name not in _CAST_TYPES:
+                raise UnsupportedQuery(f'Unsupported CAST type: {type_name}')
+            if self.accept_op('('):  # VARCHAR(20), DECIMAL(10, 2)
+                self.integer()
+                if self.accept_op(','):
+                    self.integer()
+                self.expect_op(')')
+            self.expect_op(')')
+            return ('cast', expr, _CAST_TYPES[type_name])
+        if name == 'round':
+            expr = self.expression()
+            digits = 0
+            if self.accept_op(','):
+                digits = self.integer()
+            self.expect_op(')')
+            return ('round', expr, digits)
+        raise UnsupportedQuery(f'Unsupported function: {name.upper()}')
+
+    @staticmethod
+    def _number(text):
+        return float(text) if any(c in text for c in '.eE') else int(text)
+
+
+# ----------------------------------------
+# Compilation
+# ----------------------------------------
+def _contains_aggregate(expr):
+    if expr[0] == 'agg':
+        return True
+    for part in expr[1:]:
+        if isinstance(part, tuple) and _contains_aggregate(part):
+            return True
+        if isinstance(part, list) and any(isinstance(p, tuple) and _contains_aggregate(p) for p in part):
+            return True
+    return False
+
+
+def _strip_qualifiers(expr, qualifiers):
+    """Drop a leading table alias / source name from every column reference"""
+    if expr[0] == 'col':
+        parts = expr[1]
+        if len(parts) > 1 and parts[0].lower() in qualifiers:
+            parts = parts[1:]
+        return ('col', parts)
+    stripped = []
+    for part in expr:
+        if isinstance(part, tuple):
+            part = _strip_qualifiers(part, qualifiers)
+        elif isinstance(part, list):
+            part = [_strip_qualifiers(p, qualifiers) if isinstance(p, tuple) else p for p in part]
+        stripped.append(part)
+    return tuple(stripped)
+
+
+def _like_regex(pattern):
+    regex = ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern)
+    return f'^{regex}$'
+
+
+class _Relation:
+    """
+    A compiled source: the pipeline so far and how column names map to
+    document fields. `columns` is None for a bare collection, where any
+    name is a stored field.
+    """
+
+    def __init__(self, database, collection, pipeline, columns):
+        self.database = database
+        self.collection = collection
+        self.pipeline = pipeline
+        self.columns = columns  # [(output name, field)] or None
+        self.empty_row = None   # row values to return when a global aggregate matches nothing
+
+    def field(self, name):
+        if self.columns is None:
+            return name
+        for column, field in self.columns:
+            if column.lower() == name.lower():
+                return field
+        raise UnsupportedQuery(f'Unknown column: {name}')
+
+
+class _SelectCompiler:
+    """Compiles one SELECT over a _Relation"""
+
+    def __init__(self, node, relation, names):
+        qualifiers = {name.lower() for name in names if name}
+
+        def strip(expr):
+            return _strip_qualifiers(expr, qualifiers) if expr else expr
+
+        self.node = dict(
+            node,
+            items=[(strip(expr), alias) for expr, alias in node['items']],
+            where=strip(node['where']),
+            group_by=[strip(expr) for expr in node['group_by']],
+            having=strip(node['having']),
+            order_by=[(strip(expr), direction) for expr, direction in node['order_by']]
+        )
+        self.relation = relation
+
+    # ---- references ----
+    def path(self, parts):
+        field = self.relation.field(parts[0])
+        path = '.'.join([field] + parts[1:])
+        if path.startswith('$') or '..' in path:
+            raise UnsupportedQuery(f'Invalid field: {path}')
+        return path
+
+    def value(self, expr):
+        """Aggregation expression for a row-level expression"""
+        kind = expr[0]
+        if kind == 'col':
+            return f'${self.path(expr[1])}'
+        if kind == 'lit':
+            return {'$literal': expr[1]}
+        if kind == 'cast':
+            return {'$convert': {'input': self.value(expr[1]), 'to': expr[2], 'onError': None, 'onNull': None}}
+        if kind == 'round':
+            return {'$round': [self.value(expr[1]), expr[2]]}
+        raise UnsupportedQuery('Unsupported expression in this position')
+
+    # ---- WHERE ----
+    def match(self, expr):
+        """Query-language filter (index-friendly) for a WHERE condition"""
+        kind = expr[0]
+        if kind == 'and':
+            return {'$and': [self.match(term) for term in expr[1]]}
+        if kind == 'or':
+            return {'$or': [self.match(term) for term in expr[1]]}
+        if kind == 'cmp':
+            _, op, left, right = expr
+            if left[0] == 'lit' and right[0] == 'col':
+                left, right, op = right, left, _FLIPPED[op]
+            if left[0] == 'col' and right[0] == 'lit':
+                if right[1] is None:
+                    raise UnsupportedQuery('Comparison with NULL')
+                path = self.path(left[1])
+                if op == '$ne':
+                    return {path: {'$nin': [right[1], None]}}  # SQL: NULL <> x is not true
+                return {path: {op: right[1]}}
+            return {'$expr': self.comparison(op, left, right)}
+        if kind == 'isnull':
+            path = self.column(expr[1])
+            return {path: {'$ne': None}} if expr[2] else {path: None}
+        if kind == 'in':
+            path = self.column(expr[1])
+            if expr[3]:
+                return {path: {'$nin': list(expr[2]) + [None]}}
+            return {path: {'$in': list(expr[2])}}
+        if kind == 'between':
+            path = self.column(expr[1])
+            if expr[4]:
+                return {'$or': [{path: {'$lt': expr[2]}}, {path: {'$gt': expr[3]}}]}
+            return {path: {'$gte': expr[2], '$lte': expr[3]}}
+        if kind == 'like':
+            path = self.column(expr[1])
+            if expr[3]:
+                return {path: {'$not': {'$regex': _like_regex(expr[2])}, '$ne': None}}
+            return {path: {'$regex': _like_regex(expr[2])}}
+        raise UnsupportedQuery('Unsupported WHERE condition')
+
+    def column(self, expr):
+        if expr[0] != 'col':
+            raise UnsupportedQuery('Only columns are supported on the left of IS / IN / BETWEEN / LIKE')
+        return self.path(expr[1])
+
+    def comparison(self, op, left, right, value=None):
+        """$expr comparison with SQL NULL semantics (NULL compares as unknown)"""
+        value = value or self.value
+        a, b = value(left), value(right)
+        guards = [{'$gt': [side, None]} for side, expr in ((a, left), (b, right)) if expr[0] != 'lit']
+        return {'$and': guards + [{op: [a, b]}]}
+
+    # ---- GROUP BY ----
+    def grouped(self, group_by, items, having):
+        """Build the $group stage; returns (stage, item values, having filter)"""
+        group_id = {f'g{i}': self.value(expr) for i, expr in enumerate(group_by)} or None
+        accumulators = {}
+
+        def accumulator(expr):
+            for name, (existing, _) in accumulators.items():
+                if existing == expr:
+                    return f'${name}'
+            _, function, arg = expr
+            if arg[0] == 'star':
+                operator = {'$sum': 1}
+            elif function == 'count':
+                operator = {'$sum': {'$cond': [{'$gt': [self.value(arg), None]}, 1, 0]}}
+            else:
+                operator = {f'${function}': self.value(arg)}
+            name = f'a{len(accumulators)}'
+            accumulators[name] = (expr, operator)
+            return f'${name}'
+
+        def value(expr):
+            for i, key in enumerate(group_by):
+                if key == expr:
+                    return f'$_id.g{i}'
+            kind = expr[0]
+            if kind == 'agg':
+                if _contains_aggregate(expr[2]):
+                    raise UnsupportedQuery('Nested aggregates')
+                return accumulator(expr)
+            if kind == 'lit':
+                return {'$literal': expr[1]}
+            if kind == 'cast':
+                return {'$convert': {'input': value(expr[1]), 'to': expr[2], 'onError': None, 'onNull': None}}
+            if kind == 'round':
+                return {'$round': [value(expr[1]), expr[2]]}
+            if kind == 'col':
+                raise UnsupportedQuery(f"Column {'.'.join(expr[1])} must appear in GROUP BY")
+            raise UnsupportedQuery('Unsupported expression in a grouped query')
+
+        def condition(expr):
+            kind = expr[0]
+            if kind == 'and':
+                return {'$and': [condition(term) for term in expr[1]]}
+            if kind == 'or':
+                return {'$or': [condition(term) for term in expr[1]]}
+            if kind == 'cmp':
+                return self.comparison(expr[1], expr[2], expr[3], value)
+            raise UnsupportedQuery('Unsupported HAVING condition')
+
+        values = [value(expr) for expr, _ in items]
+        having_filter = {'$expr': condition(having)} if having else None
+        stage = {'_id': group_id}
+        stage.update({name: operator for name, (_, operator) in accumulators.items()})
+        return {'$group': stage}, values, having_filter
+
+    # ---- SELECT ----
+    def compile(self):
+        node = self.node
+        pipeline = list(self.relation.pipeline)
+        items = node['items']
+        star = any(expr[0] == 'star' for expr, _ in items)
+        if star and len(items) > 1:
+            raise UnsupportedQuery('* mixed with other columns')
+        grouped = bool(node['group_by']) or any(_contains_aggregate(expr) for expr, _ in items)
+        if star and (grouped or node['distinct']):
+            raise UnsupportedQuery('SELECT * with GROUP BY / DISTINCT')
+        if node['having'] and not grouped:
+            raise UnsupportedQuery('HAVING without GROUP BY')
+
+        if node['where']:
+            if _contains_aggregate(node['where']):
+                raise UnsupportedQuery('Aggregate in WHERE')
+            pipeline.append({'$match': self.match(node['where'])})
+
+        # Output names follow Drill: alias, else the column name, else EXPR$<n>
+        names = []
+        for i, (expr, alias) in enumerate(items):
+            if alias:
+                names.append(alias)
+            elif expr[0] == 'col' and len(expr[1]) == 1:
+                names.append(expr[1][0])
+            else:
+                names.append(f'EXPR${i}')
+
+        if star:
+            columns = self.relation.columns
+            project = None
+            if columns is not None:
+                project = {field: 1 for _, field in columns}
+                project['_id'] = 0
+        else:
+            if grouped:
+                stage, values, having_filter = self.grouped(node['group_by'], items, node['having'])
+                pipeline.append(stage)
+                if having_filter:
+                    pipeline.append({'$match': having_filter})
+            else:
+                values = [self.value(expr) for expr, _ in items]
+            columns = [(name, f'c{i}') for i, name in enumerate(names)]
+            project = {f'c{i}': value for i, value in enumerate(values)}
+            project['_id'] = 0
+
+        if node['limit'] == 0:
+            raise UnsupportedQuery('LIMIT 0 is not supported ($limit must be positive)')
+        paging = []
+        if node['offset']:
+            paging.append({'$skip': node['offset']})
+        if node['limit'] is not None:
+            paging.append({'$limit': node['limit']})
+
+        # ORDER BY runs on stored fields before $project where possible: an
+        # index can serve it and $limit cuts rows before they are reshaped
+        early_sort, late_sort = self.sort_keys(items, names, columns, star, grouped or node['distinct'])
+        if early_sort is not None:
+            if early_sort:
+                pipeline.append({'$sort': early_sort})
+            pipeline.extend(paging)
+            paging = []
+        if project is not None:
+            pipeline.append({'$project': project})
+        if node['distinct']:
+            pipeline.append({'$group': {'_id': {field: f'${field}' for _, field in columns}}})
+            pipeline.append({'$replaceWith': '$_id'})
+        if late_sort:
+            pipeline.append({'$sort': late_sort})
+        pipeline.extend(paging)
+
+        relation = _Relation(self.relation.database, self.relation.collection, pipeline, columns)
+        # Without GROUP BY, SQL returns one row even when nothing matched
+        if grouped and not node['group_by'] and not node['having'] and not node['offset']:
+            relation.empty_row = [0 if expr[0] == 'agg' and expr[1] == 'count' else None for expr, _ in items]
+        return relation
+
+    def sort_target(self, expr, items, names):
+        """Index of the selected item an ORDER BY key refers to, or None"""
+        if expr[0] == 'lit' and isinstance(expr[1], int) and not isinstance(expr[1], bool):
+            if not 1 <= expr[1] <= len(items):
+                raise UnsupportedQuery(f'ORDER BY position {expr[1]} out of range')
+            return expr[1] - 1
+        if expr[0] == 'col' and len(expr[1]) == 1:
+            for i, name in enumerate(names):
+                if name.lower() == expr[1][0].lower() and items[i][0][0] != 'star':
+                    return i
+        for i, (item, _) in enumerate(items):
+            if item == expr:
+                return i
+        return None
+
+    def sort_keys(self, items, names, columns, star, late_only):
+        """
+        Split ORDER BY into a sort on stored fields (before $project) or on
+        output columns (after it).
+
+        Returns:
+            tuple: (early, late) sort specs; exactly one is used, early is {}
+                   when there is no ORDER BY and paging can run early
+        """
+        order_by = self.node['order_by']
+        if not order_by:
+            return (None, None) if late_only else ({}, None)
+
+        early, late = {}, {}
+        for expr, direction in order_by:
+            target = self.sort_target(expr, items, names)
+            key = items[target][0] if target is not None else expr
+            if early is not None and not late_only and key[0] == 'col':
+                early[self.path(key[1])] = direction
+            else:
+                early = None
+            if late is not None and target is not None and not star:
+                late[columns[target][1]] = direction
+            else:
+                late = None
+        if early is not None:
+            return early, None
+        if late is not None:
+            return None, late
+        raise UnsupportedQuery('ORDER BY must use stored fields or selected columns')
+
+
+def compile_query(sql):
+    """
+    Compile a Drill query over one MongoDB collection.
+
+    Args:
+        sql (str): SELECT, or WITH ... SELECT, reading mongo.<db>.`Collection`
+
+    Returns:
+        dict: {'database', 'collection', 'pipeline', 'columns', 'empty_row'} where
+              columns is a list of (output name, document field), or None for
+              SELECT * on a collection
+
+    Raises:
+        UnsupportedQuery: If the query cannot run as a single pipeline
+    """
+    ctes, select = _Parser(sql).query()
+    relations = {}
+
+    def compile_select(node):
+        source = node['source']
+        if len(source) == 1 and source[0].lower() in relations:
+            relation = relations[source[0].lower()]
+        elif len(source) == 3 and source[0].lower() == 'mongo':
+            relation = _Relation(source[1], source[2], [], None)
+        else:
+            raise UnsupportedQuery(f"Not a MongoDB source: {'.'.join(source)}")
+        return _SelectCompiler(node, relation, [node['alias'], source[-1]]).compile()
+
+    for name, node in ctes:
+        relations[name.lower()] = compile_select(node)
+    result = compile_select(select)
+    return {
+        'database': result.database,
+        'collection': result.collection,
+        'pipeline': result.pipeline,
+        'columns': result.columns,
+        'empty_row': result.empty_row
+    }
@@ -0,0 +1,281 @@
+# ========================================
+# MongoDB Time-Series Collections
+# Provisions Sensor_Logs and Air_Quality_History as native time-series
+# collections (MongoDB 5.0+) and converts existing regular collections.
+#
+# Documents keep their shape, so MongoDB.find and the insert routes work
+# unchanged; MongoDB stores them as compressed per-meta-value buckets.
+#
+# Usage:
+#   python mongo_timeseries.py status
+#   python mongo_timeseries.py provision
+#   python mongo_timeseries.py migrate <collection> [--drop-legacy]
+# ========================================
+
+import sys
+import time
+from datetime import datetime
+from pymongo.errors import BulkWriteError, CollectionInvalid
+from config import MONGO_TIMESERIES_CONFIG
+from database import db_manager
+
+# timeField / metaField per collection; indexes are (field, direction) lists.
+# Indexes on measurement fields (neither timeField nor metaField, e.g.
+# Sensor_Logs.region_id) need MongoDB 6.0 and are skipped on 5.x.
+TIME_SERIES_COLLECTIONS = {
+    'Sensor_Logs': {
+        'timeField': 'timestamp',
+        'metaField': 'sensor_id',
+        'granularity': MONGO_TIMESERIES_CONFIG['sensor_logs_granularity'],
+        'expire_days': MONGO_TIMESERIES_CONFIG['sensor_logs_expire_days'],
+        'indexes': [
+            [('sensor_id', 1), ('timestamp', -1)],
+            [('region_id', 1), ('timestamp', -1)]
+        ]
+    },
+    'Air_Quality_History': {
+        'timeField': 'recorded_at',
+        'metaField': 'region_id',
+        'granularity': MONGO_TIMESERIES_CONFIG['air_quality_granularity'],
+        'expire_days': MONGO_TIMESERIES_CONFIG['air_quality_expire_days'],
+        'indexes': [
+            [('region_id', 1), ('recorded_at', -1)]
+        ]
+    }
+}
+
+
+class MongoTimeSeriesManager:
+    """
+    Creates, inspects and converts the time-series collections.
+    Uses the shared MongoDB client (pymongo is thread-safe).
+    """
+
+    def __init__(self, specs=TIME_SERIES_COLLECTIONS, config=MONGO_TIMESERIES_CONFIG):
+        self.specs = specs
+        self.config = config
+        self._kinds = {}  # collection name -> 'timeseries' / 'collection' / None
+        self.migrations = {}  # collection name -> last migrate() state / result
+
+    def _db(self):
+        mongo = db_manager.mongo
+        if mongo.db is None and not mongo.connect():
+            raise ConnectionError('MongoDB unavailable')
+        return mongo.db
+
+    def _server_major(self):
+        return self._db().client.server_info()['versionArray'][0]
+
+    def server_supported(self):
+        """True if the server supports time-series collections (MongoDB 5.0+)"""
+        return self._server_major() >= 5
+
+    def collection_type(self, name, refresh=False):
+        """
+        Get the collection type, cached.
+
+        Returns:
+            str: 'timeseries', 'collection', or None if it does not exist
+        """
+        if refresh or name not in self._kinds:
+            info = next(iter(self._db().list_collections(filter={'name': name})), None)
+            self._kinds[name] = info['type'] if info else None
+        return self._kinds[name]
+
+    def is_time_series(self, name):
+        """True if `name` is a time-series collection; False when unknown or unreachable"""
+        if name not in self.specs:
+            return False
+        try:
+            return self.collection_type(name) == 'timeseries'
+        except Exception:
+            return False
+
+    # ----------------------------------------
+    # Provisioning
+    # ----------------------------------------
+    def _create(self, name):
+        spec = self.specs[name]
+        options = {'timeseries': {
+            'timeField': spec['timeField'],
+            'metaField': spec['metaField'],
+            'granularity': spec['granularity']
+        }}
+        if spec['expire_days']:
+            options['expireAfterSeconds'] = spec['expire_days'] * 86400
+        db = self._db()
+        db.create_collection(name, **options)
+        measurement_indexes = self._server_major() >= 6
+        for keys in spec['indexes']:
+            on_measurement = any(field.split('.')[0] not in (spec['timeField'], spec['metaField'])
+                                 for field, _ in keys)
+            if on_measurement and not measurement_indexes:
+                continue
+            db[name].create_index(keys)
+        self._kinds[name] = 'timeseries'
+
+    def _apply_ttl(self, name):
+        """Bring the collection's TTL in line with the configured expire_days"""
+        spec = self.specs[name]
+        info = next(iter(self._db().list_collections(filter={'name': name})))
+        current = info['options'].get('expireAfterSeconds')
+        wanted = spec['expire_days'] * 86400 if spec['expire_days'] else None
+        if current == wanted:
+            return False
+        self._db().command('collMod', name, expireAfterSeconds=wanted if wanted else 'off')
+        return True
+
+    def provision(self):
+        """
+        Create missing time-series collections and sync TTL settings.
+        Existing regular collections are left alone (see migrate()).
+
+        Returns:
+            dict: {collection: 'created' | 'ttl_updated' | 'ok' | 'needs_migration'}
+        """
+        if not self.server_supported():
+            return {name: 'unsupported_server' for name in self.specs}
+        actions = {}
+        for name in self.specs:
+            kind = self.collection_type(name, refresh=True)
+            if kind is None:
+                try:
+                    self._create(name)
+                    actions[name] = 'created'
+                except CollectionInvalid:
+                    # Another process created it first (possibly as a regular collection)
+                    kind = self.collection_type(name, refresh=True)
+            if kind == 'timeseries':
+                actions[name] = 'ttl_updated' if self._apply_ttl(name) else 'ok'
+            elif kind == 'collection':
+                actions[name] = 'needs_migration'
+        return actions
+
+    def status(self):
+        """
+        Describe each collection: type, time-series options, documents and storage.
+
+        Returns:
+            list: Collection dictionaries
+        """
+        db = self._db()
+        collections = []
+        for name, spec in self.specs.items():
+            info = next(iter(db.list_collections(filter={'name': name})), None)
+            entry = {
+                'collection': name,
+                'type': info['type'] if info else None,
+                'options': info['options'] if info else None,
+                'time_field': spec['timeField'],
+                'meta_field': spec['metaField']
+            }
+            if info:
+                stats = next(db[name].aggregate([{'$collStats': {'storageStats': {}}}]), {})
+                storage = stats.get('storageStats', {})
+                entry.update(
+                    documents=db[name].estimated_document_count(),
+                    storage_bytes=storage.get('storageSize'),
+                    index_bytes=storage.get('totalIndexSize')
+                )
+            collections.append(entry)
+        return collections
+
+    # ----------------------------------------
+    # Conversion
+    # ----------------------------------------
+    def migrate(self, name, drop_legacy=False):
+        """
+        Convert a regular collection into a time-series collection.
+
+        The original is renamed to <name>_legacy_<YYYYmmddHHMMSS>, a new
+        time-series collection takes its name (new inserts go there at once)
+        and the legacy documents are copied across in batches. Documents
+        without a date in the time field cannot be stored and are skipped.
+
+        Returns:
+            dict: {'legacy': str, 'copied': int, 'skipped': int, 'seconds': float}
+
+        Raises:
+            ValueError: If `name` is not a configured time-series collection or
+                        is already one
+            RuntimeError: If the server does not support time-series collections
+        """
+        if name not in self.specs:
+            raise ValueError(f'Not a time-series collection: {name}')
+        if not self.server_supported():
+            raise RuntimeError('Time-series collections require MongoDB 5.0 or newer')
+        kind = self.collection_type(name, refresh=True)
+        if kind == 'timeseries':
+            raise ValueError(f'{name} is already a time-series collection')
+
+        self.migrations[name] = {'state': 'running', 'started_at': datetime.utcnow().isoformat()}
+        try:
+            result = self._migrate(name, kind, drop_legacy)
+        except Exception as e:
+            self.migrations[name] = {'state': 'failed', 'error': str(e)}
+            raise
+        self.migrations[name] = dict(result, state='done')
+        return result
+
+    def _migrate(self, name, kind, drop_legacy):
+        started = time.perf_counter()
+        db = self._db()
+        spec = self.specs[name]
+        legacy = None
+        if kind == 'collection':
+            legacy = f"{name}_legacy_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+            db[name].rename(legacy)
+        self._create(name)
+
+        copied = skipped = 0
+        if legacy:
+            batch_size = self.config['copy_batch_size']
+            batch = []
+            # Oldest first, so buckets fill in time order
+            for document in db[legacy].find().sort(spec['timeField'], 1).batch_size(batch_size):
+                if not isinstance(document.get(spec['timeField']), datetime):
+                    skipped += 1
+                    continue
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    copied += self._copy_batch(db[name], batch)
+                    batch = []
+            if batch:
+                copied += self._copy_batch(db[name], batch)
+            if drop_legacy and skipped == 0:
+                db[legacy].drop()
+
+        return {
+            'legacy': legacy,
+            'copied': copied,
+            'skipped': skipped,
+            'legacy_dropped': bool(legacy and drop_legacy and skipped == 0),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+
+    def _copy_batch(self, collection, batch):
+        try:
+            return len(collection.insert_many(batch, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            return e.details.get('nInserted', 0)
+
+
+# Global time-series manager instance
+mongo_timeseries = MongoTimeSeriesManager()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'provision':
+        for collection, action in mongo_timeseries.provision().items():
+            print(f"{collection:22} {action}")
+    elif command == 'migrate':
+        if len(sys.argv) < 3:
+            sys.exit('Usage: python mongo_timeseries.py migrate <collection> [--drop-legacy]')
+        result = mongo_timeseries.migrate(sys.argv[2], drop_legacy='--drop-legacy' in sys.argv)
+        print(f"{sys.argv[2]}: copied {result['copied']}, skipped {result['skipped']} "
+              f"in {result['seconds']}s (legacy: {result['legacy']})")
+    else:
+        for entry in mongo_timeseries.status():
+            print(f"{entry['collection']:22} {entry['type'] or 'missing':11} "
+                  f"docs={entry.get('documents')} storage={entry.get('storage_bytes')}")
@@ -0,0 +1,210 @@
+# ========================================
+# Climate_Data Partition Management
+# Keeps monthly range partitions created ahead of time and
+# detaches / archives cold ones (see migration 2).
+# ========================================
+
+import re
+import threading
+import time
+from datetime import date
+from config import PARTITION_CONFIG
+from database import PostgresDB
+from structured_log import get_logger
+
+log = get_logger('partitions')
+
+_PARTITION_NAME = re.compile(r'^climate_data_(\d{4})_(\d{2})$')
+
+
+def _add_months(day, months):
+    """First day of the month `months` after the month of `day`"""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class ClimatePartitionManager:
+    """
+    Maintains monthly partitions of climate_data.
+    Inserts route to the right partition by themselves (declarative
+    partitioning); this class only makes sure the partitions exist so rows
+    do not pile up in climate_data_default, where pruning cannot skip them.
+    """
+
+    def __init__(self, config=PARTITION_CONFIG):
+        self.config = config
+        self.postgres = PostgresDB()  # own connection, partition DDL is not request work
+        self._lock = threading.Lock()
+        self._ensured_month = None    # month maintain() last ran for
+        self._known_months = set()    # months ensure_months() has created partitions for
+        self._retry_at = 0            # back off while PostgreSQL is unreachable
+
+    def is_partitioned(self):
+        """
+        True once migration 2 has turned climate_data into a partitioned table,
+        None if PostgreSQL could not be reached
+        """
+        result = self.postgres.execute_query(
+            "SELECT relkind FROM pg_class WHERE relname = 'climate_data' AND relkind = 'p'"
+        )
+        self._commit()
+        return None if result is None else bool(result)
+
+    def _commit(self):
+        # execute_query does not commit; end the transaction so no locks linger
+        if self.postgres.connection and not self.postgres.connection.closed:
+            self.postgres.connection.commit()
+
+    def ensure_current(self):
+        """
+        Cheap per-insert check: runs maintain() once per calendar month.
+        Called from /api/insert-climate.
+        """
+        month = date.today().replace(day=1)
+        if self._ensured_month == month or time.monotonic() < self._retry_at:
+            return
+        with self._lock:
+            if self._ensured_month == month or time.monotonic() < self._retry_at:
+                return
+            if self.maintain() is not None:
+                self._ensured_month = month
+            else:
+                self._retry_at = time.monotonic() + 60
+
+    def maintain(self):
+        """
+        Create partitions ahead and, if retention_months is set, detach cold ones.
+
+        Returns:
+            dict: {'created': [...], 'detached': [...]} (empty when not partitioned),
+                  or None if PostgreSQL could not be reached
+        """
+        partitioned = self.is_partitioned()
+        if partitioned is None:
+            return None
+        if not partitioned:
+            return {'created': [], 'detached': []}
+        created = self.ensure_ahead()
+        detached = []
+        if self.config['retention_months']:
+            detached = self.detach_cold(self.config['retention_months'], drop=self.config['drop_detached'])
+        return {'created': created, 'detached': detached}
+
+    def ensure_ahead(self, months_ahead=None):
+        """
+        Create the partitions for this month and the next `months_ahead` months.
+
+        Returns:
+            list: Names of partitions that exist for that window
+        """
+        months_ahead = self.config['months_ahead'] if months_ahead is None else months_ahead
+        this_month = date.today().replace(day=1)
+        names = []
+        for offset in range(months_ahead + 1):
+            result = self.postgres.execute_query(
+                "SELECT climate_data_ensure_partition(%s) AS name",
+                (_add_months(this_month, offset),)
+            )
+            if result is None:
+                break
+            names.append(result[0]['name'])
+        self._commit()
+        return names
+
+    def ensure_months(self, months):
+        """
+        Create the partitions for the given months (first days of month)
+        before a bulk load, so COPY never lands in climate_data_default.
+        Months already ensured by this process are skipped.
+
+        Returns:
+            bool: False if PostgreSQL could not be reached
+        """
+        with self._lock:
+            missing = set(months) - self._known_months
+            if not missing:
+                return True
+            partitioned = self.is_partitioned()
+            if partitioned is None:
+                return False
+            if not partitioned:
+                return True
+            for month in sorted(missing):
+                result = self.postgres.execute_query("SELECT climate_data_ensure_partition(%s) AS name", (month,))
+                self._commit()
+                if result is None:
+                    return False
+                self._known_months.add(month)
+            return True
+
+    def list_partitions(self):
+        """
+        List partitions with their bounds, estimated rows and size.
+
+        Returns:
+            list: Partition dictionaries, or None on error
+        """
+        partitions = self.postgres.execute_query("""
+            SELECT
+                c.relname AS partition_name,
+                pg_get_expr(c.relpartbound, c.oid) AS bounds,
+                c.reltuples::BIGINT AS estimated_rows,
+                pg_total_relation_size(c.oid) AS total_bytes
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'climate_data'::regclass
+            ORDER BY c.relname
+        """)
+        self._commit()
+        return partitions
+
+    def detach_cold(self, older_than_months, drop=False):
+        """
+        Detach monthly partitions entirely older than `older_than_months`.
+        Detached partitions move to the archive schema (still queryable
+        directly) or are dropped.
+
+        Returns:
+            list: Names of detached partitions
+        """
+        cutoff = _add_months(date.today(), -older_than_months)
+        partitions = self.list_partitions() or []
+        cold = []
+        for partition in partitions:
+            match = _PARTITION_NAME.match(partition['partition_name'])
+            if match and date(int(match.group(1)), int(match.group(2)), 1) < cutoff:
+                cold.append(partition['partition_name'])
+        if not cold:
+            return []
+        self._known_months.clear()
+
+        if not self.postgres.connection or self.postgres.connection.closed:
+            self.postgres.connect()
+        conn = self.postgres.connection
+        archive_schema = self.config['archive_schema']
+        detached = []
+        conn.autocommit = True  # DETACH ... CONCURRENTLY cannot run in a transaction
+        try:
+            with conn.cursor() as cursor:
+                if not drop:
+                    cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+                for name in cold:
+                    try:
+                        cursor.execute(f'ALTER TABLE climate_data DETACH PARTITION "{name}" CONCURRENTLY')
+                    except Exception:
+                        # PostgreSQL < 14: fall back to a (briefly locking) plain detach
+                        cursor.execute(f'ALTER TABLE climate_data DETACH PARTITION "{name}"')
+                    if drop:
+                        cursor.execute(f'DROP TABLE "{name}"')
+                    else:
+                        cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"')
+                    detached.append(name)
+        except Exception as e:
+            log.error('partitions.detach_failed', error=str(e))
+        finally:
+            conn.autocommit = False
+        return detached
+
+
+# Global partition manager instance
+climate_partitions = ClimatePartitionManager()
@@ -0,0 +1,244 @@
+# ========================================
+# On-Demand Request Profiling
+# Runs selected requests under cProfile (deterministic, this request's
+# thread only) and tracemalloc, and keeps a summary of the most recent
+# ones in memory for the admin page:
+#   top functions by cumulative and by own time
+#   focus functions (LLM post-processing, MongoDB.find ObjectId
+#   conversion, JSON serialization, ...) wherever they appear
+#   allocation sites still holding memory when the response is built,
+#   and the peak traced memory
+#
+# A request is profiled when
+#   an Administrator sends "X-Profile: 1" or "?profile=1"
+#     (the response then carries "X-Profile-Id"), or
+#   it is sampled: random() < sample_rate (PROFILE_SAMPLE_RATE,
+#     adjustable at runtime from the admin page)
+# One request is profiled at a time; others run normally meanwhile.
+# tracemalloc is process-wide, so allocations from concurrent requests
+# can show up in a profile's allocation sites.
+# ========================================
+
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from datetime import datetime
+from config import PROFILING_CONFIG
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _short_path(filename):
+    """Paths relative to backend/, or the last two components for libraries"""
+    if filename.startswith(_BACKEND_DIR):
+        return os.path.relpath(filename, _BACKEND_DIR)
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+def _function_row(key, values):
+    filename, line, name = key
+    primitive_calls, calls, own_time, cumulative_time, _ = values
+    return {
+        'function': name,
+        'location': f'{_short_path(filename)}:{line}' if line else filename,
+        'calls': calls,
+        'primitive_calls': primitive_calls,
+        'own_ms': round(own_time * 1000, 3),
+        'cumulative_ms': round(cumulative_time * 1000, 3)
+    }
+
+
+class _Session:
+    """One profiled request in progress"""
+
+    def __init__(self, trigger, owns_tracemalloc, frames):
+        self.trigger = trigger
+        self.owns_tracemalloc = owns_tracemalloc
+        if owns_tracemalloc:
+            tracemalloc.start(frames)
+        else:
+            tracemalloc.reset_peak()
+        self.baseline_bytes = tracemalloc.get_traced_memory()[0]
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps their summaries"""
+
+    def __init__(self, config=PROFILING_CONFIG):
+        self.config = config
+        self.sample_rate = config['sample_rate']
+        self._profiles = deque(maxlen=config['keep'])
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()   # held while a request is being profiled
+        self.stats = {'profiled': 0, 'skipped_busy': 0}
+
+    def should_profile(self, requested, role):
+        """
+        Trigger for a request, or None.
+
+        Args:
+            requested (bool): The request asked to be profiled (header / query flag)
+            role (str): Caller's role from the session
+
+        Returns:
+            str: 'requested', 'sampled' or None
+        """
+        if not self.config['enabled']:
+            return None
+        if requested and role == 'Administrator':
+            return 'requested'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def start(self, trigger):
+        """Begin profiling the current thread; None if another request is being profiled"""
+        if not self._busy.acquire(blocking=False):
+            self.stats['skipped_busy'] += 1
+            return None
+        try:
+            return _Session(trigger, not tracemalloc.is_tracing(), self.config['tracemalloc_frames'])
+        except Exception:
+            self._busy.release()
+            raise
+
+    def stop(self, session):
+        """Disable the profiler and tracemalloc; returns (allocation snapshot, peak bytes)"""
+        session.profiler.disable()
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            if session.owns_tracemalloc:
+                tracemalloc.stop()
+            self._busy.release()
+        return snapshot, peak
+
+    def finish(self, session, request_info):
+        """
+        Stop profiling and store the summary.
+
+        Args:
+            session (_Session): From start()
+            request_info (dict): method, path, route, status, user
+
+        Returns:
+            dict: The stored profile
+        """
+        duration = time.perf_counter() - session.started
+        snapshot, peak = self.stop(session)
+        profile_id = uuid.uuid4().hex[:12]
+
+        stats = pstats.Stats(session.profiler)
+        rows = [_function_row(key, values) for key, values in stats.stats.items()]
+        top = self.config['top_functions']
+        focus = set(self.config['focus'])
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>')
+        ))
+        allocations = [
+            {
+                'site': f'{_short_path(statistic.traceback[0].filename)}:{statistic.traceback[0].lineno}',
+                'size_kb': round(statistic.size / 1024, 1),
+                'count': statistic.count
+            }
+            for statistic in snapshot.statistics('lineno')[:self.config['top_allocations']]
+        ]
+
+        profile = {
+            'profile_id': profile_id,
+            'at': datetime.utcnow().isoformat() + 'Z',
+            'trigger': session.trigger,
+            **request_info,
+            'duration_ms': round(duration * 1000, 2),
+            'peak_memory_kb': round(max(peak - session.baseline_bytes, 0) / 1024, 1),
+            'function_calls': sum(row['calls'] for row in rows),
+            'by_cumulative': sorted(rows, key=lambda row: row['cumulative_ms'], reverse=True)[:top],
+            'by_own_time': sorted(rows, key=lambda row: row['own_ms'], reverse=True)[:top],
+            'focus': sorted((row for row in rows if row['function'] in focus),
+                            key=lambda row: row['cumulative_ms'], reverse=True),
+            'allocations': allocations
+        }
+        if self.config['directory']:
+            try:
+                os.makedirs(self.config['directory'], exist_ok=True)
+                # Open with snakeviz / pstats for call graphs
+                session.profiler.dump_stats(os.path.join(self.config['directory'], f'{profile_id}.prof'))
+            except Exception as e:
+                print(f"Profile Dump Error: {e}")
+
+        with self._lock:
+            self._profiles.appendleft(profile)
+            self.stats['profiled'] += 1
+        return profile
+
+    def list(self):
+        """Stored profiles, newest first, without their tables"""
+        keys = ('profile_id', 'at', 'trigger', 'method', 'path', 'route', 'status', 'user',
+                'duration_ms', 'peak_memory_kb', 'function_calls')
+        with self._lock:
+            return [{key: profile.get(key) for key in keys} for profile in self._profiles]
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((profile for profile in self._profiles if profile['profile_id'] == profile_id), None)
+
+    def set_sample_rate(self, sample_rate):
+        """Fraction of requests (0 to 1) to profile; takes effect immediately"""
+        if not 0 <= sample_rate <= 1:
+            raise ValueError('sample_rate must be between 0 and 1')
+        self.sample_rate = sample_rate
+
+
+def instrument_flask(app, profiler):
+    """Register request hooks that profile requested / sampled API requests"""
+    from flask import g, request, session
+
+    @app.before_request
+    def _profile_start():
+        if not request.path.startswith('/api/') or request.path.startswith('/api/admin/profiles'):
+            return
+        requested = request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1'
+        trigger = profiler.should_profile(requested, session.get('role'))
+        if trigger:
+            g.profile_session = profiler.start(trigger)
+
+    @app.after_request
+    def _profile_finish(response):
+        profile_session = g.pop('profile_session', None)
+        if profile_session is not None:
+            profile = profiler.finish(profile_session, {
+                'method': request.method,
+                'path': request.path,
+                'route': request.url_rule.rule if request.url_rule else None,
+                'status': response.status_code,
+                'user': session.get('email')
+            })
+            if profile_session.trigger == 'requested':
+                response.headers['X-Profile-Id'] = profile['profile_id']
+        return response
+
+    @app.teardown_request
+    def _profile_cleanup(error=None):
+        # after_request is skipped when the view raises
+        profile_session = g.pop('profile_session', None)
+        if profile_session is not None:
+            profiler.stop(profile_session)
+
+
+# Global request profiler instance
+request_profiler = RequestProfiler()
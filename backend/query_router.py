@@ -0,0 +1,252 @@
+# ========================================
+# Single-Source Query Router
+# Sits in front of DrillDB.execute_query: queries that only touch
+# PostgreSQL are rewritten to native SQL and run on PostgreSQL;
+# queries over one MongoDB collection are compiled into an aggregation
+# pipeline (MongoDB.compile_sql). Everything else (federated joins, CSV,
+# unsupported syntax) goes to Drill.
+# ========================================
+
+import re
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from psycopg2 import pool as pg_pool
+from psycopg2 import OperationalError, InterfaceError
+from psycopg2.extensions import PYDATE, PYDATETIME, PYDATETIMETZ, register_type
+from config import POSTGRES_CONFIG, QUERY_ROUTER_CONFIG
+from database import db_manager, NUMERIC_AS_FLOAT
+from tracing import span
+from structured_log import get_logger
+from workload import referenced_sources, to_postgres_sql
+
+log = get_logger('query_router')
+
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`")
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+def _strip_quoted(sql):
+    return _QUOTED.sub("''", sql)
+
+
+def is_single_select(sql):
+    """True for one SELECT / WITH statement (a trailing ';' is allowed)"""
+    body = _strip_quoted(_COMMENTS.sub(' ', sql)).strip().rstrip(';')
+    return bool(re.match(r'^(SELECT|WITH)\b', body, re.IGNORECASE)) and ';' not in body
+
+
+# Functions (and keywords followed by "(") allowed on the native PostgreSQL path.
+# Drill validates functions itself; anything else (e.g. server-side file or
+# admin functions) is left to Drill rather than sent to PostgreSQL directly.
+_ALLOWED_CALLS = {
+    'select', 'from', 'join', 'on', 'and', 'or', 'not', 'in', 'as', 'exists', 'any', 'all',
+    'over', 'filter', 'where', 'values', 'using',
+    'count', 'sum', 'avg', 'min', 'max', 'stddev', 'variance', 'round', 'floor', 'ceil', 'abs',
+    'cast', 'coalesce', 'nullif', 'greatest', 'least', 'lower', 'upper', 'trim', 'length',
+    'substring', 'concat', 'extract', 'date_trunc', 'row_number', 'rank', 'dense_rank'
+}
+_CALL = re.compile(r'"?\b(\w+)"?\s*\(')
+_CATALOG = re.compile(r'\b(pg_\w+|information_schema)\b', re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def is_safe_native_sql(sql):
+    """True if the query calls only allowlisted functions and reads no system catalogs"""
+    body = _STRING_LITERAL.sub("''", sql)  # quoted identifiers are still checked
+    if _CATALOG.search(body):
+        return False
+    return all(name.lower() in _ALLOWED_CALLS for name in _CALL.findall(body))
+
+
+def _json_value(value):
+    """Match Drill's JSON output: numbers as numbers, timestamps as ISO strings"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+# Column types _json_value has to rewrite once NUMERIC arrives as float
+_TEMPORAL_TYPES = frozenset(PYDATE.values + PYDATETIME.values + PYDATETIMETZ.values)
+
+
+def _unique_columns(names):
+    """Drill-style de-duplication of repeated column names: id, id0, id1, ..."""
+    seen = {}
+    columns = []
+    for name in names:
+        if name in seen:
+            columns.append(f'{name}{seen[name]}')
+            seen[name] += 1
+        else:
+            columns.append(name)
+            seen[name] = 0
+    return columns
+
+
+class QueryRouter:
+    """
+    Chooses the cheapest engine for a query and reports the path taken.
+    Results have the same shape as DrillDB.execute_query plus 'path'.
+    """
+
+    def __init__(self, config=QUERY_ROUTER_CONFIG):
+        self.config = config
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._checked_out = 0
+        self._stats_lock = threading.Lock()
+        self.stats = {'postgres': 0, 'mongo': 0, 'drill': 0, 'fallbacks': 0}
+
+    def execute(self, query, role=None):
+        """
+        Execute a query on PostgreSQL, MongoDB or Drill.
+
+        Args:
+            query (str): Drill SQL
+            role (str): Caller's role (used by Drill request coalescing)
+
+        Returns:
+            dict: {'success', 'rows', 'columns', 'path', 'elapsed_ms', ...}
+                  ('query_id' too when Drill ran it)
+        """
+        started = time.perf_counter()
+        fallback_reason = None
+        if self.config['enabled'] and is_single_select(query):
+            with span('route-plan'):
+                sources = {plugin for plugin, _, _ in referenced_sources(query)}
+            try:
+                if sources == {'postgres'}:
+                    with span('route-plan'):
+                        native_sql = to_postgres_sql(query)
+                        safe = native_sql and is_safe_native_sql(native_sql)
+                    if safe:
+                        return self._count(self._run_postgres(native_sql), 'postgres', started)
+                elif sources == {'mongo'}:
+                    with span('route-plan'):
+                        plan = db_manager.mongo.compile_sql(query)
+                    if plan:
+                        return self._count(self._run_mongo(plan), 'mongo', started)
+            except Exception as e:
+                if not self.config['fallback_to_drill']:
+                    return {'success': False, 'error': str(e), 'rows': [], 'columns': [], 'path': 'failed'}
+                fallback_reason = str(e)
+                log.warning('router.fallback', sources=sorted(sources), error=str(e), query=query)
+
+        result = db_manager.drill.execute_query(query, role=role)
+        result['path'] = 'drill'
+        if fallback_reason:
+            result['fallback_reason'] = fallback_reason
+            with self._stats_lock:
+                self.stats['fallbacks'] += 1
+        return self._count(result, 'drill', started)
+
+    def pool_stats(self):
+        """PostgreSQL pool utilization: {'max', 'in_use', 'available'} (checkouts counted here)"""
+        with self._pool_lock:
+            size = self.config['postgres_pool_size']
+            return {'max': size, 'in_use': self._checked_out, 'available': size - self._checked_out}
+
+    def _count(self, result, path, started):
+        with self._stats_lock:
+            self.stats[path] += 1
+        result['path'] = path
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    # ----------------------------------------
+    # PostgreSQL path
+    # ----------------------------------------
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = pg_pool.ThreadedConnectionPool(
+                    1, self.config['postgres_pool_size'],
+                    host=POSTGRES_CONFIG['host'],
+                    port=POSTGRES_CONFIG['port'],
+                    database=POSTGRES_CONFIG['database'],
+                    user=POSTGRES_CONFIG['user'],
+                    password=POSTGRES_CONFIG['password']
+                )
+            return self._pool
+
+    def _getconn(self):
+        conn = self._get_pool().getconn()
+        with self._pool_lock:
+            self._checked_out += 1
+        return conn
+
+    def _putconn(self, conn, close=False):
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._pool_lock:
+                self._checked_out -= 1
+
+    def _run_postgres(self, sql):
+        """Run in a read-only transaction with a statement timeout; always rolled back"""
+        conn = self._getconn()
+        broken = False
+        try:
+            conn.readonly = True
+            with conn.cursor() as cursor, span('postgres-native'):
+                # Numbers as floats straight from the wire (as _json_value would)
+                register_type(NUMERIC_AS_FLOAT, cursor)
+                cursor.execute("SET LOCAL statement_timeout = %s", (self.config['statement_timeout_ms'],))
+                cursor.execute(sql)
+                columns = _unique_columns([column.name for column in cursor.description])
+                temporal = [index for index, column in enumerate(cursor.description)
+                            if column.type_code in _TEMPORAL_TYPES]
+                rows = []
+                for row in cursor.fetchall():
+                    if temporal:
+                        row = list(row)
+                        for index in temporal:
+                            row[index] = _json_value(row[index])
+                    rows.append(dict(zip(columns, row)))
+            return {'success': True, 'rows': rows, 'columns': columns}
+        except (OperationalError, InterfaceError):
+            broken = True
+            raise
+        finally:
+            if not broken:
+                conn.rollback()
+            self._putconn(conn, close=broken)
+
+    # ----------------------------------------
+    # MongoDB path
+    # ----------------------------------------
+    def _run_mongo(self, plan):
+        if db_manager.mongo.db is None and not db_manager.mongo.connect():
+            raise ConnectionError('MongoDB unavailable')
+        documents = db_manager.mongo.aggregate(
+            plan['collection'], plan['pipeline'],
+            batch_size=self.config['mongo_batch_size'], allow_disk_use=True,
+            max_time_ms=self.config['statement_timeout_ms']  # same budget as the PostgreSQL path
+        )
+        if documents is None:
+            raise RuntimeError('MongoDB aggregation failed')
+
+        if plan['columns'] is None:
+            fields = []
+            for document in documents:
+                fields.extend(key for key in document if key not in fields)
+            names = fields
+        else:
+            names = [name for name, _ in plan['columns']]
+            fields = [field for _, field in plan['columns']]
+        columns = _unique_columns(names)
+        rows = [
+            {column: _json_value(document.get(field)) for column, field in zip(columns, fields)}
+            for document in documents
+        ]
+        if not rows and plan['empty_row'] is not None:
+            rows = [dict(zip(columns, plan['empty_row']))]
+        return {'success': True, 'rows': rows, 'columns': columns}
+
+
+# Global query router instance
+query_router = QueryRouter()
@@ -0,0 +1,227 @@
+# ========================================
+# Cross-Source Region Summary
+# Serves the per-region headline numbers (latest climate, averages,
+# yearly crop yield, species counts) from region_summary (migration 3).
+#
+# Climate and agriculture columns are maintained by statement-level
+# triggers in PostgreSQL; biodiversity columns are synced from MongoDB
+# by record() when Biodiversity_Data inserts succeed.
+#
+# Usage:
+#   python region_summary.py refresh
+# ========================================
+
+import sys
+import threading
+from datetime import datetime
+from psycopg2.extras import execute_values
+from database import PostgresDB, db_manager
+from structured_log import get_logger
+
+log = get_logger('region_summary')
+
+_UPSERT_BIODIVERSITY = """
+    INSERT INTO region_summary AS s (region_id, species_count, conservation_status, biodiversity_survey_date, updated_at)
+    SELECT v.region_id, v.species_count::INTEGER, v.conservation_status::VARCHAR, v.survey_date::TIMESTAMP, now()
+    FROM (VALUES %s) AS v (region_id, species_count, conservation_status, survey_date)
+    JOIN region_info r ON r.region_id = v.region_id
+    ON CONFLICT (region_id) DO UPDATE SET
+        species_count = EXCLUDED.species_count,
+        conservation_status = EXCLUDED.conservation_status,
+        biodiversity_survey_date = EXCLUDED.biodiversity_survey_date,
+        updated_at = now()
+    WHERE s.biodiversity_survey_date IS NULL
+       OR EXCLUDED.biodiversity_survey_date >= s.biodiversity_survey_date
+"""
+
+
+def _latest_surveys(documents):
+    """Newest survey per region as (region_id, species_count, conservation_status, survey_date) tuples"""
+    latest = {}
+    for document in documents:
+        try:
+            region_id = int(document['region_id'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        survey_date = document.get('last_survey_date')
+        if not isinstance(survey_date, datetime):
+            continue
+        if survey_date.tzinfo is not None:
+            survey_date = datetime.utcfromtimestamp(survey_date.timestamp())
+        current = latest.get(region_id)
+        if current is None or survey_date >= current[3]:
+            latest[region_id] = (
+                region_id, document.get('species_count'), document.get('conservation_status'), survey_date
+            )
+    return list(latest.values())
+
+
+class RegionSummary:
+    """
+    Reads and refreshes region_summary.
+    Uses its own connection (guarded by a lock) so refreshes never
+    interleave with request transactions on the shared one.
+    """
+
+    def __init__(self):
+        self.postgres = PostgresDB()
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def _commit(self):
+        if self.postgres.connection and not self.postgres.connection.closed:
+            self.postgres.connection.commit()
+
+    # ----------------------------------------
+    # Incremental maintenance (MongoDB side)
+    # ----------------------------------------
+    def record(self, collection_name, documents):
+        """
+        Fold newly written Biodiversity_Data documents into the summary.
+        Other collections are ignored. On failure the biodiversity
+        watermark is marked dirty so the next read schedules a refresh.
+
+        Returns:
+            bool: True if the summary is up to date
+        """
+        if collection_name != 'Biodiversity_Data':
+            return True
+        rows = _latest_surveys(documents)
+        if not rows:
+            return True
+        with self._lock:
+            ok = self.postgres.execute_values(_UPSERT_BIODIVERSITY, rows)
+            if not ok:
+                self.postgres.execute_update(
+                    "UPDATE region_summary_watermark SET dirty = TRUE WHERE source = 'biodiversity'"
+                )
+        return ok
+
+    # ----------------------------------------
+    # Full refresh
+    # ----------------------------------------
+    def refresh(self):
+        """
+        Recompute every column from the sources.
+
+        Returns:
+            bool: True if both the PostgreSQL and the MongoDB parts refreshed
+        """
+        with self._refreshing:
+            with self._lock:
+                postgres_ok = self.postgres.execute_update("SELECT region_summary_refresh()")
+            return postgres_ok and self.refresh_biodiversity()
+
+    def refresh_biodiversity(self):
+        """Replace the biodiversity columns with the newest survey per region from MongoDB"""
+        try:
+            if db_manager.mongo.db is None and not db_manager.mongo.connect():
+                return False
+            surveys = list(db_manager.mongo.db['Biodiversity_Data'].aggregate([
+                {'$match': {'last_survey_date': {'$type': 'date'}}},
+                {'$sort': {'last_survey_date': 1}},
+                {'$group': {
+                    '_id': '$region_id',
+                    'region_id': {'$last': '$region_id'},
+                    'species_count': {'$last': '$species_count'},
+                    'conservation_status': {'$last': '$conservation_status'},
+                    'last_survey_date': {'$last': '$last_survey_date'}
+                }}
+            ]))
+        except Exception as e:
+            log.error('region_summary.refresh_failed', source='biodiversity', error=str(e))
+            return False
+
+        with self._lock:
+            if not self.postgres.connection or self.postgres.connection.closed:
+                if not self.postgres.connect():
+                    return False
+            conn = self.postgres.connection
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "UPDATE region_summary SET species_count = NULL, conservation_status = NULL, "
+                        "biodiversity_survey_date = NULL"
+                    )
+                    rows = _latest_surveys(surveys)
+                    if rows:
+                        execute_values(cursor, _UPSERT_BIODIVERSITY, rows)
+                    cursor.execute(
+                        "UPDATE region_summary_watermark SET refreshed_at = now(), dirty = FALSE "
+                        "WHERE source = 'biodiversity'"
+                    )
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                log.error('region_summary.refresh_failed', source='biodiversity', error=str(e))
+                return False
+
+    def refresh_in_background(self):
+        """Start refresh() in a thread unless one is already running"""
+        if self._refreshing.locked():
+            return False
+        threading.Thread(target=self.refresh, name='region-summary-refresh', daemon=True).start()
+        return True
+
+    # ----------------------------------------
+    # Reading
+    # ----------------------------------------
+    def get(self):
+        """
+        Read the summary: one row per region plus per-source watermarks.
+
+        Returns:
+            dict: {'regions': [...], 'watermarks': [...], 'stale': bool}, or None on error
+        """
+        with self._lock:
+            regions = self.postgres.execute_query("""
+                SELECT
+                    r.region_id,
+                    r.region_name,
+                    COALESCE(s.climate_count, 0) AS climate_count,
+                    ROUND(s.temperature_sum / NULLIF(s.climate_count, 0), 2) AS avg_temperature,
+                    ROUND(s.rainfall_sum / NULLIF(s.climate_count, 0), 2) AS avg_rainfall,
+                    s.latest_temperature,
+                    s.latest_rainfall,
+                    s.latest_humidity,
+                    s.latest_climate_at,
+                    s.species_count,
+                    s.conservation_status,
+                    s.biodiversity_survey_date,
+                    s.updated_at
+                FROM region_info r
+                LEFT JOIN region_summary s ON s.region_id = r.region_id
+                ORDER BY r.region_id
+            """)
+            yields = self.postgres.execute_rows(
+                "SELECT region_id, year, total_yield FROM region_yield_summary ORDER BY region_id, year",
+                numeric_as_float=True
+            )
+            watermarks = self.postgres.execute_query(
+                "SELECT source, refreshed_at, dirty FROM region_summary_watermark ORDER BY source"
+            )
+            self._commit()
+        if regions is None or yields is None or watermarks is None:
+            return None
+
+        yearly = {}
+        for region_id, year, total_yield in yields['rows']:
+            yearly.setdefault(region_id, {})[year] = total_yield
+        for region in regions:
+            region['yield_by_year'] = yearly.get(region['region_id'], {})
+        return {
+            'regions': regions,
+            'watermarks': watermarks,
+            'stale': any(w['dirty'] for w in watermarks)
+        }
+
+
+# Global region summary instance
+region_summary = RegionSummary()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'refresh'
+    if command == 'refresh':
+        print(f"Refresh {'succeeded' if region_summary.refresh() else 'failed'}")
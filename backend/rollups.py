@@ -0,0 +1,324 @@
+# ========================================
+# Air Quality / Sensor Log Rollups
+# Maintains hourly and daily per-region aggregates in MongoDB:
+#   Air_Quality_Rollups_Hourly / _Daily   (from Air_Quality_History)
+#   Sensor_Log_Rollups_Hourly / _Daily    (from Sensor_Logs)
+#
+# Inserts update the affected buckets incrementally (record()); rebuild()
+# recomputes buckets from the raw history with $group + $merge.
+# Averages are sum / count of the matching metric.
+#
+# Usage:
+#   python rollups.py rebuild [days]
+# ========================================
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pymongo import UpdateOne
+from database import db_manager
+from structured_log import get_logger
+
+log = get_logger('rollups')
+
+PERIODS = {
+    'hour': 'Hourly',
+    'day': 'Daily'
+}
+
+SEVERITIES = ['info', 'warning', 'critical']
+
+# metrics: rollup field prefix -> source field path (count/sum/min/max kept)
+# last: rollup field -> source field path, taken from the newest document
+ROLLUPS = {
+    'air_quality': {
+        'source': 'Air_Quality_History',
+        'target': 'Air_Quality_Rollups',
+        'time_field': 'recorded_at',
+        'metrics': {'aqi': 'aqi', 'pm2_5': 'pollutants.pm2_5', 'co2': 'pollutants.co2'},
+        'last': {'last_aqi': 'aqi', 'last_pm2_5': 'pollutants.pm2_5', 'last_air_quality_level': 'air_quality_level'},
+        'severities': False
+    },
+    'sensor_logs': {
+        'source': 'Sensor_Logs',
+        'target': 'Sensor_Log_Rollups',
+        'time_field': 'timestamp',
+        'metrics': {},
+        'last': {'last_event_type': 'event_type', 'last_severity': 'severity', 'last_sensor_id': 'sensor_id'},
+        'severities': True
+    }
+}
+
+_SOURCE_TO_KIND = {spec['source']: kind for kind, spec in ROLLUPS.items()}
+
+
+def rollup_collection(kind, period):
+    """Name of the rollup collection for `kind` ('air_quality' / 'sensor_logs') and 'hour' / 'day'"""
+    return f"{ROLLUPS[kind]['target']}_{PERIODS[period]}"
+
+
+def _get_path(document, path):
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _as_naive_utc(moment):
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _period_start(moment, period):
+    if period == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _bucket_id(region_id, start):
+    return f"{region_id}:{start.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+
+
+def _severity_field(severity):
+    severity = str(severity or '').lower()
+    return f"severity_{severity if severity in SEVERITIES else 'other'}"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def written_documents(documents, result):
+    """Documents from an insert_many() call that MongoDB reports as written"""
+    if result['inserted'] + result['unacknowledged'] == len(documents):
+        return list(documents)
+    # 'errors' is capped; 'failed_indexes' lists every failure
+    failed = set(result['failed_indexes'])
+    return [document for index, document in enumerate(documents) if index not in failed]
+
+
+class RollupEngine:
+    """
+    Keeps the rollup collections current.
+    Uses the shared MongoDB client (pymongo is thread-safe).
+    """
+
+    def __init__(self, rollups=ROLLUPS):
+        self.rollups = rollups
+
+    # ----------------------------------------
+    # Incremental maintenance
+    # ----------------------------------------
+    def record(self, source_collection, documents):
+        """
+        Fold newly inserted documents into the hourly and daily buckets.
+        Documents are summarized per bucket first, so a bulk insert of
+        thousands of rows costs one upsert per touched bucket.
+
+        Args:
+            source_collection (str): 'Air_Quality_History' or 'Sensor_Logs'
+            documents (list): Documents that were written
+
+        Returns:
+            bool: True if the rollups were updated (or nothing applied)
+        """
+        kind = _SOURCE_TO_KIND.get(source_collection)
+        if kind is None or not documents:
+            return True
+        spec = self.rollups[kind]
+        ok = True
+        for period in PERIODS:
+            summaries = {}
+            for document in documents:
+                moment = document.get(spec['time_field'])
+                if not isinstance(moment, datetime) or document.get('region_id') is None:
+                    continue
+                moment = _as_naive_utc(moment)
+                start = _period_start(moment, period)
+                summary = summaries.setdefault(
+                    _bucket_id(document['region_id'], start),
+                    {'region_id': document['region_id'], 'period_start': start, 'count': 0, 'metrics': {},
+                     'severities': {}, 'last_at': None, 'last': {}}
+                )
+                self._add(spec, summary, document, moment)
+            if not summaries:
+                continue
+            operations = [
+                UpdateOne({'_id': bucket_id}, self._update_pipeline(spec, summary), upsert=True)
+                for bucket_id, summary in summaries.items()
+            ]
+            result = db_manager.mongo.bulk_write(rollup_collection(kind, period), operations)
+            if result is None or result['failed']:
+                ok = False
+        if not ok:
+            log.error('rollups.update_incomplete', collection=source_collection, hint='run rebuild')
+        return ok
+
+    def _add(self, spec, summary, document, moment):
+        summary['count'] += 1
+        for name, path in spec['metrics'].items():
+            value = _get_path(document, path)
+            if not _is_number(value):
+                continue
+            metric = summary['metrics'].setdefault(name, {'count': 0, 'sum': 0, 'min': value, 'max': value})
+            metric['count'] += 1
+            metric['sum'] += value
+            metric['min'] = min(metric['min'], value)
+            metric['max'] = max(metric['max'], value)
+        if spec['severities']:
+            field = _severity_field(document.get('severity'))
+            summary['severities'][field] = summary['severities'].get(field, 0) + 1
+        if summary['last_at'] is None or moment >= summary['last_at']:
+            summary['last_at'] = moment
+            summary['last'] = {field: _get_path(document, path) for field, path in spec['last'].items()}
+
+    def _update_pipeline(self, spec, summary):
+        """
+        Pipeline-style upsert: adds counts and sums, widens min / max and
+        replaces the last_* fields only if this batch is newer.
+        """
+        def add(field, amount):
+            return {'$add': [{'$ifNull': [f'${field}', 0]}, amount]}
+
+        newer = {'$gte': [{'$literal': summary['last_at']}, {'$ifNull': ['$last_at', datetime.min]}]}
+        fields = {
+            'region_id': {'$literal': summary['region_id']},
+            'period_start': {'$literal': summary['period_start']},
+            'count': add('count', summary['count']),
+            'last_at': {'$max': ['$last_at', {'$literal': summary['last_at']}]},
+            'updated_at': '$$NOW'
+        }
+        for name, metric in summary['metrics'].items():
+            fields[f'{name}_count'] = add(f'{name}_count', metric['count'])
+            fields[f'{name}_sum'] = add(f'{name}_sum', metric['sum'])
+            fields[f'{name}_min'] = {'$min': [f'${name}_min', metric['min']]}
+            fields[f'{name}_max'] = {'$max': [f'${name}_max', metric['max']]}
+        for field, amount in summary['severities'].items():
+            fields[field] = add(field, amount)
+        for field, value in summary['last'].items():
+            fields[field] = {'$cond': [newer, {'$literal': value}, f'${field}']}
+        return [{'$set': fields}]
+
+    # ----------------------------------------
+    # Full / windowed recomputation
+    # ----------------------------------------
+    def rebuild(self, kind, since=None):
+        """
+        Recompute buckets from raw history with $group + $merge.
+        Buckets starting at or after `since` (truncated to the period) are
+        replaced, so the result is exact even if an incremental update failed.
+
+        Args:
+            kind (str): 'air_quality' or 'sensor_logs'
+            since (datetime): Oldest time to recompute (None = everything)
+
+        Returns:
+            dict: {'hour': buckets, 'day': buckets}
+        """
+        spec = self.rollups[kind]
+        db = db_manager.mongo.db
+        if db is None:
+            if not db_manager.mongo.connect():
+                raise ConnectionError('MongoDB unavailable')
+            db = db_manager.mongo.db
+        written = {}
+        for period in PERIODS:
+            pipeline = self._rebuild_pipeline(spec, period, since)
+            target = rollup_collection(kind, period)
+            pipeline.append({'$merge': {'into': target, 'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}})
+            db[spec['source']].aggregate(pipeline, allowDiskUse=True)
+            query = {'period_start': {'$gte': _period_start(_as_naive_utc(since), period)}} if since else {}
+            written[period] = db[target].count_documents(query)
+        return written
+
+    def _rebuild_pipeline(self, spec, period, since):
+        time_field = f"${spec['time_field']}"
+        pipeline = []
+        match = {spec['time_field']: {'$type': 'date'}, 'region_id': {'$ne': None}}
+        if since:
+            match[spec['time_field']] = {'$gte': _period_start(_as_naive_utc(since), period)}
+        pipeline.append({'$match': match})
+        pipeline.append({'$sort': {spec['time_field']: 1}})
+
+        group = {
+            '_id': {'region_id': '$region_id', 'start': {'$dateTrunc': {'date': time_field, 'unit': period}}},
+            'count': {'$sum': 1},
+            'last_at': {'$max': time_field}
+        }
+        for name, path in spec['metrics'].items():
+            numeric = {'$cond': [{'$isNumber': f'${path}'}, f'${path}', None]}
+            group[f'{name}_count'] = {'$sum': {'$cond': [{'$isNumber': f'${path}'}, 1, 0]}}
+            group[f'{name}_sum'] = {'$sum': numeric}
+            group[f'{name}_min'] = {'$min': numeric}
+            group[f'{name}_max'] = {'$max': numeric}
+        if spec['severities']:
+            severity = {'$toLower': {'$ifNull': ['$severity', '']}}
+            for level in SEVERITIES:
+                group[f'severity_{level}'] = {'$sum': {'$cond': [{'$eq': [severity, level]}, 1, 0]}}
+            group['severity_other'] = {'$sum': {'$cond': [{'$in': [severity, SEVERITIES]}, 0, 1]}}
+        for field, path in spec['last'].items():
+            group[field] = {'$last': f'${path}'}
+        pipeline.append({'$group': group})
+
+        project = {field: 1 for field in group if field != '_id'}
+        project.update({
+            '_id': {'$concat': [
+                {'$toString': '$_id.region_id'}, ':',
+                {'$dateToString': {'date': '$_id.start', 'format': '%Y-%m-%dT%H:%M:%SZ'}}
+            ]},
+            'region_id': '$_id.region_id',
+            'period_start': '$_id.start',
+            'updated_at': '$$NOW'
+        })
+        pipeline.append({'$project': project})
+        return pipeline
+
+    # ----------------------------------------
+    # Reading
+    # ----------------------------------------
+    def query(self, kind, period, region_id=None, start=None, end=None, limit=1000):
+        """
+        Read rollup buckets in time order with averages filled in.
+
+        Returns:
+            list: Bucket dictionaries, or None on error
+        """
+        spec = self.rollups[kind]
+        query = {}
+        if region_id is not None:
+            query['region_id'] = region_id
+        if start or end:
+            query['period_start'] = {}
+            if start:
+                query['period_start']['$gte'] = start
+            if end:
+                query['period_start']['$lt'] = end
+        try:
+            db = db_manager.mongo.db
+            if db is None:
+                if not db_manager.mongo.connect():
+                    return None
+                db = db_manager.mongo.db
+            cursor = db[rollup_collection(kind, period)].find(query).sort('period_start', 1).limit(limit)
+            buckets = list(cursor)
+        except Exception as e:
+            log.error('rollups.query_failed', error=str(e), kind=kind, period=period)
+            return None
+        for bucket in buckets:
+            for name in spec['metrics']:
+                count = bucket.get(f'{name}_count')
+                bucket[f'{name}_avg'] = bucket[f'{name}_sum'] / count if count else None
+        return buckets
+
+
+# Global rollup engine instance
+rollups = RollupEngine()
+
+
+if __name__ == '__main__':
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    for kind in ROLLUPS:
+        print(f"{kind}: {rollups.rebuild(kind, since)}")
@@ -0,0 +1,246 @@
+# ========================================
+# Append-Only Sensor Reading Ingestion
+# Appends timestamp,region_id,co2_level,pm2_5 rows to segment files,
+# fsyncs them in batches and publishes finished segments atomically
+# into the increments directory read by Drill and sensor_parquet.py.
+#
+# Layout (inside Drill's dfs.data workspace):
+#   sensor_increments/_inprogress/<segment>.csv   being written (Drill skips '_' paths)
+#   sensor_increments/<segment>.csv               published, immutable
+# ========================================
+
+import atexit
+import fcntl
+import glob
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from config import SENSOR_INGEST_CONFIG, SENSOR_PARQUET_CONFIG
+from structured_log import get_logger
+
+log = get_logger('sensor_ingest')
+
+HEADER = 'timestamp,region_id,co2_level,pm2_5\n'
+
+
+def parse_reading(data):
+    """
+    Validate one reading and format it as a CSV line.
+
+    Args:
+        data (dict): {"timestamp": ISO-8601 (optional, default now), "region_id": int,
+                      "co2_level": float, "pm2_5": float}
+
+    Returns:
+        str: CSV line ending in a newline
+
+    Raises:
+        ValueError: If a field is missing or has the wrong type, or a
+                    measurement is NaN / infinite (Drill's CAST rejects them)
+    """
+    for field in ('region_id', 'co2_level', 'pm2_5'):
+        if field not in data:
+            raise ValueError(f'Missing field: {field}')
+    timestamp = data.get('timestamp')
+    if timestamp is None:
+        moment = datetime.utcnow()
+    else:
+        moment = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+        if moment.utcoffset() is not None:
+            moment = datetime.utcfromtimestamp(moment.timestamp())
+    try:
+        region_id = int(data['region_id'])
+        co2_level = float(data['co2_level'])
+        pm2_5 = float(data['pm2_5'])
+    except (TypeError, ValueError):
+        raise ValueError('region_id must be an integer; co2_level and pm2_5 must be numbers')
+    if not (math.isfinite(co2_level) and math.isfinite(pm2_5)):
+        raise ValueError('co2_level and pm2_5 must be finite numbers')
+    return f"{moment.strftime('%Y-%m-%dT%H:%M:%SZ')},{region_id},{co2_level},{pm2_5}\n"
+
+
+class SensorSegmentWriter:
+    """
+    Appends readings to the current segment and rotates it by size or age.
+
+    Appenders return once their rows are fsynced; a background thread
+    fsyncs at most every fsync_interval_ms, so concurrent appenders share
+    one fsync (group commit). Published segments are never modified, so
+    readers never observe a torn file.
+    """
+
+    def __init__(self, config=SENSOR_INGEST_CONFIG, increments_dir=SENSOR_PARQUET_CONFIG['increments_dir']):
+        self.config = config
+        self.increments_dir = increments_dir
+        self.inprogress_dir = os.path.join(increments_dir, '_inprogress')
+        self.on_publish = []          # callbacks(path) run after a segment is published
+
+        self._cond = threading.Condition()
+        self._file = None
+        self._path = None
+        self._opened_at = 0
+        self._written = 0             # bytes written to the current segment
+        self._synced = 0              # bytes known to be on disk
+        self._segment_seq = 0
+        self._thread = None
+        self._started = False
+        self._failures = 0            # fsync / rotation attempts that raised
+        self.last_error = None
+        self.stats = {'rows': 0, 'segments_published': 0, 'fsyncs': 0}
+
+    # ----------------------------------------
+    # Lifecycle
+    # ----------------------------------------
+    def start(self):
+        """Recover orphaned segments and start the fsync / rotation thread"""
+        with self._cond:
+            if self._started:
+                return
+            os.makedirs(self.inprogress_dir, exist_ok=True)
+            self._recover_orphans()
+            self._started = True
+            self._thread = threading.Thread(target=self._run, name='sensor-segments', daemon=True)
+            self._thread.start()
+
+    def _recover_orphans(self):
+        """Publish segments left behind by a crashed process, minus any torn last line"""
+        for path in glob.glob(os.path.join(self.inprogress_dir, '*.csv')):
+            with open(path, 'r+b') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue  # a live writer owns it
+                data = f.read()
+                end = data.rfind(b'\n') + 1
+                if end < len(data):
+                    f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+            if end <= len(HEADER):
+                os.remove(path)
+            else:
+                self._publish_file(path)
+
+    # ----------------------------------------
+    # Writing
+    # ----------------------------------------
+    def append(self, lines):
+        """
+        Append formatted CSV lines (see parse_reading) durably.
+
+        Args:
+            lines (list): CSV lines ending in newlines
+
+        Returns:
+            int: Number of rows appended
+
+        Raises:
+            RuntimeError: If the fsync thread failed (or died) before the
+                          rows were synced; they may or may not be on disk
+            TimeoutError: If the rows were not synced within append_timeout_s
+        """
+        if not lines:
+            return 0
+        if not self._started:
+            self.start()
+        payload = ''.join(lines).encode('utf-8')
+        with self._cond:
+            self._check_writer()
+            if self._file is None:
+                self._open_segment()
+            self._file.write(payload)
+            self._written += len(payload)
+            target = (self._path, self._written)
+            failures = self._failures
+            self.stats['rows'] += len(lines)
+            self._cond.notify_all()
+            # Wait for the group fsync (or a rotation, which also syncs)
+            deadline = time.monotonic() + self.config['append_timeout_s']
+            while self._path == target[0] and self._synced < target[1]:
+                if self._failures != failures:
+                    raise RuntimeError(f'Sensor segment sync failed: {self.last_error}')
+                self._check_writer()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError('Sensor segment sync timed out')
+                self._cond.wait(min(remaining, 1.0))
+        return len(lines)
+
+    def _check_writer(self):
+        if not self._thread.is_alive():
+            raise RuntimeError('Sensor segment writer thread is not running')
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        name = f"segment-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._segment_seq:06d}.csv"
+        self._path = os.path.join(self.inprogress_dir, name)
+        self._file = open(self._path, 'ab', buffering=0)
+        fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._file.write(HEADER.encode('utf-8'))
+        self._written = len(HEADER)
+        self._synced = 0
+        self._opened_at = time.monotonic()
+
+    def _run(self):
+        interval = self.config['fsync_interval_ms'] / 1000.0
+        while True:
+            time.sleep(interval)
+            with self._cond:
+                if self._file is None:
+                    continue
+                try:
+                    if self._synced < self._written:
+                        os.fsync(self._file.fileno())
+                        self._synced = self._written
+                        self.stats['fsyncs'] += 1
+                        self._cond.notify_all()
+                    too_big = self._written >= self.config['max_segment_bytes']
+                    too_old = time.monotonic() - self._opened_at >= self.config['max_segment_seconds']
+                    if too_big or (too_old and self._written > len(HEADER)):
+                        self._rotate()
+                except Exception as e:
+                    # Fail the waiting appenders instead of leaving them blocked; retry next interval
+                    log.error('sensor_segments.sync_failed', error=str(e), segment=self._path)
+                    self._failures += 1
+                    self.last_error = str(e)
+                    self._cond.notify_all()
+
+    def _rotate(self):
+        """Close and publish the current segment (lock held)"""
+        os.fsync(self._file.fileno())
+        self._synced = self._written
+        path = self._path
+        self._file.close()  # releases the flock
+        self._file = None
+        self._path = None
+        self._cond.notify_all()
+        self._publish_file(path)
+
+    def _publish_file(self, path):
+        """Atomically move a finished segment into the increments directory"""
+        final_path = os.path.join(self.increments_dir, os.path.basename(path))
+        os.replace(path, final_path)
+        dir_fd = os.open(self.increments_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)  # make the rename itself durable
+        finally:
+            os.close(dir_fd)
+        self.stats['segments_published'] += 1
+        for callback in self.on_publish:
+            try:
+                callback(final_path)
+            except Exception as e:
+                log.error('sensor_segments.publish_hook_failed', error=str(e), segment=final_path)
+
+    def flush(self):
+        """Publish the current segment now (e.g. before a compaction)"""
+        with self._cond:
+            if self._file is not None and self._written > len(HEADER):
+                self._rotate()
+
+
+# Global segment writer instance
+sensor_segments = SensorSegmentWriter()
+atexit.register(sensor_segments.flush)
@@ -0,0 +1,295 @@
+# ========================================
+# Sensor Readings Parquet Pipeline
+# Compacts data/sensor_readings.csv plus appended increment files into a
+# typed Parquet dataset partitioned by date and region_id, so Drill reads
+# only the columns / directories / row groups a query needs.
+#
+# Layout: <output_dir>/<YYYY-MM-DD>/<region_id>/*.parquet
+# In Drill, dir0 is the date and dir1 the region; the files also keep
+# typed timestamp, reading_date, region_id, co2_level and pm2_5 columns
+# whose row-group statistics drive Parquet filter pushdown.
+#
+# Usage:
+#   python sensor_parquet.py compact   # full rebuild (merges small files)
+#   python sensor_parquet.py append    # convert only new increment files
+# ========================================
+
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+from config import CSV_DATA_PATH, SENSOR_PARQUET_CONFIG
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+except ImportError:  # the pipeline is optional; Drill keeps reading the CSV
+    pa = None
+
+_MANIFEST = '_manifest.json'  # Drill ignores files starting with '_'
+
+
+def _csv_schema():
+    return pa.schema([
+        ('timestamp', pa.timestamp('s', tz='UTC')),
+        ('region_id', pa.int32()),
+        ('co2_level', pa.float64()),
+        ('pm2_5', pa.float64())
+    ])
+
+
+def _output_schema():
+    return pa.schema([
+        ('timestamp', pa.timestamp('ms')),
+        ('reading_date', pa.date32()),
+        ('region_id', pa.int32()),
+        ('co2_level', pa.float64()),
+        ('pm2_5', pa.float64()),
+        # Directory keys only; pyarrow strips them from the file contents
+        ('part_date', pa.string()),
+        ('part_region', pa.int32())
+    ])
+
+
+class SensorParquetPipeline:
+    """
+    Converts the sensor CSV source into a partitioned Parquet dataset.
+    Conversion streams record batches, so memory stays flat regardless
+    of file size.
+    """
+
+    def __init__(self, config=SENSOR_PARQUET_CONFIG, csv_path=CSV_DATA_PATH):
+        self.config = config
+        self.csv_path = csv_path
+        self.output_dir = config['output_dir']
+        self.increments_dir = config['increments_dir']
+        self._lock = threading.Lock()
+        self.status = {'state': 'idle', 'last_run': None, 'last_error': None}
+
+    @staticmethod
+    def available():
+        """True if pyarrow is installed"""
+        return pa is not None
+
+    # ----------------------------------------
+    # Reading
+    # ----------------------------------------
+    def _increment_files(self):
+        """Published increment segments, oldest first"""
+        return sorted(glob.glob(os.path.join(self.increments_dir, '*.csv')))
+
+    def _batches(self, path):
+        """Stream typed record batches (with partition keys) from one CSV file"""
+        reader = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=self.config['read_block_bytes']),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=_csv_schema(),
+                include_columns=_csv_schema().names
+            )
+        )
+        for batch in reader:
+            if batch.num_rows == 0:
+                continue
+            timestamps = pc.cast(batch.column('timestamp'), pa.timestamp('ms'))
+            dates = pc.cast(timestamps, pa.date32())
+            yield pa.RecordBatch.from_arrays([
+                timestamps,
+                dates,
+                batch.column('region_id'),
+                batch.column('co2_level'),
+                batch.column('pm2_5'),
+                pc.strftime(batch.column('timestamp'), format='%Y-%m-%d'),
+                batch.column('region_id')
+            ], schema=_output_schema())
+
+    def _write(self, sources, base_dir, basename):
+        """Write batches from all `sources` into base_dir. Returns rows written."""
+        rows = [0]
+
+        def batches():
+            for path in sources:
+                for batch in self._batches(path):
+                    rows[0] += batch.num_rows
+                    yield batch
+
+        file_format = ds.ParquetFileFormat()
+        ds.write_dataset(
+            batches(),
+            base_dir,
+            schema=_output_schema(),
+            format=file_format,
+            file_options=file_format.make_write_options(compression=self.config['compression']),
+            partitioning=ds.partitioning(
+                pa.schema([('part_date', pa.string()), ('part_region', pa.int32())])
+            ),
+            basename_template=basename + '-{i}.parquet',
+            max_rows_per_group=self.config['row_group_rows'],
+            min_rows_per_group=min(self.config['row_group_rows'], 10000),
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        return rows[0]
+
+    # ----------------------------------------
+    # Manifest
+    # ----------------------------------------
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.output_dir, _MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'increments': [], 'rows': 0}
+
+    def _write_manifest(self, directory, manifest):
+        tmp_path = os.path.join(directory, _MANIFEST + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(directory, _MANIFEST))
+
+    # ----------------------------------------
+    # Pipeline operations
+    # ----------------------------------------
+    def compact(self):
+        """
+        Rebuild the whole dataset from the base CSV and every increment.
+        The new dataset is written to a staging directory and swapped in,
+        replacing the many small files left by append().
+
+        Returns:
+            dict: {'rows': int, 'increments': int, 'seconds': float}
+        """
+        with self._lock:
+            return self._run('compact', self._compact)
+
+    def append(self):
+        """
+        Convert increment files not yet in the dataset into new Parquet files.
+
+        Returns:
+            dict: {'rows': int, 'increments': int, 'seconds': float}
+        """
+        with self._lock:
+            return self._run('append', self._append)
+
+    def _run(self, name, operation):
+        if not self.available():
+            raise RuntimeError('The Parquet pipeline requires the pyarrow package')
+        self.status['state'] = name
+        started = time.perf_counter()
+        try:
+            result = operation()
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            self.status.update(last_error=None, last_result=result)
+            return result
+        except Exception as e:
+            self.status['last_error'] = str(e)
+            raise
+        finally:
+            self.status.update(state='idle', last_run=datetime.utcnow().isoformat())
+            invalidate_sensor_readings_table()
+
+    def _compact(self):
+        increments = self._increment_files()
+        sources = ([self.csv_path] if os.path.exists(self.csv_path) else []) + increments
+        staging = self.output_dir + '.staging'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        rows = self._write(sources, staging, 'part')
+        self._write_manifest(staging, {
+            'increments': [os.path.basename(p) for p in increments],
+            'rows': rows,
+            'compacted_at': datetime.utcnow().isoformat()
+        })
+
+        # Swap directories; readers see either the old or the new dataset
+        retired = self.output_dir + '.retired'
+        shutil.rmtree(retired, ignore_errors=True)
+        if os.path.exists(self.output_dir):
+            os.rename(self.output_dir, retired)
+        os.rename(staging, self.output_dir)
+        shutil.rmtree(retired, ignore_errors=True)
+        return {'rows': rows, 'increments': len(increments)}
+
+    def _append(self):
+        if not os.path.exists(os.path.join(self.output_dir, _MANIFEST)):
+            return self._compact()
+        manifest = self._read_manifest()
+        done = set(manifest['increments'])
+        new = [p for p in self._increment_files() if os.path.basename(p) not in done]
+        if not new:
+            return {'rows': 0, 'increments': 0}
+
+        # Unique basename so existing files in the same directories are kept
+        rows = self._write(new, self.output_dir, f'inc-{int(time.time() * 1000)}')
+        manifest['increments'].extend(os.path.basename(p) for p in new)
+        manifest['rows'] += rows
+        self._write_manifest(self.output_dir, manifest)
+        return {'rows': rows, 'increments': len(new)}
+
+
+CSV_SENSOR_TABLE = 'dfs.data.`sensor_readings.csv`'
+# Listed explicitly: Drill cannot UNION ALL schema-less text files with SELECT *
+_CSV_SENSOR_COLUMNS = '`timestamp`, region_id, co2_level, pm2_5'
+
+
+_table_lock = threading.Lock()
+_table_cache = {'table': None, 'generation': 0}
+
+
+def sensor_readings_table():
+    """
+    Drill table reference for sensor readings: the Parquet dataset when
+    SENSOR_READINGS_SOURCE=parquet and it has been built (published
+    increments are appended to it), else the CSV. Once sensor_ingest.py has
+    published increments, the CSV is a UNION ALL derived table of the base
+    file and the increments directory, usable wherever a table name is.
+
+    The answer is cached until invalidate_sensor_readings_table() (called
+    when a segment is published and after every pipeline run).
+    """
+    with _table_lock:
+        if _table_cache['table'] is not None:
+            return _table_cache['table']
+        generation = _table_cache['generation']
+    table = _resolve_sensor_readings_table()
+    with _table_lock:
+        if _table_cache['generation'] == generation:
+            _table_cache['table'] = table
+    return table
+
+
+def invalidate_sensor_readings_table(*_):
+    """Forget the cached table reference (usable as a sensor_segments.on_publish callback)"""
+    with _table_lock:
+        _table_cache['table'] = None
+        _table_cache['generation'] += 1
+
+
+def _resolve_sensor_readings_table():
+    if (SENSOR_PARQUET_CONFIG['source'] == 'parquet'
+            and os.path.exists(os.path.join(SENSOR_PARQUET_CONFIG['output_dir'], _MANIFEST))):
+        return f"dfs.data.`{os.path.basename(SENSOR_PARQUET_CONFIG['output_dir'])}`"
+    # Drill cannot read an empty directory, so the increments join in with the first segment
+    if not glob.glob(os.path.join(SENSOR_PARQUET_CONFIG['increments_dir'], '*.csv')):
+        return CSV_SENSOR_TABLE
+    increments = f"dfs.data.`{os.path.basename(SENSOR_PARQUET_CONFIG['increments_dir'])}`"
+    return (f"(SELECT {_CSV_SENSOR_COLUMNS} FROM {CSV_SENSOR_TABLE} "
+            f"UNION ALL SELECT {_CSV_SENSOR_COLUMNS} FROM {increments})")
+
+
+# Global pipeline instance
+sensor_parquet = SensorParquetPipeline()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'compact'
+    result = sensor_parquet.append() if command == 'append' else sensor_parquet.compact()
+    print(f"{command}: {result['rows']} rows from {result['increments']} increment files "
+          f"in {result['seconds']}s -> {sensor_parquet.output_dir}")
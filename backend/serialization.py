@@ -0,0 +1,95 @@
+# ========================================
+# Fast JSON Serialization
+# Flask JSON provider used by jsonify() for every API response. With
+# orjson (optional) rows are encoded in C, including datetimes, dates,
+# UUIDs and NumPy arrays / scalars; Decimal, ObjectId and sets go
+# through a small default() hook. Without orjson the standard library
+# encoder produces the same output.
+#
+# Values follow the conventions of the query paths (query_router.py):
+#   Decimal          -> number
+#   datetime / date  -> ISO 8601 string
+#   ObjectId         -> hex string
+#
+# Keys keep their insertion order, so result rows list columns in
+# SELECT order.
+#
+#   JSON_SERIALIZER=orjson   (default; falls back to stdlib if missing)
+#   JSON_SERIALIZER=stdlib
+# ========================================
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+from bson import ObjectId
+from flask.json.provider import JSONProvider
+from config import SERIALIZATION_CONFIG
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+def _default(value):
+    """Types neither encoder handles natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, 'tolist'):  # NumPy arrays and scalars (stdlib path)
+        return value.tolist()
+    if isinstance(value, (datetime, date)):  # stdlib path
+        return value.isoformat()
+    if isinstance(value, UUID):  # stdlib path
+        return str(value)
+    if hasattr(value, '__html__'):  # Markup, as Flask's own provider does
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def backend():
+    """Encoder in use: 'orjson' or 'stdlib'"""
+    return 'orjson' if orjson is not None and SERIALIZATION_CONFIG['backend'] == 'orjson' else 'stdlib'
+
+
+if backend() == 'orjson':
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value):
+        """Encode to UTF-8 JSON bytes"""
+        return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(value):
+        """Encode to UTF-8 JSON bytes"""
+        return _encoder.encode(value).encode('utf-8')
+
+    loads = json.loads
+
+
+class FastJSONProvider(JSONProvider):
+    """Encodes responses straight to bytes (no intermediate str)"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def install(app):
+    """Make jsonify() (and request.get_json()) use the fast provider"""
+    app.json = FastJSONProvider(app)
@@ -0,0 +1,248 @@
+# ========================================
+# Slow-Query Log
+# Queries taking longer than SLOW_QUERY_THRESHOLD_MS are stored in
+# slow_query_log (migration 5) with the SQL, user, engine path and
+# whether the SQL was generated from natural language. For queries Drill
+# ran, the profile is fetched from the profiles REST API and reduced to
+# phase times (planning / queued / execution) and the hottest operators.
+#
+# record() only queues the entry; profile fetches and inserts run on a
+# background thread so the request is never delayed.
+#
+# Usage:
+#   python slow_queries.py [limit]
+# ========================================
+
+import queue
+import sys
+import threading
+import time
+from psycopg2.extras import Json
+from config import SLOW_QUERY_CONFIG
+from database import PostgresDB, db_manager
+from structured_log import get_logger
+
+log = get_logger('slow_queries')
+
+# QueryProfile.state in Drill's profile JSON
+_QUERY_STATES = ['STARTING', 'RUNNING', 'COMPLETED', 'CANCELED', 'FAILED',
+                 'CANCELLATION_REQUESTED', 'ENQUEUED', 'PREPARING', 'PLANNING']
+
+
+def summarize_profile(profile, top_operators=5):
+    """
+    Reduce a Drill query profile to phase times and the operators that
+    did the most work (summed over all minor fragments).
+
+    Args:
+        profile (dict): JSON from GET /profiles/<query_id>.json
+        top_operators (int): Operators to keep, by processing time
+
+    Returns:
+        dict: {'state', 'planning_ms', 'queued_ms', 'execution_ms',
+               'total_fragments', 'hottest_operators': [...]}
+    """
+    start = profile.get('start') or 0
+    plan_end = profile.get('planEnd') or start
+    queue_end = profile.get('queueWaitEnd') or plan_end
+    end = profile.get('end') or queue_end
+    state = profile.get('state')
+
+    operators = {}
+    for fragment in profile.get('fragmentProfile', []):
+        major = fragment.get('majorFragmentId', 0)
+        for minor in fragment.get('minorFragmentProfile', []):
+            for operator in minor.get('operatorProfile', []):
+                operator_id = operator.get('operatorId', 0)
+                name = operator.get('operatorTypeName') or str(operator.get('operatorType', '?'))
+                entry = operators.get((major, operator_id))
+                if entry is None:
+                    entry = operators[(major, operator_id)] = {
+                        'operator': f'{major:02d}-{operator_id:02d}', 'type': name,
+                        'process_ms': 0.0, 'max_process_ms': 0.0, 'setup_ms': 0.0, 'wait_ms': 0.0,
+                        'records': 0, 'peak_memory_bytes': 0, 'minor_fragments': 0
+                    }
+                process_ms = operator.get('processNanos', 0) / 1e6
+                entry['process_ms'] += process_ms
+                entry['max_process_ms'] = max(entry['max_process_ms'], process_ms)  # skew across fragments
+                entry['setup_ms'] += operator.get('setupNanos', 0) / 1e6
+                entry['wait_ms'] += operator.get('waitNanos', 0) / 1e6
+                entry['records'] += sum(stream.get('records', 0) for stream in operator.get('inputProfile', []))
+                entry['peak_memory_bytes'] = max(entry['peak_memory_bytes'], operator.get('peakLocalMemoryAllocated', 0))
+                entry['minor_fragments'] += 1
+
+    hottest = sorted(operators.values(), key=lambda entry: entry['process_ms'], reverse=True)[:top_operators]
+    for entry in hottest:
+        for field in ('process_ms', 'max_process_ms', 'setup_ms', 'wait_ms'):
+            entry[field] = round(entry[field], 2)
+    return {
+        'state': _QUERY_STATES[state] if isinstance(state, int) and state < len(_QUERY_STATES) else state,
+        'planning_ms': plan_end - start,
+        'queued_ms': queue_end - plan_end,
+        'execution_ms': end - queue_end,
+        'total_fragments': profile.get('totalFragments'),
+        'hottest_operators': hottest
+    }
+
+
+class SlowQueryLog:
+    """
+    Collects slow queries from request threads and writes them from one
+    background thread. Uses its own connection (guarded by a lock) so
+    writes never interleave with request transactions on the shared one.
+    """
+
+    def __init__(self, config=SLOW_QUERY_CONFIG):
+        self.config = config
+        self.postgres = PostgresDB()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=config['queue_size'])
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.stats = {'recorded': 0, 'dropped': 0, 'profiles': 0, 'profile_errors': 0, 'write_errors': 0}
+
+    def record(self, query_text, result, user_id=None, from_nl=False):
+        """
+        Queue a query for the log if it ran longer than the threshold.
+
+        Args:
+            query_text (str): SQL as submitted
+            result (dict): QueryRouter.execute() result ('elapsed_ms', 'path', 'query_id')
+            user_id (int): Caller
+            from_nl (bool): True if the SQL was generated from a natural-language question
+
+        Returns:
+            bool: True if queued
+        """
+        elapsed_ms = result.get('elapsed_ms')
+        if not self.config['enabled'] or elapsed_ms is None or elapsed_ms < self.config['threshold_ms']:
+            return False
+        entry = {
+            'query_text': query_text,
+            'user_id': user_id,
+            'from_nl': from_nl,
+            'path': result.get('path', 'drill'),
+            'success': bool(result.get('success')),
+            'duration_ms': elapsed_ms,
+            'row_count': len(result['rows']) if isinstance(result.get('rows'), list) else None,
+            'drill_query_id': result.get('query_id')
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self._start()
+        return True
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                profile = self._fetch_profile(entry['drill_query_id']) if entry['drill_query_id'] else None
+                self._insert(entry, profile)
+            except Exception as e:
+                log.error('slow_queries.record_failed', error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def _fetch_profile(self, query_id):
+        """Profile summary, retrying briefly since Drill may still be writing the profile"""
+        if not self.config['fetch_profiles']:
+            return None
+        for attempt in range(3):
+            profile = db_manager.drill.get_profile(query_id)
+            if profile and profile.get('fragmentProfile'):
+                self.stats['profiles'] += 1
+                return summarize_profile(profile, self.config['top_operators'])
+            time.sleep(attempt + 1)
+        self.stats['profile_errors'] += 1
+        return None
+
+    def _insert(self, entry, profile):
+        with self._lock:
+            written = self.postgres.execute_update(
+                """
+                INSERT INTO slow_query_log
+                    (user_id, from_nl, path, success, duration_ms, row_count, drill_query_id, query_text, profile)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                (entry['user_id'], entry['from_nl'], entry['path'], entry['success'], entry['duration_ms'],
+                 entry['row_count'], entry['drill_query_id'], entry['query_text'],
+                 Json(profile) if profile is not None else None)
+            )
+        self.stats['recorded' if written else 'write_errors'] += 1
+
+    def slowest(self, limit=20, since_hours=None, from_nl=None, path=None):
+        """
+        Slowest logged queries, longest first.
+
+        Args:
+            limit (int): Maximum entries
+            since_hours (float): Only queries logged in the last N hours
+            from_nl (bool): Only natural-language (True) or hand-written (False) SQL
+            path (str): Only queries that ran on 'drill', 'postgres' or 'mongo'
+
+        Returns:
+            list: Entries with user name and profile summary, or None on error
+        """
+        conditions, params = [], []
+        if since_hours is not None:
+            conditions.append("s.logged_at >= CURRENT_TIMESTAMP - make_interval(secs => %s)")
+            params.append(float(since_hours) * 3600)
+        if from_nl is not None:
+            conditions.append("s.from_nl = %s")
+            params.append(from_nl)
+        if path is not None:
+            conditions.append("s.path = %s")
+            params.append(path)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(int(limit))
+        with self._lock:
+            rows = self.postgres.execute_query(
+                f"""
+                SELECT s.slow_query_id, s.logged_at, s.user_id, u.name AS user_name, s.from_nl, s.path,
+                       s.success, s.duration_ms, s.row_count, s.drill_query_id, s.query_text, s.profile
+                FROM slow_query_log s
+                LEFT JOIN user_info u ON u.user_id = s.user_id
+                {where}
+                ORDER BY s.duration_ms DESC
+                LIMIT %s
+                """,
+                tuple(params)
+            )
+            if self.postgres.connection and not self.postgres.connection.closed:
+                self.postgres.connection.commit()
+        if rows is None:
+            return None
+        for row in rows:
+            row['duration_ms'] = float(row['duration_ms'])
+            row['logged_at'] = row['logged_at'].isoformat() if row['logged_at'] else None
+        return rows
+
+    def status(self):
+        return dict(self.stats, queued=self._queue.qsize(), threshold_ms=self.config['threshold_ms'])
+
+
+# Global slow-query log instance
+slow_query_log = SlowQueryLog()
+
+
+if __name__ == '__main__':
+    entries = slow_query_log.slowest(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
+    if entries is None:
+        sys.exit(1)
+    for entry in entries:
+        print(f"{entry['duration_ms']:>10.1f} ms  {entry['path']:8} {'NL ' if entry['from_nl'] else '   '}"
+              f"{entry['query_text'][:100]}")
+        for operator in (entry['profile'] or {}).get('hottest_operators', []):
+            print(f"{'':14}{operator['operator']} {operator['type']:28} {operator['process_ms']:>10.1f} ms"
+                  f"  {operator['records']:>12} rows")
@@ -0,0 +1,890 @@
+# ========================================
+# Local Stand-In Backends
+# Lets the Flask app run (and be load tested) without Drill, MongoDB or
+# Groq; PostgreSQL stays real (a local container is enough) and is
+# seeded from database/postgresql_schema.sql.
+#
+#   FakeDrill        /query.json, /status and /profiles/<id>.json with
+#                    configurable latency and result size
+#   FakeGroq         OpenAI-style /openai/v1/chat/completions that
+#                    streams a workload query at a configurable token rate
+#   InMemoryMongo    pymongo-compatible client / database / collections
+#                    (find, aggregate, inserts, bulk writes, updates) so the
+#                    real MongoDB class, router and caches run unchanged;
+#                    pipelines it cannot evaluate fail like a server error
+#                    and the router falls back to (fake) Drill
+#
+# Usage:
+#   python standins.py serve [--port 5000] [--drill-latency-ms 50] [--drill-rows 50]
+#                            [--groq-tokens-per-second 200] [--groq-first-token-ms 300]
+#   python standins.py drill [--port 8047] ...       fake Drill only
+#   python standins.py groq [--port 8090] ...        fake Groq only
+#   python standins.py seed-postgres --yes           recreate tables + sample rows
+# ========================================
+
+import argparse
+import copy
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'postgresql_schema.sql')
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(handler_class, port, name):
+    """Start a threaded HTTP server in a daemon thread; returns the server"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=name, daemon=True).start()
+    return server
+
+
+# ========================================
+# Fake Drill
+# ========================================
+class FakeDrill:
+    """
+    Drill REST stand-in. Every query succeeds (unless it matches
+    fail_pattern) and returns generated rows:
+        rows = min(LIMIT n, max_rows); latency = latency_ms + rows * per_row_ms (+/- jitter)
+    """
+
+    COLUMNS = ['region_id', 'region_name', 'value', 'recorded_at']
+
+    def __init__(self, latency_ms=50.0, max_rows=50, per_row_ms=0.0, jitter=0.2, fail_pattern=None):
+        self.latency_ms = latency_ms
+        self.max_rows = max_rows
+        self.per_row_ms = per_row_ms
+        self.jitter = jitter
+        self.fail_pattern = re.compile(fail_pattern, re.IGNORECASE) if fail_pattern else None
+        self.profiles = {}
+        self.stats = {'queries': 0}
+
+    def run(self, sql):
+        limit = re.search(r'\bLIMIT\s+(\d+)\s*;?\s*$', sql, re.IGNORECASE)
+        rows = min(int(limit.group(1)), self.max_rows) if limit else self.max_rows
+        delay = (self.latency_ms + rows * self.per_row_ms) / 1000.0
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        started = int(time.time() * 1000)
+        time.sleep(max(delay, 0))
+        query_id = str(uuid.uuid4())
+        self.stats['queries'] += 1
+        self.profiles[query_id] = self._profile(sql, started, rows)
+        if self.fail_pattern and self.fail_pattern.search(sql):
+            return {'queryId': query_id, 'queryState': 'FAILED',
+                    'errorMessage': 'VALIDATION ERROR: failure injected by the Drill stand-in'}
+        return {
+            'queryId': query_id,
+            'queryState': 'COMPLETED',
+            'columns': self.COLUMNS,
+            'rows': [
+                {'region_id': str(i % 10 + 1), 'region_name': f'Region {i % 10 + 1}',
+                 'value': str(round(20 + (i * 7919 % 1500) / 100, 2)),
+                 'recorded_at': (datetime(2024, 1, 1) + timedelta(hours=i)).isoformat()}
+                for i in range(rows)
+            ]
+        }
+
+    def _profile(self, sql, started, rows):
+        end = int(time.time() * 1000)
+        planning = max((end - started) // 5, 1)
+        return {
+            'query': sql, 'start': started, 'planEnd': started + planning, 'queueWaitEnd': 0, 'end': end,
+            'state': 2, 'totalFragments': 1,
+            'fragmentProfile': [{'majorFragmentId': 0, 'minorFragmentProfile': [{'operatorProfile': [
+                {'operatorId': 0, 'operatorTypeName': 'SCREEN', 'processNanos': 10000,
+                 'inputProfile': [{'records': rows}]},
+                {'operatorId': 1, 'operatorTypeName': 'JDBC_SCAN',
+                 'processNanos': (end - started - planning) * 1000000, 'inputProfile': [{'records': rows}]}
+            ]}]}]
+        }
+
+    def handler(self):
+        drill = self
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                if self.path == '/status':
+                    self._send_json({'status': 'Running'})
+                elif self.path.startswith('/profiles/') and self.path.endswith('.json'):
+                    profile = drill.profiles.get(self.path[len('/profiles/'):-len('.json')])
+                    self._send_json(profile or {'errorMessage': 'not found'}, 200 if profile else 404)
+                else:
+                    self._send_json({'errorMessage': 'not found'}, 404)
+
+            def do_POST(self):
+                if self.path != '/query.json':
+                    self._send_json({'errorMessage': 'not found'}, 404)
+                    return
+                self._send_json(drill.run(self._read_json().get('query', '')))
+
+        return Handler
+
+
+# ========================================
+# Fake Groq
+# ========================================
+class FakeGroq:
+    """
+    Chat-completions stand-in. Answers with the workload query whose name
+    and description best match the question, preceded by a short
+    <think> block (like qwen3), streamed in ~4-character tokens.
+    """
+
+    def __init__(self, tokens_per_second=200.0, first_token_ms=300.0, think_tokens=20):
+        from workload import SAMPLE_QUERIES, load_sql_file
+        self.tokens_per_second = tokens_per_second
+        self.first_token_ms = first_token_ms
+        self.think_tokens = think_tokens
+        self.answers = [(f"{q['name']} {q.get('description', '')}", q['query'])
+                        for q in SAMPLE_QUERIES + load_sql_file()]
+        self.stats = {'completions': 0}
+
+    def answer(self, messages):
+        prompt = messages[-1].get('content', '') if messages else ''
+        match = re.search(r'USER QUESTION:\s*"(.*?)"', prompt, re.DOTALL)
+        words = set(re.findall(r'[a-z0-9]+', (match.group(1) if match else prompt).lower()))
+        scored = [(len(words & set(re.findall(r'[a-z0-9]+', text.lower()))), -i)
+                  for i, (text, _) in enumerate(self.answers)]
+        best = -max(scored)[1]
+        think = ' '.join(['considering'] * self.think_tokens)
+        return f"<think>{think}</think>\n```sql\n{self.answers[best][1]}\n```"
+
+    def tokens(self, text):
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def handler(self):
+        groq = self
+
+        class Handler(_QuietHandler):
+            def do_POST(self):
+                if not self.path.endswith('/chat/completions'):
+                    self._send_json({'error': {'message': 'not found'}}, 404)
+                    return
+                request = self._read_json()
+                groq.stats['completions'] += 1
+                content = groq.answer(request.get('messages', []))
+                completion_id = f'chatcmpl-{uuid.uuid4().hex[:12]}'
+                model = request.get('model', 'stand-in')
+                time.sleep(groq.first_token_ms / 1000.0)
+                if not request.get('stream'):
+                    time.sleep(len(groq.tokens(content)) / groq.tokens_per_second)
+                    self._send_json({
+                        'id': completion_id, 'object': 'chat.completion', 'created': int(time.time()),
+                        'model': model,
+                        'choices': [{'index': 0, 'finish_reason': 'stop',
+                                     'message': {'role': 'assistant', 'content': content}}]
+                    })
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                for token in groq.tokens(content) + [None]:
+                    chunk = {
+                        'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                        'model': model,
+                        'choices': [{'index': 0, 'delta': {'content': token} if token else {},
+                                     'finish_reason': None if token else 'stop'}]
+                    }
+                    self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+                    self.wfile.flush()
+                    time.sleep(1.0 / groq.tokens_per_second)
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+
+        return Handler
+
+
+# ========================================
+# In-Memory MongoDB
+# ========================================
+_MISSING = object()
+
+
+def _get_path(document, path):
+    value = document
+    for part in path.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+    return value
+
+
+def _set_path(document, path, value):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _bson_key(value):
+    """Sort / comparison key following BSON type order (null < numbers < strings < ...)"""
+    if value is None or value is _MISSING:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (6, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, dict):
+        return (3, str(sorted(value.items())))
+    if isinstance(value, list):
+        return (4, [_bson_key(item) for item in value])
+    if isinstance(value, ObjectId):
+        return (5, str(value))
+    if isinstance(value, datetime):
+        return (7, value.timestamp() if value.tzinfo else value.replace().timestamp())
+    return (8, str(value))
+
+
+def _equals(value, target):
+    if isinstance(value, list) and not isinstance(target, list):
+        return any(_equals(item, target) for item in value)
+    if value is _MISSING:
+        value = None
+    return _bson_key(value) == _bson_key(target)
+
+
+def _compare(value, operator, target):
+    if isinstance(value, list):
+        return any(_compare(item, operator, target) for item in value)
+    if value is _MISSING or value is None or target is None:
+        return False
+    left, right = _bson_key(value), _bson_key(target)
+    if left[0] != right[0]:
+        return False  # query comparisons only match within a type bracket
+    return {'$gt': left > right, '$gte': left >= right, '$lt': left < right, '$lte': left <= right}[operator]
+
+
+def _match_operators(value, conditions):
+    for operator, argument in conditions.items():
+        if operator == '$eq':
+            ok = _equals(value, argument)
+        elif operator == '$ne':
+            ok = not _equals(value, argument)
+        elif operator in ('$gt', '$gte', '$lt', '$lte'):
+            ok = _compare(value, operator, argument)
+        elif operator == '$in':
+            ok = any(_equals(value, item) for item in argument)
+        elif operator == '$nin':
+            ok = not any(_equals(value, item) for item in argument)
+        elif operator == '$exists':
+            ok = (value is not _MISSING) == bool(argument)
+        elif operator == '$regex':
+            flags = re.IGNORECASE if 'i' in conditions.get('$options', '') else 0
+            pattern = argument.pattern if hasattr(argument, 'pattern') else argument
+            candidates = value if isinstance(value, list) else [value]
+            ok = any(isinstance(item, str) and re.search(pattern, item, flags) for item in candidates)
+        elif operator == '$options':
+            ok = True
+        elif operator == '$not':
+            ok = not _match_operators(value, argument)
+        else:
+            raise OperationFailure(f'unknown operator: {operator}', code=2)
+        if not ok:
+            return False
+    return True
+
+
+def _matches(document, query):
+    for key, condition in query.items():
+        if key == '$and':
+            ok = all(_matches(document, part) for part in condition)
+        elif key == '$or':
+            ok = any(_matches(document, part) for part in condition)
+        elif key == '$nor':
+            ok = not any(_matches(document, part) for part in condition)
+        elif key == '$expr':
+            ok = bool(_evaluate(document, condition))
+        else:
+            value = _get_path(document, key)
+            if isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition):
+                ok = _match_operators(value, condition)
+            elif hasattr(condition, 'pattern'):
+                ok = _match_operators(value, {'$regex': condition})
+            else:
+                ok = _equals(value, condition)
+        if not ok:
+            return False
+    return True
+
+
+def _convert(value, to):
+    if value is None or value is _MISSING:
+        return None
+    try:
+        if to in ('int', 'long'):
+            return int(float(value))
+        if to in ('double', 'decimal'):
+            return float(value)
+        if to == 'string':
+            return value.isoformat() if isinstance(value, datetime) else str(value)
+        if to == 'bool':
+            return bool(value)
+        if to == 'date':
+            return value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    raise OperationFailure(f'unsupported $convert target: {to}', code=2)
+
+
+def _evaluate(document, expression):
+    """Aggregation expression subset used by mongo_sql.py and the app's pipelines"""
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = _get_path(document, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, list):
+        return [_evaluate(document, item) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) != 1 or not next(iter(expression)).startswith('$'):
+        return {key: _evaluate(document, value) for key, value in expression.items()}
+    operator, argument = next(iter(expression.items()))
+    if operator == '$literal':
+        return argument
+    if operator == '$convert':
+        return _convert(_evaluate(document, argument['input']), argument['to'])
+    if operator in ('$toDouble', '$toInt', '$toLong', '$toString', '$toDate'):
+        target = {'$toDouble': 'double', '$toInt': 'int', '$toLong': 'long', '$toString': 'string', '$toDate': 'date'}
+        return _convert(_evaluate(document, argument), target[operator])
+    if operator == '$cond':
+        if isinstance(argument, dict):
+            argument = [argument['if'], argument['then'], argument['else']]
+        return _evaluate(document, argument[1] if _evaluate(document, argument[0]) else argument[2])
+    if operator == '$ifNull':
+        for item in argument:
+            value = _evaluate(document, item)
+            if value is not None:
+                return value
+        return None
+    values = _evaluate(document, argument if isinstance(argument, list) else [argument])
+    if operator in ('$eq', '$ne', '$gt', '$gte', '$lt', '$lte'):
+        left, right = _bson_key(values[0]), _bson_key(values[1])
+        return {'$eq': left == right, '$ne': left != right, '$gt': left > right,
+                '$gte': left >= right, '$lt': left < right, '$lte': left <= right}[operator]
+    if operator == '$and':
+        return all(values)
+    if operator == '$or':
+        return any(values)
+    if operator == '$not':
+        return not values[0]
+    if operator == '$in':
+        return values[0] in values[1]
+    if operator == '$round':
+        if values[0] is None:
+            return None
+        return round(values[0], values[1] if len(values) > 1 else 0)
+    if operator in ('$add', '$subtract', '$multiply', '$divide'):
+        if any(value is None for value in values):
+            return None
+        if operator == '$add':
+            return sum(values)
+        if operator == '$subtract':
+            return values[0] - values[1]
+        if operator == '$multiply':
+            return math.prod(values)
+        return values[0] / values[1]
+    raise OperationFailure(f'unsupported expression operator in stand-in: {operator}', code=168)
+
+
+class _Accumulator:
+    def __init__(self, operator, expression):
+        self.operator = operator
+        self.expression = expression
+        self.values = []
+
+    def add(self, document):
+        self.values.append(_evaluate(document, self.expression))
+
+    def result(self):
+        values = self.values
+        numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        present = [value for value in values if value is not None]
+        if self.operator == '$sum':
+            return sum(numbers)
+        if self.operator == '$avg':
+            return sum(numbers) / len(numbers) if numbers else None
+        if self.operator == '$min':
+            return min(present, key=_bson_key) if present else None
+        if self.operator == '$max':
+            return max(present, key=_bson_key) if present else None
+        if self.operator == '$first':
+            return values[0] if values else None
+        if self.operator == '$last':
+            return values[-1] if values else None
+        if self.operator == '$push':
+            return list(values)
+        if self.operator == '$addToSet':
+            unique = []
+            for value in values:
+                if not any(_equals(value, seen) for seen in unique):
+                    unique.append(value)
+            return unique
+        raise OperationFailure(f'unsupported accumulator in stand-in: {self.operator}', code=15952)
+
+
+def _project(document, specification):
+    inclusions = {key: value for key, value in specification.items() if key != '_id'}
+    if inclusions and all(value in (0, False) for value in inclusions.values()):
+        projected = copy.deepcopy(document)
+        for key in specification:
+            projected.pop(key, None)
+        return projected
+    projected = {}
+    if specification.get('_id', 1) not in (0, False) and '_id' in document:
+        projected['_id'] = document['_id']
+    for key, value in inclusions.items():
+        if value in (1, True):
+            found = _get_path(document, key)
+            if found is not _MISSING:
+                _set_path(projected, key, copy.deepcopy(found))
+        else:
+            _set_path(projected, key, _evaluate(document, value))
+    return projected
+
+
+def _sort(documents, specification):
+    items = specification.items() if isinstance(specification, dict) else specification
+    for field, direction in reversed(list(items)):
+        documents.sort(key=lambda document: _bson_key(_get_path(document, field)), reverse=direction < 0)
+    return documents
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.acknowledged = True
+        self.__dict__.update(fields)
+
+
+class InMemoryCursor:
+    def __init__(self, documents):
+        self._documents = documents
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        _sort(self._documents, [(key, direction)] if isinstance(key, str) else key)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        documents = self._documents[self._skip:]
+        return iter(documents[:self._limit] if self._limit else documents)
+
+
+def _id_key(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return json.dumps(value, default=str, sort_keys=True)
+
+
+class InMemoryCollection:
+    """Documents in a list guarded by a lock; reads work on deep copies"""
+
+    def __init__(self, name):
+        self.name = name
+        self._documents = []
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def with_options(self, **options):
+        return self
+
+    def create_index(self, keys, **options):
+        return '_'.join(f'{key}_{direction}' for key, direction in (keys if isinstance(keys, list) else [(keys, 1)]))
+
+    def _snapshot(self, query):
+        with self._lock:
+            return [copy.deepcopy(document) for document in self._documents if _matches(document, query or {})]
+
+    def find(self, query=None, projection=None, **options):
+        documents = self._snapshot(query)
+        if projection:
+            documents = [_project(document, projection) for document in documents]
+        return InMemoryCursor(documents)
+
+    def find_one(self, query=None, projection=None):
+        return next(iter(self.find(query, projection).limit(1)), None)
+
+    def count_documents(self, query, **options):
+        return len(self._snapshot(query))
+
+    def estimated_document_count(self):
+        return len(self._documents)
+
+    def aggregate(self, pipeline, **options):
+        documents = self._snapshot({})
+        for stage in pipeline:
+            (operator, argument), = stage.items()
+            if operator == '$match':
+                documents = [document for document in documents if _matches(document, argument)]
+            elif operator == '$project':
+                documents = [_project(document, argument) for document in documents]
+            elif operator in ('$addFields', '$set'):
+                for document in documents:
+                    for key, expression in argument.items():
+                        _set_path(document, key, _evaluate(document, expression))
+            elif operator == '$replaceWith':
+                documents = [_evaluate(document, argument) for document in documents]
+            elif operator == '$group':
+                groups = {}
+                for document in documents:
+                    key = _evaluate(document, argument['_id'])
+                    marker = json.dumps(key, default=str, sort_keys=True)
+                    if marker not in groups:
+                        groups[marker] = (key, {field: _Accumulator(*next(iter(spec.items())))
+                                                for field, spec in argument.items() if field != '_id'})
+                    for accumulator in groups[marker][1].values():
+                        accumulator.add(document)
+                documents = [dict({'_id': key}, **{field: acc.result() for field, acc in accumulators.items()})
+                             for key, accumulators in groups.values()]
+            elif operator == '$sort':
+                documents = _sort(documents, argument)
+            elif operator == '$skip':
+                documents = documents[argument:]
+            elif operator == '$limit':
+                documents = documents[:argument]
+            elif operator == '$count':
+                documents = [{argument: len(documents)}] if documents else []
+            elif operator == '$unwind':
+                path = (argument['path'] if isinstance(argument, dict) else argument)[1:]
+                unwound = []
+                for document in documents:
+                    for item in _get_path(document, path) if isinstance(_get_path(document, path), list) else []:
+                        expanded = copy.deepcopy(document)
+                        _set_path(expanded, path, item)
+                        unwound.append(expanded)
+                documents = unwound
+            else:
+                raise OperationFailure(f'unsupported stage in stand-in: {operator}', code=40324)
+        return iter(documents)
+
+    def insert_one(self, document):
+        document.setdefault('_id', ObjectId())
+        with self._lock:
+            if _id_key(document['_id']) in self._ids:
+                raise OperationFailure('E11000 duplicate key error', code=11000)
+            self._ids.add(_id_key(document['_id']))
+            self._documents.append(copy.deepcopy(document))
+        return _Result(inserted_id=document['_id'])
+
+    def insert_many(self, documents, ordered=True):
+        return _Result(inserted_ids=[self.insert_one(document).inserted_id for document in documents])
+
+    def _apply_update(self, document, update):
+        for operator, fields in update.items():
+            for field, value in fields.items():
+                current = _get_path(document, field)
+                if operator == '$set' or (operator == '$setOnInsert' and current is _MISSING):
+                    _set_path(document, field, value)
+                elif operator == '$inc':
+                    _set_path(document, field, (0 if current is _MISSING else current) + value)
+                elif operator == '$max' and (current is _MISSING or _bson_key(value) > _bson_key(current)):
+                    _set_path(document, field, value)
+                elif operator == '$min' and (current is _MISSING or _bson_key(value) < _bson_key(current)):
+                    _set_path(document, field, value)
+                elif operator == '$push':
+                    _set_path(document, field, (current if isinstance(current, list) else []) + [value])
+                elif operator == '$unset':
+                    parent = _get_path(document, field.rpartition('.')[0]) if '.' in field else document
+                    if isinstance(parent, dict):
+                        parent.pop(field.rpartition('.')[2], None)
+                elif operator not in ('$set', '$setOnInsert', '$max', '$min'):
+                    raise OperationFailure(f'unsupported update operator in stand-in: {operator}', code=9)
+
+    def update_one(self, query, update, upsert=False):
+        with self._lock:
+            for document in self._documents:
+                if _matches(document, query):
+                    before = copy.deepcopy(document)
+                    self._apply_update(document, {k: v for k, v in update.items() if k != '$setOnInsert'})
+                    return _Result(matched_count=1, modified_count=int(before != document), upserted_id=None)
+            if not upsert:
+                return _Result(matched_count=0, modified_count=0, upserted_id=None)
+            document = {key: value for key, value in query.items() if not key.startswith('$')
+                        and not isinstance(value, dict)}
+            self._apply_update(document, update)
+            document.setdefault('_id', ObjectId())
+            self._ids.add(_id_key(document['_id']))
+            self._documents.append(document)
+            return _Result(matched_count=0, modified_count=0, upserted_id=document['_id'])
+
+    def replace_one(self, query, replacement, upsert=False):
+        with self._lock:
+            for index, document in enumerate(self._documents):
+                if _matches(document, query):
+                    self._documents[index] = dict(copy.deepcopy(replacement), _id=document['_id'])
+                    return _Result(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            return _Result(matched_count=0, modified_count=0, upserted_id=self.insert_one(dict(replacement)).inserted_id)
+        return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    def delete_many(self, query):
+        with self._lock:
+            kept = [document for document in self._documents if not _matches(document, query)]
+            deleted = len(self._documents) - len(kept)
+            self._documents = kept
+            self._ids = {_id_key(document['_id']) for document in kept}
+        return _Result(deleted_count=deleted)
+
+    def delete_one(self, query):
+        with self._lock:
+            for index, document in enumerate(self._documents):
+                if _matches(document, query):
+                    del self._documents[index]
+                    self._ids.discard(_id_key(document['_id']))
+                    return _Result(deleted_count=1)
+        return _Result(deleted_count=0)
+
+    def bulk_write(self, operations, ordered=True):
+        """InsertOne / UpdateOne / ReplaceOne / DeleteOne, with BulkWriteError-style details"""
+        from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+        from pymongo.errors import BulkWriteError
+        counts = {'nInserted': 0, 'nMatched': 0, 'nModified': 0, 'nUpserted': 0, 'nRemoved': 0, 'writeErrors': []}
+        for index, operation in enumerate(operations):
+            try:
+                if isinstance(operation, InsertOne):
+                    self.insert_one(operation._doc)
+                    counts['nInserted'] += 1
+                elif isinstance(operation, (UpdateOne, ReplaceOne)):
+                    apply = self.update_one if isinstance(operation, UpdateOne) else self.replace_one
+                    result = apply(operation._filter, operation._doc, upsert=bool(operation._upsert))
+                    counts['nMatched'] += result.matched_count
+                    counts['nModified'] += result.modified_count
+                    counts['nUpserted'] += int(result.upserted_id is not None)
+                elif isinstance(operation, DeleteOne):
+                    counts['nRemoved'] += self.delete_one(operation._filter).deleted_count
+                else:
+                    raise OperationFailure(f'unsupported bulk operation: {type(operation).__name__}', code=2)
+            except OperationFailure as e:
+                counts['writeErrors'].append({'index': index, 'code': e.code, 'errmsg': str(e)})
+                if ordered:
+                    break
+        if counts['writeErrors']:
+            raise BulkWriteError(counts)
+        return _Result(bulk_api_result=counts, inserted_count=counts['nInserted'])
+
+    def drop(self):
+        with self._lock:
+            self._documents = []
+            self._ids = set()
+
+
+class InMemoryDatabase:
+    def __init__(self, name):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = InMemoryCollection(name)
+            return self._collections[name]
+
+    def list_collection_names(self, **options):
+        return sorted(name for name, collection in self._collections.items() if collection._documents)
+
+    def create_collection(self, name, **options):
+        return self[name]
+
+    def command(self, command, *args, **kwargs):
+        if command in ('ping', {'ping': 1}):
+            return {'ok': 1.0}
+        raise OperationFailure(f'unsupported command in stand-in: {command}', code=59)
+
+    def watch(self, *args, **kwargs):
+        # Same error as a standalone mongod: CDC disables the MongoDB feed
+        raise OperationFailure('The $changeStream stage is only supported on replica sets', code=40573)
+
+
+class InMemoryMongoClient:
+    def __init__(self):
+        self._databases = {}
+
+    def __getitem__(self, name):
+        return self._databases.setdefault(name, InMemoryDatabase(name))
+
+    def server_info(self):
+        return {'version': '7.0.0-standin', 'ok': 1.0}
+
+    def close(self):
+        pass
+
+
+def seed_mongo(database, scale=0.05, seed=42):
+    """Fill every collection the app reads with datagen.py's synthetic documents"""
+    from datagen import DATASETS, SyntheticData
+    data = SyntheticData(scale, seed)
+    for dataset, (target, collection) in DATASETS.items():
+        if target == 'mongo':
+            for chunk in range(data.chunks(dataset)):
+                database[collection].insert_many(data.rows(dataset, chunk))
+
+
+def use_in_memory_mongo(mongo, seed_scale=0.05):
+    """
+    Point a database.MongoDB instance at a fresh in-memory client.
+
+    Returns:
+        InMemoryDatabase: The database, for seeding / inspection
+    """
+    client = InMemoryMongoClient()
+    mongo.client = client
+    mongo.db = client[mongo.config['database']]
+    mongo.connect = lambda: True
+    if seed_scale:
+        seed_mongo(mongo.db, seed_scale)
+    return mongo.db
+
+
+# ========================================
+# PostgreSQL fixtures
+# ========================================
+def seed_postgres(schema_path=SCHEMA_PATH):
+    """
+    Recreate the tables from postgresql_schema.sql (it drops them first),
+    then apply the migrations. Seeded users log in with password123.
+    """
+    from database import PostgresDB
+    from migrations import run_migrations
+    postgres = PostgresDB()
+    if not postgres.connect():
+        raise ConnectionError('PostgreSQL unavailable (check POSTGRES_* settings)')
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        schema = f.read()
+    with postgres.connection.cursor() as cursor:
+        cursor.execute(schema)
+    postgres.connection.commit()
+    postgres.disconnect()
+    return run_migrations()
+
+
+# ========================================
+# Command line
+# ========================================
+def _add_drill_arguments(parser):
+    parser.add_argument('--drill-port', type=int, default=8047)
+    parser.add_argument('--drill-latency-ms', type=float, default=50.0)
+    parser.add_argument('--drill-rows', type=int, default=50, help='rows per result (capped by LIMIT)')
+    parser.add_argument('--drill-per-row-ms', type=float, default=0.0)
+    parser.add_argument('--drill-fail-pattern', help='regex; matching queries fail')
+
+
+def _add_groq_arguments(parser):
+    parser.add_argument('--groq-port', type=int, default=8090)
+    parser.add_argument('--groq-tokens-per-second', type=float, default=200.0)
+    parser.add_argument('--groq-first-token-ms', type=float, default=300.0)
+
+
+def _start_drill(args):
+    drill = FakeDrill(args.drill_latency_ms, args.drill_rows, args.drill_per_row_ms,
+                      fail_pattern=args.drill_fail_pattern)
+    _serve(drill.handler(), args.drill_port, 'fake-drill')
+    print(f"Fake Drill on http://127.0.0.1:{args.drill_port}")
+    return drill
+
+
+def _start_groq(args):
+    groq = FakeGroq(args.groq_tokens_per_second, args.groq_first_token_ms)
+    _serve(groq.handler(), args.groq_port, 'fake-groq')
+    print(f"Fake Groq on http://127.0.0.1:{args.groq_port}")
+    return groq
+
+
+def _wait():
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-ins for Drill, MongoDB and Groq')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='run the Flask app against the stand-ins')
+    serve.add_argument('--port', type=int, default=5000)
+    serve.add_argument('--mongo-scale', type=float, default=0.05, help='datagen.py scale of the MongoDB fixtures')
+    _add_drill_arguments(serve)
+    _add_groq_arguments(serve)
+    _add_drill_arguments(commands.add_parser('drill', help='fake Drill REST server only'))
+    _add_groq_arguments(commands.add_parser('groq', help='fake Groq API only'))
+    seed = commands.add_parser('seed-postgres', help='recreate and seed PostgreSQL tables')
+    seed.add_argument('--yes', action='store_true', help='confirm dropping the existing tables')
+    args = parser.parse_args()
+
+    if args.command == 'drill':
+        _start_drill(args)
+        _wait()
+    elif args.command == 'groq':
+        _start_groq(args)
+        _wait()
+    elif args.command == 'seed-postgres':
+        if not args.yes:
+            parser.error('postgresql_schema.sql drops and recreates every table; pass --yes to continue')
+        print(f"Migrations applied: {seed_postgres()}")
+    else:
+        _start_drill(args)
+        _start_groq(args)
+        # Before the app (and config) are imported: the Groq SDK reads GROQ_BASE_URL
+        os.environ['GROQ_BASE_URL'] = f'http://127.0.0.1:{args.groq_port}'
+        os.environ.setdefault('GROQ_API_KEY', 'stand-in')
+        os.environ['CDC_MONGO_ENABLED'] = 'false'
+        from database import db_manager
+        db_manager.drill.base_url = f'http://127.0.0.1:{args.drill_port}'
+        use_in_memory_mongo(db_manager.mongo, args.mongo_scale)
+        from app import app
+        print(f"App on http://127.0.0.1:{args.port} (in-memory MongoDB, fake Drill / Groq)")
+        app.run(host='127.0.0.1', port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# ========================================
+# Streaming Request Decoding
+# Decodes large JSON request bodies incrementally so bulk routes
+# never hold the whole payload in memory
+# ========================================
+
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_documents(stream, chunk_size=65536, max_document_size=None):
+    """
+    Yield JSON objects from a byte stream one at a time.
+    
+    Accepts either a top-level JSON array of objects
+    (`[{...}, {...}]`) or newline-delimited JSON (`{...}\\n{...}\\n`).
+    Only the current, not yet decoded, object is kept in memory. Reads
+    grow with a partial object and decoding is retried once per read, so
+    a large object costs time linear in its size.
+    
+    Args:
+        stream: File-like object with a read(size) method (e.g. request.stream)
+        chunk_size (int): Bytes read per call (at least)
+        max_document_size (int): Largest object accepted, in characters
+                                 (None: unlimited)
+        
+    Yields:
+        dict: Each decoded document
+        
+    Raises:
+        ValueError: If the body is not valid JSON / NDJSON or an element is
+                    not an object. Documents decoded before the error have
+                    already been yielded.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+    in_array = None
+    
+    def fill():
+        nonlocal buffer, pos, eof
+        # Grow reads with a partial document so re-copying it stays linear
+        chunk = stream.read(max(chunk_size, len(buffer) - pos))
+        if not chunk:
+            eof = True
+            buffer = buffer[pos:] + utf8.decode(b'', final=True)
+        else:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+    
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+    
+    def end_array():
+        nonlocal pos
+        pos += 1
+        skip(_WHITESPACE)
+        if pos < len(buffer):
+            raise ValueError('Unexpected data after JSON array')
+    
+    skip(_WHITESPACE)
+    if pos >= len(buffer):
+        return
+    in_array = buffer[pos] == '['
+    if in_array:
+        pos += 1
+        skip(_WHITESPACE)
+        if pos < len(buffer) and buffer[pos] == ']':
+            end_array()
+            return
+    
+    while True:
+        skip(_WHITESPACE)
+        if pos >= len(buffer):
+            if in_array:
+                raise ValueError('Unterminated JSON array')
+            return
+        # An empty element: leading, doubled or trailing comma
+        if in_array and buffer[pos] in ',]':
+            raise ValueError(f'Expected a JSON object before {buffer[pos]!r}')
+        
+        while True:
+            try:
+                document, end = _decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f'Invalid JSON document: {e.msg}')
+                if max_document_size is not None and len(buffer) - pos > max_document_size:
+                    raise ValueError(f'Document exceeds {max_document_size} characters')
+                fill()
+        
+        if not isinstance(document, dict):
+            raise ValueError('Each document must be a JSON object')
+        pos = end
+        yield document
+        
+        if in_array:
+            skip(_WHITESPACE)
+            if pos >= len(buffer):
+                raise ValueError('Unterminated JSON array')
+            if buffer[pos] == ']':
+                end_array()
+                return
+            if buffer[pos] != ',':
+                raise ValueError(f'Expected , or ] after a document, got {buffer[pos]!r}')
+            pos += 1
@@ -0,0 +1,176 @@
+# ========================================
+# Structured Logging
+# Event logging for request paths, built on the standard logging module:
+#   log = get_logger('drill')
+#   log.info('drill.query', query=query, rows=len(rows))
+#
+# Callers only build a record and put it on a queue; a listener thread
+# formats (JSON lines or text) and writes to stderr / LOG_FILE, so
+# request threads never block on terminal or disk writes and lines from
+# concurrent requests never interleave. When the queue is full, records
+# are dropped and counted rather than waited for.
+#
+#   Levels      LOG_LEVEL (DEBUG, INFO, WARNING, ERROR)
+#   Sampling    LOG_SAMPLE_RATES="drill.query=0.1,mongo.find=0.01" keeps a
+#               fraction of an event (warnings and errors are never sampled)
+#   Truncation  string fields longer than LOG_MAX_FIELD_CHARS are cut
+#   Correlation records carry the request's trace_id (tracing.py)
+# ========================================
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from config import LOGGING_CONFIG
+from tracing import current_trace
+
+_ROOT = 'platform'
+_dropped = {'records': 0}
+
+
+def _truncate(value, limit):
+    if isinstance(value, str) and len(value) > limit:
+        return f'{value[:limit]}... (+{len(value) - limit} chars)'
+    if isinstance(value, (list, tuple)) and len(value) > 20:
+        return [_truncate(item, limit) for item in value[:20]] + [f'... (+{len(value) - 20} items)']
+    if isinstance(value, dict):
+        return {key: _truncate(item, limit) for key, item in value.items()}
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, trace_id, fields"""
+
+    def __init__(self, max_field_chars):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        if getattr(record, 'trace_id', None):
+            entry['trace_id'] = record.trace_id
+        for key, value in getattr(record, 'fields', {}).items():
+            entry[key] = _truncate(value, self.max_field_chars)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable single lines for local development"""
+
+    def __init__(self, max_field_chars):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s %(message)s')
+        self.max_field_chars = max_field_chars
+
+    def format(self, record):
+        line = super().format(record)
+        fields = dict(getattr(record, 'fields', {}))
+        if getattr(record, 'trace_id', None):
+            fields['trace_id'] = record.trace_id
+        if fields:
+            line += ' ' + ' '.join(
+                f'{key}={json.dumps(_truncate(value, self.max_field_chars), default=str)}'
+                for key, value in fields.items()
+            )
+        return line
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without formatting them; drops (and counts) them when the queue is full"""
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped['records'] += 1
+
+
+class EventLogger:
+    """
+    Thin wrapper logging an event name plus keyword fields.
+    Level and sampling are checked before anything is built.
+    """
+
+    def __init__(self, logger, sample_rates):
+        self.logger = logger
+        self.sample_rates = sample_rates
+
+    def _log(self, level, event, exc_info, fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        rate = self.sample_rates.get(event)
+        if rate is not None and level < logging.WARNING and random.random() >= rate:
+            return
+        trace = current_trace()
+        extra = {'fields': fields, 'trace_id': trace.trace_id if trace else None}
+        if rate is not None and rate < 1:
+            fields['sample_rate'] = rate
+        self.logger.log(level, event, exc_info=exc_info, extra=extra)
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, None, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, None, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, None, fields)
+
+    def error(self, event, exc_info=None, **fields):
+        self._log(logging.ERROR, event, exc_info, fields)
+
+
+_listener = None
+
+
+def configure(config=LOGGING_CONFIG):
+    """Install the queue handler and start the writer thread (no-op once configured)"""
+    global _listener
+    if _listener is not None:
+        return
+    formatter_class = JsonFormatter if config['format'] == 'json' else TextFormatter
+    formatter = formatter_class(config['max_field_chars'])
+    outputs = [logging.StreamHandler(sys.stderr)]
+    if config['file']:
+        outputs.append(logging.handlers.WatchedFileHandler(config['file'], encoding='utf-8'))
+    for output in outputs:
+        output.setFormatter(formatter)
+
+    records = queue.Queue(maxsize=config['queue_size'])
+    root = logging.getLogger(_ROOT)
+    root.setLevel(config['level'])
+    root.propagate = False
+    root.addHandler(_DroppingQueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, *outputs, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)  # flush what is queued on shutdown
+
+
+def get_logger(name):
+    """
+    Event logger for a component, e.g. get_logger('drill').
+
+    Returns:
+        EventLogger: .debug / .info / .warning / .error(event, **fields)
+    """
+    configure()
+    return EventLogger(logging.getLogger(f'{_ROOT}.{name}'), LOGGING_CONFIG['sample_rates'])
+
+
+def dropped_records():
+    """Records dropped because the queue was full"""
+    return _dropped['records']
@@ -0,0 +1,86 @@
+import pytest
+
+from database import PostgresDB, normalize_sql
+from metrics import BACKEND_ERRORS, BACKEND_ROWS
+
+
+def test_queries_differing_after_line_comment_get_different_keys():
+    first = "SELECT region_id -- pick the region\nFROM postgres.public.`climate_data` WHERE temperature > 25"
+    second = "SELECT region_id -- pick the region\nFROM postgres.public.`climate_data` WHERE temperature > 30"
+    assert normalize_sql(first) != normalize_sql(second)
+    assert normalize_sql(first) == "SELECT region_id FROM postgres.public.`climate_data` WHERE temperature > 25"
+
+
+def test_comments_are_stripped_but_quoted_text_is_kept():
+    query = "SELECT /* all\ncolumns */ *\nFROM t  WHERE note = '-- not a comment'  ;"
+    assert normalize_sql(query) == "SELECT * FROM t WHERE note = '-- not a comment'"
+
+
+class _ScanConnection:
+    """Just enough of a psycopg2 connection for a named-cursor scan"""
+
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.closed = False
+        self.commits = 0
+        self.readonly = False
+
+    def cursor(self, name=None):
+        connection = self
+
+        class Cursor:
+            description = [type('Column', (), {'name': 'region_id'}), type('Column', (), {'name': 'latitude'})]
+            fetched = 0
+
+            def execute(self, query, params=None):
+                self.name = name
+
+            def fetchmany(self, size):
+                if connection.fail_after is not None and self.fetched >= connection.fail_after:
+                    raise RuntimeError('connection lost')
+                batch = connection.rows[self.fetched:self.fetched + size]
+                self.fetched += len(batch)
+                return batch
+        return Cursor()
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = True
+
+
+def _postgres(monkeypatch, scan):
+    postgres = PostgresDB()
+    postgres.connection = _ScanConnection([])
+    monkeypatch.setattr(postgres, '_open_connection', lambda: scan)
+    return postgres
+
+
+def test_iter_rows_scans_on_its_own_connection(monkeypatch):
+    scan = _ScanConnection([(1, '1.5'), (2, None), (3, '2.25')])
+    postgres = _postgres(monkeypatch, scan)
+    before = BACKEND_ROWS._values.get(('postgres', 'iter_rows'), 0)
+    batches = list(postgres.iter_rows('SELECT region_id, latitude FROM region_info', batch_size=2,
+                                      converters={'latitude': float}))
+    assert batches == [(['region_id', 'latitude'], [(1, 1.5), (2, None)]),
+                       (['region_id', 'latitude'], [(3, 2.25)])]
+    assert scan.closed and scan.readonly and scan.commits == 0
+    assert postgres.connection.commits == 0 and not postgres.connection.closed
+    assert BACKEND_ROWS._values[('postgres', 'iter_rows')] - before == 3
+
+
+def test_abandoned_or_failed_scan_closes_its_connection(monkeypatch):
+    scan = _ScanConnection([(1, None), (2, None), (3, None)])
+    batches = _postgres(monkeypatch, scan).iter_rows('SELECT 1', batch_size=1)
+    next(batches)
+    batches.close()
+    assert scan.closed
+
+    errors = BACKEND_ERRORS._values.get(('postgres', 'iter_rows'), 0)
+    scan = _ScanConnection([(1, None), (2, None)], fail_after=1)
+    with pytest.raises(RuntimeError):
+        list(_postgres(monkeypatch, scan).iter_rows('SELECT 1', batch_size=1))
+    assert scan.closed
+    assert BACKEND_ERRORS._values[('postgres', 'iter_rows')] == errors + 1
@@ -0,0 +1,92 @@
+import pytest
+
+from mongo_sql import UnsupportedQuery, compile_query
+from standins import InMemoryCollection
+
+TABLE = 'mongo.environmental_db.`Air_Quality_History`'
+
+
+def _pipeline(sql):
+    return compile_query(sql)['pipeline']
+
+
+def _run(sql, documents):
+    collection = InMemoryCollection('Air_Quality_History')
+    collection.insert_many(documents)
+    return list(collection.aggregate(_pipeline(sql)))
+
+
+def test_where_compiles_to_match():
+    plan = compile_query(f"SELECT region_id, aqi FROM {TABLE} WHERE aqi > 100 AND region_id IN (1, 2)")
+    assert plan['collection'] == 'Air_Quality_History' and plan['database'] == 'environmental_db'
+    assert plan['columns'] == [('region_id', 'c0'), ('aqi', 'c1')]
+    assert plan['pipeline'] == [
+        {'$match': {'$and': [{'aqi': {'$gt': 100}}, {'region_id': {'$in': [1, 2]}}]}},
+        {'$project': {'_id': 0, 'c0': '$region_id', 'c1': '$aqi'}}
+    ]
+    assert _pipeline(f"SELECT region_id FROM {TABLE} WHERE station IS NULL OR aqi BETWEEN 1 AND 5")[0] == \
+        {'$match': {'$or': [{'station': None}, {'aqi': {'$gte': 1, '$lte': 5}}]}}
+
+
+@pytest.mark.parametrize('condition, excluded', [
+    ('region_id <> 3', [3, None]),
+    ('region_id NOT IN (3, 4)', [3, 4, None]),
+])
+def test_negations_exclude_null_like_sql(condition, excluded):
+    sql = f"SELECT region_id FROM {TABLE} WHERE {condition}"
+    assert _pipeline(sql)[0] == {'$match': {'region_id': {'$nin': excluded}}}
+    documents = [{'region_id': 1}, {'region_id': 3}, {'region_id': None}, {'aqi': 7}]
+    assert _run(sql, documents) == [{'c0': 1}]
+
+
+def test_group_by_and_having():
+    assert _pipeline(
+        f"SELECT region_id, COUNT(*) AS n, AVG(aqi) AS avg_aqi FROM {TABLE} "
+        "GROUP BY region_id HAVING COUNT(*) > 2 ORDER BY n DESC LIMIT 5"
+    ) == [
+        {'$group': {'_id': {'g0': '$region_id'}, 'a0': {'$sum': 1}, 'a1': {'$avg': '$aqi'}}},
+        {'$match': {'$expr': {'$and': [{'$gt': ['$a0', None]}, {'$gt': ['$a0', {'$literal': 2}]}]}}},
+        {'$project': {'_id': 0, 'c0': '$_id.g0', 'c1': '$a0', 'c2': '$a1'}},
+        {'$sort': {'c1': -1}},
+        {'$limit': 5}
+    ]
+
+
+def test_global_aggregate_has_an_empty_row():
+    sql = f"SELECT COUNT(*) AS n, MAX(aqi) AS m FROM {TABLE} WHERE aqi > 1000"
+    plan = compile_query(sql)
+    assert plan['empty_row'] == [0, None]
+    assert _run(sql, [{'aqi': 5}]) == []
+    assert compile_query(f"SELECT region_id, COUNT(*) AS n FROM {TABLE} GROUP BY region_id")['empty_row'] is None
+
+
+def test_order_by_runs_before_the_projection_unless_grouped():
+    assert _pipeline(f"SELECT region_id AS r, aqi FROM {TABLE} ORDER BY aqi DESC LIMIT 3") == [
+        {'$sort': {'aqi': -1}},
+        {'$limit': 3},
+        {'$project': {'_id': 0, 'c0': '$region_id', 'c1': '$aqi'}}
+    ]
+    # An alias is resolved to the source field
+    assert _pipeline(f"SELECT region_id AS r FROM {TABLE} ORDER BY r")[0] == {'$sort': {'region_id': 1}}
+
+
+def test_distinct():
+    sql = f"SELECT DISTINCT region_id FROM {TABLE}"
+    assert _pipeline(sql) == [
+        {'$project': {'_id': 0, 'c0': '$region_id'}},
+        {'$group': {'_id': {'c0': '$c0'}}},
+        {'$replaceWith': '$_id'}
+    ]
+    rows = _run(sql, [{'region_id': 1}, {'region_id': 1}, {'region_id': 2}])
+    assert sorted(row['c0'] for row in rows) == [1, 2]
+
+
+@pytest.mark.parametrize('sql, message', [
+    (f"SELECT * FROM {TABLE} LIMIT 0", 'LIMIT 0'),
+    (f"SELECT aqi + 1 FROM {TABLE}", 'Arithmetic'),
+    (f"SELECT * FROM {TABLE} WHERE NOT aqi > 3", 'NOT is only supported'),
+    (f"SELECT * FROM {TABLE} a JOIN {TABLE} b ON a.region_id = b.region_id", 'Joins'),
+])
+def test_unsupported_queries_fall_back(sql, message):
+    with pytest.raises(UnsupportedQuery, match=message):
+        compile_query(sql)
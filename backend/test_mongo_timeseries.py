@@ -0,0 +1,32 @@
+import pytest
+
+from mongo_timeseries import TIME_SERIES_COLLECTIONS, MongoTimeSeriesManager
+
+
+class _RecordingDatabase:
+    def __init__(self):
+        self.indexes = []
+
+    def create_collection(self, name, **options):
+        pass
+
+    def __getitem__(self, name):
+        database = self
+
+        class Collection:
+            def create_index(self, keys):
+                database.indexes.append((name, keys))
+        return Collection()
+
+
+@pytest.mark.parametrize('major, expected', [
+    (5, [[('sensor_id', 1), ('timestamp', -1)]]),
+    (6, [[('sensor_id', 1), ('timestamp', -1)], [('region_id', 1), ('timestamp', -1)]]),
+])
+def test_measurement_field_index_needs_mongodb_6(monkeypatch, major, expected):
+    manager = MongoTimeSeriesManager(specs=TIME_SERIES_COLLECTIONS)
+    database = _RecordingDatabase()
+    monkeypatch.setattr(manager, '_db', lambda: database)
+    monkeypatch.setattr(manager, '_server_major', lambda: major)
+    manager._create('Sensor_Logs')
+    assert [keys for _, keys in database.indexes] == expected
@@ -0,0 +1,31 @@
+from datetime import date
+
+from partitions import ClimatePartitionManager
+
+
+class _FakePostgres:
+    def __init__(self, partitioned=True):
+        self.partitioned = partitioned
+        self.ensured = []
+        self.connection = None
+
+    def execute_query(self, query, params=None):
+        if 'relkind' in query:
+            return [{'relkind': 'p'}] if self.partitioned else []
+        self.ensured.append(params[0])
+        return [{'name': f'climate_data_{params[0]:%Y_%m}'}]
+
+
+def test_ensure_months_creates_each_missing_month_once():
+    manager = ClimatePartitionManager()
+    manager.postgres = _FakePostgres()
+    assert manager.ensure_months({date(2024, 3, 1), date(2024, 1, 1)})
+    assert manager.ensure_months({date(2024, 1, 1), date(2024, 2, 1)})
+    assert manager.postgres.ensured == [date(2024, 1, 1), date(2024, 3, 1), date(2024, 2, 1)]
+
+
+def test_ensure_months_is_a_no_op_before_partitioning():
+    manager = ClimatePartitionManager()
+    manager.postgres = _FakePostgres(partitioned=False)
+    assert manager.ensure_months({date(2024, 1, 1)})
+    assert manager.postgres.ensured == []
@@ -0,0 +1,34 @@
+from database import db_manager
+from query_router import QueryRouter
+
+
+def test_mongo_path_passes_the_statement_timeout(monkeypatch):
+    calls = []
+
+    def aggregate(collection, pipeline, **options):
+        calls.append(options)
+        return [{'c0': 1}]
+
+    monkeypatch.setattr(db_manager.mongo, 'db', object())
+    monkeypatch.setattr(db_manager.mongo, 'aggregate', aggregate)
+    router = QueryRouter(config={'statement_timeout_ms': 1234, 'mongo_batch_size': 10})
+    plan = {'collection': 'Sensor_Logs', 'pipeline': [], 'columns': [('region_id', 'c0')], 'empty_row': None}
+    assert router._run_mongo(plan)['rows'] == [{'region_id': 1}]
+    assert calls[0]['max_time_ms'] == 1234
+
+
+def test_pool_stats_count_checkouts(monkeypatch):
+    class Pool:
+        def getconn(self):
+            return object()
+
+        def putconn(self, conn, close=False):
+            pass
+
+    router = QueryRouter(config={'postgres_pool_size': 4})
+    router._pool = Pool()
+    first, second = router._getconn(), router._getconn()
+    assert router.pool_stats() == {'max': 4, 'in_use': 2, 'available': 2}
+    router._putconn(first)
+    router._putconn(second, close=True)
+    assert router.pool_stats() == {'max': 4, 'in_use': 0, 'available': 4}
@@ -0,0 +1,59 @@
+import os
+import threading
+
+import pytest
+
+import sensor_ingest
+from sensor_ingest import SensorSegmentWriter, parse_reading
+
+
+def _writer(tmp_path, **overrides):
+    config = {'max_segment_bytes': 1 << 20, 'max_segment_seconds': 300, 'fsync_interval_ms': 10,
+              'append_timeout_s': 5, 'max_rows_per_request': 100}
+    config.update(overrides)
+    return SensorSegmentWriter(config=config, increments_dir=str(tmp_path))
+
+
+def test_parse_reading_formats_csv_line():
+    line = parse_reading({'timestamp': '2024-05-01T12:00:00+02:00', 'region_id': '3', 'co2_level': 410, 'pm2_5': 7.5})
+    assert line == '2024-05-01T10:00:00Z,3,410.0,7.5\n'
+
+
+@pytest.mark.parametrize('value', ['nan', 'NaN', float('inf'), '-Infinity'])
+def test_parse_reading_rejects_non_finite_measurements(value):
+    with pytest.raises(ValueError, match='finite'):
+        parse_reading({'region_id': 1, 'co2_level': value, 'pm2_5': 1.0})
+
+
+def test_append_returns_once_synced(tmp_path):
+    writer = _writer(tmp_path)
+    assert writer.append([parse_reading({'region_id': 1, 'co2_level': 400, 'pm2_5': 5})]) == 1
+    writer.flush()
+    published = [name for name in os.listdir(tmp_path) if name.endswith('.csv')]
+    assert len(published) == 1
+
+
+def test_append_raises_when_fsync_fails(tmp_path, monkeypatch):
+    writer = _writer(tmp_path)
+    writer.start()
+
+    def broken_fsync(fd):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(sensor_ingest.os, 'fsync', broken_fsync)
+    with pytest.raises(RuntimeError, match='No space left on device'):
+        writer.append([parse_reading({'region_id': 1, 'co2_level': 400, 'pm2_5': 5})])
+    assert writer._thread.is_alive()
+
+    monkeypatch.undo()
+    assert writer.append([parse_reading({'region_id': 1, 'co2_level': 401, 'pm2_5': 5})]) == 1
+
+
+def test_append_times_out_when_never_synced(tmp_path):
+    writer = _writer(tmp_path, fsync_interval_ms=60_000, append_timeout_s=0.2)
+    writer._thread = threading.Thread(target=threading.Event().wait, daemon=True)
+    writer._thread.start()
+    writer._started = True
+    os.makedirs(writer.inprogress_dir)
+    with pytest.raises(TimeoutError):
+        writer.append([parse_reading({'region_id': 1, 'co2_level': 400, 'pm2_5': 5})])
@@ -0,0 +1,17 @@
+import sensor_parquet
+from sensor_parquet import CSV_SENSOR_TABLE, invalidate_sensor_readings_table, sensor_readings_table
+
+
+def test_table_is_cached_until_invalidated(tmp_path, monkeypatch):
+    monkeypatch.setitem(sensor_parquet.SENSOR_PARQUET_CONFIG, 'source', 'csv')
+    monkeypatch.setitem(sensor_parquet.SENSOR_PARQUET_CONFIG, 'increments_dir', str(tmp_path))
+    invalidate_sensor_readings_table()
+    assert sensor_readings_table() == CSV_SENSOR_TABLE
+
+    (tmp_path / 'segment-1.csv').write_text('timestamp,region_id,co2_level,pm2_5\n')
+    assert sensor_readings_table() == CSV_SENSOR_TABLE
+
+    invalidate_sensor_readings_table(str(tmp_path / 'segment-1.csv'))
+    table = sensor_readings_table()
+    assert table.startswith('(') and f'dfs.data.`{tmp_path.name}`' in table
+    invalidate_sensor_readings_table()
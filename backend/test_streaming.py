@@ -0,0 +1,55 @@
+import io
+import json
+import time
+
+import pytest
+
+from streaming import iter_json_documents
+
+
+def _documents(body, **kwargs):
+    return list(iter_json_documents(io.BytesIO(body), chunk_size=16, **kwargs))
+
+
+def test_array_and_ndjson_bodies():
+    assert _documents(b' [ {"a": 1}, {"b": "x\\"}"} ] ') == [{'a': 1}, {'b': 'x"}'}]
+    assert _documents(b'{"a": 1}\n{"a": 2}\n') == [{'a': 1}, {'a': 2}]
+    assert _documents(b'[]') == []
+
+
+def test_large_document_decodes_in_linear_time():
+    document = {'values': [{'sensor': 'S-%d' % i, 'note': 'a\\"{[' * 3} for i in range(200_000)]}
+    body = json.dumps([document, {'tail': True}]).encode()
+    assert len(body) > 8 * 1024 * 1024
+    started = time.perf_counter()
+    documents = list(iter_json_documents(io.BytesIO(body)))
+    assert documents == [document, {'tail': True}]
+    assert time.perf_counter() - started < 10
+
+
+def test_document_size_cap():
+    body = json.dumps([{'a': 'x' * 1000}]).encode()
+    with pytest.raises(ValueError, match='exceeds 100 characters'):
+        _documents(body, max_document_size=100)
+    assert _documents(body, max_document_size=2000) == [{'a': 'x' * 1000}]
+
+
+@pytest.mark.parametrize('body, message', [
+    (b'[{"a": 1},, {"b": 2}]', "Expected a JSON object before ','"),
+    (b'[{"a": 1}', 'Unterminated JSON array'),
+    (b'[{"a": 1}] x', 'Unexpected data after JSON array'),
+    (b'[{"a": 1} {"b": 2}]', 'Expected , or ] after a document'),
+    (b'[1, 2]', 'Each document must be a JSON object'),
+    (b'{"a": [1}', 'Invalid JSON document'),
+    (b'{"a": "unterminated', 'Invalid JSON document'),
+])
+def test_malformed_bodies(body, message):
+    with pytest.raises(ValueError, match=message):
+        _documents(body)
+
+
+def test_documents_before_an_error_are_yielded():
+    documents = iter_json_documents(io.BytesIO(b'{"a": 1}\n{"a": '))
+    assert next(documents) == {'a': 1}
+    with pytest.raises(ValueError):
+        next(documents)
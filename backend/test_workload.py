@@ -0,0 +1,53 @@
+from workload import referenced_sources, to_postgres_sql
+
+
+def test_string_literals_are_not_rewritten():
+    query = ("SELECT region_name, 'postgres.public.`climate_data`' AS src, 'it''s `q`' AS note "
+             "FROM postgres.public.`region_info` WHERE region_name <> 'x -- y'")
+    assert to_postgres_sql(query) == (
+        "SELECT region_name, 'postgres.public.`climate_data`' AS src, 'it''s `q`' AS note "
+        "FROM region_info WHERE region_name <> 'x -- y'"
+    )
+
+
+def test_quoted_identifiers_become_postgres_identifiers():
+    query = "SELECT c.`Temperature` FROM postgres.public.`Climate_Data` c"
+    assert to_postgres_sql(query) == 'SELECT c."temperature" FROM Climate_Data c'
+
+
+def test_unquoted_sources_are_detected():
+    assert referenced_sources("SELECT * FROM mongo.federated_db.Sensor_Logs") == \
+        [('mongo', 'federated_db', 'Sensor_Logs')]
+    assert referenced_sources("SELECT * FROM dfs.tmp.t JOIN postgres.public.region_info r ON 1 = 1") == \
+        [('dfs', 'tmp', 't'), ('postgres', 'public', 'region_info')]
+
+
+def test_mixed_or_unknown_sources_fall_back_to_drill():
+    assert to_postgres_sql("SELECT * FROM user_info") is None
+    assert to_postgres_sql("SELECT * FROM postgres.public.user_info") is None
+    assert to_postgres_sql(
+        "SELECT r.region_name FROM postgres.public.region_info r, mongo.federated_db.Sensor_Logs s"
+    ) is None
+    assert to_postgres_sql(
+        "SELECT * FROM postgres.public.region_info WHERE region_id IN (SELECT region_id FROM dfs.tmp.t)"
+    ) is None
+
+
+def test_from_inside_function_calls_is_not_a_relation():
+    query = "SELECT EXTRACT(YEAR FROM recorded_at) AS y FROM postgres.public.`climate_data` GROUP BY 1"
+    assert referenced_sources(query) == [('postgres', 'public', 'climate_data')]
+    assert to_postgres_sql(query) == "SELECT EXTRACT(YEAR FROM recorded_at) AS y FROM climate_data GROUP BY 1"
+
+
+def test_common_table_expressions_are_not_sources():
+    query = ("WITH hot AS (SELECT region_id FROM postgres.public.climate_data WHERE temperature > 30) "
+             "SELECT * FROM hot JOIN postgres.public.region_info USING (region_id)")
+    assert referenced_sources(query) == [('postgres', 'public', 'climate_data'), ('postgres', 'public', 'region_info')]
+    assert to_postgres_sql(query) == (
+        "WITH hot AS (SELECT region_id FROM climate_data WHERE temperature > 30) "
+        "SELECT * FROM hot JOIN region_info USING (region_id)"
+    )
+
+
+def test_any_postgres_table_when_unrestricted():
+    assert to_postgres_sql("SELECT * FROM postgres.public.`query_log`", tables=None) == "SELECT * FROM query_log"
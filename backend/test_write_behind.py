@@ -0,0 +1,81 @@
+import write_behind
+from write_behind import _mongo_writer, _postgres_writer
+
+
+class _FakePostgres:
+    """Records committed transactions; the watermark table lives in `watermarks`"""
+
+    def __init__(self, watermark=None, reject=()):
+        self.watermarks = {} if watermark is None else {('log-1', 'climate'): watermark}
+        self.reject = set(reject)
+        self.inserted = []
+        self.connection = None
+
+    def execute_query(self, query, params=None):
+        if 'write_behind_watermark' in query:
+            seq = self.watermarks.get(params)
+            return [] if seq is None else [{'seq': seq}]
+        return [{'test': 1}]
+
+    def test_connection(self):
+        return True
+
+    def execute_values(self, query, rows, page_size=1000, then=None):
+        if any(row[0] in self.reject for row in rows):
+            return False
+        self.inserted.extend(rows)
+        if then:
+            self.execute_update(*then)
+        return True
+
+    def execute_update(self, query, params=None):
+        log_id, kind, seq = params
+        self.watermarks[(log_id, kind)] = max(self.watermarks.get((log_id, kind), 0), seq)
+        return True
+
+
+def _setup(monkeypatch, postgres):
+    monkeypatch.setattr(write_behind, '_postgres', postgres)
+    monkeypatch.setattr(write_behind.write_behind, 'log_id', 'log-1')
+    dead = []
+    monkeypatch.setattr(write_behind.write_behind, 'dead_letter', lambda kind, row, error: dead.append(row))
+    return _postgres_writer('climate', 'climate_data', ['region_id']), dead
+
+
+def test_replayed_postgres_rows_are_skipped(monkeypatch):
+    postgres = _FakePostgres(watermark=5)
+    flush, _ = _setup(monkeypatch, postgres)
+    rows = [{'region_id': seq} for seq in (4, 5, 6, 7)]
+    assert flush(rows, [4, 5, 6, 7]) == []
+    assert postgres.inserted == [(6,), (7,)]
+    assert postgres.watermarks[('log-1', 'climate')] == 7
+    # The same batch again (a crash before the checkpoint) writes nothing
+    assert flush(rows, [4, 5, 6, 7]) == []
+    assert postgres.inserted == [(6,), (7,)]
+
+
+def test_rejected_rows_are_dead_lettered_once(monkeypatch):
+    postgres = _FakePostgres(reject={2})
+    flush, dead = _setup(monkeypatch, postgres)
+    rows = [{'region_id': 1}, {'region_id': 2}, {'region_id': 3}]
+    assert flush(rows, [1, 2, 3]) == []
+    assert postgres.inserted == [(1,), (3,)]
+    assert dead == [{'region_id': 2}]
+    assert postgres.watermarks[('log-1', 'climate')] == 3
+
+
+def test_truncated_mongo_errors_retry_only_failed_rows(monkeypatch):
+    rows = [{'_id': index} for index in range(6)]
+    result = {
+        'inserted': 2, 'unacknowledged': 0, 'failed': 4, 'errors_truncated': True,
+        'errors': [{'index': 0, 'code': 11000, 'error': 'duplicate'}, {'index': 1, 'code': 121, 'error': 'invalid'}],
+        'failed_indexes': [0, 1, 3, 5]
+    }
+    dead = []
+    monkeypatch.setattr(write_behind.mongo_timeseries, 'is_time_series', lambda name: False)
+    monkeypatch.setattr(write_behind.db_manager.mongo, 'insert_many', lambda name, documents: result)
+    monkeypatch.setattr(write_behind.rollups, 'record', lambda name, documents: None)
+    monkeypatch.setattr(write_behind.write_behind, 'dead_letter', lambda kind, row, error: dead.append(row))
+    flush = _mongo_writer('air_quality', 'Air_Quality_History')
+    assert flush(rows, list(range(1, 7))) == [{'_id': 3}, {'_id': 5}]
+    assert dead == [{'_id': 1}]
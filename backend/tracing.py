@@ -0,0 +1,188 @@
+# ========================================
+# Request Phase Tracing
+# Times the phases of each request (session load and role check, LLM
+# conversion, query routing, database round trips, JSON serialization,
+# query logging) and reports them:
+#   Server-Timing response header   shown by browser devtools (Network ->
+#                                   Timing) next to the request; off unless
+#                                   TRACING_SERVER_TIMING is admin or all
+#   Trace file (optional)           one JSON line per request with every
+#                                   span's start offset and duration
+#
+# Spans are opened with `with span('name'):`; @metrics.timed opens one
+# per database / LLM call as '<backend>-<operation>'. Outside a request
+# (background workers, CLI scripts) span() does nothing.
+# ========================================
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from flask.sessions import SecureCookieSessionInterface
+from config import TRACING_CONFIG
+
+_current = contextvars.ContextVar('trace', default=None)
+_file_lock = threading.Lock()
+
+
+class Trace:
+    """Spans recorded while handling one request"""
+
+    def __init__(self, method, path):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.spans = []   # (name, start offset s, duration s, depth)
+        self.depth = 0
+
+    def add(self, name, started, duration, depth):
+        self.spans.append((name, started - self.started, duration, depth))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def totals(self):
+        """{name: (total seconds, calls)} in order of first appearance"""
+        totals = {}
+        for name, _, duration, _ in self.spans:
+            total, calls = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, calls + 1)
+        return totals
+
+
+def current_trace():
+    """The trace of the request being handled on this thread, or None"""
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block as a phase of the current request.
+
+    Args:
+        name (str): Phase name (a token: letters, digits, '-', '_', '.')
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    depth = trace.depth
+    trace.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.depth = depth
+        trace.add(name, started, time.perf_counter() - started, depth)
+
+
+def server_timing(trace):
+    """
+    Server-Timing header value: one entry per phase name (durations of
+    repeated phases are summed), then the total so far.
+    """
+    entries = []
+    for name, (total, calls) in trace.totals().items():
+        entry = f'{name};dur={total * 1000:.1f}'
+        if calls > 1:
+            entry += f';desc="{calls} calls"'
+        entries.append(entry)
+    entries.append(f'total;dur={trace.elapsed() * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def _trace_record(trace, route, status):
+    return {
+        'trace_id': trace.trace_id,
+        'at': trace.started_at.isoformat() + 'Z',
+        'method': trace.method,
+        'path': trace.path,
+        'route': route,
+        'status': status,
+        'duration_ms': round(trace.elapsed() * 1000, 2),
+        'spans': [
+            {'name': name, 'start_ms': round(offset * 1000, 2),
+             'duration_ms': round(duration * 1000, 2), 'depth': depth}
+            for name, offset, duration, depth in trace.spans
+        ]
+    }
+
+
+def _write_record(record, path):
+    try:
+        line = json.dumps(record, default=str)
+        with _file_lock:
+            with open(path, 'a', encoding='utf-8') as handle:
+                handle.write(line + '\n')
+    except Exception as e:
+        from structured_log import get_logger  # structured_log imports this module
+        get_logger('tracing').error('tracing.file_write_failed', error=str(e), path=path)
+
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """
+    Flask's cookie session, with the time spent decoding it recorded for
+    the trace. The cookie is decoded before any before_request hook runs,
+    so the trace picks the timing up from the WSGI environ.
+    """
+
+    def open_session(self, app, request):
+        started = time.perf_counter()
+        try:
+            return super().open_session(app, request)
+        finally:
+            request.environ['tracing.session_open'] = (started, time.perf_counter() - started)
+
+
+def _server_timing_allowed(mode, session):
+    """Server-Timing exposes backend internals: only sent when configured for this session"""
+    if mode == 'all':
+        return True
+    if mode == 'admin':
+        return bool(session.get('logged_in')) and session.get('role') == 'Administrator'
+    return False
+
+
+def instrument_flask(app, config=TRACING_CONFIG):
+    """Register request hooks that start a trace, add Server-Timing and write trace records"""
+    if not config['enabled']:
+        return
+    from flask import g, request, session
+
+    # Time session loading as 'session-load' (only for Flask's own cookie
+    # session; a custom interface is left untouched)
+    if type(app.session_interface) is SecureCookieSessionInterface:
+        app.session_interface = TimedSessionInterface()
+
+    @app.before_request
+    def _trace_start():
+        trace = Trace(request.method, request.path)
+        session_open = request.environ.get('tracing.session_open')
+        if session_open:
+            trace.started = session_open[0]
+            trace.add('session-load', *session_open, 0)
+        g.trace_token = _current.set(trace)
+
+    @app.after_request
+    def _trace_finish(response):
+        trace = _current.get()
+        if trace is None:
+            return response
+        if _server_timing_allowed(config['server_timing'], session):
+            response.headers['Server-Timing'] = server_timing(trace)
+        if config['trace_file'] and trace.elapsed() * 1000 >= config['trace_min_ms']:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            _write_record(_trace_record(trace, route, response.status_code), config['trace_file'])
+        return response
+
+    @app.teardown_request
+    def _trace_done(error=None):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            _current.reset(token)
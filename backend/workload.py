@@ -0,0 +1,432 @@
+# ========================================
+# Sample Workload Helpers
+# Holds the federated query workload (config/sample_federated_queries.sql
+# and the sample queries offered in the UI) and analyzes which data
+# sources a Drill query touches.
+# ========================================
+
+import os
+import re
+from mongo_sql import UnsupportedQuery, sql_tokens
+
+SAMPLE_QUERIES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'config', 'sample_federated_queries.sql'
+)
+
+# PostgreSQL tables a query may read on the native path; any other relation
+# (user_info, another schema, a table function) keeps the query on Drill
+NATIVE_POSTGRES_TABLES = {
+    'region_info', 'climate_data', 'agriculture_data', 'region_summary', 'region_yield_summary'
+}
+
+# Words that cannot follow a relation as its alias
+_NOT_ALIAS = {
+    'where', 'group', 'having', 'order', 'limit', 'offset', 'join', 'inner', 'left', 'right', 'full',
+    'cross', 'natural', 'on', 'using', 'union', 'intersect', 'except', 'fetch', 'window', 'lateral'
+}
+# Words before "(" that open a subquery or expression group rather than a call
+_GROUPING = {
+    'from', 'join', 'as', 'in', 'exists', 'any', 'all', 'some', 'on', 'where', 'and', 'or', 'not',
+    'select', 'having', 'when', 'then', 'else', 'lateral'
+}
+
+
+# Sample queries offered by GET /api/sample-queries (dfs.data.`sensor_readings.csv`
+# is swapped for sensor_readings_table(): the Parquet dataset when that is the
+# active sensor source, else the CSV plus ingested increments)
+SAMPLE_QUERIES = [
+    {
+        'name': 'All Regions',
+        'description': 'List all environmental regions',
+        'query': 'SELECT * FROM postgres.public.`region_info` LIMIT 10'
+    },
+    {
+        'name': 'Climate Data',
+        'description': 'Recent climate measurements',
+        'query': 'SELECT * FROM postgres.public.`climate_data` LIMIT 10'
+    },
+    {
+        'name': 'Biodiversity Info',
+        'description': 'Species diversity data from MongoDB',
+        'query': 'SELECT * FROM mongo.environmental_db.`Biodiversity_Data` LIMIT 10'
+    },
+    {
+        'name': 'Sensor Readings',
+        'description': 'Real-time sensor data from CSV',
+        'query': 'SELECT * FROM dfs.data.`sensor_readings.csv` LIMIT 10'
+    },
+    {
+        'name': 'Agriculture Data',
+        'description': 'Crop yields by region',
+        'query': 'SELECT * FROM postgres.public.`agriculture_data` LIMIT 10'
+    },
+    {
+        'name': 'Air Quality History',
+        'description': 'Historical air quality from MongoDB',
+        'query': 'SELECT * FROM mongo.environmental_db.`Air_Quality_History` LIMIT 5'
+    },
+    {
+        'name': 'Regions with Climate',
+        'description': 'Join PostgreSQL tables: regions + climate',
+        'query': '''SELECT 
+            r.region_name, 
+            r.latitude,
+            r.longitude,
+            c.temperature, 
+            c.rainfall,
+            c.humidity
+        FROM postgres.public.`climate_data` c
+        JOIN postgres.public.`region_info` r ON c.region_id = r.region_id
+        LIMIT 10'''
+    },
+    {
+        'name': 'Regions with Agriculture',
+        'description': 'Join PostgreSQL: regions + crop yields',
+        'query': '''SELECT 
+            r.region_name,
+            a.crop_type,
+            a.yield,
+            a.season,
+            a.year
+        FROM postgres.public.`agriculture_data` a
+        JOIN postgres.public.`region_info` r ON a.region_id = r.region_id
+        LIMIT 10'''
+    },
+    {
+        'name': 'Climate vs Biodiversity',
+        'description': 'Federated join: PostgreSQL + MongoDB',
+        'query': '''WITH 
+            pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
+            pg_climate AS (SELECT region_id, temperature, humidity FROM postgres.public.`climate_data`),
+            mongo_bio AS (SELECT region_id, species_count, conservation_status FROM mongo.environmental_db.`Biodiversity_Data`)
+        SELECT 
+            r.region_name,
+            c.temperature,
+            c.humidity,
+            b.species_count,
+            b.conservation_status
+        FROM pg_region r
+        JOIN pg_climate c ON r.region_id = c.region_id
+        JOIN mongo_bio b ON r.region_id = b.region_id
+        LIMIT 50'''
+    },
+    {
+        'name': 'Sensors vs Climate',
+        'description': 'Federated join: CSV + PostgreSQL',
+        'query': '''WITH 
+            csv_sensors AS (SELECT CAST(region_id AS INT) as rid, CAST(co2_level AS FLOAT) as co2, CAST(pm2_5 AS FLOAT) as pm FROM dfs.data.`sensor_readings.csv`),
+            pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
+            pg_climate AS (SELECT region_id, temperature, humidity FROM postgres.public.`climate_data`)
+        SELECT 
+            r.region_name,
+            s.co2 as co2_level,
+            s.pm as pm2_5,
+            c.temperature,
+            c.humidity
+        FROM csv_sensors s
+        JOIN pg_region r ON s.rid = r.region_id
+        JOIN pg_climate c ON r.region_id = c.region_id
+        LIMIT 50'''
+    },
+    {
+        'name': 'Complete Environmental View',
+        'description': 'Join PostgreSQL (3 tables) + MongoDB',
+        'query': '''WITH 
+            pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
+            pg_climate AS (SELECT region_id, temperature, rainfall FROM postgres.public.`climate_data`),
+            pg_agri AS (SELECT region_id, crop_type, `yield` as crop_yield FROM postgres.public.`agriculture_data`),
+            mongo_bio AS (SELECT region_id, species_count FROM mongo.environmental_db.`Biodiversity_Data`)
+        SELECT 
+            r.region_name,
+            c.temperature,
+            c.rainfall,
+            a.crop_type,
+            a.crop_yield,
+            b.species_count
+        FROM pg_region r
+        LEFT JOIN pg_climate c ON r.region_id = c.region_id
+        LEFT JOIN pg_agri a ON r.region_id = a.region_id
+        LEFT JOIN mongo_bio b ON r.region_id = b.region_id
+        LIMIT 50'''
+    },
+    {
+        'name': 'Region Summary (materialized)',
+        'description': 'Precomputed per-region climate + biodiversity (no joins)',
+        'query': '''SELECT region_id, climate_count, latest_temperature,
+            temperature_sum / climate_count AS avg_temperature,
+            rainfall_sum / climate_count AS avg_rainfall,
+            species_count, conservation_status
+        FROM postgres.public.`region_summary`
+        WHERE climate_count > 0'''
+    },
+    {
+        'name': 'High Temp Regions with Species',
+        'description': 'Filter + join: Hot regions with biodiversity',
+        'query': '''WITH 
+            pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`),
+            pg_climate AS (SELECT region_id, temperature FROM postgres.public.`climate_data`),
+            mongo_bio AS (SELECT region_id, species_count, conservation_status FROM mongo.environmental_db.`Biodiversity_Data`)
+        SELECT 
+            r.region_name,
+            c.temperature,
+            b.species_count,
+            b.conservation_status
+        FROM pg_climate c
+        JOIN pg_region r ON c.region_id = r.region_id
+        JOIN mongo_bio b ON r.region_id = b.region_id
+        WHERE c.temperature > 25
+        LIMIT 50'''
+    },
+    {
+        'name': 'High CO2 Regions Analysis',
+        'description': 'CSV sensors + PostgreSQL regions',
+        'query': '''WITH 
+            csv_sensors AS (SELECT CAST(region_id AS INT) as rid, CAST(co2_level AS FLOAT) as co2, CAST(pm2_5 AS FLOAT) as pm FROM dfs.data.`sensor_readings.csv`),
+            pg_region AS (SELECT region_id, region_name FROM postgres.public.`region_info`)
+        SELECT 
+            r.region_name,
+            AVG(s.co2) as avg_co2,
+            AVG(s.pm) as avg_pm25,
+            COUNT(*) as reading_count
+        FROM csv_sensors s
+        JOIN pg_region r ON s.rid = r.region_id
+        GROUP BY r.region_name
+        HAVING AVG(s.co2) > 420
+        LIMIT 50'''
+    },
+    {
+        'name': 'Critical Conservation Regions',
+        'description': 'MongoDB + PostgreSQL: endangered species areas',
+        'query': '''SELECT 
+            r.region_name,
+            r.latitude,
+            r.longitude,
+            b.species_count,
+            b.conservation_status
+        FROM mongo.environmental_db.`Biodiversity_Data` b
+        JOIN postgres.public.`region_info` r ON b.region_id = r.region_id
+        WHERE b.conservation_status = 'Critical'
+        LIMIT 50'''
+    },
+    {
+        'name': 'Top Crop Producing Regions',
+        'description': 'Aggregate agriculture data by region',
+        'query': '''SELECT 
+            r.region_name,
+            SUM(a.yield) as total_yield,
+            COUNT(DISTINCT a.crop_type) as crop_diversity
+        FROM postgres.public.`agriculture_data` a
+        JOIN postgres.public.`region_info` r ON a.region_id = r.region_id
+        GROUP BY r.region_name
+        LIMIT 50'''
+    }
+]
+
+
+def load_sql_file(path=SAMPLE_QUERIES_PATH):
+    """
+    Parse a SQL workload file into named queries.
+    Each statement ends with ';'. A preceding "-- Query N: title" comment
+    names it; other comments and /* ... */ blocks are skipped.
+
+    Args:
+        path (str): Path to the .sql file
+
+    Returns:
+        list: [{'name': str, 'query': str}] in file order
+    """
+    queries = []
+    name = None
+    lines = []
+    in_block_comment = False
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for raw_line in f:
+            line = raw_line.strip()
+            if in_block_comment:
+                in_block_comment = '*/' not in line
+                continue
+            if line.startswith('/*'):
+                in_block_comment = '*/' not in line
+                continue
+            if line.startswith('--'):
+                match = re.match(r'--\s*(Query\s+\d+:.*)', line)
+                if match and not lines:
+                    name = match.group(1).strip()
+                continue
+            if not line:
+                continue
+            lines.append(raw_line.rstrip())
+            if line.endswith(';'):
+                sql = '\n'.join(lines).strip().rstrip(';').strip()
+                queries.append({'name': name or f'Query {len(queries) + 1}', 'query': sql})
+                name = None
+                lines = []
+    return queries
+
+
+def _name(text):
+    """Unquote a `backtick` / "double" quoted identifier"""
+    if text[0] in '`"':
+        return text[1:-1].replace('""', '"')
+    return text
+
+
+def _relations(sql):
+    """
+    Find every relation read by FROM / JOIN (CTE names excluded).
+    Quoted strings, comments and FROM inside calls such as EXTRACT(... FROM ...)
+    are not mistaken for table references.
+
+    Returns:
+        tuple: (tokens, relations) with tokens the verbatim (kind, text) list
+               and relations [(first token index, last token index, [name parts])];
+               None if the query cannot be tokenized. A table function is
+               reported with the parts [None].
+    """
+    try:
+        tokens = list(sql_tokens(sql))
+    except UnsupportedQuery:
+        return None
+    code = [index for index, (kind, _) in enumerate(tokens) if kind != 'space']
+
+    def at(position):
+        return tokens[code[position]] if position < len(code) else (None, None)
+
+    def word(position):
+        kind, text = at(position)
+        return text.lower() if kind == 'word' else None
+
+    relations = []
+    ctes = set()
+    parens = []          # per open '(': 'call', 'group' or 'from' (a FROM subquery)
+    expect_relation = False
+    position = 0
+    while position < len(code):
+        kind, text = at(position)
+        lowered = text.lower() if kind == 'word' else None
+
+        if expect_relation:
+            expect_relation = False
+            if (kind, text) == ('op', '('):
+                parens.append('from')
+                position += 1
+                continue
+            if kind not in ('word', 'quoted'):
+                return tokens, relations + [(code[position], code[position], [None])]
+            first = position
+            parts = [_name(text)]
+            position += 1
+            while at(position) == ('op', '.') and at(position + 1)[0] in ('word', 'quoted'):
+                parts.append(_name(at(position + 1)[1]))
+                position += 2
+            if at(position) == ('op', '('):
+                parts = [None]  # table function
+            relations.append((code[first], code[position - 1], parts))
+            position = _after_relation(at, word, position)
+            if at(position) == ('op', ','):
+                expect_relation = True
+                position += 1
+            continue
+
+        if lowered in ('from', 'join') and (not parens or parens[-1] != 'call'):
+            expect_relation = True
+        elif lowered is not None and word(position + 1) == 'as' and at(position + 2) == ('op', '(') \
+                and (word(position - 1) in ('with', 'recursive') or at(position - 1) == ('op', ',')):
+            ctes.add(_name(text).lower())
+        elif kind == 'quoted' and word(position + 1) == 'as' and at(position + 2) == ('op', '('):
+            ctes.add(_name(text).lower())
+        elif (kind, text) == ('op', '('):
+            previous = at(position - 1)
+            is_call = previous[0] in ('word', 'quoted') and (previous[0] == 'quoted' or previous[1].lower() not in _GROUPING)
+            parens.append('call' if is_call else 'group')
+        elif (kind, text) == ('op', ')'):
+            opened = parens.pop() if parens else None
+            if opened == 'from':
+                position = _after_relation(at, word, position + 1)
+                if at(position) == ('op', ','):
+                    expect_relation = True
+                    position += 1
+                continue
+        position += 1
+
+    relations = [r for r in relations if not (len(r[2]) == 1 and r[2][0] is not None and r[2][0].lower() in ctes)]
+    return tokens, relations
+
+
+def _after_relation(at, word, position):
+    """Skip an optional [AS] alias after a relation; returns the next position"""
+    if word(position) == 'as':
+        return position + 2
+    kind, text = at(position)
+    if kind == 'quoted' or (kind == 'word' and text.lower() not in _NOT_ALIAS):
+        return position + 1
+    return position
+
+
+def referenced_sources(sql):
+    """
+    List the relations a Drill query reads, as (plugin, schema, table) triples.
+    Relations not written plugin.schema.table (a bare or two-part name, a table
+    function) are reported with plugin None, so callers treat the query as
+    touching an unknown source.
+
+    Returns:
+        list: e.g. [('postgres', 'public', 'region_info'), ('mongo', 'environmental_db', 'Biodiversity_Data')]
+    """
+    found = _relations(sql)
+    if found is None:
+        return [(None, None, None)]
+    sources = []
+    for _, _, parts in found[1]:
+        if len(parts) == 3 and parts[0].lower() in ('postgres', 'mongo', 'dfs'):
+            sources.append((parts[0].lower(), parts[1], parts[2]))
+        else:
+            sources.append((None, None, '.'.join(part or '' for part in parts)))
+    return sources
+
+
+def to_postgres_sql(sql, tables=NATIVE_POSTGRES_TABLES):
+    """
+    Rewrite a PostgreSQL-only Drill query into native PostgreSQL SQL
+    (the form Drill's JDBC plugin pushes down). Only identifier tokens
+    change: postgres.public.`t` becomes t and other `quoted` identifiers
+    become "quoted"; strings and comments are kept verbatim.
+
+    Args:
+        sql (str): Drill SQL
+        tables (set): Lowercase table names allowed (None: any postgres.public table)
+
+    Returns:
+        str: Native SQL, or None unless every relation is an allowed
+             postgres.public table
+    """
+    found = _relations(sql)
+    if found is None:
+        return None
+    tokens, relations = found
+    if not relations:
+        return None
+    replaced = {}
+    for first, last, parts in relations:
+        if (len(parts) != 3 or parts[0].lower() != 'postgres' or parts[1].lower() != 'public'
+                or (tables is not None and parts[2].lower() not in tables)):
+            return None
+        replaced[first] = (last, parts[2])
+
+    native = []
+    index = 0
+    while index < len(tokens):
+        if index in replaced:
+            last, table = replaced[index]
+            native.append(table)
+            index = last + 1
+            continue
+        kind, text = tokens[index]
+        if kind == 'quoted' and text.startswith('`'):
+            # PostgreSQL quotes identifiers with double quotes (e.g. `yield`)
+            native.append('"' + text[1:-1].lower().replace('"', '""') + '"')
+        else:
+            native.append(text)
+        index += 1
+    return ''.join(native)
@@ -0,0 +1,436 @@
+# ========================================
+# Write-Behind Coalescing for Single-Row Inserts
+# Requests are acknowledged once appended to a local append-only log;
+# a background group-commit thread flushes them to PostgreSQL/MongoDB
+# in batches and the log is replayed on restart.
+# ========================================
+
+import atexit
+import fcntl
+import os
+import threading
+import time
+import uuid
+from bson import json_util
+from config import WRITE_BEHIND_CONFIG
+from database import PostgresDB, db_manager
+from mongo_timeseries import TIME_SERIES_COLLECTIONS, mongo_timeseries
+from rollups import rollups, written_documents
+from structured_log import get_logger
+
+log = get_logger('write_behind')
+
+# Datetimes round-trip through the log as naive UTC, like pymongo returns them
+_JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+
+class WriteBehindQueue:
+    """
+    Durable queue that coalesces many tiny writes into a few large ones.
+
+    Delivery is at-least-once: a crash after a batch reaches the database
+    but before the checkpoint is written replays that batch. PostgreSQL
+    batches record their highest seq in write_behind_watermark in the same
+    transaction, so replayed rows at or below it are skipped (migration 6).
+    MongoDB rows carry a pre-assigned _id so replays are ignored as
+    duplicates (checked explicitly for time-series collections, which allow
+    duplicate _ids).
+
+    Only one process can own the log directory (flock); in other processes
+    submit() returns False and callers write synchronously.
+    """
+
+    def __init__(self, config=WRITE_BEHIND_CONFIG):
+        self.config = config
+        self.enabled = config['enabled']
+        self.handlers = {}
+        self.log_path = os.path.join(config['log_dir'], 'write_behind.log')
+        self.checkpoint_path = os.path.join(config['log_dir'], 'checkpoint')
+        self.dead_letter_path = os.path.join(config['log_dir'], 'dead_letter.log')
+        self.log_id = None                     # identifies this log directory (see start())
+
+        self._lock = threading.Condition()     # guards log file, seq and pending
+        self._sync_lock = threading.Lock()     # one fsync leader at a time
+        self._pending = []                     # [(seq, kind, row, enqueued_at)]
+        self._inflight = []
+        self._seq = 0
+        self._synced_seq = 0
+        self._log = None
+        self._owner_lock = None
+        self._thread = None
+        self._running = False
+        self._stopping = False
+
+    def register(self, kind, flush_fn):
+        """
+        Register the batch writer for a kind of row.
+
+        Args:
+            kind (str): Row kind used by submit()
+            flush_fn (callable): flush_fn(rows, seqs) writes a batch (seqs are the
+                                 rows' log sequence numbers, ascending) and
+                                 returns the rows that should be retried later
+        """
+        self.handlers[kind] = flush_fn
+
+    # ----------------------------------------
+    # Lifecycle
+    # ----------------------------------------
+    def start(self):
+        """Acquire the log, replay unflushed rows and start the flush thread"""
+        if not self.enabled or self._running:
+            return self._running
+        with self._lock:
+            if self._running or not self.enabled:
+                return self._running
+            try:
+                os.makedirs(self.config['log_dir'], exist_ok=True)
+                self._owner_lock = open(os.path.join(self.config['log_dir'], 'owner.lock'), 'w')
+                fcntl.flock(self._owner_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                log.warning('write_behind.disabled', reason='log is owned by another process', error=str(e))
+                self.enabled = False
+                return False
+
+            self.log_id = self._read_log_id()
+            self._replay()
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+            log.info('write_behind.started', replayed=len(self._pending))
+            return True
+
+    def stop(self, timeout=10):
+        """Flush what is pending and stop the background thread"""
+        if not self._running:
+            return
+        with self._lock:
+            self._stopping = True
+            self._lock.notify_all()
+        self._thread.join(timeout)
+        with self._lock:
+            self._running = False
+            self._stopping = False
+            self._log.close()
+            self._owner_lock.close()  # releases the flock
+
+    def _read_log_id(self):
+        """Random id of the log directory, created with it; seqs are only unique per log_id"""
+        path = os.path.join(self.config['log_dir'], 'log_id')
+        try:
+            with open(path) as f:
+                log_id = f.read().strip()
+            if log_id:
+                return log_id
+        except OSError:
+            pass
+        log_id = uuid.uuid4().hex
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(log_id)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return log_id
+
+    def _replay(self):
+        """Load uncommitted rows from the log and rewrite it without the committed ones"""
+        committed = self._read_checkpoint()
+        self._seq = committed
+        records = []
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        record = json_util.loads(line, json_options=_JSON_OPTIONS)
+                    except ValueError:
+                        continue  # torn tail from a crash mid-append
+                    self._seq = max(self._seq, record['seq'])
+                    if record['seq'] > committed:
+                        records.append(record)
+
+        # Compact: the fresh log holds only what still has to be flushed
+        tmp_path = self.log_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            for record in records:
+                handle.write(json_util.dumps(record) + '\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.log_path)
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._synced_seq = self._seq
+
+        now = time.monotonic()
+        self._pending = [(r['seq'], r['kind'], r['row'], now) for r in records]
+
+    # ----------------------------------------
+    # Producer side
+    # ----------------------------------------
+    def submit(self, kind, row):
+        """
+        Durably enqueue a row.
+
+        Args:
+            kind (str): Registered row kind (e.g. 'climate', 'sensor_log')
+            row (dict): Row / document to write
+
+        Returns:
+            bool: True once the row is in the log; False if write-behind is
+                  off and the caller should write synchronously
+        """
+        if not self.enabled or kind not in self.handlers:
+            return False
+        if not self._running and not self.start():
+            return False
+
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._log.write(json_util.dumps({'seq': seq, 'kind': kind, 'row': row}) + '\n')
+            self._log.flush()
+            self._pending.append((seq, kind, row, time.monotonic()))
+            if len(self._pending) == 1 or len(self._pending) >= self.config['max_batch_rows']:
+                self._lock.notify_all()
+
+        if self.config['fsync']:
+            self._sync(seq)
+        return True
+
+    def _sync(self, seq):
+        """Group fsync: one caller syncs on behalf of everyone appended before it"""
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._lock:
+                target = self._seq
+                fileno = self._log.fileno()
+            os.fsync(fileno)
+            self._synced_seq = target
+
+    # ----------------------------------------
+    # Group-commit thread
+    # ----------------------------------------
+    def _run(self):
+        max_batch = self.config['max_batch_rows']
+        max_latency = self.config['max_latency_ms'] / 1000.0
+        while True:
+            with self._lock:
+                while not self._pending and not self._stopping:
+                    self._lock.wait()
+                if not self._pending and self._stopping:
+                    return
+                deadline = self._pending[0][3] + max_latency
+                while len(self._pending) < max_batch and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._lock.wait(remaining)
+                batch = self._pending[:max_batch]
+                del self._pending[:max_batch]
+                self._inflight = batch
+
+            retry = self._flush(batch)
+
+            with self._lock:
+                self._inflight = []
+                if retry:
+                    self._pending[:0] = retry
+                self._checkpoint()
+
+            if retry:
+                if self._stopping:
+                    return  # rows stay in the log for the next start
+                time.sleep(self.config['retry_interval_s'])
+
+    def _flush(self, batch):
+        """Write one batch, grouped by kind. Returns the entries to retry."""
+        by_kind = {}
+        for entry in batch:
+            by_kind.setdefault(entry[1], []).append(entry)
+
+        retry = []
+        for kind, entries in by_kind.items():
+            try:
+                failed = self.handlers[kind]([entry[2] for entry in entries], [entry[0] for entry in entries])
+            except Exception as e:
+                log.error('write_behind.flush_failed', kind=kind, error=str(e))
+                failed = [entry[2] for entry in entries]
+            failed_ids = {id(row) for row in failed}
+            retry.extend(entry for entry in entries if id(entry[2]) in failed_ids)
+        retry.sort(key=lambda entry: entry[0])
+        return retry
+
+    def _checkpoint(self):
+        """Persist the highest seq below which everything is committed (lock held)"""
+        outstanding = [entry[0] for entry in self._pending] + [entry[0] for entry in self._inflight]
+        committed = (min(outstanding) - 1) if outstanding else self._seq
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(committed))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+        # Everything is flushed: start a fresh log once the old one is large
+        if not outstanding and self._log.tell() >= self.config['compact_bytes']:
+            self._log.truncate(0)
+            self._log.seek(0)
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def dead_letter(self, kind, row, error):
+        """Record a row that can never be written (e.g. FK violation)"""
+        log.error('write_behind.dead_lettered', kind=kind, error=str(error))
+        with self._lock:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json_util.dumps({'kind': kind, 'row': row, 'error': str(error)}) + '\n')
+
+    def stats(self):
+        """Queue depth and sequence numbers for monitoring"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'running': self._running,
+                'pending': len(self._pending) + len(self._inflight),
+                'last_seq': self._seq,
+                'committed_seq': self._read_checkpoint()
+            }
+
+
+# ========================================
+# Batch Writers
+# ========================================
+# The flusher owns its own PostgreSQL connection so its transactions never
+# interleave with request threads on the shared one.
+_postgres = PostgresDB()
+
+
+_WATERMARK_QUERY = "SELECT seq FROM write_behind_watermark WHERE log_id = %s AND kind = %s"
+_WATERMARK_UPSERT = """
+    INSERT INTO write_behind_watermark AS w (log_id, kind, seq) VALUES (%s, %s, %s)
+    ON CONFLICT (log_id, kind) DO UPDATE
+    SET seq = GREATEST(w.seq, EXCLUDED.seq), updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _read_watermark(kind):
+    """
+    Highest seq of `kind` already committed for this log: an int (0 if
+    none), False without the write_behind_watermark table (migration 6),
+    or None if PostgreSQL is unreachable.
+    """
+    result = _postgres.execute_query(_WATERMARK_QUERY, (write_behind.log_id, kind))
+    if _postgres.connection and not _postgres.connection.closed:
+        _postgres.connection.rollback()  # end the read (or the failed) transaction
+    if result is not None:
+        return result[0]['seq'] if result else 0
+    if not _postgres.test_connection():
+        return None
+    log.warning('write_behind.no_watermark', kind=kind,
+                hint='apply migration 6 (python migrations.py migrate); replays may duplicate rows')
+    return False
+
+
+def _postgres_writer(kind, table, columns):
+    """Build a flush function that multi-row inserts into `table`, skipping replayed rows"""
+    column_list = ', '.join(columns)
+    batch_query = f"INSERT INTO {table} ({column_list}) VALUES %s"
+    # This process owns the log (flock), so only it advances the watermark
+    state = {'watermark': None}
+
+    def mark(seq):
+        return (_WATERMARK_UPSERT, (write_behind.log_id, kind, seq)) if state['watermark'] is not False else None
+
+    def committed(seq):
+        if state['watermark'] is not False:
+            state['watermark'] = max(state['watermark'], seq)
+
+    def flush(rows, seqs):
+        if state['watermark'] is None:
+            state['watermark'] = _read_watermark(kind)
+            if state['watermark'] is None:
+                return rows  # database down: keep everything for the retry
+        if state['watermark'] is not False:
+            kept = [(row, seq) for row, seq in zip(rows, seqs) if seq > state['watermark']]
+            if not kept:
+                return []
+            rows, seqs = [row for row, _ in kept], [seq for _, seq in kept]
+        params = [tuple(row.get(c) for c in columns) for row in rows]
+        if _postgres.execute_values(batch_query, params, then=mark(max(seqs))):
+            committed(max(seqs))
+            return []
+        if not _postgres.test_connection():
+            return rows  # database down: keep everything for the retry
+        # One bad row fails the whole statement; isolate it
+        for row, seq, row_params in zip(rows, seqs, params):
+            if not _postgres.execute_values(batch_query, [row_params], then=mark(seq)):
+                write_behind.dead_letter(kind, row, 'rejected by PostgreSQL')
+                if mark(seq):
+                    _postgres.execute_update(*mark(seq))
+            committed(seq)
+        return []
+    return flush
+
+
+def _not_yet_written(collection_name, rows):
+    """
+    Time-series collections do not enforce unique _id, so replayed rows
+    would be stored twice; drop those whose _id is already present.
+    The time-range filter lets MongoDB prune buckets.
+    """
+    time_field = TIME_SERIES_COLLECTIONS[collection_name]['timeField']
+    times = [row[time_field] for row in rows]
+    existing = db_manager.mongo.db[collection_name].find(
+        {'_id': {'$in': [row['_id'] for row in rows]},
+         time_field: {'$gte': min(times), '$lte': max(times)}},
+        {'_id': 1}
+    )
+    written = {doc['_id'] for doc in existing}
+    return [row for row in rows if row['_id'] not in written]
+
+
+def _mongo_writer(kind, collection_name):
+    """Build a flush function that insert_many's into `collection_name`"""
+    def flush(rows, seqs):
+        if mongo_timeseries.is_time_series(collection_name):
+            try:
+                rows = _not_yet_written(collection_name, rows)
+            except Exception:
+                return rows  # MongoDB unreachable; retry the whole batch
+            if not rows:
+                return []
+        result = db_manager.mongo.insert_many(collection_name, rows)
+        if result is None:
+            return rows
+        rollups.record(collection_name, written_documents(rows, result))
+        retry = []
+        for err in result['errors']:
+            if err['code'] == 11000:
+                continue  # duplicate _id: already written by an earlier attempt
+            if err['code'] is None:
+                retry.append(err['index'])
+            else:
+                write_behind.dead_letter(kind, rows[err['index']], err['error'])
+        if result['errors_truncated'] or result['failed'] > len(result['errors']):
+            # Failures past the reporting cap have positions but no error: retry
+            # them. If they did land they come back as duplicates (11000) or are
+            # filtered by _not_yet_written on time-series collections.
+            reported = {err['index'] for err in result['errors']}
+            retry.extend(index for index in result['failed_indexes'] if index not in reported)
+        return [rows[index] for index in sorted(retry)]
+    return flush
+
+
+write_behind = WriteBehindQueue()
+atexit.register(write_behind.stop)
+write_behind.register('climate', _postgres_writer(
+    'climate', 'climate_data', ['region_id', 'temperature', 'rainfall', 'humidity', 'timestamp']))
+write_behind.register('agriculture', _postgres_writer(
+    'agriculture', 'agriculture_data', ['region_id', 'crop_type', 'yield', 'season', 'year']))
+write_behind.register('sensor_log', _mongo_writer('sensor_log', 'Sensor_Logs'))
+write_behind.register('air_quality', _mongo_writer('air_quality', 'Air_Quality_History'))
@@ -56,7 +56,12 @@ db.Biodiversity_Data.insertMany([
 // ========================================
 // COLLECTION 2: Sensor_Logs
 // Purpose: Real-time sensor event logs
+// Time-series collection (MongoDB 5.0+), bucketed per sensor_id;
+// its region_id index is on a measurement field and needs MongoDB 6.0+
 // ========================================
+db.createCollection("Sensor_Logs", {
+    timeseries: { timeField: "timestamp", metaField: "sensor_id", granularity: "minutes" }
+});
 db.Sensor_Logs.insertMany([
     {
         log_id: "LOG001",
@@ -108,7 +113,11 @@ db.Sensor_Logs.insertMany([
 // ========================================
 // COLLECTION 3: Air_Quality_History
 // Purpose: Historical air quality measurements
+// Time-series collection (MongoDB 5.0+), bucketed per region_id
 // ========================================
+db.createCollection("Air_Quality_History", {
+    timeseries: { timeField: "recorded_at", metaField: "region_id", granularity: "hours" }
+});
 db.Air_Quality_History.insertMany([
     {
         reading_id: "AQ001",
@@ -598,9 +607,17 @@ db.Sensor_Metadata.insertMany([
 // ========================================
 db.Biodiversity_Data.createIndex({ region_id: 1 });
 db.Sensor_Logs.createIndex({ sensor_id: 1, timestamp: -1 });
+if (parseInt(db.version()) >= 6) {
+    db.Sensor_Logs.createIndex({ region_id: 1, timestamp: -1 });
+}
 db.Air_Quality_History.createIndex({ region_id: 1, recorded_at: -1 });
 db.Species_Details.createIndex({ habitat_regions: 1 });
 db.Sensor_Metadata.createIndex({ sensor_id: 1 });
+// Rollup collections maintained by backend/rollups.py
+db.Air_Quality_Rollups_Hourly.createIndex({ region_id: 1, period_start: 1 });
+db.Air_Quality_Rollups_Daily.createIndex({ region_id: 1, period_start: 1 });
+db.Sensor_Log_Rollups_Hourly.createIndex({ region_id: 1, period_start: 1 });
+db.Sensor_Log_Rollups_Daily.createIndex({ region_id: 1, period_start: 1 });
 
 // ========================================
 // VERIFICATION QUERIES
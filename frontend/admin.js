@@ -43,6 +43,8 @@ function showTab(tabName) {
 
     if (tabName === 'logs') {
         loadQueryLogs();
+    } else if (tabName === 'profiles') {
+        loadProfiles();
     }
 }
 
@@ -223,6 +225,168 @@ function displayQueryLogs(logs) {
     container.innerHTML = tableHTML;
 }
 
+// ========================================
+// Request Profiling
+// ========================================
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML;
+}
+
+document.getElementById('samplingForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const messageDiv = document.getElementById('samplingMessage');
+    messageDiv.textContent = '';
+    messageDiv.className = 'message';
+
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/admin/profiles/sampling`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            credentials: 'include',
+            body: JSON.stringify({ sample_rate: parseFloat(document.getElementById('sample_rate').value) })
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            messageDiv.textContent = `Sampling ${(result.sample_rate * 100).toFixed(1)}% of API requests`;
+            messageDiv.className = 'message success';
+        } else {
+            messageDiv.textContent = result.error || 'Failed to update sampling';
+            messageDiv.className = 'message error';
+        }
+    } catch (error) {
+        messageDiv.textContent = 'Connection error';
+        messageDiv.className = 'message error';
+        console.error('Sampling update error:', error);
+    }
+});
+
+async function loadProfiles() {
+    const container = document.getElementById('profilesList');
+    container.innerHTML = '<p>Loading profiles...</p>';
+
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/admin/profiles`, {
+            credentials: 'include'
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            document.getElementById('sample_rate').value = data.sample_rate;
+            displayProfiles(data.profiles);
+        } else {
+            container.innerHTML = '<p class="error">Failed to load profiles</p>';
+        }
+    } catch (error) {
+        container.innerHTML = '<p class="error">Connection error</p>';
+        console.error('Load profiles error:', error);
+    }
+}
+
+function displayProfiles(profiles) {
+    const container = document.getElementById('profilesList');
+
+    if (!profiles || profiles.length === 0) {
+        container.innerHTML = '<p>No profiles yet</p>';
+        return;
+    }
+
+    let tableHTML = '<table class="results-table">';
+    tableHTML += '<thead><tr><th>Time</th><th>Request</th><th>Status</th><th>Duration</th><th>Peak Memory</th><th>Trigger</th><th>User</th><th></th></tr></thead>';
+    tableHTML += '<tbody>';
+
+    profiles.forEach(profile => {
+        tableHTML += `
+            <tr>
+                <td>${new Date(profile.at).toLocaleString()}</td>
+                <td><code class="query-preview">${escapeHtml(profile.method)} ${escapeHtml(profile.path)}</code></td>
+                <td>${profile.status}</td>
+                <td>${profile.duration_ms.toFixed(1)} ms</td>
+                <td>${profile.peak_memory_kb.toFixed(1)} KB</td>
+                <td><span class="badge">${profile.trigger}</span></td>
+                <td>${escapeHtml(profile.user || '-')}</td>
+                <td><button onclick="showProfile('${profile.profile_id}')" class="btn-secondary">View</button></td>
+            </tr>
+        `;
+    });
+
+    tableHTML += '</tbody></table>';
+    container.innerHTML = tableHTML;
+}
+
+function functionTable(title, rows) {
+    let html = `<div class="section-header"><span>${title}</span></div>`;
+    if (!rows || rows.length === 0) {
+        return html + '<p>None</p>';
+    }
+    html += '<div class="table-container"><table class="results-table">';
+    html += '<thead><tr><th>Function</th><th>Location</th><th>Calls</th><th>Own (ms)</th><th>Cumulative (ms)</th></tr></thead><tbody>';
+    rows.forEach(row => {
+        html += `
+            <tr>
+                <td><code>${escapeHtml(row.function)}</code></td>
+                <td><small>${escapeHtml(row.location)}</small></td>
+                <td>${row.calls}</td>
+                <td>${row.own_ms.toFixed(2)}</td>
+                <td>${row.cumulative_ms.toFixed(2)}</td>
+            </tr>
+        `;
+    });
+    return html + '</tbody></table></div>';
+}
+
+async function showProfile(profileId) {
+    const container = document.getElementById('profileDetail');
+    container.innerHTML = '<p>Loading profile...</p>';
+
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/admin/profiles/${profileId}`, {
+            credentials: 'include'
+        });
+
+        const data = await response.json();
+
+        if (!data.success) {
+            container.innerHTML = `<p class="error">${escapeHtml(data.error || 'Failed to load profile')}</p>`;
+            return;
+        }
+
+        const profile = data.profile;
+        let html = `<div class="section-header"><span>${escapeHtml(profile.method)} ${escapeHtml(profile.path)}
+            &mdash; ${profile.duration_ms.toFixed(1)} ms, ${profile.function_calls} calls</span></div>`;
+        html += functionTable('Focus Functions', profile.focus);
+        html += functionTable('Top Functions by Cumulative Time', profile.by_cumulative);
+        html += functionTable('Top Functions by Own Time', profile.by_own_time);
+
+        html += `<div class="section-header"><span>Allocation Sites (peak ${profile.peak_memory_kb.toFixed(1)} KB)</span></div>`;
+        html += '<div class="table-container"><table class="results-table">';
+        html += '<thead><tr><th>Site</th><th>Size (KB)</th><th>Blocks</th></tr></thead><tbody>';
+        profile.allocations.forEach(allocation => {
+            html += `
+                <tr>
+                    <td><small>${escapeHtml(allocation.site)}</small></td>
+                    <td>${allocation.size_kb.toFixed(1)}</td>
+                    <td>${allocation.count}</td>
+                </tr>
+            `;
+        });
+        html += '</tbody></table></div>';
+
+        container.innerHTML = html;
+        container.scrollIntoView({ behavior: 'smooth' });
+    } catch (error) {
+        container.innerHTML = '<p class="error">Connection error</p>';
+        console.error('Load profile error:', error);
+    }
+}
+
 async function logout() {
     try {
         await fetch(`${API_BASE_URL}/api/logout`, {
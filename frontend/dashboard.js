@@ -10,6 +10,7 @@ window.addEventListener('DOMContentLoaded', async () => {
     await checkAuth();
     await checkDatabaseStatus();
     showRoleBasedContent();
+    loadRegionSummary();
 });
 
 async function checkAuth() {
@@ -187,6 +188,50 @@ async function checkDatabaseStatus() {
     }
 }
 
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML;
+}
+
+async function loadRegionSummary() {
+    const summaryDiv = document.getElementById('regionSummary');
+
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/region-summary`, {
+            credentials: 'include'
+        });
+        const data = await response.json();
+
+        if (!data.success) {
+            summaryDiv.innerHTML = `<p class="error">${escapeHtml(data.error || 'Region overview unavailable')}</p>`;
+            return;
+        }
+
+        const format = (value, unit = '') => value === null || value === undefined ? '-' : escapeHtml(`${value}${unit}`);
+        let html = '<table class="data-table" style="width:100%; font-size:0.8rem;"><thead><tr>' +
+            '<th>Region</th><th>Latest</th><th>Avg Temp</th><th>Species</th><th>Status</th>' +
+            '</tr></thead><tbody>';
+        data.regions.forEach(region => {
+            html += `<tr>
+                <td>${escapeHtml(region.region_name)}</td>
+                <td>${format(region.latest_temperature, '°C')}</td>
+                <td>${format(region.avg_temperature, '°C')}</td>
+                <td>${format(region.species_count)}</td>
+                <td>${format(region.conservation_status)}</td>
+            </tr>`;
+        });
+        html += '</tbody></table>';
+        if (data.stale) {
+            html += '<p class="card-desc">Some figures are being refreshed.</p>';
+        }
+        summaryDiv.innerHTML = html;
+    } catch (error) {
+        summaryDiv.innerHTML = '<p class="error">Error connecting to server</p>';
+        console.error('Region summary error:', error);
+    }
+}
+
 async function logout() {
     try {
         const response = await fetch(`${API_BASE_URL}/api/logout`, {
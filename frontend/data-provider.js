@@ -200,6 +200,72 @@ handleFormSubmit('sensor_metadataForm', '/api/insert-sensor-metadata', 'sensor_m
     status: 'active'
 }));
 
+// Bulk file upload: send the file, then poll the job until it finishes
+const uploadForm = document.getElementById('uploadForm');
+if (uploadForm) {
+    uploadForm.addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const messageDiv = document.getElementById('uploadMessage');
+        messageDiv.textContent = 'Uploading...';
+        messageDiv.className = 'message';
+        messageDiv.style.display = 'block';
+
+        const dataset = document.getElementById('upload_dataset').value;
+        const formData = new FormData();
+        formData.append('file', document.getElementById('upload_file').files[0]);
+
+        try {
+            const response = await fetch(`${API_BASE_URL}/api/upload/${dataset}`, {
+                method: 'POST',
+                credentials: 'include',
+                body: formData
+            });
+            const result = await response.json();
+            if (!result.success) {
+                messageDiv.textContent = 'Error: ' + (result.error || 'Upload failed');
+                messageDiv.className = 'message error';
+                return;
+            }
+            pollUploadJob(result.job.job_id, messageDiv);
+        } catch (error) {
+            messageDiv.textContent = 'Connection error';
+            messageDiv.className = 'message error';
+            console.error('Upload error:', error);
+        }
+    });
+}
+
+async function pollUploadJob(jobId, messageDiv) {
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/upload-jobs/${jobId}`, {
+            credentials: 'include'
+        });
+        const result = await response.json();
+        if (!result.success) {
+            messageDiv.textContent = 'Error: ' + (result.error || 'Job not found');
+            messageDiv.className = 'message error';
+            return;
+        }
+
+        const job = result.job;
+        const summary = `${job.rows_loaded} rows loaded, ${job.rows_rejected} rejected`;
+        if (job.state === 'completed') {
+            const firstError = job.errors.length ? ` (row ${job.errors[0].row}: ${job.errors[0].error})` : '';
+            messageDiv.textContent = `Success: ${summary}${firstError}`;
+            messageDiv.className = job.rows_rejected ? 'message error' : 'message success';
+        } else if (job.state === 'failed') {
+            messageDiv.textContent = `Error: ${job.error} (${summary})`;
+            messageDiv.className = 'message error';
+        } else {
+            messageDiv.textContent = `Processing ${Math.round(job.progress * 100)}%: ${summary}`;
+            setTimeout(() => pollUploadJob(jobId, messageDiv), 1000);
+        }
+    } catch (error) {
+        messageDiv.textContent = 'Connection error';
+        messageDiv.className = 'message error';
+    }
+}
+
 async function logout() {
     try {
         await fetch(`${API_BASE_URL}/api/logout`, {
@@ -105,7 +105,7 @@ async function executeQuery() {
         const data = await response.json();
 
         if (data.success) {
-            messageDiv.textContent = `Query executed successfully! (${data.data.length} rows)`;
+            messageDiv.textContent = `Query executed successfully! (${data.data.length} rows via ${data.path || 'drill'})`;
             messageDiv.className = 'message success';
             displayResults(data.data, data.columns);
         } else {